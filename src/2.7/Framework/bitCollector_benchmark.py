@@ -0,0 +1,760 @@
+## File Name: bitCollector_benchmark.py
+##
+## Author(s): Daniel "Albinohat" Mercado
+##
+## Purpose: This script measures the throughput of the framework's subsystems.
+##          hash     - Hashes a set of generated files with each algorithm, then with every algorithm at once,
+##                     for each worker count and reports the throughput in MB/s.
+##          startup  - Times parseConfig (compiling the plan and from the cache), Platform (gathering the facts and from the cache) and importBCModules
+##                     against a generated config and module set.
+##          schedule - Runs a generated set of empty modules through the ModuleScheduler and reports the overhead per module.
+##          logging  - Reports the records per second of each log file format, written directly and through the AsyncLogHandler.
+##          walk     - Walks generated file trees of each size with the walker, cold and from the file index,
+##                     then walks and hashes them in one pass.
+##          all      - Runs every benchmark above.
+##          Every measurement can be saved to a JSON file with --output and compared to a previous one with --compare.
+
+## Standard imports (Static)
+import json, logging, logging.handlers, multiprocessing, os, platform, re, shutil, sys, tempfile, time
+
+## Third-party imports (Static)
+
+## Framework imports (Static)
+import bitCollector_config, bitCollector_framework, bitCollector_hashing, bitCollector_logging, bitCollector_platform, bitCollector_walker
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+_benchmark_version = "bitCollector_benchmark v0.2.0"
+
+## The benchmarks which can be run, in the order all runs them.
+_benchmarks = ("hash", "startup", "schedule", "logging", "walk", "all")
+
+## The number of bytes written to the generated files at a time.
+_benchmark_write_size = 1048576
+
+## The log file formats and the ways of writing them measured by the logging benchmark.
+_logging_formats  = ("csv", "html", "jsonl", "bin")
+_logging_handlers = ("direct", "async")
+
+## The number of files per directory and the size of each file in the generated file trees.
+_tree_directory_files = 100
+_tree_file_size       = 4096
+
+## The source of each generated module. The imports give the import something to do.
+_module_source = """import json, logging, os, re, time
+
+def main(thread_id, path_to_main, framework_settings, platform_details, module_dict):
+	return 0
+"""
+
+## Classless Method Declarations
+
+## Method Name: main
+##
+## Purpose: Run the benchmark chosen on the command line.
+def main():
+	benchmark, options = parseCLA()
+
+	## The framework classes log through the root logger, which has no handler here.
+	logging.getLogger("").addHandler(logging.NullHandler())
+
+	if (benchmark == "all"):
+		benchmarks = _benchmarks[:-1]
+
+	else:
+		benchmarks = (benchmark,)
+
+	benchmark_functions = {
+		"hash"     : hashBenchmark,
+		"startup"  : startupBenchmark,
+		"schedule" : scheduleBenchmark,
+		"logging"  : loggingBenchmark,
+		"walk"     : walkBenchmark
+	}
+
+	results = []
+
+	for name in benchmarks:
+		print ""
+		results.extend(benchmark_functions[name](options))
+
+	if (options["output"] is not None):
+		saveResults(options["output"], benchmarks, options, results)
+
+	if (options["compare"] is not None):
+		compareResults(options["compare"], results)
+
+## Method Name: hashBenchmark
+##
+## Purpose: Report the hashing throughput per algorithm and per worker count.
+##          The files are hashed once before the measurements so that every run reads them from the page cache.
+##
+## Parameters
+## 1. options - The dictionary of options returned by parseCLA.
+##
+## Returns
+## The list of result dictionaries. (See createResult)
+def hashBenchmark(options):
+	algorithms    = options["algorithms"].split(",")
+	worker_counts = [int(workers) for workers in options["workers"].split(",")]
+
+	## Measure each algorithm alone, then every algorithm in the same pass.
+	algorithm_sets = [[algorithm] for algorithm in algorithms]
+
+	if (len(algorithms) > 1):
+		algorithm_sets.append(algorithms)
+
+	try:
+		bitCollector_hashing.checkAlgorithms(algorithms)
+
+	except ValueError as error:
+		print "    Invalid Usage: " + str(error)
+		sys.exit()
+
+	if (options["directory"] is not None):
+		file_directory = options["directory"]
+		paths          = [os.path.join(file_directory, name) for name in sorted(os.listdir(file_directory)) if (os.path.isfile(os.path.join(file_directory, name)))]
+
+	else:
+		file_directory = tempfile.mkdtemp(prefix="bitCollector_benchmark_")
+		paths          = generateFiles(file_directory, options["files"], options["size"])
+
+	results = []
+
+	try:
+		total_bytes = sum([os.path.getsize(path) for path in paths])
+		hash_engine = bitCollector_hashing.HashEngine(max(worker_counts))
+
+		print "Hashing " + str(len(paths)) + " files (" + ("%.1f" % (total_bytes / 1048576.0)) + " MB) from " + file_directory
+		print ""
+		print "%-24s %8s %10s %10s" % ("Algorithms", "Workers", "Seconds", "MB/s")
+
+		## Warm the page cache.
+		for hash_result in hash_engine.hashFiles(paths, ["md5"]):
+			pass
+
+		for algorithm_set in algorithm_sets:
+			for workers in worker_counts:
+				elapsed = timeHashFiles(hash_engine, paths, algorithm_set, workers, options["repeat"])
+
+				print "%-24s %8d %10.3f %10.1f" % ("+".join(algorithm_set), workers, elapsed, total_bytes / 1048576.0 / max(elapsed, 0.000001))
+
+				results.append(createResult("hash", "+".join(algorithm_set) + " workers=" + str(workers), elapsed, total_bytes / 1048576.0, "MB"))
+
+	finally:
+		if (options["directory"] is None):
+			shutil.rmtree(file_directory, True)
+
+	return results
+
+## Method Name: startupBenchmark
+##
+## Purpose: Time the start-up steps of the framework against a generated config and module set.
+##          The generated modules are removed from sys.modules before each run, so every run imports them again.
+##
+## Parameters
+## 1. options - The dictionary of options returned by parseCLA.
+##
+## Returns
+## The list of result dictionaries. (See createResult)
+def startupBenchmark(options):
+	work_directory = tempfile.mkdtemp(prefix="bitCollector_benchmark_")
+	results        = []
+
+	try:
+		config_path, module_names = generateModuleSet(work_directory, options["modules"], "Startup")
+		framework_settings        = bitCollector_framework.FrameworkSettings(bitCollector_framework.parseConfig(config_path))
+
+		print "Starting the framework with " + str(len(module_names)) + " generated modules"
+		print ""
+		printHeader()
+
+		## Removing the cached plan before each run makes parseConfig compile it again.
+		plan_path = bitCollector_config.planCachePath(config_path)
+
+		elapsed = timeRuns(lambda: (os.remove(plan_path), bitCollector_framework.parseConfig(config_path)), options["repeat"])
+		results.append(printResult(createResult("startup", "parseConfig", elapsed, len(module_names), "modules")))
+
+		elapsed = timeRuns(lambda: bitCollector_framework.parseConfig(config_path), options["repeat"])
+		results.append(printResult(createResult("startup", "parseConfig cached", elapsed, len(module_names), "modules")))
+
+		elapsed = timeRuns(lambda: bitCollector_framework.Platform(platform.uname()), options["repeat"])
+		results.append(printResult(createResult("startup", "Platform", elapsed, 1, "platforms")))
+
+		## The first run writes the cache and isn't measured.
+		facts_path = os.path.join(work_directory, "platform.json")
+		bitCollector_platform.loadFacts(facts_path, 3600)
+
+		elapsed = timeRuns(lambda: bitCollector_framework.Platform(platform.uname(), bitCollector_platform.loadFacts(facts_path, 3600)[0]), options["repeat"])
+		results.append(printResult(createResult("startup", "Platform cached", elapsed, 1, "platforms")))
+
+		elapsed = timeRuns(lambda: importModuleSet(framework_settings, module_names), options["repeat"])
+		results.append(printResult(createResult("startup", "importBCModules", elapsed, len(module_names), "modules")))
+
+		framework_settings.log_file_handler.close()
+
+	finally:
+		shutil.rmtree(work_directory, True)
+
+	return results
+
+## Method Name: scheduleBenchmark
+##
+## Purpose: Run a generated set of empty modules through the ModuleScheduler for each executor and worker count.
+##          The thread-backed modules are imported before the runs, so only the scheduling is measured.
+##
+## Parameters
+## 1. options - The dictionary of options returned by parseCLA.
+##
+## Returns
+## The list of result dictionaries. (See createResult)
+def scheduleBenchmark(options):
+	work_directory   = tempfile.mkdtemp(prefix="bitCollector_benchmark_")
+	worker_counts    = [int(workers) for workers in options["workers"].split(",")]
+	platform_details = bitCollector_framework.Platform(platform.uname())
+	results          = []
+
+	try:
+		print "Scheduling " + str(options["modules"]) + " empty modules"
+		print ""
+		printHeader()
+
+		for executor in bitCollector_framework._module_executors:
+			config_path, module_names = generateModuleSet(work_directory, options["modules"], "Schedule" + executor.capitalize(), executor)
+			settings_tuple            = bitCollector_framework.parseConfig(config_path)
+
+			for workers in worker_counts:
+				settings_tuple[7]["max_concurrency"]   = workers
+				settings_tuple[7]["process_pool_size"] = workers
+
+				elapsed = timeRuns(lambda: runModuleSet(settings_tuple, platform_details), options["repeat"])
+				results.append(printResult(createResult("schedule", executor + " max_concurrency=" + str(workers), elapsed, len(module_names), "modules")))
+
+	finally:
+		shutil.rmtree(work_directory, True)
+
+	return results
+
+## Method Name: loggingBenchmark
+##
+## Purpose: Report the records per second written to a log file by each format, directly and through the AsyncLogHandler.
+##
+## Parameters
+## 1. options - The dictionary of options returned by parseCLA.
+##
+## Returns
+## The list of result dictionaries. (See createResult)
+def loggingBenchmark(options):
+	work_directory = tempfile.mkdtemp(prefix="bitCollector_benchmark_")
+	results        = []
+
+	try:
+		print "Logging " + str(options["records"]) + " records per run"
+		print ""
+		printHeader()
+
+		for logging_format in _logging_formats:
+			for handler_type in _logging_handlers:
+				log_path = os.path.join(work_directory, "benchmark." + logging_format)
+
+				elapsed = timeRuns(lambda: writeLogRecords(log_path, logging_format, handler_type, options["records"]), options["repeat"])
+				results.append(printResult(createResult("logging", logging_format + " " + handler_type, elapsed, options["records"], "records")))
+
+	finally:
+		shutil.rmtree(work_directory, True)
+
+	return results
+
+## Method Name: walkBenchmark
+##
+## Purpose: Walk generated file trees of each size, cold with each thread count and from the file index,
+##          then walk and hash them in one pass with each worker count.
+##
+## Parameters
+## 1. options - The dictionary of options returned by parseCLA.
+##
+## Returns
+## The list of result dictionaries. (See createResult)
+def walkBenchmark(options):
+	worker_counts = [int(workers) for workers in options["workers"].split(",")]
+	algorithms    = options["algorithms"].split(",")
+	results       = []
+
+	try:
+		bitCollector_hashing.checkAlgorithms(algorithms)
+
+	except ValueError as error:
+		print "    Invalid Usage: " + str(error)
+		sys.exit()
+
+	for tree_size in [int(tree_size) for tree_size in options["tree_sizes"].split(",")]:
+		tree_directory = tempfile.mkdtemp(prefix="bitCollector_benchmark_")
+
+		try:
+			generateTree(tree_directory, tree_size)
+
+			print "Walking a tree of " + str(tree_size) + " files in " + tree_directory
+			print ""
+			printHeader()
+
+			for workers in worker_counts:
+				walker  = bitCollector_walker.FileWalker(workers, [], 1, 0)
+				elapsed = timeRuns(lambda: countEntries(walker.walk(tree_directory)), options["repeat"])
+				results.append(printResult(createResult("walk", "files=" + str(tree_size) + " cold threads=" + str(workers), elapsed, tree_size, "files")))
+
+			## The first walk fills the index and isn't measured.
+			walker = bitCollector_walker.FileWalker(max(worker_counts), [], 1, 1)
+			countEntries(walker.walk(tree_directory))
+
+			elapsed = timeRuns(lambda: countEntries(walker.walk(tree_directory)), options["repeat"])
+			results.append(printResult(createResult("walk", "files=" + str(tree_size) + " indexed", elapsed, tree_size, "files")))
+
+			for workers in worker_counts:
+				hash_engine = bitCollector_hashing.HashEngine(workers, algorithms)
+				walker      = bitCollector_walker.FileWalker(max(worker_counts), [], 1, 0)
+				elapsed     = timeRuns(lambda: countEntries(hash_engine.hashFiles(walker.walk(tree_directory))), options["repeat"])
+				results.append(printResult(createResult("walk", "files=" + str(tree_size) + " walk+" + "+".join(algorithms) + " workers=" + str(workers), elapsed, tree_size, "files")))
+
+			print ""
+
+		finally:
+			shutil.rmtree(tree_directory, True)
+
+	return results
+
+## Method Name: timeHashFiles
+##
+## Purpose: Return the best time taken to hash a list of files over several runs.
+##
+## Parameters
+## 1. hash_engine - The HashEngine to use.
+## 2. paths       - The list of paths to hash.
+## 3. algorithms  - The list of hashlib algorithm names.
+## 4. workers     - The number of files hashed concurrently.
+## 5. repeat      - The number of runs.
+def timeHashFiles(hash_engine, paths, algorithms, workers, repeat):
+	best = None
+
+	for run in range(max(1, repeat)):
+		run_start = time.time()
+
+		for hash_result in hash_engine.hashFiles(paths, algorithms, workers):
+			if (hash_result.error is not None):
+				print "    Unable to hash " + hash_result.path + ": " + hash_result.error
+
+		elapsed = time.time() - run_start
+
+		if (best is None or elapsed < best):
+			best = elapsed
+
+	return best
+
+## Method Name: timeRuns
+##
+## Purpose: Return the best time taken by several calls of a function.
+##
+## Parameters
+## 1. function - The function to call without arguments.
+## 2. repeat   - The number of calls.
+def timeRuns(function, repeat):
+	best = None
+
+	for run in range(max(1, repeat)):
+		run_start = time.time()
+		function()
+		elapsed = time.time() - run_start
+
+		if (best is None or elapsed < best):
+			best = elapsed
+
+	return best
+
+## Method Name: countEntries
+##
+## Purpose: Consume an iterable, such as a walk, and return the number of items it yielded.
+##
+## Parameters
+## 1. iterable - The iterable to consume.
+def countEntries(iterable):
+	count = 0
+
+	for item in iterable:
+		count += 1
+
+	return count
+
+## Method Name: generateModuleSet
+##
+## Purpose: Write a set of empty BitCollector modules and a config which runs them.
+##
+## Parameters
+## 1. directory - The directory to write the modules, the config and the logs to.
+## 2. modules   - The number of modules.
+## 3. prefix    - The prefix of the module names, which keeps the sets of different benchmarks apart in sys.modules.
+## 4. executor  - The executor of the modules. (thread or process)
+##
+## Returns
+## A tuple of the path to the config and the list of module names.
+def generateModuleSet(directory, modules, prefix, executor="thread"):
+	module_directory = os.path.join(directory, "modules")
+	log_directory    = os.path.join(directory, "logs")
+
+	for each in (module_directory, log_directory):
+		if (not os.path.isdir(each)):
+			os.makedirs(each)
+
+	module_names = []
+
+	for module_number in range(modules):
+		module_names.append("Benchmark" + prefix + str(module_number))
+
+		with open(os.path.join(module_directory, module_names[-1] + ".py"), "w") as module_file:
+			module_file.write(_module_source)
+
+	## The outputs which aren't being measured are turned off.
+	config = {
+		"module_list"      : [{"name": name, "parameters": [], "executor": executor} for name in module_names],
+		"additional_paths" : [{"path": module_directory}],
+		"log_file"         : os.path.join(log_directory, "benchmark"),
+		"logging_format"   : "csv",
+		"logging_level"    : "critical",
+		"log_to_file"      : 0,
+		"log_to_stdout"    : 0,
+		"file_cache"       : 0,
+		"container"        : 0,
+		"results_sinks"    : []
+	}
+
+	config_path = os.path.join(directory, prefix + "_config.json")
+
+	with open(config_path, "w") as config_file:
+		json.dump(config, config_file, indent=4)
+
+	return config_path, module_names
+
+## Method Name: importModuleSet
+##
+## Purpose: Import a generated module set the way the framework does, forgetting any previous import first.
+##
+## Parameters
+## 1. framework_settings - The FrameworkSettings instance of the generated config.
+## 2. module_names       - The list of module names.
+def importModuleSet(framework_settings, module_names):
+	for name in module_names:
+		sys.modules.pop(name, None)
+
+	search_path   = list(sys.path)
+	module_loader = bitCollector_framework.ModuleLoader()
+
+	try:
+		bitCollector_framework.importBCModules(logging.getLogger(""), framework_settings, module_loader)
+
+		for name in module_names:
+			module_loader.loadEntryPoint(name)
+
+	finally:
+		## importBCModules appends the module paths every time it is called.
+		sys.path[:] = search_path
+
+## Method Name: runModuleSet
+##
+## Purpose: Run a generated module set through the ModuleScheduler.
+##
+## Parameters
+## 1. settings_tuple   - The tuple returned by parseConfig for the generated config.
+## 2. platform_details - The Platform instance handed to the modules.
+def runModuleSet(settings_tuple, platform_details):
+	framework_settings = bitCollector_framework.FrameworkSettings(settings_tuple)
+	module_loader      = bitCollector_framework.ModuleLoader()
+	search_path        = list(sys.path)
+
+	try:
+		bitCollector_framework.importBCModules(logging.getLogger(""), framework_settings, module_loader)
+
+		for module_dict in framework_settings.module_list:
+			if (module_dict["executor"] == "thread"):
+				module_loader.loadEntryPoint(module_dict["name"])
+
+		scheduler = bitCollector_framework.ModuleScheduler(framework_settings, platform_details, bitCollector_framework.ThreadManager(), module_loader)
+		scheduler.run()
+
+	finally:
+		sys.path[:] = search_path
+		framework_settings.log_file_handler.close()
+
+## Method Name: writeLogRecords
+##
+## Purpose: Write log records to a new log file in one of the framework's formats.
+##
+## Parameters
+## 1. log_path       - The path to the log file.
+## 2. logging_format - The format of the log file. (csv, html, jsonl or bin)
+## 3. handler_type   - How the records are written. (direct, or async through the AsyncLogHandler)
+## 4. records        - The number of records.
+def writeLogRecords(log_path, logging_format, handler_type, records):
+	if (os.path.isfile(log_path)):
+		os.remove(log_path)
+
+	## The same handlers the framework writes its log file with.
+	if (logging_format == "bin"):
+		file_handler = bitCollector_logging.BinaryRotatingFileHandler(log_path, maxBytes=1073741824, backupCount=99)
+
+	else:
+		file_handler = logging.handlers.RotatingFileHandler(log_path, mode='a', maxBytes=1073741824, backupCount=99, encoding=None, delay=0)
+
+	file_handler.setFormatter(bitCollector_framework.createFileFormatter(logging_format))
+
+	handler = file_handler
+
+	if (handler_type == "async"):
+		handler = bitCollector_logging.AsyncLogHandler([file_handler], bitCollector_framework._optional_framework_defaults["log_queue_size"], "block")
+
+	## A logger of its own, so that the records don't reach the root logger's handlers.
+	logger = logging.getLogger("bitCollector_benchmark.logging")
+	logger.propagate = 0
+	logger.setLevel(logging.DEBUG)
+	logger.addHandler(handler)
+
+	try:
+		for record_number in range(records):
+			logger.info("Benchmark record %d of %d", record_number, records)
+
+	finally:
+		logger.removeHandler(handler)
+		handler.close()
+		file_handler.close()
+
+## Method Name: generateTree
+##
+## Purpose: Write a tree of small files, _tree_directory_files per directory and a hundred directories per level.
+##
+## Parameters
+## 1. directory - The root of the tree.
+## 2. files     - The number of files.
+def generateTree(directory, files):
+	data = os.urandom(_tree_file_size)
+
+	for file_number in range(files):
+		directory_number = file_number / _tree_directory_files
+		file_directory   = os.path.join(directory, "d" + str(directory_number / 100), "d" + str(directory_number % 100))
+
+		if (file_number % _tree_directory_files == 0):
+			os.makedirs(file_directory)
+
+		with open(os.path.join(file_directory, "f" + str(file_number) + ".bin"), "wb") as file:
+			file.write(data)
+
+## Method Name: createResult
+##
+## Purpose: Return the dictionary saved for one measurement.
+##
+## Parameters
+## 1. benchmark - The name of the benchmark.
+## 2. name      - The name of the measurement, unique within the benchmark.
+## 3. seconds   - The best time of the measurement.
+## 4. count     - The number of units processed in that time.
+## 5. unit      - The unit of the count. (MB, files, modules, records, etc)
+def createResult(benchmark, name, seconds, count, unit):
+	return {
+		"benchmark" : benchmark,
+		"name"      : name,
+		"seconds"   : seconds,
+		"count"     : count,
+		"unit"      : unit,
+		"rate"      : count / max(seconds, 0.000001)
+	}
+
+## Method Name: printHeader
+##
+## Purpose: Print the header of the table printed by printResult.
+def printHeader():
+	print "%-48s %10s %22s" % ("Measurement", "Seconds", "Rate")
+
+## Method Name: printResult
+##
+## Purpose: Print a measurement as a line of the table and return it.
+##
+## Parameters
+## 1. result - The result dictionary. (See createResult)
+def printResult(result):
+	print "%-48s %10.3f %22s" % (result["name"], result["seconds"], ("%.1f" % result["rate"]) + " " + result["unit"] + "/s")
+
+	return result
+
+## Method Name: saveResults
+##
+## Purpose: Save the results of a run as JSON along with what is needed to compare them with another version.
+##
+## Parameters
+## 1. path       - The path to the JSON file.
+## 2. benchmarks - The names of the benchmarks which were run.
+## 3. options    - The dictionary of options returned by parseCLA.
+## 4. results    - The list of result dictionaries.
+def saveResults(path, benchmarks, options, results):
+	report = {
+		"benchmark_version" : _benchmark_version,
+		"framework_version" : bitCollector_framework._framework_version,
+		"python"            : platform.python_version(),
+		"platform"          : platform.platform(),
+		"cpus"              : multiprocessing.cpu_count(),
+		"time"              : time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime()),
+		"benchmarks"        : list(benchmarks),
+		"options"           : options,
+		"results"           : results
+	}
+
+	with open(path, "w") as report_file:
+		json.dump(report, report_file, indent=4, sort_keys=True)
+
+	print ""
+	print "Saved " + str(len(results)) + " results to " + path
+
+## Method Name: compareResults
+##
+## Purpose: Print the change in rate of each measurement against a file saved by a previous run.
+##
+## Parameters
+## 1. path    - The path to the JSON file of the previous run.
+## 2. results - The list of result dictionaries of this run.
+def compareResults(path, results):
+	try:
+		with open(path, "r") as report_file:
+			previous_report = json.load(report_file)
+
+	except (IOError, ValueError) as error:
+		print "    Unable to read " + path + ": " + str(error)
+		return
+
+	previous_rates = dict([((result["benchmark"], result["name"]), result["rate"]) for result in previous_report.get("results", [])])
+
+	print ""
+	print "Compared to " + path + " (" + previous_report.get("framework_version", "unknown version") + ", " + previous_report.get("time", "unknown time") + ")"
+	print ""
+	print "%-58s %14s %14s %9s" % ("Measurement", "Previous", "Current", "Change")
+
+	for result in results:
+		key = (result["benchmark"], result["name"])
+
+		if (key not in previous_rates):
+			continue
+
+		change = (result["rate"] - previous_rates[key]) / max(previous_rates[key], 0.000001) * 100
+
+		print "%-58s %14.1f %14.1f %+8.1f%%" % (result["benchmark"] + " " + result["name"], previous_rates[key], result["rate"], change)
+
+## Method Name: generateFiles
+##
+## Purpose: Write files of random data to hash.
+##
+## Parameters
+## 1. directory - The directory to write the files to.
+## 2. files     - The number of files.
+## 3. size      - The size of each file in MB.
+##
+## Returns
+## The list of paths to the files.
+def generateFiles(directory, files, size):
+	paths = []
+
+	for file_number in range(files):
+		path      = os.path.join(directory, "file_" + str(file_number) + ".bin")
+		remaining = int(size * 1048576)
+
+		with open(path, "wb") as file:
+			while (remaining > 0):
+				chunk = os.urandom(min(remaining, _benchmark_write_size))
+				file.write(chunk)
+				remaining -= len(chunk)
+
+		paths.append(path)
+
+	return paths
+
+## Method Name: parseCLA
+##
+## Purpose: Parse through and validate the CLA needed to run a benchmark.
+##
+## Returns
+## The name of the benchmark and the dictionary of options.
+def parseCLA():
+	options   = {"algorithms": ",".join(bitCollector_hashing._default_hash_algorithms), "workers": "1,2,4,8", "files": 16, "size": 16.0, "repeat": 3, "directory": None,
+	             "modules": 50, "records": 20000, "tree_sizes": "1000,10000", "output": None, "compare": None}
+	benchmark = None
+
+	## Validate # of CLA.
+	if (len(sys.argv) < 2):
+		print "    Invalid Usage: Use " + sys.argv[0] + " -h to display the help."
+		sys.exit()
+
+	arg_index = 1
+
+	while (arg_index < len(sys.argv)):
+		arg  = sys.argv[arg_index]
+		temp = arg.lower()
+
+		if (temp == "-h" or temp == "--help"):
+			print "\n    Usage: " + sys.argv[0] + " [options] <benchmark>"
+			print "\n    Options"
+			print "        -h | --help                - Prints out this help."
+			print "        -v | --version             - Prints out the version you are using."
+			print "        --repeat <count>           - The number of runs of each measurement. The best run is reported. (Default: 3)"
+			print "        --workers <list>           - The comma-separated worker counts. Hash workers, walker threads and max_concurrency. (Default: 1,2,4,8)"
+			print "        --output <path>            - Save the results to this JSON file."
+			print "        --compare <path>           - Compare the results to a JSON file saved by a previous run."
+			print "\n    hash Options"
+			print "        --algorithms <list>        - The comma-separated hashlib algorithms. Also used by walk. (Default: md5,sha1,sha256)"
+			print "        --files <count>            - The number of files to generate. (Default: 16)"
+			print "        --size <MB>                - The size of each generated file. (Default: 16)"
+			print "        --directory <path>         - Hash the files in this directory instead of generated ones."
+			print "\n    startup and schedule Options"
+			print "        --modules <count>          - The number of modules to generate. (Default: 50)"
+			print "\n    logging Options"
+			print "        --records <count>          - The number of records written per run. (Default: 20000)"
+			print "\n    walk Options"
+			print "        --tree-sizes <list>        - The comma-separated numbers of files in the generated trees. (Default: 1000,10000)"
+			print "\nbenchmark - The benchmark to run. (" + ", ".join(_benchmarks) + ")"
+			sys.exit()
+
+		elif (temp == "-v" or temp == "--version"):
+			print "\n    " + _benchmark_version
+			sys.exit()
+
+		elif (temp in ("--algorithms", "--workers", "--files", "--size", "--repeat", "--directory", "--modules", "--records", "--tree-sizes", "--output", "--compare")):
+			if (arg_index + 1 >= len(sys.argv)):
+				print "    Invalid Usage: " + arg + " requires a value. Use " + sys.argv[0] + " -h to display the help."
+				sys.exit()
+
+			arg_index += 1
+			options[temp[2:].replace("-", "_")] = sys.argv[arg_index]
+
+		elif (re.match("--?\w+", temp)):
+			print "    Invalid Usage:     Use " + sys.argv[0] + " -h to display the help."
+			sys.exit()
+
+		else:
+			benchmark = temp
+
+		arg_index += 1
+
+	if (benchmark not in _benchmarks):
+		print "    Invalid Usage: Unknown benchmark: " + str(benchmark) + ". Use one of: " + ", ".join(_benchmarks)
+		sys.exit()
+
+	try:
+		options["files"]   = int(options["files"])
+		options["size"]    = float(options["size"])
+		options["repeat"]  = int(options["repeat"])
+		options["modules"] = int(options["modules"])
+		options["records"] = int(options["records"])
+
+		[int(workers) for workers in options["workers"].split(",")]
+		[int(tree_size) for tree_size in options["tree_sizes"].split(",")]
+
+	except ValueError:
+		print "    Invalid Usage: --files, --size, --repeat, --modules, --records, --workers and --tree-sizes take numbers. Use " + sys.argv[0] + " -h to display the help."
+		sys.exit()
+
+	return benchmark, options
+
+## This will prevent main() from running unless explicitly called.
+if (__name__ == "__main__"):
+	main()
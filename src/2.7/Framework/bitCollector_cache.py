@@ -0,0 +1,333 @@
+## File Name: bitCollector_cache.py
+##
+## Author(s): Daniel "Albinohat" Mercado
+##
+## Purpose: This script holds the persistent file cache the framework hands to the BitCollector modules
+##          through framework_settings.file_cache. It remembers the path, inode, size and modification time of the
+##          files seen by previous runs so that unchanged files can be skipped and only the delta processed.
+##          The hashing engine stores its digests in it, and each module can keep its own records under its own scope.
+
+## Standard imports (Static)
+import json, logging, os, sqlite3, threading
+
+## Framework imports (Static)
+import bitCollector_walker
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+
+## The version of the cache schema. Caches written with another version are rebuilt.
+_cache_schema_version = 1
+
+## The number of pending updates written to the cache in one transaction.
+_cache_batch_size = 1000
+
+## The scope of the digests stored by the hashing engine.
+_hash_scope = "hash"
+
+## Class Declarations
+
+## Class Name: FileCache
+##
+## Purpose: Store one record per scope and path in an SQLite database, valid as long as the file's inode, size and
+##          modification time don't change. Updates are buffered and written in batches.
+##          Process-backed modules open their own connection. Their hit and miss counts are sent back with their log records.
+class FileCache():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the cache. The database is opened on first use.
+	##
+	## Parameters
+	## 1. path       - The path to the SQLite database.
+	## 2. batch_size - The number of pending updates written in one transaction.
+	def __init__(self, path, batch_size=_cache_batch_size):
+		## Initialize the Logger for this class.
+		self.logger = logging.getLogger(self.__class__.__name__)
+		self.logger.debug("Entering BitCollector.FileCache.__init__()")
+
+		self.path       = path
+		self.batch_size = max(1, batch_size)
+
+		self.lock       = threading.Lock()
+		self.connection = None
+		self.closed     = 0
+
+		## The updates not written yet, keyed by (scope, path).
+		self.pending = {}
+
+		## The [hits, misses] of each scope.
+		self.counts = {}
+
+	## Method Name: __getstate__
+	##
+	## Purpose: Drop the connection, the lock and the logger so that the cache can be passed to process-backed modules.
+	def __getstate__(self):
+		return {"path": self.path, "batch_size": self.batch_size}
+
+	## Method Name: __setstate__
+	##
+	## Purpose: Initialize a cache using the same database. (See __getstate__)
+	##
+	## Parameters
+	## 1. state - The dictionary returned by __getstate__.
+	def __setstate__(self, state):
+		self.__init__(state["path"], state["batch_size"])
+
+	## Method Name: connect
+	##
+	## Purpose: Return the connection to the database, opening it and creating the schema on first use. The caller must hold the lock.
+	##
+	## Returns
+	## The sqlite3 connection, or None if the cache is closed or couldn't be opened.
+	def connect(self):
+		if (self.connection is not None or self.closed == 1):
+			return self.connection
+
+		try:
+			cache_directory = os.path.dirname(os.path.abspath(self.path))
+
+			if (not os.path.isdir(cache_directory)):
+				os.makedirs(cache_directory)
+
+			connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+
+			## WAL lets process-backed modules read while another process writes.
+			connection.execute("PRAGMA journal_mode=WAL")
+			connection.execute("PRAGMA synchronous=NORMAL")
+
+			if (connection.execute("PRAGMA user_version").fetchone()[0] != _cache_schema_version):
+				connection.execute("DROP TABLE IF EXISTS files")
+				connection.execute("PRAGMA user_version=" + str(_cache_schema_version))
+
+			connection.execute("CREATE TABLE IF NOT EXISTS files (scope TEXT NOT NULL, path TEXT NOT NULL, inode INTEGER, size INTEGER, mtime REAL, data TEXT, PRIMARY KEY (scope, path))")
+			connection.commit()
+
+		except (OSError, sqlite3.Error) as error:
+			self.logger.warning("Unable to open the file cache " + self.path + ": " + str(error))
+			self.closed = 1
+			return None
+
+		self.connection = connection
+
+		return self.connection
+
+	## Method Name: lookup
+	##
+	## Purpose: Return the data stored for a file if it hasn't changed since it was stored, counting a hit or a miss.
+	##
+	## Parameters
+	## 1. entry - The FileEntry of the file, from the walker or from toEntry.
+	## 2. scope - The name the record was stored under. (The module name, or "hash" for the hashing engine)
+	##
+	## Returns
+	## The stored data, or None if the file is new or has changed.
+	def lookup(self, entry, scope):
+		with self.lock:
+			row    = self.readRow(entry, scope)
+			counts = self.counts.setdefault(scope, [0, 0])
+
+			if (row is None or row[2] != entry.inode or row[3] != entry.size or row[4] != entry.mtime):
+				counts[1] += 1
+				return None
+
+			counts[0] += 1
+
+		return json.loads(row[5])
+
+	## Method Name: storedData
+	##
+	## Purpose: Return the data stored for a file whether or not it has changed since, without counting a hit or a miss.
+	##          Lets a module carry on from where it left off in a file which has grown.
+	##
+	## Parameters
+	## 1. entry - The FileEntry of the file, or its path.
+	## 2. scope - The name the record was stored under. (See lookup)
+	##
+	## Returns
+	## The stored data, or None if the file has no record.
+	def storedData(self, entry, scope):
+		with self.lock:
+			row = self.readRow(entry, scope)
+
+		if (row is None):
+			return None
+
+		return json.loads(row[5])
+
+	## Method Name: readRow
+	##
+	## Purpose: Return the pending or stored row of a file, or None. The caller must hold the lock.
+	##
+	## Parameters
+	## 1. entry - The FileEntry of the file, or its path.
+	## 2. scope - The name the record was stored under. (See lookup)
+	def readRow(self, entry, scope):
+		path = toUnicode(getattr(entry, "path", entry))
+		row  = self.pending.get((scope, path))
+
+		if (row is None and self.connect() is not None):
+			try:
+				row = self.connection.execute("SELECT scope, path, inode, size, mtime, data FROM files WHERE scope = ? AND path = ?", (scope, path)).fetchone()
+
+			except sqlite3.Error as error:
+				self.logger.warning("Unable to read the file cache " + self.path + ": " + str(error))
+
+		return row
+
+	## Method Name: update
+	##
+	## Purpose: Store the current state of a file, along with some data, replacing the previous record.
+	##
+	## Parameters
+	## 1. entry - The FileEntry of the file.
+	## 2. scope - The name to store the record under. (See lookup)
+	## 3. data  - A JSON serializable value to store with the record. (None stores an empty dictionary)
+	def update(self, entry, scope, data=None):
+		if (data is None):
+			data = {}
+
+		path = toUnicode(entry.path)
+
+		with self.lock:
+			self.pending[(scope, path)] = (scope, path, entry.inode, entry.size, entry.mtime, json.dumps(data))
+
+			if (len(self.pending) >= self.batch_size):
+				self.writePending()
+
+	## Method Name: clearScope
+	##
+	## Purpose: Forget every record stored under a scope, so that every file is new to it again.
+	##
+	## Parameters
+	## 1. scope - The name the records were stored under. (See lookup)
+	def clearScope(self, scope):
+		with self.lock:
+			for key in [key for key in self.pending if (key[0] == scope)]:
+				del self.pending[key]
+
+			if (self.connect() is None):
+				return
+
+			try:
+				self.connection.execute("DELETE FROM files WHERE scope = ?", (scope,))
+				self.connection.commit()
+
+			except sqlite3.Error as error:
+				self.logger.warning("Unable to clear " + scope + " from the file cache " + self.path + ": " + str(error))
+				self.connection.rollback()
+
+	## Method Name: changedEntries
+	##
+	## Purpose: Yield the entries which are new or have changed since they were last stored under a scope.
+	##          The caller stores each entry with update once it has been processed.
+	##
+	## Parameters
+	## 1. entries - An iterable of FileEntry instances or paths, such as a walk from framework_settings.walker.
+	## 2. scope   - The name the records are stored under. (See lookup)
+	##
+	## Returns
+	## A generator of FileEntry instances.
+	def changedEntries(self, entries, scope):
+		for entry in entries:
+			try:
+				entry = toEntry(entry)
+
+			except OSError as error:
+				self.logger.debug("Unable to stat " + str(entry) + ": " + str(error))
+				continue
+
+			if (self.lookup(entry, scope) is None):
+				yield entry
+
+	## Method Name: writePending
+	##
+	## Purpose: Write the pending updates in one transaction. The caller must hold the lock.
+	def writePending(self):
+		if (len(self.pending) == 0 or self.connect() is None):
+			self.pending = {}
+			return
+
+		try:
+			self.connection.executemany("INSERT OR REPLACE INTO files (scope, path, inode, size, mtime, data) VALUES (?, ?, ?, ?, ?, ?)", self.pending.values())
+			self.connection.commit()
+
+		except sqlite3.Error as error:
+			self.logger.warning("Unable to write " + str(len(self.pending)) + " record(s) to the file cache " + self.path + ": " + str(error))
+			self.connection.rollback()
+
+		self.pending = {}
+
+	## Method Name: flush
+	##
+	## Purpose: Write the pending updates.
+	def flush(self):
+		with self.lock:
+			self.writePending()
+
+	## Method Name: close
+	##
+	## Purpose: Write the pending updates and close the database. Later lookups miss and later updates are discarded.
+	def close(self):
+		with self.lock:
+			self.writePending()
+			self.closed = 1
+
+			if (self.connection is not None):
+				self.connection.close()
+				self.connection = None
+
+	## Method Name: addCounts
+	##
+	## Purpose: Add the hit and miss counts of a process-backed module to this cache's counts.
+	##
+	## Parameters
+	## 1. counts - The dictionary of [hits, misses] per scope.
+	def addCounts(self, counts):
+		with self.lock:
+			for scope, scope_counts in counts.iteritems():
+				own_counts = self.counts.setdefault(scope, [0, 0])
+				own_counts[0] += scope_counts[0]
+				own_counts[1] += scope_counts[1]
+
+	## Method Name: logSummary
+	##
+	## Purpose: Log the hit and miss counts of each scope.
+	def logSummary(self):
+		with self.lock:
+			counts = dict(self.counts)
+
+		hits   = sum([scope_counts[0] for scope_counts in counts.values()])
+		misses = sum([scope_counts[1] for scope_counts in counts.values()])
+
+		self.logger.info("File cache " + self.path + ": " + str(hits) + " hit(s), " + str(misses) + " miss(es)")
+
+		for scope in sorted(counts.keys()):
+			self.logger.info("    " + scope + " - " + str(counts[scope][0]) + " hit(s), " + str(counts[scope][1]) + " miss(es)")
+
+## Classless Method Declarations
+
+## Method Name: toEntry
+##
+## Purpose: Return the FileEntry of a path, following symbolic links. FileEntry instances are returned unchanged.
+##
+## Parameters
+## 1. entry - A FileEntry or a path.
+##
+## Raises
+## OSError if the path can't be stat'd.
+def toEntry(entry):
+	if (isinstance(entry, bitCollector_walker.FileEntry)):
+		return entry
+
+	return bitCollector_walker.statEntry(entry, os.stat(entry))
+
+## Method Name: toUnicode
+##
+## Purpose: Return the path as unicode so that SQLite stores str and unicode paths under the same key.
+##
+## Parameters
+## 1. path - The str or unicode path.
+def toUnicode(path):
+	if (isinstance(path, unicode)):
+		return path
+
+	return path.decode("utf-8", "replace")
@@ -0,0 +1,345 @@
+## File Name: bitCollector_config.py
+##
+## Author(s): Daniel "Albinohat" Mercado
+##
+## Purpose: This script holds the pieces of the config compiler used by bitCollector_framework.parseConfig.
+##          A config is checked against a schema in one pass, reporting every error at once, and compiled into an
+##          execution plan: the settings, the module list with the resolved path of each module, and the order the
+##          modules can run in. The plan is cached next to the config, keyed by the config's hash, and reused until
+##          the config, the source of the compiler or the module search path changes.
+
+## Standard imports (Static)
+import hashlib, imp, json, os, sys
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+
+## The version of the plan format. Plans written by another version are compiled again.
+_plan_version = 1
+
+## The value types a schema entry can have.
+## string         - A string.
+## flag           - 0 or 1.
+## number         - An integer or a float.
+## string_list    - A list of strings.
+## name_list      - A string or a list of strings. A string is turned into a list of one string.
+## path_list      - A list of dictionaries whose values are strings. The values are flattened into a list of strings.
+## parameter_list - A list of dictionaries.
+## module_list    - A list of dictionaries.
+## any            - Anything.
+_value_types = ("string", "flag", "number", "string_list", "name_list", "path_list", "parameter_list", "module_list", "any")
+
+## Classless Method Declarations
+
+## Method Name: defaultType
+##
+## Purpose: Return the schema type of an optional entry from its default value.
+##
+## Parameters
+## 1. default - The default value.
+def defaultType(default):
+	if (isinstance(default, basestring)):
+		return "string"
+
+	if (isinstance(default, (int, long, float))):
+		return "number"
+
+	if (isinstance(default, list)):
+		return "string_list"
+
+	return "any"
+
+## Method Name: checkValue
+##
+## Purpose: Check a value against a schema type and return it in the form the framework expects.
+##
+## Parameters
+## 1. value      - The value from the config.
+## 2. value_type - The schema type. (See _value_types)
+##
+## Returns
+## A tuple of the normalized value and an error message. (None if the value is valid)
+def checkValue(value, value_type):
+	if (value_type == "string"):
+		if (isinstance(value, basestring)):
+			return value, None
+
+		return value, "Expected a string, got " + typeName(value)
+
+	if (value_type == "flag"):
+		if (value in (0, 1) and isinstance(value, (int, long))):
+			return int(value), None
+
+		return value, "Expected 0 or 1, got " + json.dumps(value)
+
+	if (value_type == "number"):
+		if (isinstance(value, (int, long, float))):
+			return value, None
+
+		return value, "Expected a number, got " + typeName(value)
+
+	if (value_type == "name_list" and isinstance(value, basestring)):
+		return [value], None
+
+	if (value_type in ("string_list", "name_list")):
+		if (isinstance(value, list) and all([isinstance(item, basestring) for item in value])):
+			return value, None
+
+		return value, "Expected a list of strings, got " + typeName(value)
+
+	if (value_type == "path_list"):
+		if (isinstance(value, list) and all([isinstance(item, dict) and all([isinstance(path, basestring) for path in item.itervalues()]) for item in value])):
+			return [path for item in value for path in item.itervalues()], None
+
+		return value, "Expected a list of {\"path\": \"<directory>\"} objects"
+
+	if (value_type in ("parameter_list", "module_list")):
+		if (isinstance(value, list) and all([isinstance(item, dict) for item in value])):
+			return value, None
+
+		return value, "Expected a list of objects, got " + typeName(value)
+
+	return value, None
+
+## Method Name: checkEntries
+##
+## Purpose: Check the entries of a config object against the required and optional schemas.
+##          Every problem is collected instead of stopping at the first one.
+##
+## Parameters
+## 1. entries         - The dictionary from the config.
+## 2. required_schema - The dictionary of required entry names to schema types.
+## 3. optional_schema - The dictionary of optional entry names to schema types.
+## 4. location        - Where the object is in the config, prefixed to the messages. ("" for the top level)
+## 5. errors          - The list the error messages are appended to.
+## 6. warnings        - The list the warning messages are appended to.
+##
+## Returns
+## A tuple of the dictionary of valid, normalized entries and the list of missing required entry names.
+def checkEntries(entries, required_schema, optional_schema, location, errors, warnings):
+	checked = {}
+
+	for key in sorted(entries):
+		if (key in required_schema):
+			value_type = required_schema[key]
+
+		elif (key in optional_schema):
+			value_type = optional_schema[key]
+
+		else:
+			warnings.append(location + "Unknown configuration attribute: " + key)
+			continue
+
+		value, error = checkValue(entries[key], value_type)
+
+		if (error is not None):
+			errors.append(location + key + ": " + error)
+
+		else:
+			checked[key] = value
+
+	missing = [key for key in sorted(required_schema) if (key not in entries)]
+
+	return checked, missing
+
+## Method Name: typeName
+##
+## Purpose: Return the JSON name of the type of a value, for error messages.
+##
+## Parameters
+## 1. value - The value.
+def typeName(value):
+	if (isinstance(value, bool)):
+		return "a boolean"
+
+	if (isinstance(value, basestring)):
+		return "a string"
+
+	if (isinstance(value, (int, long, float))):
+		return "a number"
+
+	if (isinstance(value, list)):
+		return "a list"
+
+	if (isinstance(value, dict)):
+		return "an object"
+
+	if (value is None):
+		return "null"
+
+	return str(type(value))
+
+## Method Name: hashConfig
+##
+## Purpose: Return the key of the plan of a config. Anything the plan depends on besides the config is part of it.
+##
+## Parameters
+## 1. config_bytes - The contents of the config file.
+## 2. source_paths - The paths to the source files of the code which checks and compiles the config.
+##                   A change to the schema or to the checks compiles every plan again.
+def hashConfig(config_bytes, source_paths):
+	config_hash = hashlib.sha256()
+
+	## Relative module paths are resolved against the working directory, and modules are searched for in sys.path.
+	for part in [str(_plan_version), os.getcwd(), json.dumps(sys.path)] + [hashSource(path) for path in source_paths] + [config_bytes]:
+		config_hash.update(part)
+		config_hash.update("\0")
+
+	return config_hash.hexdigest()
+
+## Method Name: hashSource
+##
+## Purpose: Return the SHA-256 of a Python source file, or an empty string if it can't be read.
+##
+## Parameters
+## 1. path - The path to the source file, or to the file compiled from it. (The __file__ of a module)
+def hashSource(path):
+	root, extension = os.path.splitext(path)
+
+	if (extension in (".pyc", ".pyo")):
+		path = root + ".py"
+
+	try:
+		with open(path, "rb") as source_file:
+			return hashlib.sha256(source_file.read()).hexdigest()
+
+	except (IOError, OSError):
+		return ""
+
+## Method Name: planCachePath
+##
+## Purpose: Return the path to the plan cache of a config. The plan is kept next to the config, so that only those
+##          who can change the config can change its plan.
+##
+## Parameters
+## 1. config_path - The path to the config file.
+def planCachePath(config_path):
+	config_directory, config_name = os.path.split(os.path.abspath(config_path))
+
+	return os.path.join(config_directory, "." + config_name + ".plan")
+
+## Method Name: readPlan
+##
+## Purpose: Return the cached plan of a config if it was compiled from the same hash, every module was found and
+##          the modules are still where they were.
+##
+## Parameters
+## 1. plan_path   - The path to the plan cache.
+## 2. config_hash - The hash returned by hashConfig.
+##
+## Returns
+## The plan dictionary, or None if it has to be compiled again.
+def readPlan(plan_path, config_hash):
+	try:
+		with open(plan_path, "r") as plan_file:
+			plan = json.load(plan_file)
+
+	except (IOError, OSError, ValueError):
+		return None
+
+	if (not isinstance(plan, dict) or plan.get("plan_version") != _plan_version or plan.get("config_hash") != config_hash):
+		return None
+
+	## A module which was moved, deleted or installed since changes the plan.
+	for module_path in plan.get("module_paths", []):
+		if (module_path is None or not os.path.exists(module_path)):
+			return None
+
+	return plan
+
+## Method Name: writePlan
+##
+## Purpose: Write a plan to its cache, replacing it in one step. A config in a read-only directory simply isn't cached.
+##
+## Parameters
+## 1. plan_path - The path to the plan cache.
+## 2. plan      - The plan dictionary.
+##
+## Returns
+## 1 if the plan was written, 0 otherwise.
+def writePlan(plan_path, plan):
+	temp_path = plan_path + "." + str(os.getpid()) + ".tmp"
+
+	try:
+		with open(temp_path, "w") as plan_file:
+			json.dump(dict(plan, plan_version=_plan_version), plan_file, sort_keys=True)
+
+		## os.rename won't replace an existing file on Windows.
+		if (sys.platform == "win32" and os.path.isfile(plan_path)):
+			os.remove(plan_path)
+
+		os.rename(temp_path, plan_path)
+
+	except (IOError, OSError):
+		try:
+			os.remove(temp_path)
+
+		except OSError:
+			pass
+
+		return 0
+
+	return 1
+
+## Method Name: resolveModulePath
+##
+## Purpose: Return the path the framework will import a module from. The additional paths are appended to sys.path, so they are searched last.
+##
+## Parameters
+## 1. name             - The name of the module.
+## 2. additional_paths - The list of additional module paths from the config.
+##
+## Returns
+## The absolute path to the module's file or package, or None if it can't be found.
+def resolveModulePath(name, additional_paths):
+	search_paths = sys.path + [path for path in additional_paths if (path not in sys.path)]
+
+	try:
+		module_file, module_path, description = imp.find_module(name, search_paths)
+
+	except ImportError:
+		return None
+
+	if (module_file is not None):
+		module_file.close()
+
+	return os.path.abspath(module_path)
+
+## Method Name: scheduleWaves
+##
+## Purpose: Group the modules into waves. Each module is in the wave after the last of the modules it depends on.
+##          The modules of a wave can run at the same time, up to max_concurrency.
+##
+## Parameters
+## 1. dependencies - The list of dependency index lists returned by buildModuleGraph. Must not have a cycle.
+##
+## Returns
+## The list of waves, each a list of module_list indices in configuration order.
+def scheduleWaves(dependencies):
+	levels = [None] * len(dependencies)
+
+	for module_index in range(len(dependencies)):
+		## Resolve the levels depth-first without recursion, so a long dependency chain can't hit the recursion limit.
+		stack = [module_index]
+
+		while (len(stack) > 0):
+			current = stack[-1]
+
+			if (levels[current] is not None):
+				stack.pop()
+				continue
+
+			unresolved = [dependency for dependency in dependencies[current] if (levels[dependency] is None)]
+
+			if (len(unresolved) > 0):
+				stack.extend(unresolved)
+				continue
+
+			levels[current] = max([levels[dependency] + 1 for dependency in dependencies[current]] or [0])
+			stack.pop()
+
+	waves = [[] for level in range(max(levels or [-1]) + 1)]
+
+	for module_index, level in enumerate(levels):
+		waves[level].append(module_index)
+
+	return waves
@@ -0,0 +1,730 @@
+## File Name: bitCollector_container.py
+##
+## Author(s): Daniel "Albinohat" Mercado
+##
+## Purpose: This script holds the artifact container the framework hands to the BitCollector modules
+##          through framework_settings.container. Modules stream the files they collect into a single archive.
+##          Files are split into blocks which are compressed by worker threads and stored once per distinct content,
+##          and each file gets a manifest entry listing its blocks. Every queue between the module, the workers and
+##          the writer is bounded, so a file is never held in memory as a whole.
+##
+## Container Layout
+##   Magic  - "BCCN0001"
+##   Record - tag (4 bytes), payload length (unsigned 8-byte big-endian), payload
+##     BLCK - codec (unsigned byte), SHA-256 of the uncompressed block (32 bytes), uncompressed length (unsigned 4-byte), block data
+##     ARTF - the UTF-8 JSON manifest entry of one artifact
+##     INDX - the UTF-8 JSON index of the block and artifact record offsets, written when the container is closed
+##   Trailer - offset of the INDX record (unsigned 8-byte big-endian), "BCCNEND1"
+##
+##   A container which wasn't closed has no index or trailer. It is read by scanning its records instead.
+
+## Standard imports (Static)
+import hashlib, json, logging, os, Queue, re, struct, threading, time, zlib
+
+## Third-party imports (Optional)
+## zstandard compresses faster than zlib at a similar ratio. zlib is used when it isn't installed.
+try:
+	import zstandard
+
+except ImportError:
+	zstandard = None
+
+## Framework imports (Static)
+import bitCollector_profile
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+
+_container_magic   = "BCCN0001"
+_container_end     = "BCCNEND1"
+_record_header     = struct.Struct(">4sQ")
+_block_header      = struct.Struct(">B32sI")
+_container_trailer = struct.Struct(">Q8s")
+
+## The codec numbers stored in the block records.
+_container_codecs = {"stored": 0, "zlib": 1, "zstd": 2}
+
+## The compression levels used by the codecs.
+_zlib_level = 6
+_zstd_level = 3
+
+## The default number of bytes per block.
+_container_block_size = 1048576
+
+## The number of blocks each queue holds per worker thread.
+_container_queue_blocks = 4
+
+## Class Declarations
+
+## Class Name: ContainerWriter
+##
+## Purpose: Stream artifacts into a container file. The file is created when the first artifact is added.
+##          Process-backed modules write to their own container file next to this one, named after the run and the
+##          module, which the framework merges into this one when the module returns. (See mergeContainer and processContainerPath)
+class ContainerWriter():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the writer settings.
+	##
+	## Parameters
+	## 1. path       - The path to the container file.
+	## 2. codec      - The compression codec. (zstd, zlib or stored - zstd falls back to zlib if zstandard isn't installed)
+	## 3. workers    - The number of threads compressing blocks.
+	## 4. block_size - The number of bytes per block.
+	def __init__(self, path, codec="zstd", workers=2, block_size=_container_block_size):
+		## Initialize the Logger for this class.
+		self.logger = logging.getLogger(self.__class__.__name__)
+		self.logger.debug("Entering BitCollector.ContainerWriter.__init__()")
+
+		self.path       = path
+		self.codec      = codec
+		self.workers    = max(1, workers)
+		self.block_size = max(1, block_size)
+
+		self.condition = threading.Condition()
+		self.stream    = None
+		self.closed    = 0
+
+		## The first exception raised by the writer thread. Later additions fail with it.
+		self.error = None
+
+		## The offset of each stored block, keyed by its SHA-256, and the blocks queued but not written yet.
+		self.blocks         = {}
+		self.pending_blocks = set()
+
+		## The offsets of the manifest entries.
+		self.artifact_offsets = []
+
+		self.raw_bytes     = 0
+		self.stored_bytes  = 0
+		self.deduped_bytes = 0
+
+	## Method Name: __getstate__
+	##
+	## Purpose: Keep only the settings so that the writer can be passed to process-backed modules.
+	def __getstate__(self):
+		return {"path": self.path, "codec": self.codec, "workers": self.workers, "block_size": self.block_size}
+
+	## Method Name: __setstate__
+	##
+	## Purpose: Initialize a writer with the settings of the run's container. The framework points it at a file of the
+	##          module's own before the module runs, so that the run's container is only written by one process.
+	##          (See processContainerPath)
+	##
+	## Parameters
+	## 1. state - The dictionary returned by __getstate__.
+	def __setstate__(self, state):
+		self.__init__(state["path"], state["codec"], state["workers"], state["block_size"])
+
+	## Method Name: open
+	##
+	## Purpose: Create the container file and start the compression and writer threads. The caller must hold the condition.
+	def open(self):
+		if (self.codec == "zstd" and zstandard is None):
+			self.logger.warning("zstandard isn't installed. Compressing " + self.path + " with zlib.")
+			self.codec = "zlib"
+
+		if (self.codec not in _container_codecs):
+			self.logger.warning("Unknown container codec: " + str(self.codec) + ". Defaulting to zlib.")
+			self.codec = "zlib"
+
+		container_directory = os.path.dirname(os.path.abspath(self.path))
+
+		if (not os.path.isdir(container_directory)):
+			os.makedirs(container_directory)
+
+		self.stream = open(self.path, "wb")
+		self.stream.write(_container_magic)
+
+		self.compress_queue = Queue.Queue(self.workers * _container_queue_blocks)
+		self.write_queue    = Queue.Queue(self.workers * _container_queue_blocks)
+
+		self.compress_threads = []
+
+		for thread_number in range(self.workers):
+			thread = threading.Thread(target=self.compressBlocks, name="ContainerCompressor-" + str(thread_number))
+			thread.daemon = True
+			thread.start()
+			self.compress_threads.append(thread)
+
+		self.writer_thread = threading.Thread(target=self.writeRecords, name="ContainerWriter")
+		self.writer_thread.daemon = True
+		self.writer_thread.start()
+
+		self.logger.info("Writing artifacts to " + self.path + " (" + self.codec + ")")
+
+	## Method Name: addFile
+	##
+	## Purpose: Stream a file into the container.
+	##
+	## Parameters
+	## 1. path     - The path to the file, or a FileEntry from the walker.
+	## 2. name     - The name of the artifact in the container. (None for the path)
+	## 3. metadata - A JSON serializable dictionary stored in the manifest entry. The file's path, size and times are added to it.
+	##
+	## Returns
+	## The manifest entry of the artifact.
+	##
+	## Raises
+	## IOError if the file can't be read or the container can't be written.
+	def addFile(self, path, name=None, metadata=None):
+		path     = getattr(path, "path", path)
+		metadata = dict(metadata or {})
+
+		with open(path, "rb") as file:
+			stat_info = os.fstat(file.fileno())
+
+			metadata.setdefault("source", path)
+			metadata.setdefault("mtime", stat_info.st_mtime)
+			metadata.setdefault("ctime", stat_info.st_ctime)
+			metadata.setdefault("mode", stat_info.st_mode)
+
+			if (name is None):
+				name = path
+
+			return self.addStream(file, name, metadata)
+
+	## Method Name: addStream
+	##
+	## Purpose: Read a file-like object to its end and store it in the container as one artifact.
+	##          Blocks until every block of the artifact has been written.
+	##
+	## Parameters
+	## 1. stream   - The file-like object to read.
+	## 2. name     - The name of the artifact in the container.
+	## 3. metadata - A JSON serializable dictionary stored in the manifest entry.
+	##
+	## Returns
+	## The manifest entry of the artifact.
+	##
+	## Raises
+	## IOError if the container can't be written.
+	def addStream(self, stream, name, metadata=None):
+		with self.condition:
+			if (self.closed == 1):
+				raise IOError("The container " + self.path + " is closed")
+
+			if (self.stream is None):
+				self.open()
+
+		artifact      = ArtifactBlocks()
+		artifact_hash = hashlib.sha256()
+		size          = 0
+
+		while (1):
+			data = stream.read(self.block_size)
+
+			if (not data):
+				break
+
+			if (self.error is not None):
+				raise IOError("Unable to write to the container " + self.path + ": " + str(self.error))
+
+			artifact_hash.update(data)
+			size += len(data)
+
+			## Blocks while the workers are busy, which bounds the memory used by a large artifact.
+			self.compress_queue.put((artifact, artifact.addBlock(), data))
+
+		with self.condition:
+			while (self.error is None and artifact.isStored(self.blocks) == 0):
+				self.condition.wait()
+
+			if (self.error is not None):
+				raise IOError("Unable to write to the container " + self.path + ": " + str(self.error))
+
+		manifest_entry = {
+			"name"     : name,
+			"size"     : size,
+			"sha256"   : artifact_hash.hexdigest(),
+			"blocks"   : [digest.encode("hex") for digest in artifact.digests],
+			"added"    : time.time(),
+			"metadata" : metadata or {}
+		}
+
+		self.write_queue.put(("ARTF", json.dumps(manifest_entry, sort_keys=True)))
+
+		bitCollector_profile.addFiles(1, size)
+
+		return manifest_entry
+
+	## Method Name: mergeContainer
+	##
+	## Purpose: Copy the artifacts of another container file into this one, then delete it.
+	##          The blocks are copied as they are stored, without being compressed again, unless this container already holds them.
+	##
+	## Parameters
+	## 1. path - The path to the container file, written by a process-backed module.
+	##
+	## Returns
+	## The number of artifacts copied.
+	##
+	## Raises
+	## IOError if the file isn't a container or this container can't be written. The file is kept in that case.
+	def mergeContainer(self, path):
+		with self.condition:
+			if (self.closed == 1):
+				raise IOError("The container " + self.path + " is closed")
+
+			if (self.stream is None):
+				self.open()
+
+		reader = ContainerReader(path)
+		merged = 0
+
+		try:
+			for manifest_entry in reader.artifacts():
+				digests = [hex_digest.decode("hex") for hex_digest in manifest_entry["blocks"]]
+
+				## Only an artifact which was stored whole is copied.
+				if (len([digest for digest in digests if (digest not in reader.blocks)]) > 0):
+					self.logger.warning("Skipping the artifact " + manifest_entry["name"] + " of " + path + ": some of its blocks are missing")
+					continue
+
+				artifact = ArtifactBlocks()
+
+				for digest in digests:
+					block_index  = artifact.addBlock()
+					tag, payload = reader.readRecord(reader.blocks[digest])
+					length       = _block_header.unpack_from(payload)[2]
+
+					with self.condition:
+						duplicate = (digest in self.blocks or digest in self.pending_blocks)
+
+						if (duplicate):
+							self.deduped_bytes += length
+
+						else:
+							self.pending_blocks.add(digest)
+
+						artifact.setDigest(block_index, digest)
+
+					if (duplicate == 0):
+						self.write_queue.put(("BLCK", payload, digest, length))
+
+				with self.condition:
+					while (self.error is None and artifact.isStored(self.blocks) == 0):
+						self.condition.wait()
+
+					if (self.error is not None):
+						raise IOError("Unable to write to the container " + self.path + ": " + str(self.error))
+
+				self.write_queue.put(("ARTF", json.dumps(manifest_entry, sort_keys=True)))
+				merged += 1
+
+		finally:
+			reader.close()
+
+		os.remove(path)
+
+		self.logger.info("Merged " + str(merged) + " artifact(s) from " + path + " into " + self.path)
+
+		return merged
+
+	## Method Name: compressBlocks
+	##
+	## Purpose: The body of a compression thread. Hashes each block, then compresses and queues it unless it is already stored.
+	def compressBlocks(self):
+		if (self.codec == "zstd"):
+			compressor = zstandard.ZstdCompressor(level=_zstd_level)
+
+		while (1):
+			task = self.compress_queue.get()
+
+			if (task is None):
+				break
+
+			artifact, block_index, data = task
+			digest = hashlib.sha256(data).digest()
+
+			with self.condition:
+				duplicate = (digest in self.blocks or digest in self.pending_blocks)
+
+				if (duplicate):
+					self.deduped_bytes += len(data)
+
+				else:
+					self.pending_blocks.add(digest)
+
+				artifact.setDigest(block_index, digest)
+				self.condition.notify_all()
+
+			if (duplicate):
+				continue
+
+			try:
+				if (self.codec == "zstd"):
+					block_data = compressor.compress(data)
+
+				elif (self.codec == "zlib"):
+					block_compressor = zlib.compressobj(_zlib_level)
+					block_data       = block_compressor.compress(data) + block_compressor.flush()
+
+				else:
+					block_data = data
+
+			except Exception as error:
+				self.logger.error("Unable to compress a block for the container " + self.path + ": " + str(error))
+
+				with self.condition:
+					self.error = error
+					self.condition.notify_all()
+
+				continue
+
+			codec = _container_codecs[self.codec]
+
+			## Store blocks which don't compress as they are.
+			if (len(block_data) >= len(data)):
+				codec      = _container_codecs["stored"]
+				block_data = data
+
+			self.write_queue.put(("BLCK", _block_header.pack(codec, digest, len(data)) + block_data, digest, len(data)))
+
+	## Method Name: writeRecords
+	##
+	## Purpose: The body of the writer thread. Appends the queued records until a None record is queued.
+	def writeRecords(self):
+		while (1):
+			record = self.write_queue.get()
+
+			if (record is None):
+				break
+
+			## Keep draining the queue after an error so that the other threads never block on it.
+			if (self.error is not None):
+				continue
+
+			try:
+				if (record[0] == "BLCK"):
+					offset = self.writeRecord("BLCK", record[1])
+
+					with self.condition:
+						self.blocks[record[2]] = offset
+						self.pending_blocks.discard(record[2])
+						self.raw_bytes    += record[3]
+						self.stored_bytes += len(record[1])
+						self.condition.notify_all()
+
+				else:
+					offset = self.writeRecord("ARTF", record[1])
+					self.artifact_offsets.append(offset)
+
+			except (IOError, OSError) as error:
+				self.logger.error("Unable to write to the container " + self.path + ": " + str(error))
+
+				with self.condition:
+					self.error = error
+					self.condition.notify_all()
+
+	## Method Name: writeRecord
+	##
+	## Purpose: Append one record to the container file.
+	##
+	## Parameters
+	## 1. tag     - The 4-character record tag.
+	## 2. payload - The payload of the record.
+	##
+	## Returns
+	## The offset of the record in the container file.
+	def writeRecord(self, tag, payload):
+		offset = self.stream.tell()
+
+		self.stream.write(_record_header.pack(tag, len(payload)))
+		self.stream.write(payload)
+
+		return offset
+
+	## Method Name: close
+	##
+	## Purpose: Write the remaining blocks and manifest entries, then the index and the trailer, and close the container file.
+	def close(self):
+		with self.condition:
+			if (self.closed == 1):
+				return
+
+			self.closed = 1
+
+			if (self.stream is None):
+				return
+
+		for thread in self.compress_threads:
+			self.compress_queue.put(None)
+
+		for thread in self.compress_threads:
+			thread.join()
+
+		self.write_queue.put(None)
+		self.writer_thread.join()
+
+		try:
+			if (self.error is None):
+				index = {
+					"blocks"    : dict([(digest.encode("hex"), offset) for digest, offset in self.blocks.iteritems()]),
+					"artifacts" : self.artifact_offsets
+				}
+
+				index_offset = self.writeRecord("INDX", json.dumps(index, sort_keys=True))
+				self.stream.write(_container_trailer.pack(index_offset, _container_end))
+
+			self.stream.close()
+
+		except (IOError, OSError) as error:
+			self.logger.error("Unable to close the container " + self.path + ": " + str(error))
+
+		self.logger.info("Stored " + str(len(self.artifact_offsets)) + " artifact(s) in " + self.path + ": " + str(self.raw_bytes) + " bytes in " + str(len(self.blocks)) + " block(s) compressed to " + str(self.stored_bytes) + " bytes, " + str(self.deduped_bytes) + " duplicate bytes skipped")
+
+## Class Name: ArtifactBlocks
+##
+## Purpose: Track the digests of the blocks of one artifact as the compression threads hash them.
+##          Every method is called with the writer's condition held, except addBlock which only the adding thread calls.
+class ArtifactBlocks():
+	def __init__(self):
+		self.digests   = []
+		self.remaining = 0
+
+	## Method Name: addBlock
+	##
+	## Purpose: Reserve the position of the next block and return its index.
+	def addBlock(self):
+		self.digests.append(None)
+		self.remaining += 1
+
+		return len(self.digests) - 1
+
+	## Method Name: setDigest
+	##
+	## Purpose: Record the digest of a block.
+	##
+	## Parameters
+	## 1. block_index - The index returned by addBlock.
+	## 2. digest      - The SHA-256 of the block.
+	def setDigest(self, block_index, digest):
+		self.digests[block_index] = digest
+		self.remaining -= 1
+
+	## Method Name: isStored
+	##
+	## Purpose: Return 1 if every block of the artifact has been hashed and written, 0 otherwise.
+	##
+	## Parameters
+	## 1. blocks - The writer's dictionary of stored blocks.
+	def isStored(self, blocks):
+		if (self.remaining > 0):
+			return 0
+
+		for digest in self.digests:
+			if (digest not in blocks):
+				return 0
+
+		return 1
+
+## Class Name: ContainerReader
+##
+## Purpose: List and extract the artifacts of a container file, including one which was never closed.
+class ContainerReader():
+	## Method Name: __init__
+	##
+	## Purpose: Open the container file and load its index.
+	##
+	## Parameters
+	## 1. path - The path to the container file.
+	##
+	## Raises
+	## IOError if the file isn't a container.
+	def __init__(self, path):
+		self.path   = path
+		self.stream = open(path, "rb")
+
+		if (self.stream.read(len(_container_magic)) != _container_magic):
+			self.stream.close()
+			raise IOError(path + " isn't a BitCollector container")
+
+		if (self.loadIndex() == 0):
+			self.scanRecords()
+
+	## Method Name: loadIndex
+	##
+	## Purpose: Load the index written when the container was closed.
+	##
+	## Returns
+	## 1 if the index was loaded, 0 if the container has no trailer.
+	def loadIndex(self):
+		self.stream.seek(0, os.SEEK_END)
+
+		if (self.stream.tell() < len(_container_magic) + _container_trailer.size):
+			return 0
+
+		self.stream.seek(-_container_trailer.size, os.SEEK_END)
+		index_offset, end_magic = _container_trailer.unpack(self.stream.read(_container_trailer.size))
+
+		if (end_magic != _container_end):
+			return 0
+
+		tag, payload = self.readRecord(index_offset)
+		index        = json.loads(payload)
+
+		self.blocks           = dict([(digest.decode("hex"), offset) for digest, offset in index["blocks"].iteritems()])
+		self.artifact_offsets = index["artifacts"]
+
+		return 1
+
+	## Method Name: scanRecords
+	##
+	## Purpose: Find the block and artifact records by reading the container from the start, stopping at the first truncated record.
+	def scanRecords(self):
+		self.blocks           = {}
+		self.artifact_offsets = []
+
+		offset = len(_container_magic)
+
+		while (1):
+			self.stream.seek(offset)
+			header = self.stream.read(_record_header.size)
+
+			if (len(header) < _record_header.size):
+				break
+
+			tag, length = _record_header.unpack(header)
+
+			if (tag == "BLCK"):
+				block_header = self.stream.read(_block_header.size)
+
+				if (len(block_header) < _block_header.size):
+					break
+
+				self.blocks[_block_header.unpack(block_header)[1]] = offset
+
+			elif (tag == "ARTF"):
+				self.artifact_offsets.append(offset)
+
+			offset += _record_header.size + length
+
+		## Drop the records the container was cut short in the middle of.
+		self.stream.seek(0, os.SEEK_END)
+		end = self.stream.tell()
+
+		self.blocks           = dict([(digest, block_offset) for digest, block_offset in self.blocks.iteritems() if (self.recordEnd(block_offset) <= end)])
+		self.artifact_offsets = [artifact_offset for artifact_offset in self.artifact_offsets if (self.recordEnd(artifact_offset) <= end)]
+
+	## Method Name: recordEnd
+	##
+	## Purpose: Return the offset just past a record.
+	##
+	## Parameters
+	## 1. offset - The offset of the record.
+	def recordEnd(self, offset):
+		self.stream.seek(offset)
+
+		return offset + _record_header.size + _record_header.unpack(self.stream.read(_record_header.size))[1]
+
+	## Method Name: readRecord
+	##
+	## Purpose: Return the tag and the payload of a record.
+	##
+	## Parameters
+	## 1. offset - The offset of the record.
+	def readRecord(self, offset):
+		self.stream.seek(offset)
+		tag, length = _record_header.unpack(self.stream.read(_record_header.size))
+
+		return tag, self.stream.read(length)
+
+	## Method Name: artifacts
+	##
+	## Purpose: Return the manifest entries of the artifacts, in the order they were stored.
+	def artifacts(self):
+		return [json.loads(self.readRecord(offset)[1]) for offset in self.artifact_offsets]
+
+	## Method Name: extract
+	##
+	## Purpose: Write the content of an artifact to a file-like object one block at a time, checking each block's digest.
+	##
+	## Parameters
+	## 1. manifest_entry - The manifest entry of the artifact, from artifacts().
+	## 2. output_stream  - The file-like object to write to.
+	##
+	## Returns
+	## The number of bytes written.
+	##
+	## Raises
+	## IOError if a block is missing or corrupt.
+	def extract(self, manifest_entry, output_stream):
+		size = 0
+
+		for hex_digest in manifest_entry["blocks"]:
+			data = self.readBlock(hex_digest.decode("hex"))
+			output_stream.write(data)
+			size += len(data)
+
+		return size
+
+	## Method Name: readBlock
+	##
+	## Purpose: Return the uncompressed content of a block.
+	##
+	## Parameters
+	## 1. digest - The SHA-256 of the block.
+	##
+	## Raises
+	## IOError if the block is missing or corrupt.
+	def readBlock(self, digest):
+		if (digest not in self.blocks):
+			raise IOError("Block " + digest.encode("hex") + " is missing from " + self.path)
+
+		tag, payload = self.readRecord(self.blocks[digest])
+		codec, block_digest, length = _block_header.unpack_from(payload)
+		block_data = payload[_block_header.size:]
+
+		if (codec == _container_codecs["zlib"]):
+			block_data = zlib.decompress(block_data)
+
+		elif (codec == _container_codecs["zstd"]):
+			if (zstandard is None):
+				raise IOError("Block " + digest.encode("hex") + " is compressed with zstd, but zstandard isn't installed")
+
+			block_data = zstandard.ZstdDecompressor().decompress(block_data, max_output_size=length)
+
+		if (len(block_data) != length or hashlib.sha256(block_data).digest() != digest):
+			raise IOError("Block " + digest.encode("hex") + " in " + self.path + " is corrupt")
+
+		return block_data
+
+	## Method Name: close
+	##
+	## Purpose: Close the container file.
+	def close(self):
+		self.stream.close()
+
+## Classless Method Declarations
+
+## Method Name: processContainerPath
+##
+## Purpose: Return the path to the container file a process-backed module writes next to a container.
+##          The framework derives it to merge the file, or to delete it if the module is abandoned.
+##
+## Parameters
+## 1. path         - The path to the container file.
+## 2. run_id       - The ID of the run. (See bitCollector_framework.FrameworkSettings)
+## 3. module_index - The position of the module in the module_list.
+def processContainerPath(path, run_id, module_index):
+	root, extension = os.path.splitext(path)
+
+	return root + "." + run_id + "." + str(module_index) + extension
+
+## Method Name: processContainerPaths
+##
+## Purpose: Return the sorted paths of the container files process-backed modules wrote next to a container and which
+##          weren't merged into it, such as those whose merge failed. (See ContainerWriter)
+##
+## Parameters
+## 1. path - The path to the container file.
+def processContainerPaths(path):
+	container_directory, container_name = os.path.split(os.path.abspath(path))
+	root, extension = os.path.splitext(container_name)
+	process_name    = re.compile(re.escape(root) + r"\.\d+\.\d+\.\d+" + re.escape(extension) + "$")
+
+	try:
+		return sorted([os.path.join(container_directory, name) for name in os.listdir(container_directory) if (process_name.match(name))])
+
+	except OSError:
+		return []
@@ -0,0 +1,789 @@
+## File Name: bitCollector_daemon.py
+##
+## Author(s): Daniel "Albinohat" Mercado
+##
+## Purpose: This script runs the framework as a resident daemon and submits runs to it.
+##          The daemon listens on a Unix socket and runs one request at a time. A request names a configuration file
+##          and optionally a subset of its modules. The modules the subset depends on are run too.
+##          Imported modules, the platform facts and the process pool are kept between requests, so a run only pays
+##          for what it does. The log records, result records and a summary of each run are streamed back to the
+##          client as JSON lines, while the log file, results and container are written as they would be by
+##          bitCollector_framework.py.
+##          Modules are imported once, so a changed module is only picked up after the daemon is restarted.
+##          Relative additional_paths are resolved against the daemon's working directory.
+
+## Standard imports (Static)
+import json, logging, multiprocessing, os, Queue, re, signal, socket, SocketServer, sys, threading, time, traceback
+
+## Framework imports (Static)
+import bitCollector_container, bitCollector_framework, bitCollector_platform, bitCollector_results
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+_daemon_version = "bitCollector_daemon v0.1.0"
+
+## The commands a request can hold.
+_daemon_commands = ("run", "status", "stop")
+
+## The time format of the log records printed by the client, matching the framework's console output.
+_client_time_format = "%Y-%m-%d %H:%M:%S"
+
+## Class Declarations
+
+## Class Name: ClientStream
+##
+## Purpose: Send JSON messages to the client of a request, one per line. Messages are sent from the module threads,
+##          the results writer and the request handler, so each line is written under a lock.
+##          A client which disconnects doesn't stop the run; the rest of its messages are dropped.
+class ClientStream():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the stream.
+	##
+	## Parameters
+	## 1. wfile - The file object writing to the client's socket.
+	def __init__(self, wfile):
+		self.wfile  = wfile
+		self.lock   = threading.Lock()
+		self.closed = 0
+
+	## Method Name: send
+	##
+	## Purpose: Send a message to the client.
+	##
+	## Parameters
+	## 1. message - The JSON serializable dictionary. Its type entry tells the client what it holds.
+	def send(self, message):
+		try:
+			line = json.dumps(message, sort_keys=True)
+
+		## A log message or record which isn't valid UTF-8 or JSON is sent as its repr.
+		except (TypeError, ValueError, UnicodeDecodeError):
+			line = json.dumps(dict([(key, value if (isinstance(value, (int, long, float)) or value is None) else repr(value)) for key, value in message.iteritems()]), sort_keys=True)
+
+		with self.lock:
+			if (self.closed == 1):
+				return
+
+			try:
+				self.wfile.write(line + "\n")
+
+			except (IOError, socket.error):
+				self.closed = 1
+
+## Class Name: ClientLogHandler
+##
+## Purpose: Stream the log records of a run to its client. The records of process-backed modules are replayed
+##          through the framework's handlers, so they are streamed too.
+class ClientLogHandler(logging.Handler):
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the handler.
+	##
+	## Parameters
+	## 1. stream - The ClientStream of the request.
+	def __init__(self, stream):
+		logging.Handler.__init__(self)
+
+		self.stream = stream
+
+	## Method Name: emit
+	##
+	## Purpose: Send the record to the client.
+	##
+	## Parameters
+	## 1. record - The LogRecord being handled.
+	def emit(self, record):
+		try:
+			self.stream.send({"type": "log", "time": record.created, "level": record.levelname, "name": record.module + "." + record.name + "." + record.funcName, "message": record.getMessage()})
+
+		except Exception:
+			self.handleError(record)
+
+## Class Name: ClientSink
+##
+## Purpose: A results sink which streams the result records of a run to its client, alongside the configured sinks.
+class ClientSink():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the sink.
+	##
+	## Parameters
+	## 1. stream - The ClientStream of the request.
+	def __init__(self, stream):
+		self.path   = "the client"
+		self.stream = stream
+
+	## Method Name: write
+	##
+	## Purpose: Send a batch of (module, time, encoded record) tuples.
+	##
+	## Parameters
+	## 1. batch - The list of (module, time, encoded record) tuples.
+	def write(self, batch):
+		for name, emitted, encoded_record in batch:
+			self.stream.send({"type": "result", "module": name, "time": emitted, "record": json.loads(encoded_record)})
+
+	## Method Name: close
+	##
+	## Purpose: Nothing to close. The connection belongs to the request handler.
+	def close(self):
+		pass
+
+## Class Name: MessageCapture
+##
+## Purpose: Stand in for STDOUT while a configuration is compiled, so that the startup warnings and errors the framework
+##          prints reach the client as well as the daemon's output.
+class MessageCapture():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the capture.
+	##
+	## Parameters
+	## 1. stream - The ClientStream of the request.
+	## 2. output - The daemon's STDOUT.
+	def __init__(self, stream, output):
+		self.stream = stream
+		self.output = output
+		self.buffer = ""
+
+	## Method Name: write
+	##
+	## Purpose: Send each complete line to the client and write it to the daemon's output.
+	##
+	## Parameters
+	## 1. text - The text printed.
+	def write(self, text):
+		self.output.write(text)
+		self.buffer += text
+
+		while ("\n" in self.buffer):
+			line, self.buffer = self.buffer.split("\n", 1)
+			self.stream.send({"type": "message", "text": line})
+
+	## Method Name: flush
+	##
+	## Purpose: Send the last line if it wasn't terminated.
+	def flush(self):
+		self.output.flush()
+
+		if (self.buffer != ""):
+			self.stream.send({"type": "message", "text": self.buffer})
+			self.buffer = ""
+
+## Class Name: ModuleRunner
+##
+## Purpose: Run plans one after another, keeping what the runs have in common: the imported modules, the platform
+##          facts and the process pool. Used by the daemon and by the agents of bitCollector_fleet.
+class ModuleRunner():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the runner. The platform and the process pool are loaded by the first run which needs them.
+	##
+	## Parameters
+	## 1. pool_size - The number of workers of the process pool. (0 for one per CPU)
+	def __init__(self, pool_size):
+		self.pool_size  = pool_size
+		self.start_time = time.time()
+		self.runs       = 0
+
+		## The modules imported by earlier runs.
+		self.module_loader = bitCollector_framework.ModuleLoader()
+
+		## The Platform of the target machine and when its facts were loaded. (None until the first run)
+		self.platform_details = None
+		self.platform_time    = 0
+
+		## The (multiprocessing.Pool, pid Queue) tuple shared by the runs. (None until a run has a process-backed module)
+		self.shared_pool = None
+
+	## Method Name: runPlan
+	##
+	## Purpose: Run the modules of a plan, or a subset of them, and stream the run to the client.
+	##
+	## Parameters
+	## 1. plan        - The plan dictionary returned by bitCollector_framework.compilePlan.
+	## 2. plan_cached - A boolean tracking whether or not the plan was read from the cache.
+	## 3. names       - The list of module names to run. (Empty for every module)
+	## 4. stream      - The ClientStream of the request.
+	##
+	## Returns
+	## The list of paths to the files the run wrote: the log file, the results, the container and the containers of
+## abandoned process-backed modules. (None if the run didn't start)
+	def runPlan(self, plan, plan_cached, names, stream):
+		module_indices, unknown_names = selectModules(plan, names)
+
+		if (len(unknown_names) > 0):
+			stream.send({"type": "error", "message": "No module in " + plan["config_path"] + " is named: " + ", ".join(unknown_names)})
+			return None
+
+		settings    = list(bitCollector_framework.planSettings(plan))
+		settings[6] = [plan["module_list"][module_index] for module_index in module_indices]
+
+		## Every handler the framework adds to the root logger for this run is removed afterwards.
+		root_logger     = logging.getLogger("")
+		daemon_handlers = list(root_logger.handlers)
+		run_start       = time.time()
+
+		try:
+			framework_settings = bitCollector_framework.FrameworkSettings(tuple(settings))
+
+		except SystemExit:
+			self.removeRunHandlers(daemon_handlers)
+			stream.send({"type": "error", "message": "Unable to start the logging of " + plan["config_path"]})
+			return None
+
+		## The results are streamed to the client as well as written to the configured sinks.
+		output_sinks = list(framework_settings.results.sinks)
+		framework_settings.results.sinks.append(ClientSink(stream))
+		root_logger.addHandler(ClientLogHandler(stream))
+
+		try:
+			self.runs += 1
+			root_logger.info("Run " + str(self.runs) + ": " + str(len(module_indices)) + " of " + str(len(plan["module_list"])) + " module(s) from " + plan["config_path"])
+
+			if (plan_cached == 1):
+				root_logger.info("Read the execution plan from cache")
+
+			thread_manager = bitCollector_framework.runModules(root_logger, framework_settings, self.loadPlatform(framework_settings), self.module_loader, self.processPool(settings[6]))
+
+		finally:
+			self.removeRunHandlers(daemon_handlers)
+
+		## Stop the workers of abandoned modules, which may still be running. The next run starts a new pool.
+		if (self.shared_pool is not None and len([thread for thread in thread_manager.abandoned_list if (thread.executor == "process")]) > 0):
+			self.closePool(1)
+
+		stream.send(runSummary(plan, module_indices, thread_manager, framework_settings.log_file, time.time() - run_start))
+
+		## The container sink writes into the container rather than a file of its own.
+		output_paths = [framework_settings.log_file] + [sink.path for sink in output_sinks if (not isinstance(sink, bitCollector_results.ContainerSink))]
+
+		if (framework_settings.container is not None):
+			output_paths.append(framework_settings.container.path)
+			output_paths.extend(bitCollector_container.processContainerPaths(framework_settings.container.path))
+
+		return [path for path in output_paths if (os.path.isfile(path))]
+
+	## Method Name: loadPlatform
+	##
+	## Purpose: Return the Platform of the target machine, loading its facts again once they are older than the run's platform_cache_ttl.
+	##
+	## Parameters
+	## 1. framework_settings - The FrameworkSettings of the run.
+	def loadPlatform(self, framework_settings):
+		if (self.platform_details is None or time.time() - self.platform_time > framework_settings.platform_cache_ttl):
+			platform_facts, facts_cached = bitCollector_platform.loadFacts(framework_settings.platform_cache_path, framework_settings.platform_cache_ttl)
+			self.platform_details        = bitCollector_framework.Platform(platform_facts["os"]["uname"], platform_facts)
+			self.platform_time           = time.time()
+
+		return self.platform_details
+
+	## Method Name: processPool
+	##
+	## Purpose: Return the shared process pool, starting it if the run has a process-backed module. The pool is started
+	##          between runs, while no module thread is running, so the workers fork from a quiet process.
+	##
+	## Parameters
+	## 1. module_list - The list of module dictionaries of the run.
+	##
+	## Returns
+	## The (multiprocessing.Pool, pid Queue) tuple, or None if the pool isn't needed yet.
+	def processPool(self, module_list):
+		if (self.shared_pool is None and "process" in [module_dict.get("executor") for module_dict in module_list]):
+			pool_size = self.pool_size
+
+			if (pool_size <= 0):
+				pool_size = multiprocessing.cpu_count()
+
+			printMessage("INFO", "ModuleRunner.processPool", "Starting process pool with " + str(pool_size) + " worker(s)")
+
+			pid_queue        = multiprocessing.Queue()
+			self.shared_pool = (multiprocessing.Pool(pool_size, bitCollector_framework.initializeProcessWorker, (pid_queue,)), pid_queue)
+
+		if (self.shared_pool is not None):
+			## Drop the process IDs reported by the modules of earlier runs.
+			while (1):
+				try:
+					self.shared_pool[1].get_nowait()
+
+				except Queue.Empty:
+					break
+
+		return self.shared_pool
+
+	## Method Name: closePool
+	##
+	## Purpose: Stop the shared process pool.
+	##
+	## Parameters
+	## 1. terminate - A boolean tracking whether to stop the workers at once rather than letting them finish.
+	def closePool(self, terminate=0):
+		if (self.shared_pool is None):
+			return
+
+		if (terminate == 1):
+			self.shared_pool[0].terminate()
+
+		else:
+			self.shared_pool[0].close()
+
+		self.shared_pool[0].join()
+		self.shared_pool = None
+
+	## Method Name: removeRunHandlers
+	##
+	## Purpose: Remove and close the handlers a run added to the root logger.
+	##
+	## Parameters
+	## 1. daemon_handlers - The list of handlers the root logger had before the run.
+	def removeRunHandlers(self, daemon_handlers):
+		root_logger = logging.getLogger("")
+
+		for handler in list(root_logger.handlers):
+			if (handler not in daemon_handlers):
+				root_logger.removeHandler(handler)
+				handler.close()
+
+	## Method Name: status
+	##
+	## Purpose: Return the status message of the runner.
+	def status(self):
+		return {
+			"type"           : "status",
+			"pid"            : os.getpid(),
+			"uptime"         : time.time() - self.start_time,
+			"runs"           : self.runs,
+			"modules"        : sorted(self.module_loader.entry_points),
+			"pool_started"   : int(self.shared_pool is not None),
+			"platform_age"   : (time.time() - self.platform_time) if (self.platform_details is not None) else None
+		}
+
+## Class Name: DaemonServer
+##
+## Purpose: The Unix socket server of the daemon. Requests are handled one at a time, in the order they connect.
+class DaemonServer(SocketServer.UnixStreamServer):
+	## Method Name: __init__
+	##
+	## Purpose: Bind the socket, readable and writable by the daemon's user only, since a run executes code.
+	##
+	## Parameters
+	## 1. socket_path - The path of the Unix socket.
+	## 2. pool_size   - The number of workers of the process pool. (0 for one per CPU)
+	def __init__(self, socket_path, pool_size):
+		old_umask = os.umask(0077)
+
+		try:
+			SocketServer.UnixStreamServer.__init__(self, socket_path, RequestHandler)
+
+		finally:
+			os.umask(old_umask)
+
+		self.socket_path = socket_path
+		self.stopping    = 0
+		self.runner      = ModuleRunner(pool_size)
+
+	## Method Name: runRequest
+	##
+	## Purpose: Compile the configuration file of a request and run it, or a subset of its modules.
+	##
+	## Parameters
+	## 1. request - The request dictionary. (See submitRun)
+	## 2. stream  - The ClientStream of the request.
+	def runRequest(self, request, stream):
+		config_path = request.get("config")
+		names       = request.get("modules", [])
+
+		if (not isinstance(config_path, basestring) or not isinstance(names, list)):
+			stream.send({"type": "error", "message": "A run request needs a config path and a list of module names"})
+			return
+
+		## Compile the configuration the way the framework does, sending its startup messages to the client.
+		capture    = MessageCapture(stream, sys.stdout)
+		sys.stdout = capture
+
+		try:
+			plan, plan_cached = bitCollector_framework.compilePlan(config_path)
+
+		except SystemExit:
+			stream.send({"type": "error", "message": "Unable to compile " + config_path})
+			return
+
+		finally:
+			sys.stdout = capture.output
+			capture.flush()
+
+		self.runner.runPlan(plan, plan_cached, names, stream)
+
+## Class Name: StreamHandler
+##
+## Purpose: The base of the request handlers streaming JSON lines to a client which may go away in the middle of a run.
+class StreamHandler(SocketServer.StreamRequestHandler):
+	## Method Name: finish
+	##
+	## Purpose: Close the connection. The lines a departed client didn't read are dropped instead of failing the request.
+	def finish(self):
+		try:
+			SocketServer.StreamRequestHandler.finish(self)
+
+		except (IOError, socket.error):
+			pass
+
+## Class Name: RequestHandler
+##
+## Purpose: Read the request of a client and stream the response back.
+class RequestHandler(StreamHandler):
+	## Method Name: handle
+	##
+	## Purpose: Dispatch the request line to the daemon.
+	def handle(self):
+		stream = ClientStream(self.wfile)
+
+		try:
+			request = json.loads(self.rfile.readline())
+
+		except ValueError:
+			stream.send({"type": "error", "message": "The request is not properly formatted JSON"})
+			return
+
+		if (not isinstance(request, dict) or request.get("command") not in _daemon_commands):
+			stream.send({"type": "error", "message": "Unknown request. Use one of: " + ", ".join(_daemon_commands)})
+			return
+
+		if (request["command"] == "status"):
+			stream.send(self.server.runner.status())
+
+		elif (request["command"] == "stop"):
+			printMessage("INFO", "RequestHandler.handle", "Stopping on request")
+			self.server.stopping = 1
+			stream.send({"type": "stopping"})
+
+		else:
+			try:
+				self.server.runRequest(request, stream)
+
+			## The daemon outlives a failed run.
+			except Exception:
+				printMessage("ERROR", "RequestHandler.handle", "The run failed: " + traceback.format_exc())
+				stream.send({"type": "error", "message": "The run failed: " + traceback.format_exc()})
+
+## Classless Method Declarations
+
+## Method Name: selectModules
+##
+## Purpose: Return the modules of a plan to run for a list of module names, along with every module they depend on.
+##
+## Parameters
+## 1. plan  - The plan dictionary returned by bitCollector_framework.compilePlan.
+## 2. names - The list of module names. (Empty for every module)
+##
+## Returns
+## A tuple of the sorted list of module_list indices and the list of names no module has.
+def selectModules(plan, names):
+	module_list = plan["module_list"]
+
+	if (len(names) == 0):
+		return range(len(module_list)), []
+
+	unknown_names = [name for name in names if (name not in [module_dict["name"] for module_dict in module_list])]
+	pending       = [module_index for module_index, module_dict in enumerate(module_list) if (module_dict["name"] in names)]
+	selected      = set()
+
+	while (len(pending) > 0):
+		module_index = pending.pop()
+
+		if (module_index not in selected):
+			selected.add(module_index)
+			pending.extend(plan["dependencies"][module_index])
+
+	return sorted(selected), unknown_names
+
+## Method Name: runSummary
+##
+## Purpose: Return the message summing up a run.
+##
+## Parameters
+## 1. plan           - The plan dictionary the run was started from.
+## 2. module_indices - The list of module_list indices which were run.
+## 3. thread_manager - The ThreadManager of the run.
+## 4. log_file       - The path to the log file of the run.
+## 5. elapsed        - The number of seconds the run took.
+##
+## Returns
+## The summary dictionary. Its return_code is 0 if every module returned 0, otherwise 1.
+def runSummary(plan, module_indices, thread_manager, log_file, elapsed):
+	threads = dict([(thread.module_index, thread) for thread in thread_manager.finished_list])
+	modules = []
+
+	for thread in thread_manager.abandoned_list:
+		threads[thread.module_index] = thread
+
+	## The threads are numbered within the run's subset of the module_list.
+	for run_index, module_index in enumerate(module_indices):
+		thread = threads.get(run_index)
+		module = {"index": module_index, "name": plan["module_list"][module_index]["name"], "return_code": None, "elapsed": None}
+
+		if (thread is None):
+			module["status"] = "skipped"
+
+		elif (thread in thread_manager.abandoned_list):
+			module["status"] = "abandoned"
+
+		else:
+			module["status"]      = "finished"
+			module["return_code"] = thread.return_code
+			module["elapsed"]     = thread.elapsed
+
+		modules.append(module)
+
+	return_code = int(len([module for module in modules if (module["return_code"] != 0)]) > 0)
+
+	return {"type": "done", "return_code": return_code, "modules": modules, "log_file": log_file, "elapsed": elapsed}
+
+## Method Name: printMessage
+##
+## Purpose: Print a message of the daemon itself, in the format of the framework's startup messages.
+##
+## Parameters
+## 1. level   - The level name. (INFO, WARNING or ERROR)
+## 2. method  - The class and method printing the message.
+## 3. message - The message.
+def printMessage(level, method, message):
+	print "Daemon - bitCollector_daemon." + method + " - " + level + " - " + message
+	sys.stdout.flush()
+
+## Method Name: serve
+##
+## Purpose: Run the daemon until it is asked to stop, interrupted or terminated.
+##
+## Parameters
+## 1. socket_path - The path of the Unix socket.
+## 2. pool_size   - The number of workers of the process pool. (0 for one per CPU)
+def serve(socket_path, pool_size):
+	## Replace the socket left behind by a daemon which didn't exit cleanly, but not one which is still listening.
+	if (os.path.exists(socket_path)):
+		try:
+			sendRequest(socket_path, {"command": "status"}).close()
+			printMessage("ERROR", "serve", "A daemon is already listening on " + socket_path)
+			sys.exit()
+
+		except socket.error:
+			os.remove(socket_path)
+
+	server = DaemonServer(socket_path, pool_size)
+
+	## Exit through the finally clause below, so that the socket is removed.
+	signal.signal(signal.SIGTERM, lambda signal_number, frame: sys.exit())
+
+	printMessage("INFO", "serve", "Listening on " + socket_path + " (process " + str(os.getpid()) + ")")
+
+	try:
+		while (server.stopping == 0):
+			server.handle_request()
+
+	except KeyboardInterrupt:
+		printMessage("INFO", "serve", "Interrupted")
+
+	finally:
+		server.server_close()
+		server.runner.closePool()
+
+		try:
+			os.remove(socket_path)
+
+		except OSError:
+			pass
+
+		printMessage("INFO", "serve", "Stopped after " + str(server.runner.runs) + " run(s)")
+
+## Method Name: sendRequest
+##
+## Purpose: Connect to the daemon and send it a request.
+##
+## Parameters
+## 1. socket_path - The path of the Unix socket.
+## 2. request     - The request dictionary.
+##
+## Returns
+## The connected socket, to read the response lines from.
+##
+## Raises
+## socket.error if no daemon is listening.
+def sendRequest(socket_path, request):
+	client_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+	try:
+		client_socket.connect(socket_path)
+		client_socket.sendall(json.dumps(request) + "\n")
+
+	except socket.error:
+		client_socket.close()
+		raise
+
+	return client_socket
+
+## Method Name: submitRun
+##
+## Purpose: Ask the daemon to run a configuration file and print the response as it streams in.
+##          The result records are written to STDOUT as JSON lines, everything else to STDERR.
+##
+## Parameters
+## 1. socket_path - The path of the Unix socket.
+## 2. command     - The command. (See _daemon_commands)
+## 3. config_path - The path to the configuration file. (None unless command is run)
+## 4. names       - The list of module names to run. (Empty for every module)
+##
+## Returns
+## The return code of the run. (0 if every module returned 0, otherwise 1)
+def submitRun(socket_path, command, config_path, names):
+	request = {"command": command}
+
+	## The daemon has its own working directory.
+	if (command == "run"):
+		request["config"]  = os.path.abspath(config_path)
+		request["modules"] = names
+
+	try:
+		client_socket = sendRequest(socket_path, request)
+
+	except socket.error as error:
+		print >> sys.stderr, "    Unable to connect to the daemon on " + socket_path + ": " + str(error)
+		return 1
+
+	return_code = 1
+
+	try:
+		for line in iter(client_socket.makefile("rb").readline, ""):
+			message = json.loads(line)
+
+			if (message["type"] == "result"):
+				print bitCollector_results.formatResult(message["module"], message["time"], message["record"])
+				sys.stdout.flush()
+
+			elif (message["type"] == "log"):
+				print >> sys.stderr, time.strftime(_client_time_format, time.localtime(message["time"])) + " - " + message["name"] + " - [" + message["level"] + "] - " + message["message"]
+
+			elif (message["type"] == "message"):
+				print >> sys.stderr, message["text"]
+
+			elif (message["type"] == "error"):
+				print >> sys.stderr, "    ERROR - " + message["message"]
+
+			elif (message["type"] == "done"):
+				return_code = message["return_code"]
+
+				print >> sys.stderr, "\n    Run finished in " + ("%.3f" % message["elapsed"]) + " seconds. Log file: " + message["log_file"]
+
+				for module in message["modules"]:
+					print >> sys.stderr, "        [" + str(module["index"]) + "] " + module["name"] + " - " + module["status"] + " - return code " + str(module["return_code"])
+
+			else:
+				return_code = 0
+
+				for key in sorted(message):
+					if (isinstance(message[key], list)):
+						print >> sys.stderr, "    " + key + ": " + ", ".join(message[key])
+
+					elif (key != "type"):
+						print >> sys.stderr, "    " + key + ": " + str(message[key])
+
+	finally:
+		client_socket.close()
+
+	return return_code
+
+## Method Name: main
+##
+## Purpose: Start the daemon or submit a request to it, depending on the command line.
+def main():
+	options = parseCLA()
+
+	if (options["serve"] is not None):
+		serve(options["serve"], options["pool_size"])
+
+	else:
+		sys.exit(submitRun(options["socket"], options["command"], options["config_path"], options["modules"]))
+
+## Method Name: parseCLA
+##
+## Purpose: Parse through and validate the CLA.
+##
+## Returns
+## The dictionary of options.
+def parseCLA():
+	options = {"serve": None, "pool_size": 0, "socket": None, "command": "run", "config_path": None, "modules": []}
+
+	## Validate # of CLA.
+	if (len(sys.argv) < 2):
+		print "    Invalid Usage: Use " + sys.argv[0] + " -h to display the help."
+		sys.exit()
+
+	arg_index = 1
+
+	while (arg_index < len(sys.argv)):
+		arg  = sys.argv[arg_index]
+		temp = arg.lower()
+
+		if (temp == "-h" or temp == "--help"):
+			print "\n    Usage: " + sys.argv[0] + " --serve <socket_path> [--pool-size <count>]"
+			print "           " + sys.argv[0] + " --socket <socket_path> <config_path> [<module> ...]"
+			print "           " + sys.argv[0] + " --socket <socket_path> --status | --stop"
+			print "\n    Options"
+			print "        -h | --help                - Prints out this help."
+			print "        -v | --version             - Prints out the version you are using."
+			print "        --serve <socket_path>      - Runs the daemon, listening on the Unix socket."
+			print "        --pool-size <count>        - The number of workers of the daemon's process pool. (Default: 0 - one per CPU)"
+			print "        --socket <socket_path>     - Sends a request to the daemon listening on the Unix socket."
+			print "        --status                   - Prints the status of the daemon instead of starting a run."
+			print "        --stop                     - Stops the daemon once its current run has finished."
+			print "\nconfig_path - The JSON file containing the settings of the run, as given to bitCollector_framework.py."
+			print "module      - The name of a module to run, along with the modules it depends on. (Default: every module)"
+			print "\nThe result records are written to STDOUT as JSON lines and the log records to STDERR."
+			sys.exit()
+
+		elif (temp == "-v" or temp == "--version"):
+			print "\n    " + _daemon_version
+			sys.exit()
+
+		elif (temp == "--status" or temp == "--stop"):
+			options["command"] = temp[2:]
+
+		elif (temp in ("--serve", "--pool-size", "--socket")):
+			if (arg_index + 1 >= len(sys.argv)):
+				print "    Invalid Usage: " + arg + " requires a value. Use " + sys.argv[0] + " -h to display the help."
+				sys.exit()
+
+			arg_index += 1
+			options[temp[2:].replace("-", "_")] = sys.argv[arg_index]
+
+		elif (re.match("--?\w+", temp)):
+			print "    Invalid Usage:     Use " + sys.argv[0] + " -h to display the help."
+			sys.exit()
+
+		elif (options["config_path"] is None):
+			options["config_path"] = arg
+
+		else:
+			options["modules"].append(arg)
+
+		arg_index += 1
+
+	try:
+		options["pool_size"] = int(options["pool_size"])
+
+	except ValueError:
+		print "    Invalid Usage: --pool-size requires a number. Use " + sys.argv[0] + " -h to display the help."
+		sys.exit()
+
+	if (options["serve"] is None and options["socket"] is None):
+		print "    Invalid Usage: Use --serve to start the daemon or --socket to send it a request. Use " + sys.argv[0] + " -h to display the help."
+		sys.exit()
+
+	if (options["serve"] is None and options["command"] == "run" and options["config_path"] is None):
+		print "    Invalid Usage: No configuration file given. Use " + sys.argv[0] + " -h to display the help."
+		sys.exit()
+
+	return options
+
+## This will prevent main() from running unless explicitly called.
+if (__name__ == "__main__"):
+	main()
@@ -0,0 +1,735 @@
+## File Name: bitCollector_fleet.py
+##
+## Author(s): Daniel "Albinohat" Mercado
+##
+## Purpose: This script runs a configuration file on many hosts at once.
+##          An agent runs on each host and listens on a TCP port. It runs the plans it is sent one at a time, the same
+##          way the daemon does (See bitCollector_daemon.ModuleRunner), and streams the log records, result records,
+##          summary and output files of each run back to the coordinator as JSON lines.
+##          Each run writes its output files to a directory of its own under the agent's work directory, so agents
+##          sharing a host never write to the same files.
+##          The coordinator compiles the configuration file once, sends the plan to every agent, a bounded number of
+##          sessions at a time, and writes what each agent streams back to a directory per agent while it reports the
+##          progress of the whole fleet.
+##          Agents started with a token only accept sessions which send the same token. Anything can be sent over a
+##          session without one, so an agent without a token should only listen on the loopback interface.
+
+## Standard imports (Static)
+import base64, hashlib, hmac, json, multiprocessing.pool, os, re, signal, socket, SocketServer, sys, threading, time, traceback
+
+## Framework imports (Static)
+import bitCollector_daemon, bitCollector_framework, bitCollector_results
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+_fleet_version = "bitCollector_fleet v0.1.0"
+
+## The commands a session request can hold.
+_agent_commands = ("run", "status", "stop")
+
+## The environment variable the token is read from when --token isn't given, so that it doesn't show up in the process list.
+_token_variable = "BITCOLLECTOR_FLEET_TOKEN"
+
+## The number of bytes of an output file sent per message.
+_artifact_chunk_size = 262144
+
+## The number of seconds between two progress lines of the coordinator.
+_progress_interval = 5
+
+## The entries a plan must have to be run by an agent.
+_plan_entries = ("config_path", "settings", "optional_settings", "module_list", "dependencies")
+
+## Class Declarations
+
+## Class Name: AgentServer
+##
+## Purpose: The TCP server of an agent. Sessions are handled one at a time, in the order they connect.
+class AgentServer(SocketServer.TCPServer):
+	## An agent restarted on the same port shouldn't wait for the old connections to time out.
+	allow_reuse_address = True
+
+	## Method Name: __init__
+	##
+	## Purpose: Bind the port.
+	##
+	## Parameters
+	## 1. address   - The (host, port) tuple to listen on.
+	## 2. pool_size - The number of workers of the process pool. (0 for one per CPU)
+	## 3. token          - The token sessions have to send. (None to accept every session)
+	## 4. work_directory - The directory holding the directory of each run and the caches shared by the runs.
+	def __init__(self, address, pool_size, token, work_directory):
+		SocketServer.TCPServer.__init__(self, address, AgentRequestHandler)
+
+		self.token          = token
+		self.work_directory = work_directory
+		self.stopping       = 0
+		self.runner         = bitCollector_daemon.ModuleRunner(pool_size)
+
+## Class Name: AgentRequestHandler
+##
+## Purpose: Read the request of a coordinator, run it and stream the run and its output files back.
+class AgentRequestHandler(bitCollector_daemon.StreamHandler):
+	## Method Name: handle
+	##
+	## Purpose: Check the token of the request and dispatch it.
+	def handle(self):
+		stream = bitCollector_daemon.ClientStream(self.wfile)
+
+		try:
+			request = json.loads(self.rfile.readline())
+
+		except ValueError:
+			stream.send({"type": "error", "message": "The request is not properly formatted JSON"})
+			return
+
+		if (not isinstance(request, dict) or request.get("command") not in _agent_commands):
+			stream.send({"type": "error", "message": "Unknown request. Use one of: " + ", ".join(_agent_commands)})
+			return
+
+		if (self.server.token is not None and not hmac.compare_digest(str(request.get("token", "")), self.server.token)):
+			printMessage("WARNING", "AgentRequestHandler.handle", "Refused a session from " + self.client_address[0] + " with the wrong token")
+			stream.send({"type": "error", "message": "The token is wrong"})
+			return
+
+		stream.send({"type": "agent", "host": socket.gethostname(), "pid": os.getpid(), "version": _fleet_version})
+
+		if (request["command"] == "status"):
+			stream.send(self.server.runner.status())
+
+		elif (request["command"] == "stop"):
+			printMessage("INFO", "AgentRequestHandler.handle", "Stopping on request from " + self.client_address[0])
+			self.server.stopping = 1
+			stream.send({"type": "stopping"})
+
+		else:
+			plan  = request.get("plan")
+			names = request.get("modules", [])
+
+			if (not isinstance(plan, dict) or len([entry for entry in _plan_entries if (entry not in plan)]) > 0 or not isinstance(names, list)):
+				stream.send({"type": "error", "message": "A run request needs a plan and a list of module names"})
+				return
+
+			run_directory = os.path.join(self.server.work_directory, time.strftime("%Y-%m-%d_%H-%M-%S") + "_" + str(os.getpid()) + "_" + str(self.server.runner.runs + 1))
+
+			printMessage("INFO", "AgentRequestHandler.handle", "Running " + plan["config_path"] + " for " + self.client_address[0] + " in " + run_directory)
+
+			try:
+				output_paths = self.server.runner.runPlan(agentPlan(plan, self.server.work_directory, run_directory), 0, names, stream)
+
+			## The agent outlives a failed run.
+			except Exception:
+				printMessage("ERROR", "AgentRequestHandler.handle", "The run failed: " + traceback.format_exc())
+				stream.send({"type": "error", "message": "The run failed: " + traceback.format_exc()})
+				return
+
+			for path in output_paths or []:
+				sendArtifact(stream, path)
+
+## Class Name: AgentSession
+##
+## Purpose: One session of the coordinator with an agent. Writes what the agent streams back to the agent's directory
+##          as it arrives and keeps the counters the coordinator reports the progress from.
+class AgentSession():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the session.
+	##
+	## Parameters
+	## 1. agent     - The host:port of the agent.
+	## 2. directory - The directory to write what the agent sends to.
+	def __init__(self, agent, directory):
+		self.agent     = agent
+		self.directory = directory
+
+		## queued, running, done or failed.
+		self.state       = "queued"
+		self.host        = None
+		self.error       = None
+		self.return_code = None
+		self.modules     = []
+		self.log_file    = None
+		self.start_time  = None
+		self.elapsed     = None
+
+		self.log_records    = 0
+		self.result_records = 0
+		self.artifacts      = []
+		self.artifact_bytes = 0
+
+	## Method Name: run
+	##
+	## Purpose: Send the plan to the agent and read its messages until it closes the connection.
+	##
+	## Parameters
+	## 1. request - The request dictionary. (See FleetCoordinator.run)
+	## 2. timeout - The number of seconds to wait for the agent to accept the session. (0 for no limit)
+	def run(self, request, timeout):
+		self.state      = "running"
+		self.start_time = time.time()
+
+		host, port = splitAddress(self.agent)
+
+		if (not os.path.isdir(self.directory)):
+			os.makedirs(self.directory)
+
+		log_output     = open(os.path.join(self.directory, "agent.log"), "wb")
+		results_output = open(os.path.join(self.directory, "results.jsonl"), "wb")
+		artifact       = None
+
+		try:
+			agent_socket = socket.create_connection((host, port), timeout or None)
+
+			## A module may run for a long time without logging anything. The run_timeout framework setting bounds the run.
+			agent_socket.settimeout(None)
+
+			try:
+				agent_socket.sendall(json.dumps(request) + "\n")
+
+				for line in iter(agent_socket.makefile("rb").readline, ""):
+					message = json.loads(line)
+
+					if (message["type"] == "result"):
+						results_output.write(bitCollector_results.formatResult(message["module"], message["time"], message["record"]) + "\n")
+						self.result_records += 1
+
+					elif (message["type"] == "log"):
+						log_output.write(time.strftime(bitCollector_daemon._client_time_format, time.localtime(message["time"])) + " - " + message["name"] + " - [" + message["level"] + "] - " + message["message"].encode("utf-8") + "\n")
+						self.log_records += 1
+
+					elif (message["type"] == "message"):
+						log_output.write(message["text"].encode("utf-8") + "\n")
+
+					elif (message["type"] == "agent"):
+						self.host = message["host"]
+
+					elif (message["type"] == "artifact"):
+						if (artifact is None):
+							artifact = ArtifactWriter(os.path.join(self.directory, "artifacts"), message["name"])
+
+						data = base64.b64decode(message["data"])
+						artifact.write(data)
+						self.artifact_bytes += len(data)
+
+					elif (message["type"] == "artifact_end"):
+						if (artifact is None):
+							artifact = ArtifactWriter(os.path.join(self.directory, "artifacts"), message["name"])
+
+						self.artifacts.append(artifact.close(message["size"], message["sha256"]))
+						artifact = None
+
+					elif (message["type"] == "done"):
+						self.return_code = message["return_code"]
+						self.modules     = message["modules"]
+						self.log_file    = message["log_file"]
+
+					elif (message["type"] == "error"):
+						self.error = message["message"]
+
+			finally:
+				agent_socket.close()
+
+		except (socket.error, IOError, OSError, ValueError, KeyError) as error:
+			self.error = "The session ended early: " + str(error)
+
+		finally:
+			log_output.close()
+			results_output.close()
+
+			if (artifact is not None):
+				artifact.abort()
+
+			self.elapsed = time.time() - self.start_time
+
+		if (self.error is None and self.return_code is None):
+			self.error = "The agent closed the session before the run finished"
+
+		if (self.error is not None):
+			self.state = "failed"
+
+		else:
+			self.state = "done"
+
+	## Method Name: summary
+	##
+	## Purpose: Return the session as a dictionary, for the fleet summary file.
+	def summary(self):
+		return {
+			"agent"          : self.agent,
+			"host"           : self.host,
+			"state"          : self.state,
+			"error"          : self.error,
+			"return_code"    : self.return_code,
+			"elapsed"        : self.elapsed,
+			"modules"        : self.modules,
+			"log_file"       : self.log_file,
+			"log_records"    : self.log_records,
+			"result_records" : self.result_records,
+			"artifacts"      : self.artifacts
+		}
+
+## Class Name: ArtifactWriter
+##
+## Purpose: Write an output file streamed by an agent, checking its size and SHA-256 once it is complete.
+##          The file is written under a temporary name and only renamed once it checks out.
+class ArtifactWriter():
+	## Method Name: __init__
+	##
+	## Purpose: Open the temporary file.
+	##
+	## Parameters
+	## 1. directory - The directory to write the file to.
+	## 2. name      - The name of the file on the agent. Only its base name is used.
+	def __init__(self, directory, name):
+		if (not os.path.isdir(directory)):
+			os.makedirs(directory)
+
+		self.path      = os.path.join(directory, re.sub("[^\w.-]", "_", os.path.basename(name)))
+		self.temp_path = self.path + ".part"
+		self.stream    = open(self.temp_path, "wb")
+		self.hash      = hashlib.sha256()
+		self.size      = 0
+
+	## Method Name: write
+	##
+	## Purpose: Write a chunk of the file.
+	##
+	## Parameters
+	## 1. data - The bytes of the chunk.
+	def write(self, data):
+		self.stream.write(data)
+		self.hash.update(data)
+		self.size += len(data)
+
+	## Method Name: close
+	##
+	## Purpose: Check the file against the size and digest sent by the agent and move it into place.
+	##
+	## Parameters
+	## 1. size   - The size of the file on the agent.
+	## 2. sha256 - The hex SHA-256 of the file on the agent.
+	##
+	## Returns
+	## The path of the file.
+	##
+	## Raises
+	## IOError if the file doesn't match.
+	def close(self, size, sha256):
+		self.stream.close()
+
+		if (size != self.size or sha256 != self.hash.hexdigest()):
+			self.abort()
+			raise IOError("The artifact " + os.path.basename(self.path) + " doesn't match its digest")
+
+		os.rename(self.temp_path, self.path)
+
+		return self.path
+
+	## Method Name: abort
+	##
+	## Purpose: Delete the incomplete file.
+	def abort(self):
+		self.stream.close()
+
+		try:
+			os.remove(self.temp_path)
+
+		except OSError:
+			pass
+
+## Class Name: FleetCoordinator
+##
+## Purpose: Run a plan on every agent, a bounded number of sessions at a time, and report the progress of the fleet.
+class FleetCoordinator():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the coordinator and a session per agent.
+	##
+	## Parameters
+	## 1. agents           - The list of host:port addresses of the agents.
+	## 2. sessions         - The largest number of agents to run at once.
+	## 3. output_directory - The directory the agents' directories are created in.
+	## 4. timeout          - The number of seconds to wait for an agent to accept a session. (0 for no limit)
+	def __init__(self, agents, sessions, output_directory, timeout):
+		self.agents           = agents
+		self.sessions         = max(1, min(sessions, len(agents)))
+		self.output_directory = output_directory
+		self.timeout          = timeout
+
+		## Two agents on the same host get different directories.
+		self.agent_sessions = [AgentSession(agent, os.path.join(output_directory, re.sub("[^\w.-]", "_", agent))) for agent in agents]
+
+		## Session threads print the line of their agent when it finishes.
+		self.print_lock = threading.Lock()
+		self.finished   = threading.Event()
+
+	## Method Name: run
+	##
+	## Purpose: Send the plan to every agent and wait for all of them to finish.
+	##
+	## Parameters
+	## 1. plan  - The plan dictionary returned by bitCollector_framework.compilePlan.
+	## 2. names - The list of module names to run. (Empty for every module)
+	## 3. token - The token of the agents. (None if they don't use one)
+	##
+	## Returns
+	## 0 if every agent ran every module with a return code of 0, otherwise 1.
+	def run(self, plan, names, token):
+		request = {"command": "run", "plan": plan, "modules": names, "token": token or ""}
+
+		print "    Running " + plan["config_path"] + " on " + str(len(self.agents)) + " agent(s), " + str(self.sessions) + " at a time"
+
+		progress_thread = threading.Thread(target=self.printProgress, name="FleetProgress")
+		progress_thread.daemon = True
+		progress_thread.start()
+
+		session_pool = multiprocessing.pool.ThreadPool(self.sessions)
+
+		try:
+			## A timeout keeps the wait interruptible. (Python 2 ignores KeyboardInterrupt in an untimed get)
+			session_pool.map_async(lambda agent_session: self.runSession(agent_session, request), self.agent_sessions).get(bitCollector_framework._process_result_timeout)
+
+		finally:
+			session_pool.terminate()
+			self.finished.set()
+
+		summaries = [agent_session.summary() for agent_session in self.agent_sessions]
+
+		with open(os.path.join(self.output_directory, "fleet_summary.json"), "wb") as summary_file:
+			json.dump({"config_path": plan["config_path"], "modules": names, "agents": summaries}, summary_file, indent=1, sort_keys=True)
+
+		print "\n    " + self.progressLine()
+		print "    Summary: " + os.path.join(self.output_directory, "fleet_summary.json")
+
+		return int(len([summary for summary in summaries if (summary["state"] != "done" or summary["return_code"] != 0)]) > 0)
+
+	## Method Name: runSession
+	##
+	## Purpose: Run the session of one agent in a thread of the session pool and print its outcome.
+	##
+	## Parameters
+	## 1. agent_session - The AgentSession.
+	## 2. request       - The request dictionary.
+	def runSession(self, agent_session, request):
+		try:
+			agent_session.run(request, self.timeout)
+
+		except Exception:
+			agent_session.state = "failed"
+			agent_session.error = traceback.format_exc()
+
+		if (agent_session.state == "done"):
+			outcome = "return code " + str(agent_session.return_code) + " - " + str(agent_session.result_records) + " result record(s) - " + str(len(agent_session.artifacts)) + " artifact(s)"
+
+		else:
+			outcome = "failed - " + str(agent_session.error).strip()
+
+		with self.print_lock:
+			print "    " + agent_session.agent + (" (" + agent_session.host + ")" if (agent_session.host is not None) else "") + " - " + ("%.3f" % agent_session.elapsed) + " seconds - " + outcome
+			sys.stdout.flush()
+
+	## Method Name: printProgress
+	##
+	## Purpose: Print the progress of the fleet every _progress_interval seconds until the run is over.
+	def printProgress(self):
+		while (not self.finished.wait(_progress_interval)):
+			with self.print_lock:
+				print "    " + self.progressLine()
+				sys.stdout.flush()
+
+	## Method Name: progressLine
+	##
+	## Purpose: Return the progress of the fleet as one line.
+	def progressLine(self):
+		states = dict([(state, 0) for state in ("queued", "running", "done", "failed")])
+
+		for agent_session in self.agent_sessions:
+			states[agent_session.state] += 1
+
+		return "Agents: " + ", ".join([str(states[state]) + " " + state for state in ("done", "failed", "running", "queued")]) + " - " + str(sum([agent_session.result_records for agent_session in self.agent_sessions])) + " result record(s) - " + str(sum([agent_session.log_records for agent_session in self.agent_sessions])) + " log record(s) - " + str(sum([len(agent_session.artifacts) for agent_session in self.agent_sessions])) + " artifact(s), " + ("%.1f" % (sum([agent_session.artifact_bytes for agent_session in self.agent_sessions]) / 1048576.0)) + " MB"
+
+## Classless Method Declarations
+
+## Method Name: sendArtifact
+##
+## Purpose: Stream an output file of a run to the coordinator, followed by its size and SHA-256.
+##
+## Parameters
+## 1. stream - The ClientStream of the session.
+## 2. path   - The path to the file.
+def sendArtifact(stream, path):
+	artifact_hash = hashlib.sha256()
+	size          = 0
+
+	try:
+		with open(path, "rb") as artifact_file:
+			for data in iter(lambda: artifact_file.read(_artifact_chunk_size), ""):
+				artifact_hash.update(data)
+				size += len(data)
+				stream.send({"type": "artifact", "name": path, "data": base64.b64encode(data)})
+
+	except (IOError, OSError) as error:
+		stream.send({"type": "error", "message": "Unable to send " + path + ": " + str(error)})
+		return
+
+	stream.send({"type": "artifact_end", "name": path, "size": size, "sha256": artifact_hash.hexdigest()})
+
+## Method Name: agentPlan
+##
+## Purpose: Return a copy of a plan which writes the log file, the results and the container to the run's directory.
+##          The file cache and the platform cache are kept in the work directory unless the config places them, so
+##          that the runs of an agent still share them.
+##
+## Parameters
+## 1. plan           - The plan dictionary sent by the coordinator.
+## 2. work_directory - The work directory of the agent.
+## 3. run_directory  - The directory of the run.
+def agentPlan(plan, work_directory, run_directory):
+	settings          = dict(plan["settings"])
+	optional_settings = dict(plan["optional_settings"])
+
+	settings["log_file"] = os.path.join(run_directory, os.path.basename(settings["log_file"]))
+
+	for key in ("results_path", "container_path"):
+		if (optional_settings.get(key, "") != ""):
+			optional_settings[key] = os.path.join(run_directory, os.path.basename(optional_settings[key]))
+
+	for key, name in (("file_cache_path", "bitCollector_cache.sqlite"), ("platform_cache_path", "bitCollector_platform.json")):
+		if (optional_settings.get(key, "") == ""):
+			optional_settings[key] = os.path.join(work_directory, name)
+
+	return dict(plan, settings=settings, optional_settings=optional_settings)
+
+## Method Name: splitAddress
+##
+## Purpose: Split a host:port address.
+##
+## Parameters
+## 1. address - The address. ([host]:port, the host defaults to localhost)
+##
+## Returns
+## A (host, port) tuple.
+##
+## Raises
+## ValueError if the port isn't a number.
+def splitAddress(address):
+	host, separator, port = address.rpartition(":")
+
+	return (host.strip("[]") or "localhost"), int(port)
+
+## Method Name: readAgents
+##
+## Purpose: Return the list of agent addresses from the --agents option.
+##
+## Parameters
+## 1. agents - A comma-separated list of host:port addresses, or @ followed by the path to a file with one address per line.
+def readAgents(agents):
+	if (agents.startswith("@")):
+		with open(agents[1:], "r") as agents_file:
+			agents = ",".join([line.split("#")[0].strip() for line in agents_file])
+
+	return [agent.strip() for agent in agents.split(",") if (agent.strip() != "")]
+
+## Method Name: serveAgent
+##
+## Purpose: Run an agent until it is asked to stop, interrupted or terminated.
+##
+## Parameters
+## 1. address   - The host:port to listen on.
+## 2. pool_size - The number of workers of the process pool. (0 for one per CPU)
+## 3. token          - The token sessions have to send. (None to accept every session)
+## 4. work_directory - The directory holding the directory of each run and the caches shared by the runs.
+def serveAgent(address, pool_size, token, work_directory):
+	host, port = splitAddress(address)
+	server     = AgentServer((host, port), pool_size, token, os.path.abspath(work_directory))
+
+	if (token is None and host not in ("localhost", "127.0.0.1", "::1")):
+		printMessage("WARNING", "serveAgent", "No token was given. Anyone who can reach " + address + " can run modules on this host.")
+
+	signal.signal(signal.SIGTERM, lambda signal_number, frame: sys.exit())
+
+	printMessage("INFO", "serveAgent", "Listening on " + host + ":" + str(server.server_address[1]) + " (process " + str(os.getpid()) + "), writing the runs to " + server.work_directory)
+
+	try:
+		while (server.stopping == 0):
+			server.handle_request()
+
+	except KeyboardInterrupt:
+		printMessage("INFO", "serveAgent", "Interrupted")
+
+	finally:
+		server.server_close()
+		server.runner.closePool()
+
+		printMessage("INFO", "serveAgent", "Stopped after " + str(server.runner.runs) + " run(s)")
+
+## Method Name: commandAgents
+##
+## Purpose: Send a status or stop request to each agent and print the responses.
+##
+## Parameters
+## 1. agents  - The list of host:port addresses of the agents.
+## 2. command - status or stop.
+## 3. token   - The token of the agents. (None if they don't use one)
+## 4. timeout - The number of seconds to wait for an agent. (0 for no limit)
+##
+## Returns
+## The number of agents which couldn't be reached or refused the request.
+def commandAgents(agents, command, token, timeout):
+	failed = 0
+
+	for agent in agents:
+		print "\n    " + agent
+
+		try:
+			agent_socket = socket.create_connection(splitAddress(agent), timeout or None)
+
+			try:
+				agent_socket.sendall(json.dumps({"command": command, "token": token or ""}) + "\n")
+
+				printed = {}
+
+				for line in iter(agent_socket.makefile("rb").readline, ""):
+					message = json.loads(line)
+
+					if (message["type"] == "error"):
+						failed += 1
+
+					## The status repeats some of the entries of the agent's greeting.
+					for key in sorted(message):
+						if (key != "type" and printed.get(key) != message[key]):
+							print "        " + key + ": " + str(message[key])
+							printed[key] = message[key]
+
+			finally:
+				agent_socket.close()
+
+		except (socket.error, ValueError) as error:
+			print "        Unable to reach the agent: " + str(error)
+			failed += 1
+
+	return failed
+
+## Method Name: printMessage
+##
+## Purpose: Print a message of the agent in the framework's startup format. The agent has no log file of its own.
+##
+## Parameters
+## 1. level   - The level of the message. (INFO, WARNING or ERROR)
+## 2. method  - The name of the method printing the message.
+## 3. message - The message.
+def printMessage(level, method, message):
+	print "Agent - bitCollector_fleet." + method + " - " + level + " - " + message
+	sys.stdout.flush()
+
+## Method Name: main
+##
+## Purpose: Start an agent or coordinate a run, depending on the command line.
+def main():
+	options = parseCLA()
+	token   = options["token"] or os.environ.get(_token_variable) or None
+
+	if (options["agent"] is not None):
+		serveAgent(options["agent"], options["pool_size"], token, options["work_dir"])
+		return
+
+	agents = readAgents(options["agents"])
+
+	if (options["command"] != "run"):
+		sys.exit(1 if (commandAgents(agents, options["command"], token, options["timeout"]) > 0) else 0)
+
+	## Validate and compile the configuration file once for the whole fleet.
+	plan = bitCollector_framework.compilePlan(options["config_path"])[0]
+
+	coordinator = FleetCoordinator(agents, options["sessions"], os.path.abspath(options["output"]), options["timeout"])
+	sys.exit(coordinator.run(plan, options["modules"], token))
+
+## Method Name: parseCLA
+##
+## Purpose: Parse through and validate the CLA.
+##
+## Returns
+## The dictionary of options.
+def parseCLA():
+	options = {"agent": None, "pool_size": "0", "token": None, "work_dir": "bitCollector_agent", "agents": None, "sessions": "8", "output": "bitCollector_fleet", "timeout": "30", "command": "run", "config_path": None, "modules": []}
+
+	## Validate # of CLA.
+	if (len(sys.argv) < 2):
+		print "    Invalid Usage: Use " + sys.argv[0] + " -h to display the help."
+		sys.exit()
+
+	arg_index = 1
+
+	while (arg_index < len(sys.argv)):
+		arg  = sys.argv[arg_index]
+		temp = arg.lower()
+
+		if (temp == "-h" or temp == "--help"):
+			print "\n    Usage: " + sys.argv[0] + " --agent <host:port> [--pool-size <count>] [--token <token>] [--work-dir <directory>]"
+			print "           " + sys.argv[0] + " --agents <agents> [options] <config_path> [<module> ...]"
+			print "           " + sys.argv[0] + " --agents <agents> --status | --stop"
+			print "\n    Options"
+			print "        -h | --help                - Prints out this help."
+			print "        -v | --version             - Prints out the version you are using."
+			print "        --agent <host:port>        - Runs an agent, listening on the address."
+			print "        --pool-size <count>        - The number of workers of the agent's process pool. (Default: 0 - one per CPU)"
+			print "        --token <token>            - The token agents require from the coordinator. (Default: $" + _token_variable + ")"
+			print "        --work-dir <directory>     - The directory the agent writes each run's output files to, one directory per run. (Default: bitCollector_agent)"
+			print "        --agents <agents>          - The comma-separated host:port addresses of the agents, or @<path> to read them from a file."
+			print "        --sessions <count>         - The largest number of agents to run at once. (Default: 8)"
+			print "        --output <directory>       - The directory to write each agent's logs, results and artifacts to. (Default: bitCollector_fleet)"
+			print "        --timeout <seconds>        - How long to wait for an agent to accept a session. (Default: 30 - 0 for no limit)"
+			print "        --status                   - Prints the status of each agent instead of starting a run."
+			print "        --stop                     - Stops each agent once its current run has finished."
+			print "\nconfig_path - The JSON file containing the settings of the run, as given to bitCollector_framework.py."
+			print "              The additional_paths are paths on the agents' hosts. The output files go to a directory per run under"
+			print "              each agent's --work-dir, keeping the names the config gives them."
+			print "module      - The name of a module to run, along with the modules it depends on. (Default: every module)"
+			sys.exit()
+
+		elif (temp == "-v" or temp == "--version"):
+			print "\n    " + _fleet_version
+			sys.exit()
+
+		elif (temp == "--status" or temp == "--stop"):
+			options["command"] = temp[2:]
+
+		elif (temp in ("--agent", "--pool-size", "--token", "--work-dir", "--agents", "--sessions", "--output", "--timeout")):
+			if (arg_index + 1 >= len(sys.argv)):
+				print "    Invalid Usage: " + arg + " requires a value. Use " + sys.argv[0] + " -h to display the help."
+				sys.exit()
+
+			arg_index += 1
+			options[temp[2:].replace("-", "_")] = sys.argv[arg_index]
+
+		elif (re.match("--?\w+", temp)):
+			print "    Invalid Usage:     Use " + sys.argv[0] + " -h to display the help."
+			sys.exit()
+
+		elif (options["config_path"] is None):
+			options["config_path"] = arg
+
+		else:
+			options["modules"].append(arg)
+
+		arg_index += 1
+
+	for option in ("pool_size", "sessions", "timeout"):
+		try:
+			options[option] = int(options[option])
+
+		except ValueError:
+			print "    Invalid Usage: --" + option.replace("_", "-") + " requires a number. Use " + sys.argv[0] + " -h to display the help."
+			sys.exit()
+
+	if (options["agent"] is None and options["agents"] is None):
+		print "    Invalid Usage: Use --agent to start an agent or --agents to coordinate a run. Use " + sys.argv[0] + " -h to display the help."
+		sys.exit()
+
+	if (options["agent"] is None and options["command"] == "run" and options["config_path"] is None):
+		print "    Invalid Usage: No configuration file given. Use " + sys.argv[0] + " -h to display the help."
+		sys.exit()
+
+	return options
+
+## This will prevent main() from running unless explicitly called.
+if (__name__ == "__main__"):
+	main()
@@ -7,16 +7,167 @@
 ##          module-independent tasks.
 
 ## Standard imports (Static)
-import json, logging, logging.handlers, platform
-import os, re, sys, threading, time
+import json, logging, logging.handlers, multiprocessing, multiprocessing.pool, platform
+import os, Queue, re, signal, sys, threading, time, traceback
 
 ## Third-party imports (Static)
 
+## Framework imports (Static)
+import bitCollector_cache, bitCollector_config, bitCollector_container, bitCollector_hashing, bitCollector_logging, bitCollector_platform, bitCollector_profile, bitCollector_progress, bitCollector_resources, bitCollector_results, bitCollector_sqlite, bitCollector_walker
+
 ## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
 _framework_version = "bitCollector_framework v0.2.1 Released 2015-03-09"
 
+## The optional framework configuration entries and the values used when they are not present.
+_optional_framework_defaults = {
+	"max_concurrency"       : 1,
+	"process_pool_size"     : 0,
+	"run_timeout"           : 0,
+	"warm_import"           : 0,
+	"warm_import_workers"   : 4,
+	"async_logging"         : 0,
+	"log_queue_size"        : 10000,
+	"log_queue_policy"      : "block",
+	"walker_threads"        : 8,
+	"walker_exclude_mounts" : ["/proc", "/sys", "/dev"],
+	"walker_cross_mounts"   : 1,
+	"file_index"            : 1,
+	"hash_workers"          : 4,
+	"hash_algorithms"       : ["md5", "sha1", "sha256"],
+	"file_cache"            : 1,
+	"file_cache_path"       : "",
+	"container"             : 1,
+	"container_path"        : "",
+	"container_codec"       : "zstd",
+	"container_workers"     : 2,
+	"container_block_size"  : 1048576,
+	"sqlite_workers"        : 4,
+	"sqlite_batch_size"     : 500,
+	"results_sinks"         : ["jsonl"],
+	"results_path"          : "",
+	"results_queue_size"    : 10000,
+	"results_batch_size"    : 500,
+	"platform_cache"        : 1,
+	"platform_cache_path"   : "",
+	"platform_cache_ttl"    : 3600
+}
+
+## The optional module configuration entries and the values used when they are not present.
+_optional_module_defaults = {
+	"executor"        : "thread",
+	"depends_on"      : [],
+	"provides"        : [],
+	"timeout"         : 0,
+	"max_rss"         : 0,
+	"max_cpu_seconds" : 0
+}
+
+## The supported values of the executor module configuration entry.
+_module_executors = ("thread", "process")
+
+## The schema types of the configuration entries. (See bitCollector_config._value_types)
+## The types of the optional entries follow from their default values.
+_required_framework_schema = {
+	"log_file"         : "string",
+	"logging_format"   : "string",
+	"logging_level"    : "string",
+	"log_to_file"      : "flag",
+	"log_to_stdout"    : "flag",
+	"additional_paths" : "path_list",
+	"module_list"      : "module_list"
+}
+
+_required_module_schema = {
+	"name"       : "string",
+	"parameters" : "parameter_list"
+}
+
+_optional_framework_schema = dict([(key, bitCollector_config.defaultType(default)) for key, default in _optional_framework_defaults.iteritems()])
+
+## depends_on and provides accept a single name as well as a list of names.
+_optional_module_schema = dict([(key, bitCollector_config.defaultType(default)) for key, default in _optional_module_defaults.iteritems()])
+_optional_module_schema.update({"depends_on": "name_list", "provides": "name_list"})
+
+## The number of seconds to wait for a process-backed module before giving up on it.
+_process_result_timeout = 31536000
+
+## The number of seconds between two checks of the modules' resource limits by the watchdog.
+_watchdog_interval = 0.5
+
+## The number of seconds between two reports of the counters of a process-backed module while the run's progress is
+## published, and between two reads of the reports by the scheduler.
+_process_stats_interval = 0.25
+
+## The queue process pool workers report the ID of the process running each module and its counters on. (Only set in the workers)
+_worker_pid_queue = None
+
 ## Class Declarations
 
+## Class Name: PicklableState
+##
+## Purpose: Allow instances passed to process-backed modules to be pickled.
+##          Loggers, handlers and other per-process attributes are dropped and the logger is recreated on the other side.
+class PicklableState():
+	## The attributes which can't cross a process boundary.
+	_unpicklable_attributes = ("logger",)
+
+	## Method Name: __getstate__
+	##
+	## Purpose: Return a copy of the instance dictionary without the unpicklable attributes.
+	def __getstate__(self):
+		state = dict(self.__dict__)
+
+		for attribute in self._unpicklable_attributes:
+			state.pop(attribute, None)
+
+		return state
+
+	## Method Name: __setstate__
+	##
+	## Purpose: Restore the instance dictionary and recreate the logger for this class.
+	##
+	## Parameters
+	## 1. state - The dictionary returned by __getstate__.
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+
+		for attribute in self._unpicklable_attributes:
+			setattr(self, attribute, None)
+
+		if ("logger" in self._unpicklable_attributes):
+			self.logger = logging.getLogger(self.__class__.__name__)
+
+## Class Name: BufferingLogHandler
+##
+## Purpose: Collect the log records of a process-backed module so that they can be sent back to the framework.
+class BufferingLogHandler(logging.Handler):
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the handler and the list of buffered records.
+	def __init__(self):
+		logging.Handler.__init__(self)
+
+		self.records = []
+
+	## Method Name: emit
+	##
+	## Purpose: Store the record as a picklable dictionary.
+	##
+	## Parameters
+	## 1. record - The LogRecord to buffer.
+	def emit(self, record):
+		## Merge the arguments and the traceback into plain strings since neither is guaranteed to pickle.
+		record_dict = dict(record.__dict__)
+		record_dict["msg"]  = record.getMessage()
+		record_dict["args"] = None
+
+		if (record.exc_info):
+			record_dict["exc_text"] = logging.Formatter().formatException(record.exc_info)
+			record_dict["exc_info"] = None
+
+		self.records.append(record_dict)
+
+
 ## Class Name: InitializeBCModuleThread - A thread which parses through and executes a command.
 ##
 ## Purpose: Spin up a new thread to run a dynamically imported module.
@@ -24,12 +175,15 @@ class InitializeBCModuleThread(threading.Thread):
 	## Method Name: __init__
 	##
 	## Purpose: Initializes a new thread and calls the main method of a BitCollector module.
+	##          The thread is started by the ModuleScheduler once it has been registered with the ThreadManager.
 	##
 	## Parameters
 	## 1. framework_settings - An instance of the FrameworkSettings class containing settings required to start the framework.
 	## 2. platform           - An instance of the Platform class containing the platform-independent attributes as well as a platform-dependent object.
 	## 3. module_dict        - The name and parameters to pass to the BitCollector module to be initialized.
-	def __init__(self, framework_settings, platform_details, module_dict):
+	## 4. module_index       - The position of the module in the module_list.
+	## 5. scheduler          - The ModuleScheduler to notify once the BitCollector module has finished.
+	def __init__(self, framework_settings, platform_details, module_dict, module_index, scheduler):
 		## Initialize the Logger for this class.
 		self.logger = logging.getLogger(self.__class__.__name__)
 		self.logger.debug("Entering BitCollector.InitializeBCModuleThread.__init__()")
@@ -38,49 +192,271 @@ class InitializeBCModuleThread(threading.Thread):
 		self.path_to_main = os.path.dirname(os.path.realpath(__file__))
 
 		## Initialize the parent thread object.
-		threading.Thread.__init__(self)
+		threading.Thread.__init__(self, name=module_dict["name"])
+
+		## Don't let an abandoned module keep the interpreter alive.
+		self.daemon = True
+
+		## Set once the module has finished, whether or not it succeeded.
+		self.completed = threading.Event()
+
+		## Determine where the module's main method will run. (thread or process)
+		self.executor = module_dict.get("executor", _optional_module_defaults["executor"])
 
 		self.framework_settings = framework_settings
 		self.platform_details   = platform_details
 		self.module_dict        = module_dict
-
-		self.start()
+		self.module_index       = module_index
+		self.scheduler          = scheduler
+
+		## Initialize the attributes reported back to the scheduler.
+		## The return code stays None if the module could not be run.
+		self.thread_id   = None
+		self.return_code = None
+		self.results     = None
+		self.start_time  = None
+		self.elapsed     = None
+
+		## The resource usage of the module. The CPU time of a thread-backed module only covers the thread running its main method.
+		## The process ID is reported by the pool worker running a process-backed module. (See ModuleWatchdog)
+		self.native_id   = None
+		self.pid         = None
+		self.cpu_start   = None
+		self.cpu_seconds = None
+		self.peak_rss    = None
+
+		## The files, bytes and log volume of the module. (None unless the run is profiled or its progress is published)
+		self.stats = None
 
 	## run - This method calls the executeCommand method of the specified feature set.
 	def run(self):
 		## Get the thread ID
-		self.thread_id = threading.current_thread()
+		self.thread_id  = threading.current_thread()
+		self.start_time = time.time()
+
+		if (self.framework_settings.profile == 1 or self.framework_settings.progress is not None):
+			self.stats = bitCollector_profile.ModuleStats()
+			bitCollector_profile.beginModule(self.stats)
+
+		if (self.framework_settings.progress is not None):
+			self.framework_settings.progress.moduleStarted(self.module_index, self.module_dict["name"], self.executor, self.stats)
 
 		try:
-			entry_point = getattr(__import__(self.module_dict["name"]), "main")
-			self.logger.info("Successfully imported BitCollector module: " + self.module_dict["name"] + ".main")
+			if (self.executor == "process"):
+				self.runInProcess()
+
+			else:
+				self.native_id = bitCollector_resources.currentThreadId()
+				self.cpu_start = bitCollector_resources.threadCpuSeconds(self.native_id)
+
+				try:
+					## The module is imported on first use unless the warm-up pool got to it first.
+					entry_point = self.scheduler.module_loader.loadEntryPoint(self.module_dict["name"])
 
-			## Call the entry_point (main) method of the BitCollector module.
-			self.return_code = entry_point(self.thread_id, self.path_to_main, self.framework_settings, self.platform_details, self.module_dict)
+					## Call the entry_point (main) method of the BitCollector module.
+					self.return_code, self.results = splitModuleReturn(callEntryPoint(entry_point, (self.thread_id, self.path_to_main, self.framework_settings, self.platform_details, self.module_dict), self.framework_settings, self.module_index))
+
+				finally:
+					cpu_end = bitCollector_resources.threadCpuSeconds(self.native_id)
+
+					if (self.cpu_start is not None and cpu_end is not None):
+						self.cpu_seconds = cpu_end - self.cpu_start
 
 		except AttributeError:
 			self.logger.warning("Failed to import BitCollector module: " + self.module_dict["name"] + ".main")
 
+		except ImportError as error:
+			self.logger.warning("Failed to import BitCollector module: " + self.module_dict["name"] + ".main - " + str(error))
+
+		finally:
+			self.elapsed = time.time() - self.start_time
+
+			bitCollector_profile.beginModule(None)
+
+			## Hand the concurrency slot back to the scheduler.
+			self.scheduler.moduleFinished(self)
+			self.completed.set()
+
+	## Method Name: runInProcess
+	##
+	## Purpose: Run the module's main method in a worker of the scheduler's process pool and replay its logs here.
+	def runInProcess(self):
+		## The module opens its own connection to the file cache, so write out what this process has stored so far.
+		if (self.framework_settings.file_cache is not None):
+			self.framework_settings.file_cache.flush()
+
+		async_result = self.scheduler.process_pool.apply_async(runBCModuleProcess, (self.path_to_main, self.framework_settings, self.platform_details, self.module_dict, self.module_index))
+
+		## A timeout keeps the wait interruptible. (Python 2 ignores KeyboardInterrupt in an untimed get)
+		return_value, log_records, cache_counts, results_spool, usage, container_path = async_result.get(_process_result_timeout)
+		self.return_code, self.results = splitModuleReturn(return_value)
+
+		self.pid         = usage["pid"]
+		self.cpu_seconds = usage["cpu_seconds"]
+		self.peak_rss    = max(self.peak_rss, usage["peak_rss"])
+
+		if (self.stats is not None):
+			self.stats.setDict(usage["stats"])
+
+		if (self.framework_settings.file_cache is not None):
+			self.framework_settings.file_cache.addCounts(cache_counts)
+
+		## Replay the module's log records through this process's handlers.
+		for record_dict in log_records:
+			record = logging.makeLogRecord(record_dict)
+			logging.getLogger(record.name).handle(record)
+
+		## Queue the result records the module spooled to a file.
+		if (results_spool is not None):
+			self.framework_settings.results.replaySpool(results_spool)
+
+		## Copy the artifacts the module stored into the run's container.
+		if (container_path is not None):
+			try:
+				self.framework_settings.container.mergeContainer(container_path)
+
+			except (IOError, OSError, ValueError) as error:
+				self.logger.error("Unable to merge the container " + container_path + " into " + self.framework_settings.container.path + ": " + str(error))
+
+## Class Name: ModuleLoader
+##
+## Purpose: Import BitCollector modules on first use, optionally warming them up in a background thread pool,
+##          and record how long each import took.
+class ModuleLoader():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the caches of imported entry points, import failures and import durations.
+	##
+	## Parameters: None
+	def __init__(self):
+		## Initialize the Logger for this class.
+		self.logger = logging.getLogger(self.__class__.__name__)
+		self.logger.debug("Entering BitCollector.ModuleLoader.__init__()")
+
+		self.entry_points  = {}
+		self.import_errors = {}
+
+		## Each entry is a tuple of the import duration in seconds and how the module was imported. (on demand or warm-up)
+		self.import_times  = {}
+
+		## One lock per module name so that concurrent loads of the same module import it once.
+		self.lock       = threading.Lock()
+		self.name_locks = {}
+
+		self.warm_pool = None
+
+	## Method Name: loadEntryPoint
+	##
+	## Purpose: Return the main method of a BitCollector module, importing the module if it hasn't been yet.
+	##
+	## Parameters
+	## 1. name   - The name of the BitCollector module.
+	## 2. reason - How the module is being imported. (on demand or warm-up)
+	##
+	## Raises
+	## ImportError if the module or its main method could not be imported. Failures are cached.
+	def loadEntryPoint(self, name, reason="on demand"):
+		with self.lock:
+			name_lock = self.name_locks.setdefault(name, threading.Lock())
+
+		with name_lock:
+			if (name in self.entry_points):
+				return self.entry_points[name]
+
+			if (name in self.import_errors):
+				raise ImportError(self.import_errors[name])
+
+			import_start = time.time()
+
+			try:
+				entry_point = getattr(__import__(name), "main")
+
+			except AttributeError:
+				self.import_errors[name] = "The module has no main method"
+
+			except ImportError as error:
+				self.import_errors[name] = str(error)
+
+			## Errors raised by the module's own top-level code. (SyntaxError, missing files, etc)
+			except Exception:
+				self.import_errors[name] = "".join(traceback.format_exception_only(*sys.exc_info()[:2])).strip()
+
+			self.import_times[name] = (time.time() - import_start, reason)
+
+			if (name in self.import_errors):
+				raise ImportError(self.import_errors[name])
+
+			self.entry_points[name] = entry_point
+			self.logger.info("Successfully imported BitCollector module: " + name + ".main in " + ("%.3f" % self.import_times[name][0]) + " seconds (" + reason + ")")
+
+			return entry_point
+
+	## Method Name: warmUp
+	##
+	## Purpose: Import the given BitCollector modules in a background thread pool without waiting for them.
+	##          Python 2 holds a global import lock while a module is imported, so the imports overlap the scheduling
+	##          and running of modules rather than each other.
+	##
+	## Parameters
+	## 1. names   - The list of BitCollector module names to import.
+	## 2. workers - The number of threads in the warm-up pool.
+	def warmUp(self, names, workers):
+		self.warm_pool = multiprocessing.pool.ThreadPool(max(1, min(workers, len(names))))
+		self.warm_pool.map_async(self.warmUpModule, names)
+		self.warm_pool.close()
+
+	## Method Name: warmUpModule
+	##
+	## Purpose: Import one BitCollector module in the warm-up pool. Failures are reported when the module is scheduled.
+	##
+	## Parameters
+	## 1. name - The name of the BitCollector module.
+	def warmUpModule(self, name):
+		try:
+			self.loadEntryPoint(name, "warm-up")
+
 		except ImportError:
-			self.logger.warning("Failed to import BitCollector module: " + self.module_dict["name"] + ".main")
+			pass
+
+	## Method Name: logImportReport
+	##
+	## Purpose: Log the import duration of each BitCollector module, slowest first.
+	def logImportReport(self):
+		with self.lock:
+			import_times = sorted(self.import_times.items(), key=lambda item: item[1][0], reverse=True)
+
+		self.logger.info("Module import report: " + str(len(import_times)) + " module(s) imported in " + ("%.3f" % sum([item[1][0] for item in import_times])) + " seconds")
+
+		for name, (seconds, reason) in import_times:
+			if (name in self.import_errors):
+				status = "failed"
+
+			else:
+				status = "ok"
+
+			self.logger.info("    " + name + " - " + ("%.3f" % seconds) + " seconds - " + reason + " - " + status)
 
 ## Class Name: FrameworkSettings
 ##
 ## Purpose: Hold information about the settings required to run the framework.
-class FrameworkSettings():
+class FrameworkSettings(PicklableState):
+	## The logging objects belong to the framework process.
+	_unpicklable_attributes = ("root_logger", "log_file_handler", "log_console_handler", "log_file_formatter", "log_console_formatter", "async_log_handler", "progress")
+
 	## Method Name: __init__
 	##
 	## Purpose: Initialize the settings required to start the framework.
 	##
 	## Parameters
-	## 1. tuple - A 7-part tuple containing runtime settings.
+	## 1. tuple - An 8-part tuple containing runtime settings.
 	##    Index 0 - The path to the file to write the logs to.
-	##    Index 1 - The format to in which to save the log file (CSV or HTML)
+	##    Index 1 - The format to in which to save the log file (csv, html, jsonl or bin)
 	##    Index 2 - The default log level which may be overridden by individual modules.
 	##    Index 3 - A boolean tracking whether or not to log to the log file.
 	##    Index 4 - A boolean tracking whether or not to log to STDOUT.
 	##    Index 5 - The list of strings containing additional module paths.
 	##    Index 6 - The list of module dictionaries containing module-specific settings.
+	##    Index 7 - The dictionary of optional framework settings. Missing entries use _optional_framework_defaults.
 	def __init__(self, tuple):
 		## Initialize the Logger for this class.
 		## Store the runtime settings so that modules will have access to them.
@@ -92,27 +468,112 @@ class FrameworkSettings():
 		self.additional_paths = tuple[5]
 		self.module_list      = tuple[6]
 
+		## Store the optional runtime settings, falling back to the defaults.
+		optional_settings     = dict(_optional_framework_defaults)
+		optional_settings.update(tuple[7])
+
+		self.max_concurrency     = optional_settings["max_concurrency"]
+		self.process_pool_size   = optional_settings["process_pool_size"]
+		self.run_timeout         = optional_settings["run_timeout"]
+		self.warm_import         = optional_settings["warm_import"]
+		self.warm_import_workers = optional_settings["warm_import_workers"]
+		self.async_logging       = optional_settings["async_logging"]
+		self.log_queue_size      = optional_settings["log_queue_size"]
+		self.log_queue_policy    = optional_settings["log_queue_policy"]
+
+		## Names the files process-backed modules write during this run, so that they can be found again. (<pid>.<milliseconds>)
+		self.run_id = str(os.getpid()) + "." + str(int(time.time() * 1000))
+
+		## Initialize the cache of the platform facts, next to the log file unless configured otherwise. (None if disabled)
+		self.platform_cache_path = None
+		self.platform_cache_ttl  = optional_settings["platform_cache_ttl"]
+
+		if (optional_settings["platform_cache"] == 1):
+			self.platform_cache_path = optional_settings["platform_cache_path"]
+
+			if (self.platform_cache_path == ""):
+				self.platform_cache_path = os.path.join(os.path.dirname(self.log_file), "bitCollector_platform_" + re.sub("[^\w.-]", "_", platform.node()) + ".json")
+
+		## Set from the command line by main. (See parseCLA)
+		self.profile          = 0
+		self.pstats_directory = None
+
+		## The ProgressBus of the run and the path to its events file. (None unless --progress was given)
+		self.progress      = None
+		self.progress_path = None
+
+		## Initialize the filesystem walker shared by the BitCollector modules, and the index of the directories it has walked. (None if disabled)
+		self.walker     = bitCollector_walker.FileWalker(optional_settings["walker_threads"], optional_settings["walker_exclude_mounts"], optional_settings["walker_cross_mounts"], optional_settings["file_index"])
+		self.file_index = self.walker.file_index
+
+		## Initialize the cache of the files seen by previous runs, next to the log file unless configured otherwise. (None if disabled)
+		self.file_cache = None
+
+		if (optional_settings["file_cache"] == 1):
+			file_cache_path = optional_settings["file_cache_path"]
+
+			if (file_cache_path == ""):
+				file_cache_path = os.path.join(os.path.dirname(self.log_file), "bitCollector_cache.sqlite")
+
+			self.file_cache = bitCollector_cache.FileCache(file_cache_path)
+
+		## Initialize the hashing engine shared by the BitCollector modules, ignoring the algorithms hashlib doesn't support.
+		hash_algorithms = []
+
+		for algorithm in optional_settings["hash_algorithms"]:
+			if (bitCollector_hashing.isSupported(algorithm) == 1):
+				hash_algorithms.append(algorithm)
+
+			else:
+				print "Startup - bitCollector_framework.FrameworkSettings.__init__ - WARNING - Unsupported hash algorithm: " + str(algorithm) + ". Ignoring it."
+
+		self.hash_engine = bitCollector_hashing.HashEngine(optional_settings["hash_workers"], hash_algorithms, file_cache=self.file_cache)
+
+		## Initialize the reader the BitCollector modules use to export SQLite artifacts.
+		self.sqlite_reader = bitCollector_sqlite.SQLiteReader(optional_settings["sqlite_workers"], optional_settings["sqlite_batch_size"])
+
 		## Initialize the absolute path to the logging directory.
 		self.abs_log_dir = os.path.dirname(self.log_file)		
 
 		## Call the method to initialize the root logger.
 		self.initializeRootLogger()
 
+		## Initialize the container the modules store their artifacts in, named after the log file unless configured otherwise. (None if disabled)
+		## The file is only created once a module adds an artifact.
+		self.container = None
+
+		if (optional_settings["container"] == 1):
+			container_path = optional_settings["container_path"]
+
+			if (container_path == ""):
+				container_path = os.path.splitext(self.log_file)[0] + ".bcc"
+
+			self.container = bitCollector_container.ContainerWriter(container_path, optional_settings["container_codec"], optional_settings["container_workers"], optional_settings["container_block_size"])
+
+		## Initialize the channel the modules emit their result records through, with its outputs named after the log file unless configured otherwise.
+		results_path = optional_settings["results_path"]
+
+		if (results_path == ""):
+			results_path = os.path.splitext(self.log_file)[0] + "_results"
+
+		results_sinks, warnings = bitCollector_results.createSinks(optional_settings["results_sinks"], results_path, self.container)
+
+		for warning in warnings:
+			print "Startup - bitCollector_framework.FrameworkSettings.__init__ - WARNING - " + warning
+
+		self.results = bitCollector_results.ResultsChannel(results_sinks, optional_settings["results_queue_size"], optional_settings["results_batch_size"])
+
 	## Method Name: initializeRootLogger
 	##
 	## Purpose: Initialize the root logger as well as the logging formats and logging streams for the log file and STDOUT.
 	def initializeRootLogger(self):	
 		## Initialize the logging formats to be used by all modules.
-		if (self.logging_format == "csv"):
-			self.log_file_formatter = logging.Formatter('%(asctime)s,%(module)s.%(name)s.%(funcName)s,%(levelname)s,%(message)s', '%Y-%m-%dT%H:%M:%S')
-
-		elif (self.logging_format == "html"):
-			self.log_file_formatter = logging.Formatter("<tr><td>%(asctime)s</td><td>%(module)s.%(name)s.%(funcName)s</td><td>%(levelname)s</td><td>%(message)s</td></tr>", '%Y-%m-%dT%H:%M:%S')
+		self.log_file_formatter = createFileFormatter(self.logging_format)
 
-		else:
+		if (self.log_file_formatter is None):
 			print "Startup - bitCollector_framework.FrameworkSettings.initializeRootLogger - WARNING - Unknown logging format: " + self.logging_format + ". Defaulting to CSV."
 			self.logging_format  = "csv"
-			self.log_file_formatter = logging.Formatter('%(asctime)s,%(module)s.%(name)s.%(funcName)s,%(levelname)s,%(message)s', '%Y-%m-%dT%H:%M:%S')
+			self.log_file_formatter = createFileFormatter(self.logging_format)
 
 		self.log_console_formatter  = logging.Formatter('%(asctime)s - %(module)s.%(name)s.%(funcName)s - [%(levelname)s] - %(message)s', '%Y-%m-%d %H:%M:%S')
 
@@ -147,7 +608,7 @@ class FrameworkSettings():
 		if (os.path.isdir(self.abs_log_dir) == 0):
 			os.makedirs(self.abs_log_dir)
 			print "Startup - bitCollector_framework.FrameworkSettings.initializeRootLogger - WARNING - Log directory doesn't exists. Making."			
-			print "Startup - bitCollector_framework.FrameworkSettings.initializeRootLogger - WARNING - Created log directory: " + abs_log_dir
+			print "Startup - bitCollector_framework.FrameworkSettings.initializeRootLogger - WARNING - Created log directory: " + self.abs_log_dir
 
 		## Create the log file logging stream and configure it.
 		for log_count in range(1000):
@@ -155,68 +616,725 @@ class FrameworkSettings():
 				temp_file = self.log_file + "_" + str(log_count + 1) + "." + self.logging_format
 				if (os.path.isfile(temp_file) == 0):
 					self.log_file = temp_file
-					self.log_file_handler = logging.handlers.RotatingFileHandler(self.log_file, mode='a', maxBytes=1073741824, backupCount=99, encoding=None, delay=0)
+
+					if (self.logging_format == "bin"):
+						self.log_file_handler = bitCollector_logging.BinaryRotatingFileHandler(self.log_file, maxBytes=1073741824, backupCount=99)
+
+					else:
+						self.log_file_handler = logging.handlers.RotatingFileHandler(self.log_file, mode='a', maxBytes=1073741824, backupCount=99, encoding=None, delay=0)
+
 					break
 
-			except IOError:
-				print "Startup - bitCollector_framework.FrameworkSettings.initializeRootLogger - ERROR - Unable to open: " + self.log_file + "."
-				sys.exit()
+			except IOError:
+				print "Startup - bitCollector_framework.FrameworkSettings.initializeRootLogger - ERROR - Unable to open: " + self.log_file + "."
+				sys.exit()
+
+		self.log_file_handler.setFormatter(self.log_file_formatter)
+
+		## Only log to the file if specified.
+		if (self.log_to_file == 1):
+			if (self.logging_format == "html"):
+				## Write the table header to the log file.
+				temp_handler = open(self.log_file, 'a')
+				temp_handler.write("<table border=\"1\"  width=\"100%\"><tr><th>Date & Time</th><th>Traceback</th><th>Level</th><th>Message</th></tr>\n")
+				temp_handler.close()
+
+			## The jsonl and bin formats have no header so that every record stands on its own.
+			elif (self.logging_format == "csv"):
+				temp_handler = open(self.log_file, 'a')
+				temp_handler.write("Date & Time,Traceback,Level,Message\n")
+				temp_handler.close()
+
+			self.root_logger.addHandler(self.log_file_handler)
+
+		## Create the console logging stream and configure it.
+		self.log_console_handler = logging.StreamHandler(sys.stdout)
+		self.log_console_handler.setFormatter(self.log_console_formatter)
+
+		## Only log to STDOUT if specified.
+		if (self.log_to_stdout == 1):
+			self.root_logger.addHandler(self.log_console_handler)
+
+		## Put a queue in front of the file and console handlers so that logging threads don't wait on the writes.
+		self.async_log_handler = None
+
+		if (self.async_logging == 1):
+			if (self.log_queue_policy not in bitCollector_logging._log_queue_policies):
+				print "Startup - bitCollector_framework.FrameworkSettings.initializeRootLogger - WARNING - Unknown log queue policy: " + str(self.log_queue_policy) + ". Defaulting to block."
+				self.log_queue_policy = "block"
+
+			target_handlers = list(self.root_logger.handlers)
+
+			for handler in target_handlers:
+				self.root_logger.removeHandler(handler)
+
+			self.async_log_handler = bitCollector_logging.AsyncLogHandler(target_handlers, self.log_queue_size, self.log_queue_policy)
+			self.root_logger.addHandler(self.async_log_handler)
+
+## Class Name: ThreadManager
+##
+## Purpose: Holds information pertaining to all running threads.
+##          Each module thread sets its completed event when it exits and may carry a deadline after which it is abandoned.
+class ThreadManager():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the lists of running, finished and abandoned BitCollector module threads.
+	##
+	## Parameters: None
+	def __init__(self):
+		## Initialize the Logger for this class.
+		self.logger = logging.getLogger(self.__class__.__name__)
+		self.logger.debug("Entering BitCollector.ThreadManager.__init__()")
+
+		self.thread_list    = []
+		self.finished_list  = []
+		self.abandoned_list = []
+
+		## Module threads add and remove themselves concurrently.
+		self.lock = threading.Lock()
+
+	## Method Name: addThread
+	##
+	## Purpose: Register a module thread.
+	##
+	## Parameters
+	## 1. thread  - The InitializeBCModuleThread to track.
+	## 2. timeout - The number of seconds the module may run for. (0 for no limit)
+	def addThread(self, thread, timeout=0):
+		with self.lock:
+			if (timeout > 0):
+				thread.deadline = time.time() + timeout
+
+			else:
+				thread.deadline = None
+
+			self.thread_list.append(thread)
+
+	## Method Name: removeThread
+	##
+	## Purpose: Move a module thread which has exited to the finished list.
+	##
+	## Parameters
+	## 1. thread - The InitializeBCModuleThread which has exited.
+	##
+	## Returns
+	## 1 if the thread was running, 0 if it had already been abandoned or removed.
+	def removeThread(self, thread):
+		with self.lock:
+			for each in self.thread_list:
+				if (each is thread):
+					self.logger.debug("Removing thread with ID " + str(each.thread_id))
+					self.thread_list.remove(each)
+					self.finished_list.append(each)
+					return 1
+
+		return 0
+
+	## Method Name: abandonThread
+	##
+	## Purpose: Stop tracking a module thread which has outlived its deadline.
+	##          Python threads can't be killed, so the thread keeps running as a daemon but no longer holds up the run.
+	##
+	## Parameters
+	## 1. thread - The InitializeBCModuleThread to abandon.
+	##
+	## Returns
+	## 1 if the thread was running, 0 if it had already finished.
+	def abandonThread(self, thread):
+		with self.lock:
+			if (thread in self.thread_list):
+				self.thread_list.remove(thread)
+				self.abandoned_list.append(thread)
+				return 1
+
+		return 0
+
+	## Method Name: runningThreads
+	##
+	## Purpose: Return a copy of the list of running threads.
+	def runningThreads(self):
+		with self.lock:
+			return list(self.thread_list)
+
+	## Method Name: expiredThreads
+	##
+	## Purpose: Return the running threads whose deadline has passed.
+	##
+	## Parameters
+	## 1. now - The current time.
+	def expiredThreads(self, now):
+		with self.lock:
+			return [thread for thread in self.thread_list if (thread.deadline is not None and thread.deadline <= now)]
+
+	## Method Name: nextDeadline
+	##
+	## Purpose: Return the earliest deadline of the running threads, or None if none of them has one.
+	def nextDeadline(self):
+		with self.lock:
+			deadlines = [thread.deadline for thread in self.thread_list if (thread.deadline is not None)]
+
+		if (len(deadlines) == 0):
+			return None
+
+		return min(deadlines)
+
+	## Method Name: waitAll
+	##
+	## Purpose: Block until every registered thread has set its completed event or the deadline has passed.
+	##
+	## Parameters
+	## 1. deadline - The time after which to stop waiting. (None to wait indefinitely)
+	##
+	## Returns
+	## The list of threads which were still running when waitAll returned.
+	def waitAll(self, deadline=None):
+		with self.lock:
+			running = list(self.thread_list)
+
+		for thread in running:
+			if (deadline is None):
+				thread.completed.wait()
+
+			elif (deadline > time.time()):
+				thread.completed.wait(deadline - time.time())
+
+		return [thread for thread in running if (not thread.completed.is_set())]
+
+## Class Name: ModuleWatchdog
+##
+## Purpose: Measure the running modules and find those which have gone over their max_rss or max_cpu_seconds module settings.
+##          The memory of a thread-backed module can't be told apart from the framework's, so max_rss only applies to process-backed modules.
+class ModuleWatchdog():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the watchdog.
+	##
+	## Parameters
+	## 1. thread_manager - The ThreadManager tracking the module threads.
+	def __init__(self, thread_manager):
+		## Initialize the Logger for this class.
+		self.logger = logging.getLogger(self.__class__.__name__)
+		self.logger.debug("Entering BitCollector.ModuleWatchdog.__init__()")
+
+		self.thread_manager = thread_manager
+
+		## The queue the process pool workers report their process ID and the counters of their module on. (None until the pool is created)
+		self.pid_queue = None
+
+		## Set if any module has a resource limit, otherwise the running modules aren't measured.
+		self.active = 0
+
+	## Method Name: checkLimits
+	##
+	## Purpose: Validate the resource limits of each module and enable the watchdog if any module has one.
+	##
+	## Parameters
+	## 1. module_list - The list of module dictionaries.
+	def checkLimits(self, module_list):
+		for module_dict in module_list:
+			for setting in ("max_rss", "max_cpu_seconds"):
+				try:
+					module_dict[setting] = max(0, float(module_dict.get(setting, _optional_module_defaults[setting])))
+
+				except (TypeError, ValueError):
+					self.logger.warning("Invalid " + setting + " for module " + module_dict["name"] + ": " + str(module_dict[setting]) + ". Ignoring it.")
+					module_dict[setting] = 0
+
+			if (module_dict.get("executor", _optional_module_defaults["executor"]) != "process"):
+				if (module_dict["max_rss"] > 0):
+					self.logger.warning("max_rss only applies to process-backed modules. Ignoring it for module " + module_dict["name"] + ".")
+					module_dict["max_rss"] = 0
+
+				if (module_dict["max_cpu_seconds"] > 0 and bitCollector_resources.currentThreadId() is None):
+					self.logger.warning("Unable to measure the CPU time of a thread on this platform. Ignoring max_cpu_seconds for module " + module_dict["name"] + ".")
+					module_dict["max_cpu_seconds"] = 0
+
+			if (module_dict["max_rss"] > 0 or module_dict["max_cpu_seconds"] > 0):
+				self.active = 1
+
+	## Method Name: readReports
+	##
+	## Purpose: Assign the process IDs and counters reported by the pool workers to the threads of the process-backed modules.
+	def readReports(self):
+		if (self.pid_queue is None):
+			return
+
+		threads = dict([(thread.module_index, thread) for thread in self.thread_manager.runningThreads()])
+
+		while (1):
+			try:
+				report = self.pid_queue.get_nowait()
+
+			except Queue.Empty:
+				break
+
+			## A report from a module which has already finished is ignored.
+			if (report[1] not in threads):
+				continue
+
+			thread = threads[report[1]]
+
+			if (report[0] == "stats"):
+				if (thread.stats is not None):
+					thread.stats.setDict(report[2])
+
+			else:
+				thread.pid       = report[2]
+				thread.cpu_start = report[3]
+
+	## Method Name: check
+	##
+	## Purpose: Measure the running modules which have a resource limit.
+	##
+	## Returns
+	## A list of (thread, reason) tuples for the modules which have gone over a limit.
+	def check(self):
+		self.readReports()
+
+		exceeded = []
+
+		if (self.active == 0):
+			return exceeded
+
+		for thread in self.thread_manager.runningThreads():
+			max_rss         = thread.module_dict.get("max_rss", 0)
+			max_cpu_seconds = thread.module_dict.get("max_cpu_seconds", 0)
+
+			if (max_rss <= 0 and max_cpu_seconds <= 0):
+				continue
+
+			if (thread.executor == "process"):
+				## The worker hasn't started the module yet.
+				if (thread.pid is None):
+					continue
+
+				rss         = bitCollector_resources.processRss(thread.pid)
+				cpu_seconds = bitCollector_resources.processCpuSeconds(thread.pid)
+
+			else:
+				rss         = None
+				cpu_seconds = bitCollector_resources.threadCpuSeconds(thread.native_id)
+
+			if (cpu_seconds is not None and thread.cpu_start is not None):
+				thread.cpu_seconds = cpu_seconds - thread.cpu_start
+
+			thread.peak_rss = max(thread.peak_rss, rss)
+
+			if (max_rss > 0 and rss is not None and rss > max_rss * bitCollector_resources._bytes_per_megabyte):
+				exceeded.append((thread, "exceeded its max_rss of " + str(max_rss) + " MB (" + bitCollector_resources.formatMegabytes(rss) + ")"))
+
+			elif (max_cpu_seconds > 0 and thread.cpu_seconds is not None and thread.cpu_seconds > max_cpu_seconds):
+				exceeded.append((thread, "exceeded its max_cpu_seconds of " + str(max_cpu_seconds) + " (" + bitCollector_resources.formatSeconds(thread.cpu_seconds) + ")"))
+
+		return exceeded
+
+	## Method Name: stopProcess
+	##
+	## Purpose: Kill the pool worker running a process-backed module. The pool replaces the worker.
+	##
+	## Parameters
+	## 1. thread - The InitializeBCModuleThread of the module.
+	def stopProcess(self, thread):
+		self.readReports()
+
+		if (thread.pid is None):
+			self.logger.warning("Unable to stop module " + thread.module_dict["name"] + ": its process ID hasn't been reported yet")
+			return
+
+		try:
+			os.kill(thread.pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+			self.logger.warning("Stopped module " + thread.module_dict["name"] + " by killing process " + str(thread.pid))
+
+		except OSError as error:
+			self.logger.warning("Unable to stop module " + thread.module_dict["name"] + " in process " + str(thread.pid) + ": " + str(error))
+
+## Class Name: ModuleScheduler
+##
+## Purpose: Run the BitCollector modules in parallel, bounded by the max_concurrency framework setting.
+##          A module is started once every module it depends on has finished and receives their results as module_dict["inputs"].
+class ModuleScheduler():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the scheduler and its concurrency slots.
+	##
+	## Parameters
+	## 1. framework_settings - An instance of the FrameworkSettings class containing settings required to start the framework.
+	## 2. platform_details   - An instance of the Platform class containing information about the target machine.
+	## 3. thread_manager     - The ThreadManager used to track the module threads.
+	## 4. module_loader      - The ModuleLoader used to import the modules when they are scheduled.
+	## 5. shared_pool        - A (multiprocessing.Pool, pid Queue) tuple kept by the caller across runs. (None to create a pool for the run)
+	def __init__(self, framework_settings, platform_details, thread_manager, module_loader, shared_pool=None):
+		## Initialize the Logger for this class.
+		self.logger = logging.getLogger(self.__class__.__name__)
+		self.logger.debug("Entering BitCollector.ModuleScheduler.__init__()")
+
+		self.framework_settings = framework_settings
+		self.platform_details   = platform_details
+		self.thread_manager     = thread_manager
+		self.module_loader      = module_loader
+
+		## Anything below 1 would never schedule a module.
+		try:
+			self.max_concurrency = max(1, int(framework_settings.max_concurrency))
+
+		except (TypeError, ValueError):
+			self.logger.warning("Invalid max_concurrency: " + str(framework_settings.max_concurrency) + ". Defaulting to 1.")
+			self.max_concurrency = 1
+
+		## The condition is notified each time a module finishes.
+		self.condition = threading.Condition()
+		self.running   = 0
+
+		## The time after which no module is started and running modules are abandoned. (None for no limit)
+		self.deadline = None
+
+		## The results of finished modules, stored under the module name and each name it provides.
+		self.finished_modules = {}
+		self.provided_results = {}
+
+		## The process pool is only created if a module asks for the process executor.
+		## A shared pool is used as is and left open at the end of the run.
+		self.process_pool = None
+		self.shared_pool  = shared_pool
+
+		## Enforces the max_rss and max_cpu_seconds module settings.
+		self.watchdog = ModuleWatchdog(thread_manager)
+
+	## Method Name: run
+	##
+	## Purpose: Start a thread for each BitCollector module once a slot is free and wait for all of them to finish.
+	def run(self):
+		self.logger.debug("Entering BitCollector.ModuleScheduler.run()")
+		self.logger.info("Scheduling " + str(len(self.framework_settings.module_list)) + " module(s) with max_concurrency " + str(self.max_concurrency))
+
+		run_start = time.time()
+
+		if (self.framework_settings.run_timeout > 0):
+			self.deadline = run_start + self.framework_settings.run_timeout
+
+		## Create the process pool before any module thread is running so the workers fork from a quiet process.
+		self.initializeProcessPool()
+		self.watchdog.checkLimits(self.framework_settings.module_list)
+
+		module_list  = self.framework_settings.module_list
+		dependencies = buildModuleGraph(module_list)[0]
+		pending      = range(len(module_list))
+
+		with self.condition:
+			while (len(pending) > 0 or self.running > 0):
+				progress = 0
+
+				## Abandon the modules which have run past their timeout.
+				for thread in self.thread_manager.expiredThreads(time.time()):
+					self.abandonModule(thread, "exceeded its timeout of " + str(thread.module_dict["timeout"]) + " seconds")
+
+				## Abandon the modules which have gone over their resource limits.
+				for thread, reason in self.watchdog.check():
+					self.abandonModule(thread, reason)
+
+				## Once the run deadline has passed, skip the pending modules and abandon the running ones.
+				if (self.deadline is not None and time.time() >= self.deadline):
+					self.logger.warning("Run timeout of " + str(self.framework_settings.run_timeout) + " seconds reached")
+
+					for module_index in pending:
+						self.logger.warning("Skipping module " + module_list[module_index]["name"] + " because the run timed out")
+						self.finished_modules[module_index] = None
+						self.publishSkipped(module_index)
+
+					for thread in list(self.thread_manager.thread_list):
+						self.abandonModule(thread, "was still running when the run timed out")
+
+					break
+
+				## Walk the pending modules in configuration order and start each one whose dependencies are met.
+				for module_index in list(pending):
+					if (self.running >= self.max_concurrency):
+						break
+
+					dependency_state = self.dependencyState(dependencies[module_index])
+
+					if (dependency_state == "waiting"):
+						continue
+
+					pending.remove(module_index)
+					progress = 1
+
+					if (dependency_state == "failed"):
+						self.logger.warning("Skipping module " + module_list[module_index]["name"] + " because a module it depends on did not return 0")
+						self.finished_modules[module_index] = None
+						self.publishSkipped(module_index)
+
+					else:
+						self.startModule(module_index, dependencies[module_index])
+
+				## Sleep until a running module finishes or the next deadline passes.
+				if (self.running > 0):
+					self.condition.wait(self.waitTimeout())
+
+				elif (len(pending) > 0 and progress == 0):
+					## parseConfig rejects cycles, so this can only be reached if the module_list was changed afterwards.
+					self.logger.error("Unable to schedule " + str(len(pending)) + " module(s) with unmet dependencies")
+					break
+
+		## Abandoned process-backed modules would block a graceful shutdown of the pool.
+		if (self.process_pool is not None and self.shared_pool is None):
+			if (len(self.thread_manager.abandoned_list) > 0):
+				self.process_pool.terminate()
+
+			else:
+				self.process_pool.close()
+
+			self.process_pool.join()
+
+		self.logger.info("Finished " + str(len(self.thread_manager.finished_list)) + " module(s) in " + ("%.3f" % (time.time() - run_start)) + " seconds")
+
+		if (len(self.thread_manager.abandoned_list) > 0):
+			self.logger.warning("Abandoned " + str(len(self.thread_manager.abandoned_list)) + " module(s): " + ", ".join([thread.module_dict["name"] for thread in self.thread_manager.abandoned_list]))
+
+		self.logUsageReport()
+
+	## Method Name: logUsageReport
+	##
+	## Purpose: Log the wall time, CPU time and peak memory of each module which was started, to help schedule the heavy ones.
+	def logUsageReport(self):
+		threads = sorted(self.thread_manager.finished_list + self.thread_manager.abandoned_list, key=lambda thread: thread.start_time)
+
+		if (len(threads) == 0):
+			return
+
+		self.logger.info("Module resource usage: (the CPU time of a thread-backed module only covers its main thread)")
+
+		for thread in threads:
+			if (thread in self.thread_manager.abandoned_list):
+				status = "abandoned"
+
+			else:
+				status = "return code " + str(thread.return_code)
+
+			## An abandoned module may still be running.
+			elapsed = thread.elapsed
+
+			if (elapsed is None):
+				elapsed = time.time() - thread.start_time
+
+			if (thread.executor == "process"):
+				peak_rss = bitCollector_resources.formatMegabytes(thread.peak_rss) + " peak RSS"
+
+			else:
+				peak_rss = "shared memory"
+
+			self.logger.info("    " + thread.module_dict["name"] + " - " + thread.executor + " - " + bitCollector_resources.formatSeconds(elapsed) + " wall - " + bitCollector_resources.formatSeconds(thread.cpu_seconds) + " CPU - " + peak_rss + " - " + status)
+
+		self.logger.info("Framework process: " + bitCollector_resources.formatSeconds(bitCollector_resources.processCpuSeconds()) + " CPU - " + bitCollector_resources.formatMegabytes(bitCollector_resources.peakRss()) + " peak RSS")
+
+	## Method Name: waitTimeout
+	##
+	## Purpose: Return the number of seconds until the next module or run deadline, or None if there is none.
+	##          Called with the condition held.
+	def waitTimeout(self):
+		deadlines = [deadline for deadline in (self.thread_manager.nextDeadline(), self.deadline) if (deadline is not None)]
+
+		## Wake up regularly to measure the modules with resource limits.
+		if (self.watchdog.active == 1):
+			deadlines.append(time.time() + _watchdog_interval)
+
+		## Read the counters of the process-backed modules for the progress events as they are reported.
+		if (self.framework_settings.progress is not None and self.process_pool is not None):
+			deadlines.append(time.time() + _process_stats_interval)
+
+		if (len(deadlines) == 0):
+			return None
+
+		return max(0, min(deadlines) - time.time())
+
+	## Method Name: abandonModule
+	##
+	## Purpose: Give up on a running module, freeing its slot. Modules which depend on it are skipped.
+	##          A process-backed module is stopped, while a thread-backed one keeps running as a daemon.
+	##          Called with the condition held.
+	##
+	## Parameters
+	## 1. thread - The InitializeBCModuleThread to abandon.
+	## 2. reason - Why the module is being abandoned.
+	def abandonModule(self, thread, reason):
+		## Only running modules are assigned the process IDs reported by the workers.
+		if (thread.executor == "process"):
+			self.watchdog.readReports()
+
+		if (self.thread_manager.abandonThread(thread) == 1):
+			self.logger.warning("Abandoning module " + thread.module_dict["name"] + " which " + reason)
+
+			if (thread.executor == "process"):
+				self.watchdog.stopProcess(thread)
+				self.removeProcessFiles(thread)
+
+			self.finished_modules[thread.module_index] = None
+			self.running -= 1
+
+			if (self.framework_settings.progress is not None):
+				self.framework_settings.progress.moduleEnded(thread.module_index, thread.module_dict["name"], "abandoned", None, time.time() - thread.start_time)
+
+	## Method Name: removeProcessFiles
+	##
+	## Purpose: Delete the result spool and the container file of an abandoned process-backed module, which will never be merged.
+	##
+	## Parameters
+	## 1. thread - The InitializeBCModuleThread of the module.
+	def removeProcessFiles(self, thread):
+		process_paths = [bitCollector_results.spoolPath(self.framework_settings.run_id, thread.module_index)]
+
+		if (self.framework_settings.container is not None):
+			process_paths.append(bitCollector_container.processContainerPath(self.framework_settings.container.path, self.framework_settings.run_id, thread.module_index))
+
+		for path in process_paths:
+			try:
+				os.remove(path)
+				self.logger.debug("Deleted " + path + " of abandoned module " + thread.module_dict["name"])
+
+			## The module may not have written the file. A process which couldn't be stopped may still hold it open on Windows.
+			except OSError as error:
+				if (os.path.exists(path)):
+					self.logger.warning("Unable to delete " + path + " of abandoned module " + thread.module_dict["name"] + ": " + str(error))
+
+	## Method Name: publishSkipped
+	##
+	## Purpose: Publish a module which will not run on the progress bus, if there is one.
+	##
+	## Parameters
+	## 1. module_index - The position of the module in the module_list.
+	def publishSkipped(self, module_index):
+		if (self.framework_settings.progress is not None):
+			self.framework_settings.progress.moduleEnded(module_index, self.framework_settings.module_list[module_index]["name"], "skipped", None, None)
+
+	## Method Name: dependencyState
+	##
+	## Purpose: Determine whether the dependencies of a module are met.
+	##
+	## Parameters
+	## 1. dependency_indices - The list of module_list indices the module depends on.
+	##
+	## Returns
+	## "ready" if every dependency returned 0, "failed" if any dependency did not and "waiting" otherwise.
+	def dependencyState(self, dependency_indices):
+		for dependency_index in dependency_indices:
+			if (dependency_index not in self.finished_modules):
+				return "waiting"
+
+		for dependency_index in dependency_indices:
+			thread = self.finished_modules[dependency_index]
+
+			if (thread is None or thread.return_code != 0):
+				return "failed"
+
+		return "ready"
+
+	## Method Name: startModule
+	##
+	## Purpose: Start the thread of a module, handing it the results of the modules it depends on.
+	##          Called with the condition held.
+	##
+	## Parameters
+	## 1. module_index       - The position of the module in the module_list.
+	## 2. dependency_indices - The list of module_list indices the module depends on.
+	def startModule(self, module_index, dependency_indices):
+		## Give each module its own copy of its dictionary so the inputs don't leak into the configuration.
+		module_dict = dict(self.framework_settings.module_list[module_index])
+		inputs      = {}
+
+		for name in module_dict.get("depends_on", []):
+			if (name in self.provided_results):
+				provided = self.provided_results[name]
+
+				## A name provided by several modules maps to the list of their results.
+				if (len(provided) == 1):
+					inputs[name] = provided[0]
+
+				else:
+					inputs[name] = provided
+
+		module_dict["inputs"] = inputs
+
+		## The handle the module emits its result records through. A process-backed module spools them to a file named after it.
+		spool_path = None
+
+		if (module_dict.get("executor", _optional_module_defaults["executor"]) == "process"):
+			spool_path = bitCollector_results.spoolPath(self.framework_settings.run_id, module_index)
+
+		module_dict["results"] = self.framework_settings.results.handle(module_dict["name"], spool_path)
+
+		new_thread = InitializeBCModuleThread(self.framework_settings, self.platform_details, module_dict, module_index, self)
+		self.thread_manager.addThread(new_thread, module_dict.get("timeout", 0))
+		self.running += 1
+		new_thread.start()
+
+	## Method Name: initializeProcessPool
+	##
+	## Purpose: Validate each module's executor and create the process pool if any module needs it.
+	def initializeProcessPool(self):
+		process_modules = 0
 
-		self.log_file_handler.setFormatter(self.log_file_formatter)
+		for module_dict in self.framework_settings.module_list:
+			executor = module_dict.get("executor", _optional_module_defaults["executor"])
 
-		## Only log to the file if specified.
-		if (self.log_to_file == 1):
-			if (self.logging_format == "html"):
-				## Write the table header to the log file.
-				temp_handler = open(self.log_file, 'a')
-				temp_handler.write("<table border=\"1\"  width=\"100%\"><tr><th>Date & Time</th><th>Traceback</th><th>Level</th><th>Message</th></tr>\n")
-				temp_handler.close()
+			if (executor not in _module_executors):
+				self.logger.warning("Unknown executor for module " + module_dict["name"] + ": " + str(executor) + ". Defaulting to thread.")
+				module_dict["executor"] = "thread"
 
-			else:
-				temp_handler = open(self.log_file, 'a')
-				temp_handler.write("Date & Time,Traceback,Level,Message\n")
-				temp_handler.close()
+			elif (executor == "process"):
+				process_modules += 1
 
-			self.root_logger.addHandler(self.log_file_handler)
+		if (process_modules == 0):
+			return
 
-		## Create the console logging stream and configure it.
-		self.log_console_handler = logging.StreamHandler(sys.stdout)
-		self.log_console_handler.setFormatter(self.log_console_formatter)
+		if (self.shared_pool is not None):
+			self.process_pool, self.watchdog.pid_queue = self.shared_pool
+			return
 
-		## Only log to STDOUT if specified.
-		if (self.log_to_stdout == 1):
-			self.root_logger.addHandler(self.log_console_handler)
+		## A pool size of 0 means one worker per CPU, but never more workers than process-backed modules.
+		pool_size = self.framework_settings.process_pool_size
 
-## Class Name: ThreadManager
-##
-## Purpose: Holds information pertaining to all running threads.
-class ThreadManager():
-	## Method Name: __init__
+		if (pool_size <= 0):
+			pool_size = multiprocessing.cpu_count()
+
+		pool_size = min(pool_size, process_modules)
+
+		self.logger.info("Starting process pool with " + str(pool_size) + " worker(s)")
+
+		## The workers report the process running each module so that the watchdog can measure and stop it.
+		self.watchdog.pid_queue = multiprocessing.Queue()
+		self.process_pool       = multiprocessing.Pool(pool_size, initializeProcessWorker, (self.watchdog.pid_queue,))
+
+	## Method Name: moduleFinished
 	##
-	## Purpose: Initialize the platform-independent attributes as well as the correct platform-dependent object.
+	## Purpose: Report the return code and elapsed time of a finished module, store its results and release its slot.
 	##
-	## Parameters: None
-	def __init__(self):
-		## Initialize the Logger for this class.
-		self.logger = logging.getLogger(self.__class__.__name__)
-		self.logger.debug("Entering BitCollector.ThreadManager.__init__()")
+	## Parameters
+	## 1. thread - The InitializeBCModuleThread which has finished.
+	def moduleFinished(self, thread):
+		self.logger.info("Module " + thread.module_dict["name"] + " finished with return code " + str(thread.return_code) + " in " + ("%.3f" % thread.elapsed) + " seconds")
 
-		self.thread_list = []
+		with self.condition:
+			## An abandoned module has already given its slot back and its results are no longer wanted.
+			if (self.thread_manager.removeThread(thread) == 0):
+				return
 
-	def addThread(self, thread):
-		self.thread_list.append(thread)
+			self.finished_modules[thread.module_index] = thread
 
-	def removeThread(self, thread):
-		for each in self.thread_list:
-			if (each.thread_id == thread.thread_id):
-				self.logger.debug("Removing thread with ID each.thread_id" + each.thread_id)
-				self.thread_list.remove(each)
-				break
+			if (self.framework_settings.progress is not None):
+				self.framework_settings.progress.moduleEnded(thread.module_index, thread.module_dict["name"], "finished" if (thread.return_code == 0) else "failed", thread.return_code, thread.elapsed)
+
+			## Keep the results in memory for the modules downstream of this one.
+			if (thread.return_code == 0):
+				for name in [thread.module_dict["name"]] + thread.module_dict.get("provides", []):
+					self.provided_results.setdefault(name, []).append(thread.results)
+
+			self.running -= 1
+			self.condition.notify()
 
 ## Class Name: Platform
 ##
 ## Purpose: Hold information about the target machine.
-class Platform():
+class Platform(PicklableState):
 	## Method Name: __init__
 	##
 	## Purpose: Initialize the platform-independent attributes as well as the correct platform-dependent object.
@@ -229,11 +1347,18 @@ class Platform():
 	##    Index 3  - The version of the OS running on the target machine.
 	##    Index 4  - The machine CPU architecture (i386, AMD64, etc)
 	##    Index 5  - Information about the processor in the target machine as a 3-part tuple.
-	def __init__(self, tuple):
+	## 2. facts - The read-only facts from bitCollector_platform.loadFacts. (None to gather them without the cache)
+	def __init__(self, tuple, facts=None):
 		## Initialize the Logger for this class.
 		self.logger = logging.getLogger(self.__class__.__name__)
 		self.logger.debug("Entering BitCollector.Platform.__init__()")
 
+		## The OS, distribution, hardware and mount facts, for modules which need more than the attributes below.
+		if (facts is None):
+			facts = bitCollector_platform.loadFacts(None, 0)[0]
+
+		self.facts = facts
+
 		## Replace unknown information ('') with "Unknown"
 		for each in tuple:
 			if (each == ""):
@@ -250,21 +1375,22 @@ class Platform():
 		## Initialize the OS type attribute which will be populated below.
 		self.os_type   = "unknown"
 
-		## Initialize the platform OS-dependent attribute objects.
+		## Initialize the platform OS-dependent attribute objects from the gathered distribution facts.
+		## The system name is Darwin on Mac OS and Linux, FreeBSD, etc on Linux/Unix.
+		self.os_type = bitCollector_platform.osType(self.system)
+		distro_raw   = facts.get("distro", {}).get("raw", ())
+
 		## Mac OS
-		if (re.search(r'mac', self.system.lower())):
-			self.os_type = "mac"
-			self.mac_platform = MacPlatform(platform.mac_ver(release='', versioninfo=('', '', ''), machine=''))
+		if (self.os_type == "mac"):
+			self.mac_platform = MacPlatform(distro_raw or ("", ("", "", ""), ""))
 
 		## Linux/Unix
-		elif (re.search(r'nix', self.system.lower())):
-			self.os_type = "nix"
-			self.nix_platform = NixPlatform(platform.linux_distribution(distname='', version='', id='', supported_dists=('SuSE', 'debian', 'redhat', 'mandrake'), full_distribution_name=1))
+		elif (self.os_type == "nix"):
+			self.nix_platform = NixPlatform(distro_raw or ("", "", ""))
 
 		## Windows
-		elif (re.search(r'win', self.system.lower())):
-			self.os_type = "windows"
-			self.win_platform = WinPlatform(platform.win32_ver(release='', version='', csd='', ptype=''))
+		elif (self.os_type == "windows"):
+			self.win_platform = WinPlatform(distro_raw or ("", "", "", ""))
 
 		else:
 			self.logger.warning("Unknown OS type. Unable to perform OS-dependent logic!")
@@ -272,7 +1398,7 @@ class Platform():
 ## Class Name: MacPlatform
 ##
 ## Purpose: Hold Mac OS-dependent information about the target machine.
-class MacPlatform():
+class MacPlatform(PicklableState):
 	## Method Name: __init__
 	##
 	## Purpose: Initialize the Mac OS-dependent attributes.
@@ -303,7 +1429,7 @@ class MacPlatform():
 ## Class Name: NixPlatform
 ##
 ## Purpose: Hold Linux/Unix OS-dependent information about the target machine.
-class NixPlatform():
+class NixPlatform(PicklableState):
 	## Method Name: __init__
 	##
 	## Purpose: Initialize the Linux/Unix OS-dependent attributes.
@@ -331,7 +1457,7 @@ class NixPlatform():
 ## Class Name: WinPlatform
 ##
 ## Purpose: Hold Windows OS-dependent information about the target machine.
-class WinPlatform():
+class WinPlatform(PicklableState):
 	## Method Name: __init__
 	##
 	## Purpose: Initialize the Windows OS-dependent attributes.
@@ -360,19 +1486,303 @@ class WinPlatform():
 
 ## Classless Method Declarations
 
+## Method Name: buildModuleGraph
+##
+## Purpose: Resolve the depends_on entries of each module to the modules which provide them.
+##          A module provides its own name as well as each name in its provides entry. A module never depends on
+##          itself, so that a module listed twice can depend on its earlier instance by name.
+##
+## Parameters
+## 1. module_list - The list of modules stored as dictionaries.
+##
+## Returns
+## A tuple
+##   Index 0 - A list holding, for each module, the sorted list of module_list indices it depends on.
+##   Index 1 - The list of depends_on names which no module provides.
+def buildModuleGraph(module_list):
+	providers     = {}
+	dependencies  = []
+	unknown_names = []
+
+	for module_index, module_dict in enumerate(module_list):
+		for name in [module_dict["name"]] + module_dict.get("provides", []):
+			providers.setdefault(name, []).append(module_index)
+
+	for module_index, module_dict in enumerate(module_list):
+		dependency_indices = set()
+
+		for name in module_dict.get("depends_on", []):
+			if (name in providers):
+				dependency_indices.update(providers[name])
+
+			elif (name not in unknown_names):
+				unknown_names.append(name)
+
+		dependency_indices.discard(module_index)
+		dependencies.append(sorted(dependency_indices))
+
+	return dependencies, unknown_names
+
+## Method Name: createFileFormatter
+##
+## Purpose: Return the formatter of the log file for a logging format, or None if the format is unknown.
+##
+## Parameters
+## 1. logging_format - The format in which to save the log file. (csv, html, jsonl or bin)
+def createFileFormatter(logging_format):
+	if (logging_format == "csv"):
+		return logging.Formatter('%(asctime)s,%(module)s.%(name)s.%(funcName)s,%(levelname)s,%(message)s', '%Y-%m-%dT%H:%M:%S')
+
+	elif (logging_format == "html"):
+		return logging.Formatter("<tr><td>%(asctime)s</td><td>%(module)s.%(name)s.%(funcName)s</td><td>%(levelname)s</td><td>%(message)s</td></tr>", '%Y-%m-%dT%H:%M:%S')
+
+	## One JSON object per line.
+	elif (logging_format == "jsonl"):
+		return bitCollector_logging.JsonLinesFormatter()
+
+	## Length-prefixed binary records. (See bitCollector_logging._binary_record_header)
+	elif (logging_format == "bin"):
+		return bitCollector_logging.BinaryLogFormatter()
+
+	return None
+
+## Method Name: findModuleCycle
+##
+## Purpose: Search the module dependency graph for a cycle.
+##
+## Parameters
+## 1. dependencies - The list of dependency indices returned by buildModuleGraph.
+##
+## Returns
+## The list of module_list indices forming a cycle, or an empty list if the graph is acyclic.
+def findModuleCycle(dependencies):
+	## 0 - Unvisited, 1 - On the current path, 2 - Done.
+	state = [0] * len(dependencies)
+
+	for start_index in range(len(dependencies)):
+		if (state[start_index] != 0):
+			continue
+
+		## Iterative depth-first search. Each stack entry is a module index and the position of the next dependency to visit.
+		path  = [start_index]
+		stack = [[start_index, 0]]
+		state[start_index] = 1
+
+		while (len(stack) > 0):
+			module_index, position = stack[-1]
+
+			if (position < len(dependencies[module_index])):
+				stack[-1][1] += 1
+				dependency_index = dependencies[module_index][position]
+
+				if (state[dependency_index] == 1):
+					return path[path.index(dependency_index):]
+
+				elif (state[dependency_index] == 0):
+					state[dependency_index] = 1
+					path.append(dependency_index)
+					stack.append([dependency_index, 0])
+
+			else:
+				state[module_index] = 2
+				path.pop()
+				stack.pop()
+
+	return []
+
+## Method Name: splitModuleReturn
+##
+## Purpose: Separate the return code of a BitCollector module from the results it hands to downstream modules.
+##          Modules return either a return code or a (return_code, results) tuple.
+##
+## Parameters
+## 1. return_value - The value returned by the module's main method.
+##
+## Returns
+## A tuple
+##   Index 0 - The return code.
+##   Index 1 - The results. (None if the module only returned a return code)
+def splitModuleReturn(return_value):
+	if (isinstance(return_value, tuple) and len(return_value) == 2):
+		return return_value[0], return_value[1]
+
+	return return_value, None
+
+## Method Name: runBCModuleProcess
+##
+## Purpose: Entry point of a process pool worker. Imports and runs a BitCollector module's main method.
+##
+## Parameters
+## 1. path_to_main       - The absolute path to the framework for dynamic linking in the BitCollector modules.
+## 2. framework_settings - The unpickled FrameworkSettings instance. (Without its logging objects)
+## 3. platform_details   - The unpickled Platform instance.
+## 4. module_dict        - The name and parameters to pass to the BitCollector module.
+## 5. module_index       - The position of the module in the module_list, reported to the watchdog along with the process ID.
+##
+## Returns
+## A tuple
+##   Index 0 - The return code of the module. (None if it could not be run)
+##   Index 1 - The list of log records emitted while the module ran, as dictionaries.
+##   Index 2 - The dictionary of file cache hits and misses.
+##   Index 3 - The path to the file the module's result records were spooled to. (None if it didn't emit any)
+##   Index 4 - The dictionary of the process ID, the CPU time used by the module, the peak memory of the worker
+##             and the module's profiling counters.
+##   Index 5 - The path to the container file the module stored its artifacts in. (None if it didn't store any)
+def runBCModuleProcess(path_to_main, framework_settings, platform_details, module_dict, module_index):
+	root_logger    = logging.getLogger("")
+	return_code    = None
+	container_path = None
+	cpu_start      = bitCollector_resources.processCpuSeconds()
+
+	if (_worker_pid_queue is not None):
+		_worker_pid_queue.put(("pid", module_index, os.getpid(), cpu_start))
+
+	## The module stores its artifacts in a container file of its own, which the framework merges or deletes.
+	if (framework_settings.container is not None):
+		framework_settings.container.path = bitCollector_container.processContainerPath(framework_settings.container.path, framework_settings.run_id, module_index)
+
+	stats         = bitCollector_profile.ModuleStats()
+	stats_stopped = threading.Event()
+
+	## The counters are sent back when the module returns. (See ModuleStats.toDict)
+	if (framework_settings.profile == 1 or framework_settings.progress_path is not None):
+		bitCollector_profile.beginModule(stats)
+
+	## The progress events need them while the module runs too.
+	if (framework_settings.progress_path is not None and _worker_pid_queue is not None):
+		stats_reporter = threading.Thread(target=reportStats, args=(module_index, stats, stats_stopped), name="StatsReporter")
+		stats_reporter.daemon = True
+		stats_reporter.start()
+
+	## Replace the handlers inherited from the framework so records are buffered instead of written twice.
+	for handler in list(root_logger.handlers):
+		root_logger.removeHandler(handler)
+
+	log_buffer = BufferingLogHandler()
+	root_logger.addHandler(log_buffer)
+
+	## Workers which weren't forked from the framework need the module search paths too.
+	for path in framework_settings.additional_paths:
+		if (path not in sys.path):
+			sys.path.append(path)
+
+	try:
+		import_start = time.time()
+		entry_point  = getattr(__import__(module_dict["name"]), "main")
+		root_logger.info("Successfully imported BitCollector module: " + module_dict["name"] + ".main in " + ("%.3f" % (time.time() - import_start)) + " seconds (process " + str(os.getpid()) + ")")
+
+		return_code = callEntryPoint(entry_point, (threading.current_thread(), path_to_main, framework_settings, platform_details, module_dict), framework_settings, module_index)
+
+	except (AttributeError, ImportError):
+		root_logger.warning("Failed to import BitCollector module: " + module_dict["name"] + ".main")
+
+	except Exception:
+		root_logger.error("BitCollector module " + module_dict["name"] + " raised an exception: " + traceback.format_exc())
+
+	finally:
+		## Write the module's cache updates and close its container before the worker moves on to another module.
+		if (framework_settings.file_cache is not None):
+			framework_settings.file_cache.flush()
+
+		if (framework_settings.container is not None):
+			framework_settings.container.close()
+
+			if (framework_settings.container.stream is not None):
+				container_path = framework_settings.container.path
+
+		results_spool = module_dict["results"].closeSpool()
+
+		stats_stopped.set()
+		bitCollector_profile.beginModule(None)
+		root_logger.removeHandler(log_buffer)
+
+	cache_counts = {}
+
+	if (framework_settings.file_cache is not None):
+		cache_counts = framework_settings.file_cache.counts
+
+	## The worker is reused, so its peak memory may have been reached by an earlier module.
+	usage = {
+		"pid"         : os.getpid(),
+		"cpu_seconds" : bitCollector_resources.processCpuSeconds() - cpu_start,
+		"peak_rss"    : bitCollector_resources.peakRss(),
+		"stats"       : stats.toDict()
+	}
+
+	return return_code, log_buffer.records, cache_counts, results_spool, usage, container_path
+
+## Method Name: reportStats
+##
+## Purpose: Report the counters of a process-backed module to the framework until the module returns.
+##          Runs in a thread of the pool worker. (See ModuleWatchdog.readReports)
+##
+## Parameters
+## 1. module_index - The position of the module in the module_list.
+## 2. stats        - The ModuleStats instance of the module.
+## 3. stopped      - The Event set when the module returns.
+def reportStats(module_index, stats, stopped):
+	while (not stopped.wait(_process_stats_interval)):
+		_worker_pid_queue.put(("stats", module_index, stats.toDict()))
+
+## Method Name: callEntryPoint
+##
+## Purpose: Call the main method of a BitCollector module, under cProfile if the --pstats option was given.
+##
+## Parameters
+## 1. entry_point        - The main method.
+## 2. arguments          - The tuple of arguments to call it with.
+## 3. framework_settings - The FrameworkSettings instance holding the profiling options.
+## 4. module_index       - The position of the module in the module_list.
+##
+## Returns
+## The return value of the main method.
+def callEntryPoint(entry_point, arguments, framework_settings, module_index):
+	if (framework_settings.pstats_directory is None):
+		return entry_point(*arguments)
+
+	return bitCollector_profile.runProfiled(framework_settings.pstats_directory, arguments[4]["name"], module_index, entry_point, arguments)
+
+## Method Name: initializeProcessWorker
+##
+## Purpose: Initializer of the process pool workers. Stores the queue the workers report their process ID and counters on.
+##
+## Parameters
+## 1. pid_queue - The multiprocessing Queue read by the ModuleWatchdog.
+def initializeProcessWorker(pid_queue):
+	global _worker_pid_queue
+
+	_worker_pid_queue = pid_queue
+
 ## Method Name: frameworkCleanUp
 ##
 ## Purpose: Wait for child threads to exit and perform Framework clean up
 ##
 ## Parameters
-## 1. log_file       - The name of the log file to write the logging footer to.
-## 2. logging_format - The format to in which to save the log file (CSV or HTML)
-## 3. log_to_file    - A boolean tracking whether or not to log to the log file.
-def frameworkCleanUp(root_logger, log_file, logging_format, log_to_file):
+## 1. root_logger       - The logger from the main method.
+## 2. thread_manager    - The ThreadManager tracking the BitCollector module threads.
+## 3. deadline          - The time after which to stop waiting for module threads. (None to wait indefinitely)
+## 4. log_file          - The name of the log file to write the logging footer to.
+## 5. logging_format    - The format to in which to save the log file (csv, html, jsonl or bin)
+## 6. log_to_file       - A boolean tracking whether or not to log to the log file.
+## 7. async_log_handler - The AsyncLogHandler to flush, or None if asynchronous logging is disabled.
+def frameworkCleanUp(root_logger, thread_manager, deadline, log_file, logging_format, log_to_file, async_log_handler):
 	root_logger.debug("Entering BitCollector.frameworkCleanUp()")
 
-	while (threading.activeCount() > 1):
-		time.sleep(1)
+	## Only the module threads are waited on, so unrelated library threads can't hold up the shutdown.
+	for thread in thread_manager.waitAll(deadline):
+		root_logger.warning("Module " + thread.module_dict["name"] + " is still running at shutdown")
+
+	## Write out the queued log records before the footer, then log straight to the handlers
+	## so that records from abandoned modules aren't lost.
+	if (async_log_handler is not None):
+		async_log_handler.close()
+		root_logger.removeHandler(async_log_handler)
+
+		for handler in async_log_handler.target_handlers:
+			root_logger.addHandler(handler)
+
+		if (async_log_handler.dropped > 0):
+			root_logger.warning("Dropped " + str(async_log_handler.dropped) + " log record(s) because the log queue was full")
 
 	## Only write the footer to the log file if file logging was enabled and the format was HTML.
 	if (logging_format == "html" and log_to_file == 1):
@@ -380,70 +1790,209 @@ def frameworkCleanUp(root_logger, log_file, logging_format, log_to_file):
 		log_file_handler.write("</table>")
 		log_file_handler.close()
 
+## Method Name: printProfileReport
+##
+## Purpose: Print the table of the time, memory, files, bytes and log volume of each module, for the --profile option.
+##
+## Parameters
+## 1. thread_manager   - The ThreadManager tracking the BitCollector module threads.
+## 2. pstats_directory - The directory the .pstats files were written to. (None if --pstats wasn't given)
+def printProfileReport(thread_manager, pstats_directory):
+	rows = []
+
+	for thread in sorted(thread_manager.finished_list + thread_manager.abandoned_list, key=lambda thread: thread.start_time):
+		if (thread in thread_manager.abandoned_list):
+			status = "abandoned"
+
+		else:
+			status = "rc " + str(thread.return_code)
+
+		## The memory of a thread-backed module is shared with the framework.
+		if (thread.executor == "process"):
+			peak_rss = bitCollector_resources.formatMegabytes(thread.peak_rss)
+
+		else:
+			peak_rss = "shared"
+
+		elapsed = thread.elapsed
+
+		if (elapsed is None):
+			elapsed = time.time() - thread.start_time
+
+		stats = thread.stats or bitCollector_profile.ModuleStats()
+
+		rows.append((thread.module_dict["name"], thread.executor, status, bitCollector_resources.formatSeconds(elapsed), bitCollector_resources.formatSeconds(thread.cpu_seconds), peak_rss, str(stats.files), str(stats.bytes), str(stats.log_records), str(stats.log_bytes)))
+
+	print "\n    Profile Report"
+	print
+
+	for line in bitCollector_profile.formatReport(rows):
+		print "    " + line
+
+	print "\n    Framework process: " + bitCollector_resources.formatSeconds(bitCollector_resources.processCpuSeconds()) + " CPU - " + bitCollector_resources.formatMegabytes(bitCollector_resources.peakRss()) + " peak RSS"
+
+	if (pstats_directory is not None):
+		print "    cProfile statistics: " + pstats_directory
+
 ## Method Name: importBCModules
 ##
-## Purpose: Dynamically import the BitCollector modules specified in the configuration file.
+## Purpose: Prepare the import of the BitCollector modules specified in the configuration file.
+##          Modules are imported when they are scheduled unless warm_import is set, in which case they are
+##          imported ahead of time in a background thread pool.
 ##
 ## Parameters
-## 1. root_logger      - The logger from the main method.
-## 2. additional_paths - The list of additional module search paths.
-## 3. module_list      - The list of modules stored as dictionaries.
-def importBCModules(root_logger, additional_paths, module_list):
+## 1. root_logger        - The logger from the main method.
+## 2. framework_settings - An instance of the FrameworkSettings class containing settings required to start the framework.
+## 3. module_loader      - The ModuleLoader which imports and caches the modules.
+def importBCModules(root_logger, framework_settings, module_loader):
 	root_logger.debug("Entering BitCollector.importBCModules()")
 
-	## Add the additional search paths for BitCollector modules.
-	for each in additional_paths:
-		sys.path.append(each)
+	## Add the additional search paths for BitCollector modules. (Once, since the daemon runs many configs)
+	for each in framework_settings.additional_paths:
+		if (each not in sys.path):
+			sys.path.append(each)
 
-	## Attempt to import each of the BitCollector modules.
-	for module in module_list:
-		for key in module:
-			if (key == "name"):
-				try:
-					__import__(module[key])
-					root_logger.info("Successfully imported module: " + str(module[key]))
+	if (framework_settings.warm_import == 1):
+		## Only warm up the modules which run in this process. Process-backed modules are imported by the pool workers.
+		names = []
+
+		for module_dict in framework_settings.module_list:
+			if (module_dict.get("executor", _optional_module_defaults["executor"]) != "process" and module_dict["name"] not in names):
+				names.append(module_dict["name"])
+
+		if (len(names) > 0):
+			root_logger.info("Warming up " + str(len(names)) + " module(s) in the background")
+			module_loader.warmUp(names, framework_settings.warm_import_workers)
+
+## Method Name: runModules
+##
+## Purpose: Import and run the BitCollector modules of the FrameworkSettings, then write out their results,
+##          the container and the file cache and clean up. Called once by main and once per run request by bitCollector_daemon.
+##
+## Parameters
+## 1. root_logger        - The logger from the main method.
+## 2. framework_settings - An instance of the FrameworkSettings class containing settings required to start the framework.
+## 3. platform_details   - An instance of the Platform class containing information about the target machine.
+## 4. module_loader      - The ModuleLoader which imports and caches the modules.
+## 5. shared_pool        - A (multiprocessing.Pool, pid Queue) tuple kept by the caller across runs. (None to create a pool for the run)
+##
+## Returns
+## The ThreadManager tracking the module threads.
+def runModules(root_logger, framework_settings, platform_details, module_loader, shared_pool=None):
+	## Dynamically import BitCollector modules specified in the configuration file, as they are scheduled or ahead of time.
+	importBCModules(root_logger, framework_settings, module_loader)
+
+	## Call the main method within each of the dynamically loaded BitCollector modules, max_concurrency at a time.
+	thread_manager = ThreadManager()
+	scheduler      = ModuleScheduler(framework_settings, platform_details, thread_manager, module_loader, shared_pool)
+	scheduler.run()
+
+	## Report which modules slowed down the start of the run.
+	module_loader.logImportReport()
+
+	if (framework_settings.file_index is not None):
+		root_logger.info("The file index holds " + str(len(framework_settings.file_index)) + " entries from " + str(len(framework_settings.file_index.roots)) + " walked directories")
 
-				except:
-					root_logger.warning("Unable to import module: " + str(module[key]))
+	## Write out the result records. The container sink stores them in the container, so this comes first.
+	framework_settings.results.close()
+
+	## Write the container's index so that it can be read without a scan.
+	if (framework_settings.container is not None):
+		framework_settings.container.close()
+
+	## Report how many files were unchanged since the previous runs and write the cache out.
+	if (framework_settings.file_cache is not None):
+		framework_settings.file_cache.logSummary()
+		framework_settings.file_cache.close()
+
+	## Wait for child threads and perform clean up.
+	frameworkCleanUp(root_logger, thread_manager, scheduler.deadline, framework_settings.log_file, framework_settings.logging_format, framework_settings.log_to_file, framework_settings.async_log_handler)
+
+	return thread_manager
 
 ## Method Name: main
 ##
 ## Purpose: Serves as the entry point into the script.
 def main():
 	## Parse the command-line arguments to get start-up options.
-	config_path = parseCLA()
+	config_path, profile, pstats_directory, plan_only, progress_path = parseCLA()
+
+	## Compile the configuration file into an execution plan, or reuse the plan compiled from the same config.
+	plan, plan_cached = compilePlan(config_path)
+
+	## Print the schedule of a dry run without running anything.
+	if (plan_only == 1):
+		printPlan(plan, plan_cached)
+		sys.exit()
 
-	## Parse the configuration file to determine runtime settings and to
-	## initialize the FrameworkSettings object to contain all of the settings required to run the modules.
-	framework_settings = FrameworkSettings(parseConfig(config_path))
+	## Initialize the FrameworkSettings object to contain all of the settings required to run the modules.
+	framework_settings = FrameworkSettings(planSettings(plan))
+	framework_settings.profile          = profile
+	framework_settings.pstats_directory = pstats_directory
 
 	## Create a logger for methods called by main().
 	root_logger = logging.getLogger("")
 	root_logger.debug("Initialized root_logger")
 
-	## Create a Platform instance to check the hardware and OS configuration.
-	platform_details = Platform(platform.uname())
+	if (plan_cached == 1):
+		root_logger.info("Read the execution plan from " + bitCollector_config.planCachePath(config_path))
 
-	## Dynamically import BitCollector modules specified in the configuration file.
-	importBCModules(root_logger, framework_settings.additional_paths, framework_settings.module_list)
+	## Count the log volume of each module when profiling.
+	if (profile == 1):
+		root_logger.addHandler(bitCollector_profile.ProfileLogHandler())
 
-	## Loop through and call the main method within each of the dynamically loaded BitCollector modules.
-	for module_dict in framework_settings.module_list:
-		new_thread = InitializeBCModuleThread(framework_settings, platform_details, module_dict)
+	## Publish the progress of the run to the events file.
+	if (progress_path is not None):
+		try:
+			framework_settings.progress      = bitCollector_progress.ProgressBus(progress_path)
+			framework_settings.progress_path = progress_path
 
-		## Force the main thread to wait for the child thread before terminating.
-		new_thread.join()
+		except (IOError, OSError) as error:
+			root_logger.warning("Unable to publish the progress of the run to " + progress_path + ": " + str(error))
 
-	## Wait for child threads and perform clean up.
-	frameworkCleanUp(root_logger, framework_settings.log_file, framework_settings.logging_format, framework_settings.log_to_file)
+	if (framework_settings.progress is not None):
+		root_logger.addHandler(bitCollector_progress.ProgressLogHandler(framework_settings.progress))
+		framework_settings.progress.publish("run_start", {"config_path": plan["config_path"], "max_concurrency": framework_settings.max_concurrency, "modules": [{"index": module_index, "name": module_dict["name"], "executor": module_dict.get("executor", _optional_module_defaults["executor"])} for module_index, module_dict in enumerate(plan["module_list"])]})
+
+	## Create a Platform instance to check the hardware and OS configuration, from the cached facts when they are fresh enough.
+	platform_facts, facts_cached = bitCollector_platform.loadFacts(framework_settings.platform_cache_path, framework_settings.platform_cache_ttl)
+	platform_details             = Platform(platform_facts["os"]["uname"], platform_facts)
+
+	if (facts_cached == 1):
+		root_logger.info("Read the platform facts from " + framework_settings.platform_cache_path)
+
+	## Run the modules and write out what they produced.
+	run_start      = time.time()
+	thread_manager = runModules(root_logger, framework_settings, platform_details, ModuleLoader())
+
+	if (framework_settings.progress is not None):
+		framework_settings.progress.close({"elapsed": time.time() - run_start, "abandoned": len(thread_manager.abandoned_list)})
+
+	if (profile == 1):
+		printProfileReport(thread_manager, pstats_directory)
 
 ## Method Name: parseCLA
 ##
 ## Purpose: Parse through and validate the CLA needed to start the framework.
+##
+## Returns
+## A tuple of the path to the configuration file, the profile boolean, the --pstats directory (None if not given), the --plan boolean
+## and the --progress events file. (None if not given)
 def parseCLA():
 	## Initialize flow control booleans
 	bool_help = 0
 	bool_version = 0
+	config_path = None
+
+	## Initialize the profiling options.
+	profile          = 0
+	pstats_directory = None
+
+	## Initialize a boolean tracking whether or not to only print the execution plan.
+	plan_only = 0
+
+	## Initialize the path to the file the progress events are written to.
+	progress_path = None
 
 	## Validate # of CLA.
 	if (len(sys.argv) < 2):
@@ -452,7 +2001,10 @@ def parseCLA():
 		sys.exit()
 
 	## Loop through each CLA and choose what to do based on the the arguments provided.
-	for arg in sys.argv:
+	arg_index = 1
+
+	while (arg_index < len(sys.argv)):
+		arg  = sys.argv[arg_index]
 		temp = arg.lower()
 
 		if (temp == "-h" or temp == "--help"):
@@ -461,12 +2013,38 @@ def parseCLA():
 		elif (temp == "-v" or temp == "--version"):
 			bool_version = 1
 
+		elif (temp == "-p" or temp == "--profile"):
+			profile = 1
+
+		elif (temp == "--pstats"):
+			if (arg_index + 1 >= len(sys.argv)):
+				print "    Invalid Usage: --pstats requires a directory. Use " + sys.argv[0] + " -h to display the help."
+				sys.exit()
+
+			## Wrapping the modules in cProfile implies the profile report.
+			profile          = 1
+			pstats_directory = os.path.abspath(sys.argv[arg_index + 1])
+			arg_index       += 1
+
+		elif (temp == "--plan"):
+			plan_only = 1
+
+		elif (temp == "--progress"):
+			if (arg_index + 1 >= len(sys.argv)):
+				print "    Invalid Usage: --progress requires a file. Use " + sys.argv[0] + " -h to display the help."
+				sys.exit()
+
+			progress_path = os.path.abspath(sys.argv[arg_index + 1])
+			arg_index    += 1
+
 		elif (re.match("--?\w+", temp)):
 			print "    Invalid Usage:     Use " + sys.argv[0] + " -h to display the help."
 			sys.exit()
 
 		else:
-			config_path = sys.argv[1]
+			config_path = arg
+
+		arg_index += 1
 
 	## Print the help
 	if (bool_help == 1):
@@ -474,6 +2052,10 @@ def parseCLA():
 		print "\n    Options"
 		print "        -h | --help - Prints out this help."
 		print "        -v | --version - Prints out the version you are using."
+		print "        -p | --profile - Prints a table of the time, memory, files, bytes and log volume of each module at exit."
+		print "        --pstats <directory> - Also runs each module's main method under cProfile and writes a .pstats file per module to the directory."
+		print "        --plan - Validates the configuration file and prints the execution plan without running any module."
+		print "        --progress <file> - Writes the progress of the run to the file as JSON lines, for the web app's run dashboard."
 		print "\nconfig_file - The JSON file containing the settings for the script."
 
 	## Print the version
@@ -484,178 +2066,235 @@ def parseCLA():
 	if (bool_help == 1 or bool_version == 1):
 		sys.exit()
 
-	return config_path
+	if (config_path is None):
+		print "    Invalid Usage: Use " + sys.argv[0] + " -h to display the help."
+		sys.exit()
+
+	return config_path, profile, pstats_directory, plan_only, progress_path
 
 ## Method Name: parseConfig
 ##
-## Purpose: Parse through the configuration file to determine runtime settings.
+## Purpose: Parse through the configuration file to determine runtime settings, through its execution plan.
 ##
 ## Parameters
 ## 1. config_path - The path to the configuration file.
 ##
 ## Returns
-## A tuple
-##   Index 0 - The path to the file to write log entries to.
-##   Index 1 - The default logging level to use when logging.
-##   Index 2 - The list of modules. Each element contains the name and settings for one module. 
+## The tuple returned by planSettings. (See FrameworkSettings.__init__)
 def parseConfig(config_path):
-	## Initialize blank lists to store the additional paths and module dictionaries.
-	additional_paths = []
-	module_list      = []
-
-	## Initialize booleans tracking if the required framework attributes are present.
-	module_list_present      = 0
-	additional_paths_present = 0
-	log_file_present         = 0
-	logging_format_present   = 0
-	logging_level_present    = 0
-	log_to_file_present      = 0
-	log_to_stdout_present    = 0
-
-	## Initialize booleans tracking whether the required module attributes are present.
-	name_present       = 0
-	parameters_present = 0
-	
-	## Initialize a boolean tracking whether or not to exit.
-	bool_exit = 0
-	
-	## Initialize a boolean tracking whether or not to break out of the module loop.
-	bool_break = 0
-
-	## Initialize lists to store missing required configuration entries.
-	missing_framework_config_entries = []
-	missing_module_config_entries    = []
+	return planSettings(compilePlan(config_path)[0])
 
+## Method Name: compilePlan
+##
+## Purpose: Validate the configuration file against the configuration schema and compile it into an execution plan.
+##          Every error in the file is printed before exiting. The plan is cached next to the file, keyed by its hash,
+##          and read back instead of being compiled while the file, the framework, sys.path and the modules stay the same.
+##
+## Parameters
+## 1. config_path - The path to the configuration file.
+##
+## Returns
+## A tuple
+##   Index 0 - The plan dictionary.
+##     config_hash       - The hash of the configuration file the plan was compiled from.
+##     config_path       - The absolute path to the configuration file.
+##     settings          - The dictionary of required framework settings, except module_list.
+##     optional_settings - The dictionary of optional framework settings which were present.
+##     module_list       - The list of valid modules.
+##     module_paths      - The path each module will be imported from. (None if it can't be found)
+##     dependencies      - The module dependency graph. (See buildModuleGraph)
+##     schedule          - The module_list indices grouped into waves. (See bitCollector_config.scheduleWaves)
+##     warnings          - The warnings printed when the plan was compiled, printed again when it is reused.
+##   Index 1 - A boolean tracking whether or not the plan was read from the cache.
+def compilePlan(config_path):
 	## Open the configuration file for parsing.
 	try:
-		config_json = json.load(open(config_path))
+		with open(config_path, "rb") as config_file:
+			config_bytes = config_file.read()
 
 	except IOError:
 		print "Startup - bitCollector_framework.root.parseConfig - ERROR - Unable to open: " + config_path + "."
 		sys.exit()
 
+	config_hash = bitCollector_config.hashConfig(config_bytes, [__file__, bitCollector_config.__file__])
+	plan_path   = bitCollector_config.planCachePath(config_path)
+	plan        = bitCollector_config.readPlan(plan_path, config_hash)
+
+	if (plan is not None):
+		for warning in plan["warnings"]:
+			print "Startup - bitCollector_framework.root.parseConfig - WARNING - " + warning
+
+		return plan, 1
+
+	try:
+		config_json = json.loads(config_bytes)
+
 	except ValueError:
 		print "Startup - bitCollector_framework.root.parseConfig - ERROR - The configuration file provided is not properly formatted JSON."
 		sys.exit()
 
-	## Parse through each of the key value pairs of the entire JSON payload.
-	for key, value in config_json.iteritems():
-		if (key == "log_file"):
-			log_file_present = 1
-			log_file = value
-
-		elif (key == "logging_format"):
-			logging_format_present = 1
-			logging_format = value
-
-		elif (key == "logging_level"):
-			logging_level_present = 1
-			logging_level = value
-
-		elif (key == "log_to_file"):
-			log_to_file_present = 1
-			log_to_file = value
-
-		elif (key == "log_to_stdout"):
-			log_to_stdout_present = 1
-			log_to_stdout = value
-
-		elif (key == "additional_paths"):
-			additional_paths_present = 1
-			
-			## Loop through each of the paths in the list.
-			for path in config_json["additional_paths"]:
-				## Loop through the attributes of each module and update the dictionary with those attributes.
-				for key, value in path.iteritems():
-					additional_paths.append(value)
-
-		elif (key == "module_list"):
-			module_list_present = 1
-		
-			## Loop through each of the modules in the list.
-			for module in config_json["module_list"]:				
-				## Initialize a blank dictionary to populate with the attributes of a module.
-				current_module = {}
-				
-				## Reset the values of the booleans tracking the presence of the name and parameters attributes as well as the break boolean.
-				name_present       = 0
-				parameters_present = 0
-				bool_break         = 0
-
-				## Loop through the attributes of each module and update the dictionary with those attributes.
-				for key, value in module.iteritems():
-					if (key == "name"):
-						name_present = 1
-						current_module.update({key: value})
-
-					elif (key == "parameters"):
-						parameters_present = 1
-						current_module.update({key: value})
+	if (not isinstance(config_json, dict)):
+		print "Startup - bitCollector_framework.root.parseConfig - ERROR - The configuration file provided is not a JSON object."
+		sys.exit()
+
+	settings, module_list, dependencies, errors, warnings = checkConfig(config_json)
 
-					else:
-						print "Startup - bitCollector_framework.root.parseConfig - WARNING - Unknown module configuration attribute: " + key
-
-				if (name_present == 0):
-					missing_module_config_entries.append("name")
-					bool_break = 1
-
-				if (parameters_present == 0):
-					missing_module_config_entries.append("parameters")
-					bool_break = 1
-
-				## Break out of the loop if any of the required module attributes are missing.
-				if (bool_break == 1):
-					for entry in missing_module_config_entries:
-						print "Startup - bitCollector_framework.root.parseConfig - WARNING - Required module configuration entry missing: " + entry
-						
-					print "Module will not be imported. See documentation for more info."
-				
-				else:
-					## Add the dictionary containing all the module settings to the list of modules.
-					module_list.append(current_module)
+	for warning in warnings:
+		print "Startup - bitCollector_framework.root.parseConfig - WARNING - " + warning
+
+	if (len(errors) > 0):
+		for error in errors:
+			print "Startup - bitCollector_framework.root.parseConfig - ERROR - " + error
 
-		else:
-			print "Startup - bitCollector_framework.root.parseConfig - WARNING - Unknown framework configuration attribute: " + key
-
-	## If any of the required configuration entries are not present, exit.
-	if (module_list_present == 0):
-		bool_exit = 1
-		missing_framework_config_entries.append("module_list")
-
-	if (additional_paths_present == 0):
-		bool_exit = 1
-		missing_framework_config_entries.append("additional_paths")
-
-	if (log_file_present == 0):
-		bool_exit = 1
-		missing_framework_config_entries.append("log_file")
-
-	if (logging_format_present == 0):
-		bool_exit = 1
-		missing_framework_config_entries.append("logging_format")
-
-	if (logging_level_present == 0):
-		bool_exit = 1
-		missing_framework_config_entries.append("logging_level")
-
-	if (log_to_file_present == 0):
-		bool_exit = 1
-		missing_framework_config_entries.append("log_to_file")
-
-	if (log_to_stdout_present == 0):
-		bool_exit = 1
-		missing_framework_config_entries.append("log_to_stdout")
-	
-	if (bool_exit == 1):
-		for entry in missing_framework_config_entries:
-			print "Startup - bitCollector_framework.root.parseConfig - ERROR - Required framework configuration entry missing: " + entry
-		
 		print "Startup - bitCollector_framework.root.parseConfig - ERROR - See documentation for more info."
 		sys.exit()
 
-	else:
-		## Return the configuration file name and level as well as the list of modules as a tuple.
-		return log_file, logging_format, logging_level, log_to_file, log_to_stdout, additional_paths, module_list
+	## Resolve each module name once, since the same module is often configured many times.
+	additional_paths = settings.pop("additional_paths")
+	resolved_paths   = {}
+
+	for module_index, module_dict in enumerate(module_list):
+		name = module_dict["name"]
+
+		if (name not in resolved_paths):
+			resolved_paths[name] = bitCollector_config.resolveModulePath(name, additional_paths)
+
+			if (resolved_paths[name] is None):
+				warning = "module_list[" + str(module_index) + "] (" + name + ") - Unable to find the module in sys.path or the additional paths."
+				warnings.append(warning)
+				print "Startup - bitCollector_framework.root.parseConfig - WARNING - " + warning
+
+	plan = {
+		"config_hash"       : config_hash,
+		"config_path"       : os.path.abspath(config_path),
+		"settings"          : dict([(key, value) for key, value in settings.iteritems() if (key in _required_framework_schema)], additional_paths=additional_paths),
+		"optional_settings" : dict([(key, value) for key, value in settings.iteritems() if (key in _optional_framework_schema)]),
+		"module_list"       : module_list,
+		"module_paths"      : [resolved_paths[module_dict["name"]] for module_dict in module_list],
+		"dependencies"      : dependencies,
+		"schedule"          : bitCollector_config.scheduleWaves(dependencies),
+		"warnings"          : warnings
+	}
+
+	bitCollector_config.writePlan(plan_path, plan)
+
+	return plan, 0
+
+## Method Name: checkConfig
+##
+## Purpose: Check a parsed configuration against the configuration schema without printing or exiting, so that
+##          configurations can be checked before they are written to a file.
+##
+## Parameters
+## 1. config_json - The dictionary parsed from the configuration file.
+##
+## Returns
+## A tuple
+##   Index 0 - The dictionary of valid, normalized framework settings, without the module_list.
+##   Index 1 - The list of valid, normalized module dictionaries.
+##   Index 2 - The list of dependency index lists returned by buildModuleGraph.
+##   Index 3 - The list of error messages. The configuration can't be run unless it is empty.
+##   Index 4 - The list of warning messages.
+def checkConfig(config_json):
+	## Collect every problem in the configuration before reporting any of them.
+	errors   = []
+	warnings = []
+
+	settings, missing_entries = bitCollector_config.checkEntries(config_json, _required_framework_schema, _optional_framework_schema, "", errors, warnings)
+
+	for entry in missing_entries:
+		errors.append("Required framework configuration entry missing: " + entry)
+
+	## Modules missing a required entry are skipped rather than stopping the run.
+	module_list = []
+
+	for module_index, module in enumerate(settings.pop("module_list", [])):
+		location = "module_list[" + str(module_index) + "]"
+
+		if (isinstance(module.get("name"), basestring)):
+			location += " (" + module["name"] + ")"
+
+		module_dict, missing_entries = bitCollector_config.checkEntries(module, _required_module_schema, _optional_module_schema, location + " - ", errors, warnings)
+
+		if (len(missing_entries) > 0):
+			warnings.append(location + " - Required module configuration entry missing: " + ", ".join(missing_entries) + ". The module will not be imported.")
+
+		elif (module.get("executor", "thread") not in _module_executors):
+			errors.append(location + " - executor: Expected one of " + ", ".join(_module_executors) + ", got " + json.dumps(module["executor"]))
+
+		## A required entry of the wrong type was reported as an error by checkEntries.
+		elif (len([key for key in _required_module_schema if (key not in module_dict)]) == 0):
+			module_list.append(module_dict)
+
+	## Reject dependencies which no module provides as well as dependency cycles.
+	dependencies, unknown_names = buildModuleGraph(module_list)
+
+	for name in unknown_names:
+		errors.append("No module provides the depends_on entry: " + name)
+
+	module_cycle = findModuleCycle(dependencies)
+
+	if (len(module_cycle) > 0):
+		errors.append("Module dependency cycle: " + " -> ".join([module_list[module_index]["name"] for module_index in module_cycle + module_cycle[:1]]))
+
+	return settings, module_list, dependencies, errors, warnings
+
+## Method Name: planSettings
+##
+## Purpose: Return the settings of an execution plan as the tuple FrameworkSettings is initialized from.
+##
+## Parameters
+## 1. plan - The plan dictionary returned by compilePlan.
+##
+## Returns
+## A tuple (See FrameworkSettings.__init__)
+##   Index 0 - The path to the file to write log entries to.
+##   Index 1 - The format in which to save the log file.
+##   Index 2 - The default logging level to use when logging.
+##   Index 3 - A boolean tracking whether or not to log to the log file.
+##   Index 4 - A boolean tracking whether or not to log to STDOUT.
+##   Index 5 - The list of additional module search paths.
+##   Index 6 - The list of modules. Each element contains the name and settings for one module.
+##   Index 7 - The dictionary of optional framework settings which were present.
+def planSettings(plan):
+	settings = plan["settings"]
+
+	return settings["log_file"], settings["logging_format"], settings["logging_level"], settings["log_to_file"], settings["log_to_stdout"], settings["additional_paths"], plan["module_list"], plan["optional_settings"]
+
+## Method Name: printPlan
+##
+## Purpose: Print the execution plan of a --plan dry run.
+##          Each wave holds the modules whose dependencies are all in earlier waves. Within a wave, modules start in
+##          configuration order, max_concurrency at a time.
+##
+## Parameters
+## 1. plan        - The plan dictionary returned by compilePlan.
+## 2. plan_cached - A boolean tracking whether or not the plan was read from the cache.
+def printPlan(plan, plan_cached):
+	module_list       = plan["module_list"]
+	optional_settings = plan["optional_settings"]
+
+	print "\n    Execution plan of " + plan["config_path"] + (" (cached)" if (plan_cached == 1) else " (compiled)")
+	print "        Config hash: " + plan["config_hash"]
+	print "        Modules: " + str(len(module_list)) + " in " + str(len(plan["schedule"])) + " wave(s)"
+	print "        max_concurrency: " + str(optional_settings.get("max_concurrency", _optional_framework_defaults["max_concurrency"])) + ", process_pool_size: " + str(optional_settings.get("process_pool_size", _optional_framework_defaults["process_pool_size"])) + ", run_timeout: " + str(optional_settings.get("run_timeout", _optional_framework_defaults["run_timeout"]))
+
+	for wave_index, wave in enumerate(plan["schedule"]):
+		print "\n    Wave " + str(wave_index + 1)
+
+		for module_index in wave:
+			module_dict = module_list[module_index]
+			details     = [module_dict.get("executor", _optional_module_defaults["executor"]), str(len(module_dict["parameters"])) + " parameter(s)"]
+
+			for key in ("timeout", "max_rss", "max_cpu_seconds"):
+				if (module_dict.get(key, 0) > 0):
+					details.append(key + " " + str(module_dict[key]))
+
+			print "        [" + str(module_index) + "] " + module_dict["name"] + " - " + ", ".join(details)
+			print "            Path: " + str(plan["module_paths"][module_index])
+
+			if (len(plan["dependencies"][module_index]) > 0):
+				print "            Depends on: " + ", ".join(["[" + str(dependency_index) + "] " + module_list[dependency_index]["name"] for dependency_index in plan["dependencies"][module_index]])
 
 ## This will prevent main() from running unless explicitly called.
 if (__name__ == "__main__"):
@@ -0,0 +1,368 @@
+## File Name: bitCollector_hashing.py
+##
+## Author(s): Daniel "Albinohat" Mercado
+##
+## Purpose: This script holds the hashing engine the framework hands to the BitCollector modules
+##          through framework_settings.hash_engine. Each file is read once and every requested digest is
+##          updated from the same buffer. hashlib releases the GIL while hashing, so files are hashed concurrently by a pool of threads.
+
+## Standard imports (Static)
+import hashlib, logging, Queue, sys, threading, time
+
+## Framework imports (Static)
+import bitCollector_cache, bitCollector_profile
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+
+## The algorithms used when neither the configuration nor the module asks for others.
+_default_hash_algorithms = ("md5", "sha1", "sha256")
+
+## The number of bytes read from a file at a time.
+_hash_chunk_size = 1048576
+
+## The number of files taken from the paths of hashFiles per hashing thread before their results are consumed.
+_hash_queue_factor = 2
+
+## Tells a hashing thread to exit.
+_hash_done = object()
+
+## Class Declarations
+
+## Class Name: HashResult
+##
+## Purpose: Hold the digests of one file, or the reason it couldn't be hashed.
+class HashResult():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the result.
+	##
+	## Parameters
+	## 1. path    - The path to the file.
+	## 2. size    - The number of bytes hashed.
+	## 3. digests - The dictionary mapping each algorithm name to its hexadecimal digest. (Empty if error is set)
+	## 4. elapsed - The number of seconds spent reading and hashing the file.
+	## 5. error   - The reason the file couldn't be hashed, or None.
+	## 6. cached  - A boolean tracking whether or not the digests were read from the file cache instead of the file.
+	def __init__(self, path, size, digests, elapsed, error, cached=0):
+		self.path    = path
+		self.size    = size
+		self.digests = digests
+		self.elapsed = elapsed
+		self.error   = error
+		self.cached  = cached
+
+## Class Name: HashEngine
+##
+## Purpose: Hash files with several algorithms in a single read, many files at a time.
+class HashEngine():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the engine settings.
+	##
+	## Parameters
+	## 1. workers    - The number of files hashed concurrently by hashFiles.
+	## 2. algorithms - The list of hashlib algorithm names used when the caller doesn't ask for others.
+	## 3. chunk_size - The number of bytes read from a file at a time.
+	## 4. file_cache - The FileCache holding the digests of files hashed by previous runs. (None to always read the files)
+	def __init__(self, workers, algorithms=_default_hash_algorithms, chunk_size=_hash_chunk_size, file_cache=None):
+		## Initialize the Logger for this class.
+		self.logger = logging.getLogger(self.__class__.__name__)
+		self.logger.debug("Entering BitCollector.HashEngine.__init__()")
+
+		self.workers    = max(1, workers)
+		self.algorithms = tuple(algorithms)
+		self.chunk_size = max(1, chunk_size)
+		self.file_cache = file_cache
+
+		checkAlgorithms(self.algorithms)
+
+	## Method Name: __getstate__
+	##
+	## Purpose: Drop the logger so that the engine can be passed to process-backed modules.
+	def __getstate__(self):
+		state = dict(self.__dict__)
+		del state["logger"]
+
+		return state
+
+	## Method Name: __setstate__
+	##
+	## Purpose: Restore the engine settings and recreate the logger.
+	##
+	## Parameters
+	## 1. state - The dictionary returned by __getstate__.
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self.logger = logging.getLogger(self.__class__.__name__)
+
+	## Method Name: hashFile
+	##
+	## Purpose: Hash one file with every requested algorithm, reading it once.
+	##          Files which haven't changed since the file cache stored their digests are not read.
+	##
+	## Parameters
+	## 1. path       - The path to the file, or a FileEntry from the walker.
+	## 2. algorithms - The list of hashlib algorithm names. (None for the engine's algorithms)
+	## 3. use_cache  - A boolean tracking whether or not to use the file cache, if the engine has one.
+	##
+	## Returns
+	## A HashResult. Files which can't be read are reported through its error attribute.
+	##
+	## Raises
+	## ValueError if an algorithm isn't supported by hashlib.
+	def hashFile(self, path, algorithms=None, use_cache=1):
+		if (algorithms is None):
+			algorithms = self.algorithms
+
+		else:
+			checkAlgorithms(algorithms)
+
+		hash_result = hashFileTask((path, tuple(algorithms), self.chunk_size, self.cacheFor(use_cache)))
+		bitCollector_profile.addFiles(1, hash_result.size)
+
+		return hash_result
+
+	## Method Name: hashFiles
+	##
+	## Purpose: Hash many files concurrently and yield each result as soon as it is ready, in completion order.
+	##          The paths are taken lazily, a few per hashing thread ahead of the results consumed, so a walk is never
+	##          read into memory. Stopping the iteration early stops the hashing threads.
+	##
+	## Parameters
+	## 1. paths      - An iterable of paths or FileEntry instances, such as a walk from framework_settings.walker.
+	## 2. algorithms - The list of hashlib algorithm names. (None for the engine's algorithms)
+	## 3. workers    - The number of files hashed concurrently. (None for the engine's workers)
+	## 4. use_cache  - A boolean tracking whether or not to use the file cache, if the engine has one.
+	##
+	## Returns
+	## A generator of HashResult instances.
+	##
+	## Raises
+	## ValueError if an algorithm isn't supported by hashlib.
+	def hashFiles(self, paths, algorithms=None, workers=None, use_cache=1):
+		if (algorithms is None):
+			algorithms = self.algorithms
+
+		else:
+			checkAlgorithms(algorithms)
+
+		if (workers is None):
+			workers = self.workers
+
+		return self.hashFilesWithPool(paths, tuple(algorithms), max(1, workers), self.cacheFor(use_cache))
+
+	## Method Name: cacheFor
+	##
+	## Purpose: Return the file cache to use for a call, or None.
+	##
+	## Parameters
+	## 1. use_cache - A boolean tracking whether or not the caller wants the file cache used.
+	def cacheFor(self, use_cache):
+		if (use_cache == 1):
+			return self.file_cache
+
+		return None
+
+	## Method Name: hashFilesWithPool
+	##
+	## Purpose: The generator behind hashFiles. (See hashFiles)
+	##          The paths are taken in the caller's thread and queued for the hashing threads through a bounded queue.
+	def hashFilesWithPool(self, paths, algorithms, workers, file_cache):
+		hash_start = time.time()
+		hash_count = 0
+		hash_bytes = 0
+
+		task_queue   = Queue.Queue(workers * _hash_queue_factor)
+		result_queue = Queue.Queue()
+
+		for worker_index in range(workers):
+			hash_thread = threading.Thread(target=hashWorker, args=(task_queue, result_queue, algorithms, self.chunk_size, file_cache), name="HashWorker-" + str(worker_index))
+			hash_thread.daemon = True
+			hash_thread.start()
+
+		paths     = iter(paths)
+		exhausted = 0
+		pending   = 0
+
+		try:
+			while (1):
+				## Top the queue up to its size. It never blocks, since it holds no more than the pending files.
+				while (exhausted == 0 and pending < task_queue.maxsize):
+					try:
+						task_queue.put(next(paths))
+						pending += 1
+
+					except StopIteration:
+						exhausted = 1
+
+				if (pending == 0):
+					break
+
+				hash_result, exc_info = result_queue.get()
+				pending -= 1
+
+				if (exc_info is not None):
+					raise exc_info[0], exc_info[1], exc_info[2]
+
+				hash_count += 1
+				hash_bytes += hash_result.size
+
+				## The generator runs in the module's thread, so the files are counted for the module.
+				bitCollector_profile.addFiles(1, hash_result.size)
+
+				yield hash_result
+
+		finally:
+			## Reached on completion as well as when the module stops iterating early.
+			## The files still queued are dropped and the hashing threads exit once they finish their current file.
+			while (1):
+				try:
+					task_queue.get_nowait()
+
+				except Queue.Empty:
+					break
+
+			for worker_index in range(workers):
+				task_queue.put(_hash_done)
+
+			elapsed = time.time() - hash_start
+			self.logger.debug("Hashed " + str(hash_count) + " files (" + str(hash_bytes) + " bytes) with " + str(workers) + " worker(s) in " + ("%.3f" % elapsed) + " seconds (" + ("%.1f" % (hash_bytes / 1048576.0 / max(elapsed, 0.000001))) + " MB/s)")
+
+## Classless Method Declarations
+
+## Method Name: hashFile
+##
+## Purpose: Read a file in chunks and update every digest from each chunk.
+##
+## Parameters
+## 1. path       - The path to the file.
+## 2. algorithms - The list of hashlib algorithm names.
+## 3. chunk_size - The number of bytes read at a time.
+##
+## Returns
+## A HashResult.
+def hashFile(path, algorithms, chunk_size):
+	hash_start = time.time()
+	hashes     = [hashlib.new(algorithm) for algorithm in algorithms]
+	size       = 0
+
+	## Read into the same buffer every time rather than allocating a string per chunk.
+	buffer = bytearray(chunk_size)
+	view   = memoryview(buffer)
+
+	try:
+		with open(path, "rb") as file:
+			while (1):
+				bytes_read = file.readinto(buffer)
+
+				if (bytes_read == 0):
+					break
+
+				for hash in hashes:
+					hash.update(view[:bytes_read])
+
+				size += bytes_read
+
+	except (IOError, OSError) as error:
+		return HashResult(path, size, {}, time.time() - hash_start, str(error))
+
+	return HashResult(path, size, dict(zip(algorithms, [hash.hexdigest() for hash in hashes])), time.time() - hash_start, None)
+
+## Method Name: hashFileTask
+##
+## Purpose: Hash a file queued by HashEngine, going through the file cache if there is one.
+##
+## Parameters
+## 1. task - The tuple of (path or FileEntry, algorithms, chunk_size, file_cache or None).
+def hashFileTask(task):
+	path, algorithms, chunk_size, file_cache = task
+
+	if (file_cache is None):
+		return hashFile(getattr(path, "path", path), algorithms, chunk_size)
+
+	return hashCachedFile(path, algorithms, chunk_size, file_cache)
+
+## Method Name: hashWorker
+##
+## Purpose: The body of a hashing thread of HashEngine.hashFiles. Hashes the queued files until it is told to exit.
+##
+## Parameters
+## 1. task_queue   - The Queue of paths or FileEntry instances, ended by _hash_done.
+## 2. result_queue - The Queue the (HashResult, None) or (None, exc_info) tuples are put in, one per file.
+## 3. algorithms   - The list of hashlib algorithm names.
+## 4. chunk_size   - The number of bytes read at a time.
+## 5. file_cache   - The FileCache holding the digests, or None.
+def hashWorker(task_queue, result_queue, algorithms, chunk_size, file_cache):
+	while (1):
+		path = task_queue.get()
+
+		if (path is _hash_done):
+			return
+
+		## Unexpected errors are raised in the caller's thread, since a thread which died would leave the caller waiting forever.
+		try:
+			result_queue.put((hashFileTask((path, algorithms, chunk_size, file_cache)), None))
+
+		except Exception:
+			result_queue.put((None, sys.exc_info()))
+
+## Method Name: hashCachedFile
+##
+## Purpose: Return the cached digests of a file if it hasn't changed, otherwise hash it and store its digests.
+##
+## Parameters
+## 1. entry      - The path to the file, or a FileEntry from the walker.
+## 2. algorithms - The list of hashlib algorithm names.
+## 3. chunk_size - The number of bytes read at a time.
+## 4. file_cache - The FileCache holding the digests.
+def hashCachedFile(entry, algorithms, chunk_size, file_cache):
+	try:
+		entry = bitCollector_cache.toEntry(entry)
+
+	except OSError as error:
+		return HashResult(getattr(entry, "path", entry), 0, {}, 0.0, str(error))
+
+	cached_digests = file_cache.lookup(entry, bitCollector_cache._hash_scope)
+
+	if (cached_digests is not None and all([algorithm in cached_digests for algorithm in algorithms])):
+		return HashResult(entry.path, entry.size, dict([(algorithm, cached_digests[algorithm]) for algorithm in algorithms]), 0.0, None, 1)
+
+	hash_result = hashFile(entry.path, algorithms, chunk_size)
+
+	if (hash_result.error is None):
+		## Keep the digests of other algorithms stored for the unchanged file.
+		digests = dict(cached_digests or {})
+		digests.update(hash_result.digests)
+
+		file_cache.update(entry, bitCollector_cache._hash_scope, digests)
+
+	return hash_result
+
+## Method Name: checkAlgorithms
+##
+## Purpose: Make sure hashlib supports every algorithm in a list.
+##
+## Parameters
+## 1. algorithms - The list of hashlib algorithm names.
+##
+## Raises
+## ValueError naming the first unsupported algorithm.
+def checkAlgorithms(algorithms):
+	for algorithm in algorithms:
+		if (isSupported(algorithm) == 0):
+			raise ValueError("Unsupported hash algorithm: " + str(algorithm))
+
+## Method Name: isSupported
+##
+## Purpose: Return 1 if hashlib supports an algorithm, 0 otherwise. (OpenSSL may provide more than hashlib.algorithms)
+##
+## Parameters
+## 1. algorithm - The hashlib algorithm name.
+def isSupported(algorithm):
+	try:
+		hashlib.new(algorithm)
+
+	except (TypeError, ValueError):
+		return 0
+
+	return 1
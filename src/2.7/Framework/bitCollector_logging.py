@@ -0,0 +1,377 @@
+## File Name: bitCollector_logging.py
+##
+## Author(s): Daniel "Albinohat" Mercado
+##
+## Purpose: This script holds the logging handlers and formatters used by the framework
+##          in addition to the ones provided by the standard logging module.
+
+## Standard imports (Static)
+import json, logging, logging.handlers, Queue, re, struct, threading, time
+
+## Third-party imports (Static)
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+
+## The supported values of the log_queue_policy framework setting.
+_log_queue_policies = ("block", "drop")
+
+## The maximum number of records written to the target handlers between two flushes.
+_log_batch_size = 512
+
+## The date and time format shared by the log file formats.
+_log_date_format = "%Y-%m-%dT%H:%M:%S"
+
+## The binary log format stores each record as a 4-byte big-endian length followed by the record.
+## The record starts with this header, followed by the UTF-8 encoded module, thread and message.
+##   created (double), level number (unsigned byte), module length (unsigned short), thread length (unsigned short), message length (unsigned int)
+_binary_length_prefix  = struct.Struct(">I")
+_binary_record_header  = struct.Struct(">dBHHI")
+
+## Class Declarations
+
+## Class Name: AsyncLogHandler
+##
+## Purpose: Hand log records to a single writer thread through a bounded queue.
+##          Module threads only pay for enqueueing a record. The writer thread formats the records and writes
+##          them to the target handlers in batches, flushing each handler once per batch.
+class AsyncLogHandler(logging.Handler):
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the queue and start the writer thread.
+	##
+	## Parameters
+	## 1. target_handlers - The list of handlers the writer thread writes the records to.
+	## 2. queue_size      - The maximum number of records waiting to be written.
+	## 3. policy          - What to do when the queue is full. (block - wait for room, drop - discard the record)
+	def __init__(self, target_handlers, queue_size, policy):
+		logging.Handler.__init__(self)
+
+		self.target_handlers = target_handlers
+		self.policy          = policy
+		self.dropped         = 0
+		self.queue           = Queue.Queue(max(1, queue_size))
+
+		## Set once close() has stopped the writer thread.
+		self.closed = 0
+
+		self.writer_thread = threading.Thread(target=self.writeRecords, name="AsyncLogHandler")
+		self.writer_thread.daemon = True
+		self.writer_thread.start()
+
+	## Method Name: emit
+	##
+	## Purpose: Queue a record for the writer thread.
+	##
+	## Parameters
+	## 1. record - The LogRecord to write.
+	def emit(self, record):
+		try:
+			## Merge the arguments and the traceback into strings now, since they may change before the writer thread gets to them.
+			record.msg  = record.getMessage()
+			record.args = None
+
+			if (record.exc_info):
+				record.exc_text = logging.Formatter().formatException(record.exc_info)
+				record.exc_info = None
+
+			if (self.policy == "drop"):
+				self.queue.put_nowait(record)
+
+			else:
+				self.queue.put(record)
+
+		except Queue.Full:
+			self.dropped += 1
+
+		except Exception:
+			self.handleError(record)
+
+	## Method Name: writeRecords
+	##
+	## Purpose: The body of the writer thread. Writes batches of queued records until a None record is queued.
+	def writeRecords(self):
+		while (1):
+			## Block for the first record of a batch, then take whatever else is already waiting.
+			batch = [self.queue.get()]
+
+			while (len(batch) < _log_batch_size):
+				try:
+					batch.append(self.queue.get_nowait())
+
+				except Queue.Empty:
+					break
+
+			records = [record for record in batch if (record is not None)]
+
+			for handler in self.target_handlers:
+				emitBatch(handler, records)
+
+			for record in batch:
+				self.queue.task_done()
+
+			if (len(records) < len(batch)):
+				break
+
+	## Method Name: flush
+	##
+	## Purpose: Block until every queued record has been written.
+	def flush(self):
+		if (self.closed == 0):
+			self.queue.join()
+
+	## Method Name: close
+	##
+	## Purpose: Write the remaining records and stop the writer thread.
+	def close(self):
+		if (self.closed == 0):
+			self.closed = 1
+
+			## The None record is always queued, even if the policy is drop.
+			self.queue.put(None)
+			self.writer_thread.join()
+
+		logging.Handler.close(self)
+
+## Class Name: JsonLinesFormatter
+##
+## Purpose: Format each record as one JSON object per line.
+##          Every line is complete on its own, so a file cut short by a crash is still readable up to its last line.
+class JsonLinesFormatter(logging.Formatter):
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the formatter with the framework's date and time format.
+	def __init__(self):
+		logging.Formatter.__init__(self, None, _log_date_format)
+
+	## Method Name: format
+	##
+	## Purpose: Return the record as a JSON object without a trailing newline.
+	##
+	## Parameters
+	## 1. record - The LogRecord to format.
+	def format(self, record):
+		return json.dumps(recordToDict(record, self), sort_keys=True)
+
+## Class Name: BinaryLogFormatter
+##
+## Purpose: Format each record as a compact binary record. (See _binary_record_header)
+class BinaryLogFormatter(logging.Formatter):
+	## Method Name: format
+	##
+	## Purpose: Return the binary record, without its length prefix.
+	##
+	## Parameters
+	## 1. record - The LogRecord to format.
+	def format(self, record):
+		return encodeBinaryRecord(recordToDict(record, self))
+
+## Class Name: BinaryRotatingFileHandler
+##
+## Purpose: Write length-prefixed binary records to a log file which is rotated like the other log formats.
+class BinaryRotatingFileHandler(logging.handlers.RotatingFileHandler):
+	## Method Name: __init__
+	##
+	## Purpose: Open the log file in binary append mode.
+	##
+	## Parameters
+	## 1. filename    - The path to the log file.
+	## 2. maxBytes    - The size at which the log file is rotated.
+	## 3. backupCount - The number of rotated log files to keep.
+	def __init__(self, filename, maxBytes, backupCount):
+		## RotatingFileHandler forces text append mode, so open the stream after switching to binary.
+		logging.handlers.RotatingFileHandler.__init__(self, filename, mode='a', maxBytes=maxBytes, backupCount=backupCount, encoding=None, delay=1)
+
+		self.mode   = 'ab'
+		self.stream = self._open()
+
+	## Method Name: emit
+	##
+	## Purpose: Write the length prefix and the binary record, rotating the log file first if needed.
+	##
+	## Parameters
+	## 1. record - The LogRecord to write.
+	def emit(self, record):
+		try:
+			if (self.shouldRollover(record)):
+				self.doRollover()
+
+			if (self.stream is None):
+				self.stream = self._open()
+
+			binary_record = self.format(record)
+			self.stream.write(_binary_length_prefix.pack(len(binary_record)) + binary_record)
+			self.flush()
+
+		except (KeyboardInterrupt, SystemExit):
+			raise
+
+		except Exception:
+			self.handleError(record)
+
+## Classless Method Declarations
+
+## Method Name: recordToDict
+##
+## Purpose: Extract the fields stored by the structured log formats from a record.
+##
+## Parameters
+## 1. record    - The LogRecord to convert.
+## 2. formatter - The formatter used to format the time and the traceback.
+##
+## Returns
+## A dictionary with the created, timestamp, module, thread, level and message of the record.
+def recordToDict(record, formatter):
+	message = toUnicode(record.getMessage())
+
+	## Append the traceback like logging.Formatter does.
+	if (record.exc_info and not record.exc_text):
+		record.exc_text = formatter.formatException(record.exc_info)
+
+	if (record.exc_text):
+		message = message + u"\n" + toUnicode(record.exc_text)
+
+	return {
+		"created"   : record.created,
+		"timestamp" : formatter.formatTime(record, _log_date_format),
+		"module"    : record.module + "." + record.name + "." + record.funcName,
+		"thread"    : record.threadName,
+		"level"     : record.levelname,
+		"message"   : message
+	}
+
+## Method Name: encodeBinaryRecord
+##
+## Purpose: Encode a record dictionary as a binary record, without its length prefix.
+##
+## Parameters
+## 1. record_dict - A dictionary with the same keys as recordToDict.
+def encodeBinaryRecord(record_dict):
+	module  = toUnicode(record_dict["module"]).encode("utf-8")
+	thread  = toUnicode(record_dict["thread"]).encode("utf-8")
+	message = toUnicode(record_dict["message"]).encode("utf-8")
+
+	return _binary_record_header.pack(record_dict["created"], levelNumber(record_dict["level"]), len(module), len(thread), len(message)) + module + thread + message
+
+## Method Name: levelNumber
+##
+## Purpose: Return the number of a level name. (DEBUG, INFO, etc)
+##
+## Parameters
+## 1. level_name - The name of the level, or "Level N" for unnamed levels.
+##
+## Returns
+## The level number, or 0 if the name is unknown.
+def levelNumber(level_name):
+	level = logging.getLevelName(str(level_name).upper())
+
+	if (isinstance(level, int)):
+		return level
+
+	## logging.getLevelName names unknown levels "Level N".
+	if (re.match(r"Level \d+$", str(level_name))):
+		return int(str(level_name)[6:])
+
+	return 0
+
+## Method Name: readBinaryRecords
+##
+## Purpose: Read the records of a binary log file one at a time.
+##          A record cut short by a crash ends the iteration instead of raising.
+##
+## Parameters
+## 1. stream - The binary log file, opened in binary mode.
+##
+## Returns
+## A generator of dictionaries with the same keys as recordToDict.
+def readBinaryRecords(stream):
+	while (1):
+		length_prefix = stream.read(_binary_length_prefix.size)
+
+		if (len(length_prefix) < _binary_length_prefix.size):
+			return
+
+		binary_record = stream.read(_binary_length_prefix.unpack(length_prefix)[0])
+
+		try:
+			yield decodeBinaryRecord(binary_record)
+
+		except (struct.error, UnicodeDecodeError):
+			return
+
+## Method Name: decodeBinaryRecord
+##
+## Purpose: Decode one binary record produced by BinaryLogFormatter.
+##
+## Parameters
+## 1. binary_record - The record, without its length prefix.
+##
+## Returns
+## A dictionary with the same keys as recordToDict.
+def decodeBinaryRecord(binary_record):
+	created, levelno, module_length, thread_length, message_length = _binary_record_header.unpack_from(binary_record)
+
+	offset = _binary_record_header.size
+	module = binary_record[offset:offset + module_length].decode("utf-8")
+
+	offset += module_length
+	thread = binary_record[offset:offset + thread_length].decode("utf-8")
+
+	offset += thread_length
+	message = binary_record[offset:offset + message_length]
+
+	if (len(message) < message_length):
+		raise struct.error("Truncated binary log record")
+
+	return {
+		"created"   : created,
+		"timestamp" : time.strftime(_log_date_format, time.localtime(created)),
+		"module"    : module,
+		"thread"    : thread,
+		"level"     : logging.getLevelName(levelno),
+		"message"   : message.decode("utf-8")
+	}
+
+## Method Name: toUnicode
+##
+## Purpose: Return a unicode version of a log message, replacing bytes which aren't valid UTF-8.
+##
+## Parameters
+## 1. message - The str or unicode message.
+def toUnicode(message):
+	if (isinstance(message, unicode)):
+		return message
+
+	return str(message).decode("utf-8", "replace")
+
+
+## Method Name: emitBatch
+##
+## Purpose: Write a batch of records to a handler while holding its lock once, flushing it once at the end.
+##
+## Parameters
+## 1. handler - The handler to write the records to.
+## 2. records - The list of LogRecords to write.
+def emitBatch(handler, records):
+	handler.acquire()
+
+	try:
+		## StreamHandler.emit flushes after each record. Shadow flush for the duration of the batch.
+		if (isinstance(handler, logging.StreamHandler)):
+			handler.flush = noFlush
+
+		for record in records:
+			if (record.levelno >= handler.level and handler.filter(record)):
+				handler.emit(record)
+
+	finally:
+		if ("flush" in handler.__dict__):
+			del handler.flush
+
+		handler.flush()
+		handler.release()
+
+## Method Name: noFlush
+##
+## Purpose: Stand in for StreamHandler.flush while a batch is written.
+def noFlush():
+	pass
@@ -0,0 +1,652 @@
+## File Name: bitCollector_logquery.py
+##
+## Author(s): Daniel "Albinohat" Mercado
+##
+## Purpose: This script queries and converts the log files written by the framework.
+##          Log files are read through mmap one record at a time, including the backups made when a log file is rotated,
+##          so multi-gigabyte logs never have to fit in memory. An optional sidecar time index (<log file>.idx)
+##          lets repeated time range queries skip straight to the interesting part of a log file.
+
+## Standard imports (Static)
+import bisect, json, logging, mmap, os, re, struct, sys, time
+
+## Third-party imports (Static)
+
+## Framework imports (Static)
+import bitCollector_logging
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+_logquery_version = "bitCollector_logquery v0.1.0"
+
+## The log formats which can be read and written.
+_log_formats = ("csv", "html", "jsonl", "bin")
+
+## The number of records between two entries of the time index.
+_index_interval = 1024
+
+## The time index starts with a header followed by one entry per checkpoint.
+##   Header - magic, size of the log file, modification time of the log file, log format
+##   Entry  - offset of the checkpoint record, latest time of the records before it, earliest time of the records from it onwards
+##
+## Records replayed from process-backed modules arrive out of order, so the index stores both bounds instead of
+## assuming that the log file is sorted.
+_index_magic  = "BCIX0001"
+_index_header = struct.Struct(">8sQd8s")
+_index_entry  = struct.Struct(">Qdd")
+
+## A csv record starts with "<timestamp>,<module>,<level>,". Other lines are the rest of a multi-line message.
+_csv_record_start = re.compile(r"\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d,[^,]*,[A-Za-z0-9 ]+,")
+
+## An html record spans from <tr><td> to </td></tr>, possibly over several lines.
+_html_record = re.compile(r"<tr><td>(.*?)</td><td>(.*?)</td><td>(.*?)</td><td>(.*)</td></tr>\s*$", re.DOTALL)
+
+## Class Declarations
+
+## Class Name: RecordFilter
+##
+## Purpose: Hold the criteria a record must meet to be written out.
+class RecordFilter():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the filter. A criterion set to None always matches.
+	##
+	## Parameters
+	## 1. level  - The minimum level number.
+	## 2. module - A string which must appear in the module of the record.
+	## 3. since  - The earliest time, in seconds since the epoch.
+	## 4. until  - The latest time, in seconds since the epoch.
+	## 5. regex  - A regular expression which must match part of the message.
+	def __init__(self, level, module, since, until, regex):
+		self.level  = level
+		self.module = module
+		self.since  = since
+		self.until  = until
+		self.regex  = regex
+
+		if (regex is not None):
+			self.regex = re.compile(regex)
+
+	## Method Name: matches
+	##
+	## Purpose: Return 1 if the record meets every criterion, 0 otherwise.
+	##
+	## Parameters
+	## 1. record_dict - The record, with the same keys as bitCollector_logging.recordToDict.
+	def matches(self, record_dict):
+		if (self.since is not None and record_dict["created"] < self.since):
+			return 0
+
+		if (self.until is not None and record_dict["created"] > self.until):
+			return 0
+
+		if (self.level is not None and bitCollector_logging.levelNumber(record_dict["level"]) < self.level):
+			return 0
+
+		if (self.module is not None and self.module not in record_dict["module"]):
+			return 0
+
+		if (self.regex is not None and self.regex.search(record_dict["message"]) is None):
+			return 0
+
+		return 1
+
+## Class Name: RecordWriter
+##
+## Purpose: Write records in one of the log formats.
+class RecordWriter():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the writer and write the header of the format, if it has one.
+	##
+	## Parameters
+	## 1. stream         - The file to write to.
+	## 2. logging_format - The format to write. (csv, html, jsonl or bin)
+	def __init__(self, stream, logging_format):
+		self.stream         = stream
+		self.logging_format = logging_format
+
+		if (logging_format == "csv"):
+			self.stream.write("Date & Time,Traceback,Level,Message\n")
+
+		elif (logging_format == "html"):
+			self.stream.write("<table border=\"1\"  width=\"100%\"><tr><th>Date & Time</th><th>Traceback</th><th>Level</th><th>Message</th></tr>\n")
+
+	## Method Name: write
+	##
+	## Purpose: Write one record.
+	##
+	## Parameters
+	## 1. record_dict - The record, with the same keys as bitCollector_logging.recordToDict.
+	def write(self, record_dict):
+		if (self.logging_format == "jsonl"):
+			self.stream.write(json.dumps(record_dict, sort_keys=True) + "\n")
+
+		elif (self.logging_format == "bin"):
+			binary_record = bitCollector_logging.encodeBinaryRecord(record_dict)
+			self.stream.write(bitCollector_logging._binary_length_prefix.pack(len(binary_record)) + binary_record)
+
+		else:
+			fields = [bitCollector_logging.toUnicode(record_dict[key]).encode("utf-8") for key in ("timestamp", "module", "level", "message")]
+
+			if (self.logging_format == "html"):
+				self.stream.write("<tr><td>" + "</td><td>".join(fields) + "</td></tr>\n")
+
+			else:
+				self.stream.write(",".join(fields) + "\n")
+
+	## Method Name: close
+	##
+	## Purpose: Write the footer of the format, if it has one.
+	def close(self):
+		if (self.logging_format == "html"):
+			self.stream.write("</table>")
+
+		self.stream.flush()
+
+## Classless Method Declarations
+
+## Method Name: findLogFiles
+##
+## Purpose: Return a log file and its rotated backups, oldest first.
+##          RotatingFileHandler renames the full log file to <log file>.1, the previous .1 to .2 and so on.
+##
+## Parameters
+## 1. log_path - The path to the current log file.
+def findLogFiles(log_path):
+	log_dir  = os.path.dirname(os.path.abspath(log_path))
+	log_name = os.path.basename(log_path)
+	backups  = []
+
+	for file_name in os.listdir(log_dir):
+		if (file_name.startswith(log_name + ".") and file_name[len(log_name) + 1:].isdigit()):
+			backups.append((int(file_name[len(log_name) + 1:]), os.path.join(log_dir, file_name)))
+
+	log_files = [path for number, path in sorted(backups, reverse=True)]
+
+	if (os.path.isfile(log_path)):
+		log_files.append(log_path)
+
+	return log_files
+
+## Method Name: detectLogFormat
+##
+## Purpose: Determine the format of a log file from its extension, ignoring the backup number.
+##
+## Parameters
+## 1. log_path - The path to the log file.
+##
+## Returns
+## The log format, or None if the extension isn't one of _log_formats.
+def detectLogFormat(log_path):
+	log_name = os.path.basename(log_path)
+
+	## Strip the backup number of a rotated log file. (example_log_1.html.3)
+	if (re.search(r"\.\d+$", log_name)):
+		log_name = log_name[:log_name.rindex(".")]
+
+	extension = os.path.splitext(log_name)[1][1:].lower()
+
+	if (extension in _log_formats):
+		return extension
+
+	return None
+
+## Method Name: openLogMap
+##
+## Purpose: Map a log file into memory, read-only.
+##
+## Parameters
+## 1. log_path - The path to the log file.
+##
+## Returns
+## The mmap, or None if the file is empty. (Empty files can't be mapped)
+def openLogMap(log_path):
+	log_handle = open(log_path, 'rb')
+
+	try:
+		if (os.fstat(log_handle.fileno()).st_size == 0):
+			return None
+
+		return mmap.mmap(log_handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+	finally:
+		## The mapping stays valid after the file is closed.
+		log_handle.close()
+
+## Method Name: readRecords
+##
+## Purpose: Read the records of a mapped log file, starting at a record boundary.
+##
+## Parameters
+## 1. log_map        - The mmap of the log file.
+## 2. logging_format - The format of the log file.
+## 3. start_offset   - The offset of the first record to read.
+##
+## Returns
+## A generator of (offset, record dictionary) tuples.
+def readRecords(log_map, logging_format, start_offset):
+	if (logging_format == "bin"):
+		return readBinaryRecords(log_map, start_offset)
+
+	return readTextRecords(log_map, logging_format, start_offset)
+
+## Method Name: readBinaryRecords
+##
+## Purpose: Read the length-prefixed records of a mapped bin log file. A truncated last record is ignored.
+##
+## Parameters
+## 1. log_map      - The mmap of the log file.
+## 2. start_offset - The offset of the first record to read.
+def readBinaryRecords(log_map, start_offset):
+	prefix_size = bitCollector_logging._binary_length_prefix.size
+	offset      = start_offset
+	map_size    = len(log_map)
+
+	while (offset + prefix_size <= map_size):
+		record_length = bitCollector_logging._binary_length_prefix.unpack_from(log_map, offset)[0]
+
+		if (offset + prefix_size + record_length > map_size):
+			return
+
+		try:
+			record_dict = bitCollector_logging.decodeBinaryRecord(log_map[offset + prefix_size:offset + prefix_size + record_length])
+
+		except (struct.error, UnicodeDecodeError):
+			return
+
+		yield offset, record_dict
+		offset += prefix_size + record_length
+
+## Method Name: readTextRecords
+##
+## Purpose: Read the records of a mapped csv, html or jsonl log file line by line.
+##          Lines which don't start a record are appended to the message of the previous record. (tracebacks)
+##
+## Parameters
+## 1. log_map        - The mmap of the log file.
+## 2. logging_format - The format of the log file.
+## 3. start_offset   - The offset of the first record to read.
+def readTextRecords(log_map, logging_format, start_offset):
+	log_map.seek(start_offset)
+
+	record_offset = None
+	record_lines  = []
+
+	## strptime is slow and most consecutive records share their timestamp, so remember the last conversion.
+	time_cache = {}
+
+	while (1):
+		line_offset = log_map.tell()
+		line        = log_map.readline()
+
+		if (line == ""):
+			break
+
+		## Records logged after the html footer was written follow it on the same line.
+		if (logging_format == "html" and line.startswith("</table>")):
+			line_offset += len("</table>")
+			line         = line[len("</table>"):]
+
+		if (isRecordStart(line, logging_format)):
+			if (len(record_lines) > 0):
+				record_dict = parseTextRecord("".join(record_lines), logging_format, time_cache)
+
+				if (record_dict is not None):
+					yield record_offset, record_dict
+
+			record_offset = line_offset
+			record_lines  = [line]
+
+		elif (len(record_lines) > 0 and logging_format != "jsonl"):
+			record_lines.append(line)
+
+	if (len(record_lines) > 0):
+		record_dict = parseTextRecord("".join(record_lines), logging_format, time_cache)
+
+		if (record_dict is not None):
+			yield record_offset, record_dict
+
+## Method Name: isRecordStart
+##
+## Purpose: Return 1 if a line starts a new record in the given format, 0 otherwise.
+##
+## Parameters
+## 1. line           - The line to check.
+## 2. logging_format - The format of the log file.
+def isRecordStart(line, logging_format):
+	if (logging_format == "csv"):
+		return int(_csv_record_start.match(line) is not None)
+
+	elif (logging_format == "html"):
+		return int(line.startswith("<tr><td>"))
+
+	return int(line.startswith("{"))
+
+## Method Name: parseTextRecord
+##
+## Purpose: Convert the text of one record into a record dictionary.
+##
+## Parameters
+## 1. text           - The text of the record, including its trailing newline.
+## 2. logging_format - The format of the log file.
+## 3. time_cache     - A dictionary caching the conversion of timestamps to seconds since the epoch.
+##
+## Returns
+## The record dictionary, or None if the text isn't a valid record.
+def parseTextRecord(text, logging_format, time_cache):
+	if (logging_format == "jsonl"):
+		try:
+			return json.loads(text)
+
+		except ValueError:
+			return None
+
+	if (logging_format == "html"):
+		match = _html_record.match(text)
+
+		if (match is None):
+			return None
+
+		timestamp, module, level, message = match.groups()
+
+	else:
+		timestamp, module, level, message = text.rstrip("\r\n").split(",", 3)
+
+	if (timestamp not in time_cache):
+		try:
+			time_cache.clear()
+			time_cache[timestamp] = time.mktime(time.strptime(timestamp, bitCollector_logging._log_date_format))
+
+		except ValueError:
+			return None
+
+	## The csv and html formats don't record the thread.
+	return {
+		"created"   : time_cache[timestamp],
+		"timestamp" : timestamp,
+		"module"    : bitCollector_logging.toUnicode(module),
+		"thread"    : u"",
+		"level"     : level,
+		"message"   : bitCollector_logging.toUnicode(message)
+	}
+
+## Method Name: buildTimeIndex
+##
+## Purpose: Scan a log file and write its sidecar time index. (<log file>.idx)
+##
+## Parameters
+## 1. log_path       - The path to the log file.
+## 2. logging_format - The format of the log file.
+##
+## Returns
+## The list of index entries, as (offset, latest time before, earliest time from) tuples.
+def buildTimeIndex(log_path, logging_format):
+	log_map     = openLogMap(log_path)
+	offsets     = []
+	latest      = []
+	record_time = []
+	latest_time = float("-inf")
+
+	if (log_map is not None):
+		try:
+			for record_number, (offset, record_dict) in enumerate(readRecords(log_map, logging_format, 0)):
+				if (record_number % _index_interval == 0):
+					offsets.append(offset)
+					latest.append(latest_time)
+					record_time.append(float("inf"))
+
+				latest_time     = max(latest_time, record_dict["created"])
+				record_time[-1] = min(record_time[-1], record_dict["created"])
+
+		finally:
+			log_map.close()
+
+	## Turn the earliest time of each block of records into the earliest time from each checkpoint onwards.
+	for position in range(len(record_time) - 2, -1, -1):
+		record_time[position] = min(record_time[position], record_time[position + 1])
+
+	entries   = zip(offsets, latest, record_time)
+	log_stat  = os.stat(log_path)
+	index_handle = open(log_path + ".idx", 'wb')
+
+	try:
+		index_handle.write(_index_header.pack(_index_magic, log_stat.st_size, log_stat.st_mtime, logging_format))
+
+		for entry in entries:
+			index_handle.write(_index_entry.pack(*entry))
+
+	finally:
+		index_handle.close()
+
+	return entries
+
+## Method Name: loadTimeIndex
+##
+## Purpose: Read the sidecar time index of a log file if it is still up to date.
+##
+## Parameters
+## 1. log_path       - The path to the log file.
+## 2. logging_format - The format of the log file.
+##
+## Returns
+## The list of index entries, or None if there is no index or the log file changed since it was built.
+def loadTimeIndex(log_path, logging_format):
+	try:
+		index_handle = open(log_path + ".idx", 'rb')
+
+	except IOError:
+		return None
+
+	try:
+		index_data = index_handle.read()
+
+	finally:
+		index_handle.close()
+
+	if (len(index_data) < _index_header.size):
+		return None
+
+	magic, log_size, log_mtime, index_format = _index_header.unpack_from(index_data)
+	log_stat = os.stat(log_path)
+
+	if (magic != _index_magic or log_size != log_stat.st_size or log_mtime != log_stat.st_mtime or index_format.rstrip("\x00") != logging_format):
+		return None
+
+	return [_index_entry.unpack_from(index_data, offset) for offset in range(_index_header.size, len(index_data) - _index_entry.size + 1, _index_entry.size)]
+
+## Method Name: queryLogFile
+##
+## Purpose: Write the records of a log file which match a filter.
+##
+## Parameters
+## 1. log_path      - The path to the log file.
+## 2. record_filter - The RecordFilter the records must match.
+## 3. writer        - The RecordWriter to write the matching records to.
+## 4. build_index   - A boolean tracking whether or not to build the time index if it is missing or out of date.
+##
+## Returns
+## The number of records written.
+def queryLogFile(log_path, record_filter, writer, build_index):
+	logging_format = detectLogFormat(log_path)
+
+	if (logging_format is None):
+		print >> sys.stderr, "bitCollector_logquery - WARNING - Unknown log format, skipping: " + log_path
+		return 0
+
+	entries = loadTimeIndex(log_path, logging_format)
+
+	if (entries is None and build_index == 1):
+		entries = buildTimeIndex(log_path, logging_format)
+
+	start_offset = 0
+	stop_offsets = []
+
+	if (entries is not None and len(entries) > 0):
+		## Start at the last checkpoint before which every record is older than since.
+		if (record_filter.since is not None):
+			position = bisect.bisect_left([entry[1] for entry in entries], record_filter.since) - 1
+			start_offset = entries[max(0, position)][0]
+
+		## Stop at the first checkpoint from which every record is newer than until.
+		if (record_filter.until is not None):
+			stop_offsets = [entry[0] for entry in entries if (entry[2] > record_filter.until)]
+
+	stop_offset = None
+
+	if (len(stop_offsets) > 0):
+		stop_offset = stop_offsets[0]
+
+	log_map = openLogMap(log_path)
+	written = 0
+
+	if (log_map is None):
+		return 0
+
+	try:
+		for offset, record_dict in readRecords(log_map, logging_format, start_offset):
+			if (stop_offset is not None and offset >= stop_offset):
+				break
+
+			if (record_filter.matches(record_dict) == 1):
+				writer.write(record_dict)
+				written += 1
+
+	finally:
+		log_map.close()
+
+	return written
+
+## Method Name: parseTime
+##
+## Purpose: Convert a local YYYY-MM-DDTHH:MM:SS time from the command line into seconds since the epoch.
+##
+## Parameters
+## 1. value - The time to convert.
+def parseTime(value):
+	try:
+		return time.mktime(time.strptime(value, bitCollector_logging._log_date_format))
+
+	except ValueError:
+		print "    Invalid time: " + value + ". Expected YYYY-MM-DDTHH:MM:SS."
+		sys.exit()
+
+## Method Name: main
+##
+## Purpose: Serves as the entry point into the script.
+def main():
+	options, log_paths = parseCLA()
+
+	level = None
+
+	if (options["level"] is not None):
+		level = bitCollector_logging.levelNumber(options["level"])
+
+	since = None
+	until = None
+
+	if (options["since"] is not None):
+		since = parseTime(options["since"])
+
+	if (options["until"] is not None):
+		until = parseTime(options["until"])
+
+	record_filter = RecordFilter(level, options["module"], since, until, options["regex"])
+
+	if (options["output"] is not None):
+		output_stream = open(options["output"], 'wb')
+
+	else:
+		output_stream = sys.stdout
+
+	writer  = RecordWriter(output_stream, options["to"])
+	written = 0
+
+	try:
+		for log_path in log_paths:
+			for log_file in findLogFiles(log_path):
+				written += queryLogFile(log_file, record_filter, writer, options["index"])
+
+		writer.close()
+
+	finally:
+		if (output_stream is not sys.stdout):
+			output_stream.close()
+
+	print >> sys.stderr, "bitCollector_logquery - INFO - Wrote " + str(written) + " record(s)"
+
+## Method Name: parseCLA
+##
+## Purpose: Parse through and validate the CLA.
+##
+## Returns
+## A tuple
+##   Index 0 - The dictionary of options.
+##   Index 1 - The list of log file paths.
+def parseCLA():
+	options   = {"level": None, "module": None, "since": None, "until": None, "regex": None, "to": "csv", "output": None, "index": 0}
+	log_paths = []
+
+	## Validate # of CLA.
+	if (len(sys.argv) < 2):
+		print "    Invalid Usage: Use " + sys.argv[0] + " -h to display the help."
+		sys.exit()
+
+	arg_index = 1
+
+	while (arg_index < len(sys.argv)):
+		arg  = sys.argv[arg_index]
+		temp = arg.lower()
+
+		if (temp == "-h" or temp == "--help"):
+			print "\n    Usage: " + sys.argv[0] + " [options] <log_path> [<log_path> ...]"
+			print "\n    Options"
+			print "        -h | --help                - Prints out this help."
+			print "        -v | --version             - Prints out the version you are using."
+			print "        --level <level>            - Only records at this level or above. (DEBUG, INFO, WARNING, ERROR, CRITICAL)"
+			print "        --module <text>            - Only records whose module contains the text."
+			print "        --since <time>             - Only records at or after the local time. (YYYY-MM-DDTHH:MM:SS)"
+			print "        --until <time>             - Only records at or before the local time. (YYYY-MM-DDTHH:MM:SS)"
+			print "        --regex <pattern>          - Only records whose message matches the regular expression."
+			print "        --to <format>              - The output format. (csv, html, jsonl or bin - Default: csv)"
+			print "        --output <path>            - Write to the file instead of STDOUT."
+			print "        --index                    - Build the sidecar time index (<log file>.idx) if it is missing or out of date."
+			print "\nlog_path - A log file written by the framework. Its rotated backups (<log_path>.1, .2, ...) are read too."
+			sys.exit()
+
+		elif (temp == "-v" or temp == "--version"):
+			print "\n    " + _logquery_version
+			sys.exit()
+
+		elif (temp == "--index"):
+			options["index"] = 1
+
+		elif (temp in ("--level", "--module", "--since", "--until", "--regex", "--to", "--output")):
+			if (arg_index + 1 >= len(sys.argv)):
+				print "    Invalid Usage: " + arg + " requires a value. Use " + sys.argv[0] + " -h to display the help."
+				sys.exit()
+
+			arg_index += 1
+			options[temp[2:]] = sys.argv[arg_index]
+
+		elif (re.match("--?\w+", temp)):
+			print "    Invalid Usage:     Use " + sys.argv[0] + " -h to display the help."
+			sys.exit()
+
+		else:
+			log_paths.append(arg)
+
+		arg_index += 1
+
+	if (options["to"] not in _log_formats):
+		print "    Invalid Usage: Unknown output format: " + options["to"] + ". Use one of: " + ", ".join(_log_formats)
+		sys.exit()
+
+	if (len(log_paths) == 0):
+		print "    Invalid Usage: No log file given. Use " + sys.argv[0] + " -h to display the help."
+		sys.exit()
+
+	return options, log_paths
+
+## This will prevent main() from running unless explicitly called.
+if (__name__ == "__main__"):
+	main()
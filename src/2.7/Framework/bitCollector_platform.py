@@ -0,0 +1,342 @@
+## File Name: bitCollector_platform.py
+##
+## Author(s): Daniel "Albinohat" Mercado
+##
+## Purpose: This script gathers the facts the framework hands to the BitCollector modules through platform_details.facts.
+##          The OS, distribution, hardware and mount facts are gathered in parallel, since some of the probes read
+##          files or start processes, and are cached per host for a number of seconds so that most runs don't gather them at all.
+##          Modules receive the facts as nested read-only dictionaries and tuples.
+
+## Standard imports (Static)
+import json, logging, multiprocessing, multiprocessing.pool, os, platform, re, socket, sys, time
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+
+## The version of the cached facts. Caches written by another version are gathered again.
+_facts_version = 1
+
+## The number of threads gathering the facts.
+_facts_workers = 4
+
+## The file OS-release information is read from on systemd-era Linux distributions.
+_os_release_path = "/etc/os-release"
+
+## The file the mounts are read from on Linux.
+_mounts_path = "/proc/mounts"
+
+## Class Declarations
+
+## Class Name: ReadOnlyDict
+##
+## Purpose: A dictionary which can't be changed after it is created, so that one module can't change the facts another module sees.
+class ReadOnlyDict(dict):
+	## Method Name: readOnly
+	##
+	## Purpose: Refuse a change to the dictionary.
+	##
+	## Raises
+	## TypeError every time.
+	def readOnly(self, *args, **kwargs):
+		raise TypeError("The platform facts are read-only")
+
+	__setitem__ = readOnly
+	__delitem__ = readOnly
+	clear       = readOnly
+	pop         = readOnly
+	popitem     = readOnly
+	setdefault  = readOnly
+	update      = readOnly
+
+	## Method Name: __reduce__
+	##
+	## Purpose: Pickle the dictionary through its constructor, since unpickling a dict subclass would call __setitem__.
+	def __reduce__(self):
+		return (ReadOnlyDict, (dict(self),))
+
+## Classless Method Declarations
+
+## Method Name: loadFacts
+##
+## Purpose: Return the facts of this host from the cache if they are younger than the TTL, otherwise gather and cache them.
+##
+## Parameters
+## 1. cache_path - The path to the JSON cache file. (None to always gather the facts)
+## 2. ttl        - The number of seconds cached facts stay valid.
+##
+## Returns
+## A tuple of the read-only facts and a boolean tracking whether or not they were read from the cache.
+def loadFacts(cache_path, ttl):
+	logger = logging.getLogger("bitCollector_platform")
+
+	if (cache_path is not None):
+		cached_facts = readCache(cache_path, ttl)
+
+		if (cached_facts is not None):
+			return freeze(cached_facts), 1
+
+	facts = gatherFacts()
+
+	if (cache_path is not None):
+		try:
+			writeCache(cache_path, facts)
+
+		except (IOError, OSError, TypeError, ValueError) as error:
+			logger.warning("Unable to cache the platform facts in " + cache_path + ": " + str(error))
+
+	return freeze(facts), 0
+
+## Method Name: readCache
+##
+## Purpose: Return the cached facts if they belong to this host and version and are younger than the TTL, otherwise None.
+##
+## Parameters
+## 1. cache_path - The path to the JSON cache file.
+## 2. ttl        - The number of seconds cached facts stay valid.
+def readCache(cache_path, ttl):
+	try:
+		with open(cache_path, "r") as cache_file:
+			cache = json.load(cache_file)
+
+	except (IOError, OSError, ValueError):
+		return None
+
+	if (not isinstance(cache, dict) or cache.get("version") != _facts_version or cache.get("host") != socket.gethostname()):
+		return None
+
+	## A cache from the future means the clock was changed, so it can't be trusted either.
+	age = time.time() - cache.get("gathered", 0)
+
+	if (age < 0 or age > ttl):
+		return None
+
+	return cache.get("facts")
+
+## Method Name: writeCache
+##
+## Purpose: Write the facts to the cache file, replacing it in one step so that a concurrent run never reads half of it.
+##
+## Parameters
+## 1. cache_path - The path to the JSON cache file.
+## 2. facts      - The dictionary of facts.
+def writeCache(cache_path, facts):
+	cache_directory = os.path.dirname(os.path.abspath(cache_path))
+
+	if (not os.path.isdir(cache_directory)):
+		os.makedirs(cache_directory)
+
+	temp_path = cache_path + "." + str(os.getpid()) + ".tmp"
+
+	with open(temp_path, "w") as cache_file:
+		json.dump({"version": _facts_version, "host": socket.gethostname(), "gathered": time.time(), "facts": facts}, cache_file, sort_keys=True)
+
+	## os.rename won't replace an existing file on Windows.
+	if (sys.platform == "win32" and os.path.isfile(cache_path)):
+		os.remove(cache_path)
+
+	os.rename(temp_path, cache_path)
+
+## Method Name: gatherFacts
+##
+## Purpose: Gather the OS, distribution, hardware and mount facts in parallel.
+##          A probe which fails leaves its facts empty rather than failing the run.
+##
+## Returns
+## The dictionary of facts, keyed by os, distro, hardware and mounts.
+def gatherFacts():
+	logger    = logging.getLogger("bitCollector_platform")
+	uname     = platform.uname()
+	os_type   = osType(uname[0])
+	gatherers = (("os", osFacts), ("distro", distroFacts), ("hardware", hardwareFacts), ("mounts", mountFacts))
+
+	gather_start = time.time()
+	gather_pool  = multiprocessing.pool.ThreadPool(min(_facts_workers, len(gatherers)))
+
+	try:
+		async_results = [(name, gather_pool.apply_async(gatherer, (uname, os_type))) for name, gatherer in gatherers]
+		facts         = {}
+
+		for name, async_result in async_results:
+			try:
+				facts[name] = async_result.get()
+
+			except Exception as error:
+				logger.warning("Unable to gather the " + name + " facts: " + str(error))
+				facts[name] = {}
+
+	finally:
+		gather_pool.terminate()
+
+	logger.debug("Gathered the platform facts in " + ("%.3f" % (time.time() - gather_start)) + " seconds")
+
+	return facts
+
+## Method Name: osFacts
+##
+## Purpose: Return the facts from platform.uname and the type of OS the framework's OS-dependent logic is based on.
+##
+## Parameters
+## 1. uname   - The tuple returned by platform.uname.
+## 2. os_type - The OS type. (mac, nix, windows or unknown)
+def osFacts(uname, os_type):
+	return {
+		"uname"          : list(uname),
+		"system"         : uname[0],
+		"node"           : uname[1],
+		"release"        : uname[2],
+		"version"        : uname[3],
+		"machine"        : uname[4],
+		"os_type"        : os_type,
+		"python_version" : platform.python_version()
+	}
+
+## Method Name: distroFacts
+##
+## Purpose: Return the facts of the OS distribution. The raw entry holds the tuple the OS-dependent Platform object is built from.
+##
+## Parameters
+## 1. uname   - The tuple returned by platform.uname.
+## 2. os_type - The OS type. (mac, nix, windows or unknown)
+def distroFacts(uname, os_type):
+	if (os_type == "mac"):
+		raw = platform.mac_ver()
+		return {"name": "Mac OS X", "version": raw[0], "id": "", "raw": raw}
+
+	if (os_type == "windows"):
+		raw = platform.win32_ver()
+		return {"name": "Windows", "version": raw[1], "id": raw[2], "raw": raw}
+
+	if (os_type == "nix"):
+		raw = ("", "", "")
+
+		if (hasattr(platform, "linux_distribution")):
+			raw = platform.linux_distribution(distname='', version='', id='', supported_dists=('SuSE', 'debian', 'redhat', 'mandrake'), full_distribution_name=1)
+
+		## Distributions which only ship /etc/os-release aren't recognized by linux_distribution.
+		if (raw[0] == ""):
+			os_release = readOsRelease(_os_release_path)
+			raw        = (os_release.get("NAME", ""), os_release.get("VERSION_ID", ""), os_release.get("VERSION_CODENAME", ""))
+
+		return {"name": raw[0], "version": raw[1], "id": raw[2], "raw": raw}
+
+	return {"name": "", "version": "", "id": "", "raw": ("", "", "")}
+
+## Method Name: hardwareFacts
+##
+## Purpose: Return the processor and memory facts.
+##
+## Parameters
+## 1. uname   - The tuple returned by platform.uname.
+## 2. os_type - The OS type. (mac, nix, windows or unknown)
+def hardwareFacts(uname, os_type):
+	## platform.uname doesn't start the processor probe in Python 2, but platform.processor may run a process.
+	facts = {
+		"processor"    : uname[5],
+		"machine"      : uname[4],
+		"cpu_count"    : multiprocessing.cpu_count(),
+		"memory_bytes" : None,
+		"page_size"    : None
+	}
+
+	try:
+		facts["page_size"]    = os.sysconf("SC_PAGE_SIZE")
+		facts["memory_bytes"] = os.sysconf("SC_PHYS_PAGES") * facts["page_size"]
+
+	except (AttributeError, ValueError, OSError):
+		pass
+
+	if (os_type == "nix"):
+		try:
+			with open("/proc/cpuinfo", "r") as cpuinfo_file:
+				for line in cpuinfo_file:
+					if (line.startswith("model name")):
+						facts["processor"] = line.split(":", 1)[1].strip()
+						break
+
+		except (IOError, OSError):
+			pass
+
+	return facts
+
+## Method Name: mountFacts
+##
+## Purpose: Return the mounted file systems. Only Linux is supported, elsewhere the list is empty.
+##
+## Parameters
+## 1. uname   - The tuple returned by platform.uname.
+## 2. os_type - The OS type. (mac, nix, windows or unknown)
+def mountFacts(uname, os_type):
+	mounts = []
+
+	try:
+		with open(_mounts_path, "r") as mounts_file:
+			for line in mounts_file:
+				fields = line.split()
+
+				if (len(fields) >= 4):
+					## Spaces and other characters in the mount point are octal escapes, such as \040.
+					mounts.append({"device": fields[0], "mount_point": re.sub(r"\\([0-7]{3})", lambda match: chr(int(match.group(1), 8)), fields[1]), "type": fields[2], "options": fields[3].split(",")})
+
+	except (IOError, OSError):
+		pass
+
+	return {"mounts": mounts}
+
+## Method Name: readOsRelease
+##
+## Purpose: Return the KEY=value pairs of an os-release file as a dictionary. (Empty if it can't be read)
+##
+## Parameters
+## 1. path - The path to the os-release file.
+def readOsRelease(path):
+	os_release = {}
+
+	try:
+		with open(path, "r") as os_release_file:
+			for line in os_release_file:
+				line = line.strip()
+
+				if (line == "" or line.startswith("#") or "=" not in line):
+					continue
+
+				key, value = line.split("=", 1)
+				os_release[key] = value.strip("\"'")
+
+	except (IOError, OSError):
+		pass
+
+	return os_release
+
+## Method Name: osType
+##
+## Purpose: Return the OS type of a platform.uname system name. (mac, nix, windows or unknown)
+##
+## Parameters
+## 1. system - The system name, such as Darwin, Linux, FreeBSD or Windows.
+def osType(system):
+	system = system.lower()
+
+	if (system == "darwin" or "mac" in system):
+		return "mac"
+
+	if (system.startswith("win") or system.startswith("cygwin")):
+		return "windows"
+
+	if (system in ("linux", "freebsd", "openbsd", "netbsd", "sunos", "aix", "hp-ux") or "nix" in system or "bsd" in system):
+		return "nix"
+
+	return "unknown"
+
+## Method Name: freeze
+##
+## Purpose: Return a read-only copy of the facts. Dictionaries become ReadOnlyDict instances and lists become tuples.
+##
+## Parameters
+## 1. value - The facts, or any value within them.
+def freeze(value):
+	if (isinstance(value, dict)):
+		return ReadOnlyDict([(key, freeze(item)) for key, item in value.iteritems()])
+
+	if (isinstance(value, (list, tuple))):
+		return tuple([freeze(item) for item in value])
+
+	return value
@@ -0,0 +1,149 @@
+## File Name: bitCollector_profile.py
+##
+## Author(s): Daniel "Albinohat" Mercado
+##
+## Purpose: This script holds the run profiler enabled by the --profile option of bitCollector_framework.py.
+##          Each module thread is given a ModuleStats instance which the framework services add the files and
+##          bytes they process to, and which a logging handler adds the module's log volume to.
+##          Work done by the helper threads of a service or module is counted by the thread which consumes it.
+
+## Standard imports (Static)
+import cProfile, logging, os, re, threading
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+
+## The ModuleStats of the module running in the current thread, if the run is being profiled.
+_current_stats = threading.local()
+
+## The columns of the summary table printed at exit.
+_report_columns = ("Module", "Executor", "Status", "Wall", "CPU", "Peak RSS", "Files", "Bytes", "Log records", "Log bytes")
+
+## Class Declarations
+
+## Class Name: ModuleStats
+##
+## Purpose: Hold the counters of one module run.
+class ModuleStats():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the counters.
+	def __init__(self):
+		self.files       = 0
+		self.bytes       = 0
+		self.log_records = 0
+		self.log_bytes   = 0
+
+	## Method Name: toDict
+	##
+	## Purpose: Return the file counters as a dictionary, to be sent back from a process-backed module.
+	def toDict(self):
+		return {"files": self.files, "bytes": self.bytes}
+
+	## Method Name: setDict
+	##
+	## Purpose: Take the file counters reported by a process-backed module, while it runs or when it returns.
+	##          The counters only ever grow, so a report which arrives late never lowers them.
+	##
+	## Parameters
+	## 1. counters - The dictionary returned by toDict.
+	def setDict(self, counters):
+		self.files = max(self.files, counters.get("files", 0))
+		self.bytes = max(self.bytes, counters.get("bytes", 0))
+
+## Class Name: ProfileLogHandler
+##
+## Purpose: Count the log records and message bytes emitted by the thread of each profiled module.
+##          The records a process-backed module sends back are replayed by its thread, so they are counted too.
+class ProfileLogHandler(logging.Handler):
+	## Method Name: emit
+	##
+	## Purpose: Add the record to the counters of the current module, if any.
+	##
+	## Parameters
+	## 1. record - The LogRecord being handled.
+	def emit(self, record):
+		stats = currentStats()
+
+		if (stats is not None):
+			stats.log_records += 1
+			stats.log_bytes   += len(record.getMessage())
+
+## Classless Method Declarations
+
+## Method Name: beginModule
+##
+## Purpose: Make a ModuleStats instance the counters of the current thread.
+##
+## Parameters
+## 1. stats - The ModuleStats instance. (None to stop counting)
+def beginModule(stats):
+	_current_stats.stats = stats
+
+## Method Name: currentStats
+##
+## Purpose: Return the ModuleStats of the current thread, or None if the module isn't being profiled.
+def currentStats():
+	return getattr(_current_stats, "stats", None)
+
+## Method Name: addFiles
+##
+## Purpose: Add processed files to the counters of the current module. Does nothing if the run isn't being profiled.
+##
+## Parameters
+## 1. files - The number of files.
+## 2. size  - The number of bytes read from them.
+def addFiles(files, size):
+	stats = currentStats()
+
+	if (stats is not None):
+		stats.files += files
+		stats.bytes += size
+
+## Method Name: runProfiled
+##
+## Purpose: Call a module's main method under cProfile and dump the statistics to a .pstats file.
+##
+## Parameters
+## 1. pstats_directory - The directory to write the file to.
+## 2. name             - The name of the module, used in the file name.
+## 3. module_index     - The position of the module in the module_list, which tells apart modules with the same name.
+## 4. entry_point      - The main method.
+## 5. arguments        - The tuple of arguments to call the main method with.
+##
+## Returns
+## The return value of the main method.
+def runProfiled(pstats_directory, name, module_index, entry_point, arguments):
+	profiler = cProfile.Profile()
+
+	try:
+		return profiler.runcall(entry_point, *arguments)
+
+	finally:
+		if (not os.path.isdir(pstats_directory)):
+			try:
+				os.makedirs(pstats_directory)
+
+			## Another module may have created it first.
+			except OSError:
+				pass
+
+		profiler.dump_stats(os.path.join(pstats_directory, str(module_index) + "_" + re.sub("[^\w.-]", "_", name) + ".pstats"))
+
+## Method Name: formatReport
+##
+## Purpose: Return the lines of the summary table printed at exit.
+##
+## Parameters
+## 1. rows - The list of row tuples, one string per column. (See _report_columns)
+def formatReport(rows):
+	widths = [len(column) for column in _report_columns]
+
+	for row in rows:
+		widths = [max(width, len(value)) for width, value in zip(widths, row)]
+
+	lines = []
+
+	for row in [_report_columns, ["-" * width for width in widths]] + rows:
+		lines.append("  ".join([value.ljust(width) for value, width in zip(row, widths)]).rstrip())
+
+	return lines
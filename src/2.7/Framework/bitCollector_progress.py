@@ -0,0 +1,253 @@
+## File Name: bitCollector_progress.py
+##
+## Author(s): Daniel "Albinohat" Mercado
+##
+## Purpose: This script holds the progress event bus enabled by the --progress option of bitCollector_framework.py.
+##          The framework publishes the start and end of the run and of each module, and the warnings logged during
+##          the run, onto a bounded queue without ever waiting on it. A single publisher thread writes the events to
+##          a file as JSON lines, which the web app streams to the browser, and every interval adds a progress event
+##          holding the files and bytes processed by each running module and the rate they were processed at.
+##          When the queue is full, events are dropped and counted rather than slowing down the collector threads.
+
+## Standard imports (Static)
+import json, logging, os, Queue, threading, time
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+
+## The number of events the queue holds before events are dropped.
+_progress_queue_size = 10000
+
+## The number of seconds between two progress events.
+_progress_interval = 1.0
+
+## Put on the queue by close to stop the publisher thread.
+_stop_event = object()
+
+## Class Declarations
+
+## Class Name: ProgressBus
+##
+## Purpose: Publish the progress of a run to a file of JSON lines.
+class ProgressBus():
+	## Method Name: __init__
+	##
+	## Purpose: Open the events file and start the publisher thread.
+	##
+	## Parameters
+	## 1. path     - The path to the events file. It is replaced if it exists.
+	## 2. interval - The number of seconds between two progress events.
+	##
+	## Raises
+	## IOError if the file can't be created.
+	def __init__(self, path, interval=_progress_interval):
+		events_directory = os.path.dirname(os.path.abspath(path))
+
+		if (not os.path.isdir(events_directory)):
+			os.makedirs(events_directory)
+
+		self.path     = path
+		self.interval = interval
+		self.stream   = open(path, "wb")
+		self.queue    = Queue.Queue(_progress_queue_size)
+		self.dropped  = 0
+
+		## The ModuleStats of every module which has started, by module_list index, and the indices of those still running.
+		self.lock           = threading.Lock()
+		self.module_stats   = {}
+		self.running        = set()
+		self.last_sample    = (time.time(), {}, 0, 0)
+
+		self.publisher = threading.Thread(target=self.publishEvents, name="ProgressPublisher")
+		self.publisher.daemon = True
+		self.publisher.start()
+
+	## Method Name: publish
+	##
+	## Purpose: Queue an event without waiting. The event is dropped if the queue is full.
+	##
+	## Parameters
+	## 1. event_type - The type of the event, such as module_start.
+	## 2. fields     - The dictionary of the JSON serializable fields of the event.
+	def publish(self, event_type, fields):
+		try:
+			self.queue.put_nowait(dict(fields, type=event_type, time=time.time()))
+
+		except Queue.Full:
+			self.dropped += 1
+
+	## Method Name: moduleStarted
+	##
+	## Purpose: Publish the start of a module and sample its counters from now on.
+	##
+	## Parameters
+	## 1. module_index - The position of the module in the module_list.
+	## 2. name         - The name of the module.
+	## 3. executor     - thread or process.
+	## 4. stats        - The ModuleStats instance the module's files and bytes are added to.
+	def moduleStarted(self, module_index, name, executor, stats):
+		with self.lock:
+			self.module_stats[module_index] = stats
+			self.running.add(module_index)
+
+		self.publish("module_start", {"index": module_index, "name": name, "executor": executor})
+
+	## Method Name: moduleEnded
+	##
+	## Purpose: Publish the end of a module, along with its counters if it ran.
+	##
+	## Parameters
+	## 1. module_index - The position of the module in the module_list.
+	## 2. name         - The name of the module.
+	## 3. status       - finished, failed, abandoned or skipped.
+	## 4. return_code  - The return code of the module. (None if it didn't return)
+	## 5. elapsed      - The number of seconds the module ran for. (None if it didn't run)
+	def moduleEnded(self, module_index, name, status, return_code, elapsed):
+		with self.lock:
+			self.running.discard(module_index)
+			stats = self.module_stats.get(module_index)
+
+		fields = {"index": module_index, "name": name, "status": status, "return_code": return_code, "elapsed": elapsed, "files": 0, "bytes": 0}
+
+		if (stats is not None):
+			fields.update(files=stats.files, bytes=stats.bytes)
+
+		self.publish("module_end", fields)
+
+	## Method Name: close
+	##
+	## Purpose: Publish the end of the run, wait for the publisher thread to write out the queue and close the file.
+	##
+	## Parameters
+	## 1. fields - The dictionary of the fields of the run_end event.
+	def close(self, fields):
+		self.publish("run_end", dict(fields, dropped=self.dropped))
+
+		## The queue may be full, but the publisher thread is draining it.
+		self.queue.put(_stop_event)
+		self.publisher.join()
+
+	## Method Name: publishEvents
+	##
+	## Purpose: Write the queued events to the file as they arrive, and a progress event every interval.
+	##          Runs in the publisher thread until close is called.
+	def publishEvents(self):
+		next_sample = time.time() + self.interval
+		stopping    = 0
+
+		while (stopping == 0):
+			events = []
+
+			try:
+				events.append(self.queue.get(timeout=max(0, next_sample - time.time())))
+
+				## Write out everything which is already queued in one go.
+				while (len(events) < _progress_queue_size):
+					events.append(self.queue.get_nowait())
+
+			except Queue.Empty:
+				pass
+
+			lines = []
+
+			for event in events:
+				if (event is _stop_event):
+					stopping = 1
+					continue
+
+				## The counters at the end of the run come before the run_end event.
+				if (event["type"] == "run_end"):
+					lines.append(self.sample())
+
+				lines.append(event)
+
+			if (time.time() >= next_sample):
+				lines.append(self.sample())
+				next_sample = time.time() + self.interval
+
+			self.writeEvents(lines)
+
+		self.stream.close()
+
+	## Method Name: sample
+	##
+	## Purpose: Return a progress event holding the counters and rates of the running modules and of the whole run.
+	##          The rates are measured since the previous progress event.
+	def sample(self):
+		now = time.time()
+
+		with self.lock:
+			module_stats = self.module_stats.items()
+			running      = set(self.running)
+
+		last_time, last_counts, last_files, last_bytes = self.last_sample
+		elapsed = max(now - last_time, 0.001)
+		counts  = {}
+		modules = []
+
+		for module_index, stats in module_stats:
+			counts[module_index] = (stats.files, stats.bytes)
+
+			if (module_index in running):
+				module_files, module_bytes = last_counts.get(module_index, (0, 0))
+				modules.append({"index": module_index, "files": stats.files, "bytes": stats.bytes, "files_rate": (stats.files - module_files) / elapsed, "bytes_rate": (stats.bytes - module_bytes) / elapsed})
+
+		total_files = sum([files for files, size in counts.itervalues()])
+		total_bytes = sum([size for files, size in counts.itervalues()])
+
+		self.last_sample = (now, counts, total_files, total_bytes)
+
+		return {"type": "progress", "time": now, "modules": modules, "files": total_files, "bytes": total_bytes, "files_rate": (total_files - last_files) / elapsed, "bytes_rate": (total_bytes - last_bytes) / elapsed, "dropped": self.dropped}
+
+	## Method Name: writeEvents
+	##
+	## Purpose: Write events to the file and flush it, so that a reader sees them at once.
+	##          The bus goes quiet instead of failing the run if the file can't be written.
+	##
+	## Parameters
+	## 1. events - The list of event dictionaries.
+	def writeEvents(self, events):
+		if (len(events) == 0 or self.stream.closed):
+			return
+
+		try:
+			for event in events:
+				try:
+					self.stream.write(json.dumps(event, sort_keys=True) + "\n")
+
+				## A log message which isn't valid UTF-8 is written as its repr.
+				except (TypeError, ValueError, UnicodeDecodeError):
+					self.stream.write(json.dumps(dict([(key, value if (isinstance(value, (int, long, float)) or value is None) else repr(value)) for key, value in event.iteritems()]), sort_keys=True) + "\n")
+
+			self.stream.flush()
+
+		except (IOError, OSError):
+			self.stream.close()
+
+## Class Name: ProgressLogHandler
+##
+## Purpose: Publish the warnings and errors logged during the run.
+##          The records of process-backed modules are replayed through the framework's handlers, so they are published too.
+class ProgressLogHandler(logging.Handler):
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the handler.
+	##
+	## Parameters
+	## 1. bus - The ProgressBus to publish the records on.
+	def __init__(self, bus):
+		logging.Handler.__init__(self, logging.WARNING)
+
+		self.bus = bus
+
+	## Method Name: emit
+	##
+	## Purpose: Publish a record as a warning event.
+	##
+	## Parameters
+	## 1. record - The LogRecord being handled.
+	def emit(self, record):
+		try:
+			self.bus.publish("warning", {"name": record.name, "level": record.levelname, "message": record.getMessage(), "thread": record.threadName})
+
+		except Exception:
+			self.handleError(record)
@@ -0,0 +1,153 @@
+## File Name: bitCollector_resources.py
+##
+## Author(s): Daniel "Albinohat" Mercado
+##
+## Purpose: This script holds the methods the framework uses to measure the CPU time and memory of the
+##          BitCollector modules. Processes and threads are read from /proc where it exists. Elsewhere
+##          only the calling process can be measured, through the resource module or os.times.
+
+## Standard imports (Static)
+import os
+
+## resource is only available on Unix.
+try:
+	import resource
+
+except ImportError:
+	resource = None
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+
+## The number of bytes in a megabyte, the unit of the max_rss module setting.
+_bytes_per_megabyte = 1048576
+
+## The number of clock ticks per second used by /proc for CPU times, and the number of bytes per memory page.
+try:
+	_clock_ticks = float(os.sysconf("SC_CLK_TCK"))
+	_page_size   = os.sysconf("SC_PAGE_SIZE")
+
+except (AttributeError, ValueError, OSError):
+	_clock_ticks = 100.0
+	_page_size   = 4096
+
+## Classless Method Declarations
+
+## Method Name: currentThreadId
+##
+## Purpose: Return the kernel ID of the calling thread, or None if /proc/thread-self isn't available. (Linux 3.17+)
+def currentThreadId():
+	try:
+		return int(os.readlink("/proc/thread-self").split("/")[-1])
+
+	except (OSError, ValueError):
+		return None
+
+## Method Name: readProcStat
+##
+## Purpose: Return the CPU time in seconds (user + system) from a /proc stat file, or None if it can't be read.
+##
+## Parameters
+## 1. path - The path to the stat file, such as /proc/<pid>/stat or /proc/<pid>/task/<tid>/stat.
+def readProcStat(path):
+	try:
+		with open(path, "rb") as stat_file:
+			stat = stat_file.read()
+
+	except (IOError, OSError):
+		return None
+
+	## The command name in parentheses may contain spaces, so the fields are counted from the closing parenthesis.
+	## The first field after it is the state (field 3), which puts utime and stime (fields 14 and 15) at 11 and 12.
+	fields = stat[stat.rfind(")") + 2:].split()
+
+	try:
+		return (int(fields[11]) + int(fields[12])) / _clock_ticks
+
+	except (IndexError, ValueError):
+		return None
+
+## Method Name: processCpuSeconds
+##
+## Purpose: Return the CPU time in seconds used by a process and all of its threads, or None if it can't be read.
+##
+## Parameters
+## 1. pid - The process ID. (None for the calling process, which can be measured without /proc)
+def processCpuSeconds(pid=None):
+	if (pid is None or pid == os.getpid()):
+		times = os.times()
+		return times[0] + times[1]
+
+	return readProcStat("/proc/" + str(pid) + "/stat")
+
+## Method Name: threadCpuSeconds
+##
+## Purpose: Return the CPU time in seconds used by one thread of this process, or None if it can't be read.
+##
+## Parameters
+## 1. thread_id - The kernel ID of the thread, from currentThreadId.
+def threadCpuSeconds(thread_id):
+	if (thread_id is None):
+		return None
+
+	return readProcStat("/proc/self/task/" + str(thread_id) + "/stat")
+
+## Method Name: processRss
+##
+## Purpose: Return the resident memory of a process in bytes, or None if it can't be read.
+##
+## Parameters
+## 1. pid - The process ID. (None for the calling process)
+def processRss(pid=None):
+	if (pid is None):
+		pid = "self"
+
+	try:
+		with open("/proc/" + str(pid) + "/statm", "rb") as statm_file:
+			return int(statm_file.read().split()[1]) * _page_size
+
+	except (IOError, OSError, IndexError, ValueError):
+		pass
+
+	if (pid == "self" or pid == os.getpid()):
+		return peakRss()
+
+	return None
+
+## Method Name: peakRss
+##
+## Purpose: Return the peak resident memory of the calling process in bytes, or None if it can't be read.
+def peakRss():
+	if (resource is None):
+		return None
+
+	max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+	## Linux reports kilobytes and OS X reports bytes.
+	if (os.uname()[0] == "Darwin"):
+		return max_rss
+
+	return max_rss * 1024
+
+## Method Name: formatMegabytes
+##
+## Purpose: Return a number of bytes as megabytes with one decimal, or "n/a" if it is unknown.
+##
+## Parameters
+## 1. size - The number of bytes, or None.
+def formatMegabytes(size):
+	if (size is None):
+		return "n/a"
+
+	return ("%.1f" % (size / float(_bytes_per_megabyte))) + " MB"
+
+## Method Name: formatSeconds
+##
+## Purpose: Return a number of seconds with three decimals, or "n/a" if it is unknown.
+##
+## Parameters
+## 1. seconds - The number of seconds, or None.
+def formatSeconds(seconds):
+	if (seconds is None):
+		return "n/a"
+
+	return ("%.3f" % seconds) + " s"
@@ -0,0 +1,615 @@
+## File Name: bitCollector_results.py
+##
+## Author(s): Daniel "Albinohat" Mercado
+##
+## Purpose: This script holds the results channel the framework hands to each BitCollector module
+##          through module_dict["results"]. Modules emit records into a bounded queue which blocks them
+##          when the sinks fall behind, and a writer thread hands the records to the sinks in batches.
+##          Process-backed modules spool their records to a temporary file which the framework replays.
+
+## Standard imports (Static)
+import csv, json, logging, os, Queue, sqlite3, tempfile, threading, time
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+
+## The supported values of the results_sinks framework configuration entry and the extension of the file each one writes.
+_results_sink_extensions = {
+	"jsonl"     : ".jsonl",
+	"csv"       : ".csv",
+	"sqlite"    : ".sqlite",
+	"container" : ".jsonl"
+}
+
+## The name of the artifact the container sink stores the records as.
+_results_artifact_name = "results/results.jsonl"
+
+## Marks the end of the records in the channel's queue.
+_results_done = object()
+
+## Class Declarations
+
+## Class Name: ResultsChannel
+##
+## Purpose: Carry the records emitted by the BitCollector modules to the sinks with bounded memory.
+class ResultsChannel():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the channel. The writer thread is started when the first record is emitted.
+	##
+	## Parameters
+	## 1. sinks      - The list of sink instances. (JsonLinesSink, CsvSink, SQLiteSink or ContainerSink)
+	## 2. queue_size - The number of records waiting to be written before emitting modules are blocked.
+	## 3. batch_size - The largest number of records handed to the sinks at a time.
+	def __init__(self, sinks, queue_size, batch_size):
+		## Initialize the Logger for this class.
+		self.logger = logging.getLogger(self.__class__.__name__)
+		self.logger.debug("Entering BitCollector.ResultsChannel.__init__()")
+
+		self.sinks      = list(sinks)
+		self.queue_size = max(1, queue_size)
+		self.batch_size = max(1, batch_size)
+
+		## The lock is held while a record is queued, so that no record can follow the end marker queued by close.
+		self.queue         = Queue.Queue(self.queue_size)
+		self.lock          = threading.Lock()
+		self.writer_thread = None
+		self.closed        = 0
+
+		## The number of records emitted by each module, and those emitted after the channel was closed.
+		self.counts  = {}
+		self.dropped = 0
+		self.batches = 0
+
+		## The number of records each sink failed to write, by the path of the sink.
+		self.failed = {}
+
+	## Method Name: __getstate__
+	##
+	## Purpose: Keep only the settings so that the channel can be passed to process-backed modules.
+	##          The unpickled channel has no sinks; its handles spool the records to a file instead. (See ResultsHandle)
+	def __getstate__(self):
+		return {"queue_size": self.queue_size, "batch_size": self.batch_size}
+
+	## Method Name: __setstate__
+	##
+	## Purpose: Initialize a channel without sinks in this process.
+	##
+	## Parameters
+	## 1. state - The dictionary returned by __getstate__.
+	def __setstate__(self, state):
+		self.__init__([], state["queue_size"], state["batch_size"])
+
+	## Method Name: handle
+	##
+	## Purpose: Return the handle a BitCollector module emits its records through.
+	##
+	## Parameters
+	## 1. name       - The name of the BitCollector module.
+	## 2. spool_path - The path a process-backed module spools its records to. (None for a temporary file. See spoolPath)
+	def handle(self, name, spool_path=None):
+		return ResultsHandle(self, name, spool_path)
+
+	## Method Name: put
+	##
+	## Purpose: Queue a record for the sinks, blocking while the queue is full.
+	##          The record is encoded in the caller's thread, so that a bad record is reported to the module which emitted it
+	##          and later changes to the record don't change what is written.
+	##
+	## Parameters
+	## 1. name    - The name of the BitCollector module which emitted the record.
+	## 2. record  - The JSON serializable record.
+	## 3. emitted - The time the record was emitted. (None for now)
+	##
+	## Returns
+	## 1 if the record was queued, 0 if the channel is closed or has no sinks.
+	##
+	## Raises
+	## TypeError or ValueError if the record isn't JSON serializable.
+	def put(self, name, record, emitted=None):
+		if (emitted is None):
+			emitted = time.time()
+
+		encoded_record = encodeRecord(record)
+
+		with self.lock:
+			if (self.closed == 1 or len(self.sinks) == 0):
+				self.dropped += 1
+				return 0
+
+			if (self.writer_thread is None):
+				self.writer_thread = threading.Thread(target=self.writeRecords, name="ResultsWriter")
+				self.writer_thread.daemon = True
+				self.writer_thread.start()
+
+			self.counts[name] = self.counts.get(name, 0) + 1
+
+			## Blocks while the sinks are behind, which keeps a fast module from filling the memory.
+			## The writer thread never takes the lock, so it keeps draining the queue meanwhile.
+			self.queue.put((name, emitted, encoded_record))
+
+		return 1
+
+	## Method Name: replaySpool
+	##
+	## Purpose: Queue the records a process-backed module spooled to a file, then delete the file.
+	##
+	## Parameters
+	## 1. spool_path - The path to the spool file. (See ResultsHandle.emit)
+	def replaySpool(self, spool_path):
+		try:
+			with open(spool_path, "rb") as spool:
+				for line in spool:
+					spooled = json.loads(line)
+					self.put(spooled["module"], spooled["record"], spooled["time"])
+
+		except (IOError, OSError, ValueError) as error:
+			self.logger.error("Unable to replay the results spooled to " + spool_path + ": " + str(error))
+
+		finally:
+			try:
+				os.remove(spool_path)
+
+			except OSError:
+				pass
+
+	## Method Name: writeRecords
+	##
+	## Purpose: The body of the writer thread. Takes the queued records a batch at a time and hands each batch to every sink.
+	##          A batch a sink fails to write is dropped from that sink, which is still handed the later batches.
+	def writeRecords(self):
+		done = 0
+
+		while (done == 0):
+			batch = [self.queue.get()]
+
+			## Take whatever else is already waiting, up to the batch size, without waiting for more.
+			while (len(batch) < self.batch_size):
+				try:
+					batch.append(self.queue.get_nowait())
+
+				except Queue.Empty:
+					break
+
+			if (batch[-1] is _results_done):
+				batch.pop()
+				done = 1
+
+			if (len(batch) == 0):
+				continue
+
+			self.batches += 1
+
+			for sink in list(self.sinks):
+				try:
+					sink.write(batch)
+
+				## Any error is caught, since a writer thread which died would leave the emitting modules blocked forever.
+				except Exception as error:
+					self.logger.error("Unable to write " + str(len(batch)) + " result record(s) to " + sink.path + ": " + str(error) + ". Dropping them from the sink.")
+					self.failed[sink.path] = self.failed.get(sink.path, 0) + len(batch)
+
+	## Method Name: close
+	##
+	## Purpose: Write the queued records and close the sinks. Records emitted afterwards are dropped.
+	def close(self):
+		with self.lock:
+			if (self.closed == 1):
+				return
+
+			self.closed = 1
+
+			if (self.writer_thread is not None):
+				self.queue.put(_results_done)
+
+		if (self.writer_thread is not None):
+			self.writer_thread.join()
+
+		for sink in self.sinks:
+			try:
+				sink.close()
+
+			except (IOError, OSError, sqlite3.Error) as error:
+				self.logger.error("Unable to close the results sink " + sink.path + ": " + str(error))
+
+		if (len(self.counts) > 0):
+			self.logger.info("Wrote " + str(sum(self.counts.values())) + " result record(s) in " + str(self.batches) + " batch(es) to " + ", ".join([sink.path for sink in self.sinks]))
+
+			for name in sorted(self.counts):
+				self.logger.info("  " + name + ": " + str(self.counts[name]) + " record(s)")
+
+		if (self.dropped > 0):
+			self.logger.warning("Dropped " + str(self.dropped) + " result record(s) emitted after the results channel was closed or without a sink")
+
+		for path in sorted(self.failed):
+			self.logger.warning("Failed to write " + str(self.failed[path]) + " result record(s) to " + path)
+
+## Class Name: ResultsHandle
+##
+## Purpose: The handle one BitCollector module emits its records through.
+class ResultsHandle():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the handle.
+	##
+	## Parameters
+	## 1. channel    - The ResultsChannel the records are queued in.
+	## 2. name       - The name of the BitCollector module.
+	## 3. spool_path - The path to spool the records to in a process-backed module. (None for a temporary file)
+	def __init__(self, channel, name, spool_path=None):
+		self.channel    = channel
+		self.name       = name
+		self.spool      = None
+		self.spool_path = spool_path
+		self.emitted    = 0
+
+	## Method Name: __getstate__
+	##
+	## Purpose: Keep only the module name and spool path so that the handle can be passed to process-backed modules.
+	def __getstate__(self):
+		return {"name": self.name, "spool_path": self.spool_path}
+
+	## Method Name: __setstate__
+	##
+	## Purpose: Initialize a handle which spools the records to a file for the framework to replay.
+	##
+	## Parameters
+	## 1. state - The dictionary returned by __getstate__.
+	def __setstate__(self, state):
+		self.__init__(None, state["name"], state.get("spool_path"))
+
+	## Method Name: emit
+	##
+	## Purpose: Emit one record. Blocks while the sinks are behind.
+	##
+	## Parameters
+	## 1. record - The JSON serializable record, usually a dictionary.
+	##
+	## Raises
+	## TypeError or ValueError if the record isn't JSON serializable.
+	def emit(self, record):
+		if (self.channel is not None):
+			self.channel.put(self.name, record)
+			self.emitted += 1
+			return
+
+		spooled_record = formatEncodedResult(self.name, time.time(), encodeRecord(record))
+
+		if (self.spool is None):
+			if (self.spool_path is None):
+				spool_descriptor, self.spool_path = tempfile.mkstemp(prefix="bitCollector_results_", suffix=".jsonl")
+
+			## The path can be guessed, so it is only opened if it doesn't exist yet, like mkstemp does.
+			else:
+				spool_descriptor = os.open(self.spool_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0600)
+
+			self.spool = os.fdopen(spool_descriptor, "wb")
+
+		self.spool.write(spooled_record + "\n")
+		self.emitted += 1
+
+	## Method Name: emitMany
+	##
+	## Purpose: Emit every record of an iterable. (See emit)
+	##
+	## Parameters
+	## 1. records - The iterable of records.
+	def emitMany(self, records):
+		for record in records:
+			self.emit(record)
+
+	## Method Name: closeSpool
+	##
+	## Purpose: Close the spool file of a process-backed module.
+	##
+	## Returns
+	## The path to the spool file, or None if the module didn't emit any records.
+	def closeSpool(self):
+		if (self.spool is None):
+			return None
+
+		self.spool.close()
+		self.spool = None
+
+		return self.spool_path
+
+## Class Name: JsonLinesSink
+##
+## Purpose: Write the records to a file as one JSON object per line.
+class JsonLinesSink():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the sink. The file is created when the first batch is written.
+	##
+	## Parameters
+	## 1. path - The path to the output file.
+	def __init__(self, path):
+		self.path   = path
+		self.stream = None
+
+	## Method Name: write
+	##
+	## Purpose: Write a batch of (module, time, encoded record) tuples.
+	##
+	## Parameters
+	## 1. batch - The list of (module, time, encoded record) tuples.
+	def write(self, batch):
+		if (self.stream is None):
+			self.stream = openOutput(self.path, "wb")
+
+		self.stream.write("".join([formatEncodedResult(name, emitted, encoded_record) + "\n" for name, emitted, encoded_record in batch]))
+
+	## Method Name: close
+	##
+	## Purpose: Close the output file.
+	def close(self):
+		if (self.stream is not None):
+			self.stream.close()
+			self.stream = None
+
+## Class Name: CsvSink
+##
+## Purpose: Write the records to a CSV file. The columns are the keys of the first record.
+##          Keys first seen in later records are written to the extra column as JSON.
+class CsvSink():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the sink. The file is created when the first batch is written.
+	##
+	## Parameters
+	## 1. path - The path to the output file.
+	def __init__(self, path):
+		self.path    = path
+		self.stream  = None
+		self.writer  = None
+		self.columns = None
+
+	## Method Name: write
+	##
+	## Purpose: Write a batch of (module, time, encoded record) tuples.
+	##
+	## Parameters
+	## 1. batch - The list of (module, time, encoded record) tuples.
+	def write(self, batch):
+		batch = [(name, emitted, json.loads(encoded_record)) for name, emitted, encoded_record in batch]
+
+		if (self.stream is None):
+			first_record = batch[0][2]
+
+			if (isinstance(first_record, dict)):
+				self.columns = sorted(first_record)
+
+			else:
+				self.columns = ["value"]
+
+			self.stream = openOutput(self.path, "wb")
+			self.writer = csv.writer(self.stream)
+			self.writer.writerow(["module", "time"] + [csvValue(column) for column in self.columns] + ["extra"])
+
+		rows = []
+
+		for name, emitted, record in batch:
+			if (not isinstance(record, dict)):
+				record = {"value": record}
+
+			extra = dict([(key, value) for key, value in record.iteritems() if key not in self.columns])
+			row   = [csvValue(name), "%.6f" % emitted] + [csvValue(record.get(column, "")) for column in self.columns]
+
+			if (len(extra) > 0):
+				row.append(json.dumps(extra, sort_keys=True))
+
+			else:
+				row.append("")
+
+			rows.append(row)
+
+		self.writer.writerows(rows)
+
+	## Method Name: close
+	##
+	## Purpose: Close the output file.
+	def close(self):
+		if (self.stream is not None):
+			self.stream.close()
+			self.stream = None
+
+## Class Name: SQLiteSink
+##
+## Purpose: Write the records to a table of a SQLite database, one transaction per batch.
+class SQLiteSink():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the sink. The database is created when the first batch is written.
+	##
+	## Parameters
+	## 1. path - The path to the database.
+	def __init__(self, path):
+		self.path       = path
+		self.connection = None
+
+	## Method Name: write
+	##
+	## Purpose: Insert a batch of (module, time, encoded record) tuples.
+	##
+	## Parameters
+	## 1. batch - The list of (module, time, encoded record) tuples.
+	def write(self, batch):
+		if (self.connection is None):
+			openOutput(self.path, "ab").close()
+
+			## The writer thread is the only user of the connection, but it is opened by the first write.
+			self.connection = sqlite3.connect(self.path, check_same_thread=False)
+			self.connection.execute("PRAGMA journal_mode=WAL")
+			self.connection.execute("PRAGMA synchronous=NORMAL")
+			self.connection.execute("CREATE TABLE IF NOT EXISTS results (id INTEGER PRIMARY KEY, module TEXT NOT NULL, time REAL, record TEXT)")
+
+		with self.connection:
+			self.connection.executemany("INSERT INTO results (module, time, record) VALUES (?, ?, ?)", batch)
+
+	## Method Name: close
+	##
+	## Purpose: Close the database.
+	def close(self):
+		if (self.connection is not None):
+			self.connection.close()
+			self.connection = None
+
+## Class Name: ContainerSink
+##
+## Purpose: Store the records in the artifact container as one JSON lines artifact.
+##          The records are spooled to a temporary file and streamed into the container when the sink is closed.
+class ContainerSink():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the sink.
+	##
+	## Parameters
+	## 1. container - The ContainerWriter to store the records in.
+	## 2. name      - The name of the artifact in the container.
+	def __init__(self, container, name=_results_artifact_name):
+		self.container = container
+		self.name      = name
+		self.path      = container.path + ":" + name
+		self.spool     = None
+		self.records   = 0
+
+	## Method Name: write
+	##
+	## Purpose: Spool a batch of (module, time, encoded record) tuples.
+	##
+	## Parameters
+	## 1. batch - The list of (module, time, encoded record) tuples.
+	def write(self, batch):
+		if (self.spool is None):
+			self.spool = tempfile.TemporaryFile(prefix="bitCollector_results_")
+
+		self.spool.write("".join([formatEncodedResult(name, emitted, encoded_record) + "\n" for name, emitted, encoded_record in batch]))
+		self.records += len(batch)
+
+	## Method Name: close
+	##
+	## Purpose: Store the spooled records in the container and delete the spool.
+	def close(self):
+		if (self.spool is None):
+			return
+
+		try:
+			self.spool.seek(0)
+			self.container.addStream(self.spool, self.name, {"records": self.records})
+
+		finally:
+			self.spool.close()
+			self.spool = None
+
+## Classless Method Declarations
+
+## Method Name: createSinks
+##
+## Purpose: Create the sinks named in the results_sinks framework configuration entry.
+##
+## Parameters
+## 1. names     - The list of sink names. (See _results_sink_extensions)
+## 2. base_path - The path the output files are named after, without an extension.
+## 3. container - The ContainerWriter used by the container sink, or None if the container is disabled.
+##
+## Returns
+## A tuple of the list of sinks and the list of warnings about the names which were ignored.
+def createSinks(names, base_path, container):
+	sinks    = []
+	warnings = []
+
+	for name in names:
+		if (name not in _results_sink_extensions):
+			warnings.append("Unknown results sink: " + str(name) + ". Ignoring it.")
+
+		elif (name == "container"):
+			if (container is None):
+				warnings.append("The container results sink needs the container to be enabled. Ignoring it.")
+
+			else:
+				sinks.append(ContainerSink(container))
+
+		elif (name == "jsonl"):
+			sinks.append(JsonLinesSink(base_path + _results_sink_extensions[name]))
+
+		elif (name == "csv"):
+			sinks.append(CsvSink(base_path + _results_sink_extensions[name]))
+
+		elif (name == "sqlite"):
+			sinks.append(SQLiteSink(base_path + _results_sink_extensions[name]))
+
+	return sinks, warnings
+
+## Method Name: spoolPath
+##
+## Purpose: Return the path a process-backed module spools its records to. The framework derives it to replay the
+##          records, or to delete them if the module is abandoned.
+##
+## Parameters
+## 1. run_id       - The ID of the run. (See bitCollector_framework.FrameworkSettings)
+## 2. module_index - The position of the module in the module_list.
+def spoolPath(run_id, module_index):
+	return os.path.join(tempfile.gettempdir(), "bitCollector_results_" + run_id + "_" + str(module_index) + ".jsonl")
+
+## Method Name: formatResult
+##
+## Purpose: Return a record as a JSON line, without the newline.
+##
+## Parameters
+## 1. name    - The name of the BitCollector module which emitted the record.
+## 2. emitted - The time the record was emitted.
+## 3. record  - The JSON serializable record.
+def formatResult(name, emitted, record):
+	return formatEncodedResult(name, emitted, encodeRecord(record))
+
+## Method Name: formatEncodedResult
+##
+## Purpose: Return a record which was already encoded as a JSON line, without the newline. (See formatResult)
+##
+## Parameters
+## 1. name           - The name of the BitCollector module which emitted the record.
+## 2. emitted        - The time the record was emitted.
+## 3. encoded_record - The record as returned by encodeRecord.
+def formatEncodedResult(name, emitted, encoded_record):
+	return "{\"module\": " + json.dumps(name) + ", \"record\": " + encoded_record + ", \"time\": " + json.dumps(emitted) + "}"
+
+## Method Name: encodeRecord
+##
+## Purpose: Return a record as JSON.
+##
+## Parameters
+## 1. record - The JSON serializable record.
+##
+## Raises
+## TypeError or ValueError if the record isn't JSON serializable.
+def encodeRecord(record):
+	return json.dumps(record, sort_keys=True)
+
+## Method Name: csvValue
+##
+## Purpose: Return a value as a UTF-8 string for Python 2's csv module. Lists and dictionaries are written as JSON.
+##
+## Parameters
+## 1. value - The value of a record key.
+def csvValue(value):
+	if (isinstance(value, unicode)):
+		return value.encode("utf-8")
+
+	if (isinstance(value, (dict, list, tuple))):
+		return json.dumps(value, sort_keys=True)
+
+	return str(value)
+
+## Method Name: openOutput
+##
+## Purpose: Open an output file, creating its directory if needed.
+##
+## Parameters
+## 1. path - The path to the output file.
+## 2. mode - The mode to open the file in.
+def openOutput(path, mode):
+	output_directory = os.path.dirname(os.path.abspath(path))
+
+	if (not os.path.isdir(output_directory)):
+		os.makedirs(output_directory)
+
+	return open(path, mode)
@@ -0,0 +1,311 @@
+## File Name: bitCollector_sqlite.py
+##
+## Author(s): Daniel "Albinohat" Mercado
+##
+## Purpose: This script holds the SQLite artifact reader the framework hands to the BitCollector modules
+##          through framework_settings.sqlite_reader. Databases are copied along with their -wal and -journal files
+##          and the copy is opened, so the application owning the database never sees a lock or a change.
+##          Rows are streamed out in batches through fetchmany, and several databases can be read concurrently.
+
+## Standard imports (Static)
+import logging, os, Queue, shutil, sqlite3, tempfile, threading, time
+
+## Framework imports (Static)
+import bitCollector_profile
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+
+## The files SQLite keeps next to a database which may hold changes not written to the database yet.
+## The -shm file is only an index of the -wal file, which SQLite rebuilds when the copy is opened.
+_sqlite_sidecar_suffixes = ("-wal", "-journal")
+
+## The number of batches waiting to be consumed per database read concurrently.
+_sqlite_queue_batches = 4
+
+## Marks the end of one database in the output queue of readMany.
+_database_done = object()
+
+## Class Declarations
+
+## Class Name: SQLiteReader
+##
+## Purpose: Read SQLite databases collected from the target machine with bounded memory.
+class SQLiteReader():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the reader settings.
+	##
+	## Parameters
+	## 1. workers        - The number of databases read concurrently by readMany.
+	## 2. batch_size     - The number of rows fetched at a time.
+	## 3. temp_directory - The directory the databases are copied to. (None for the system's temporary directory)
+	def __init__(self, workers, batch_size, temp_directory=None):
+		## Initialize the Logger for this class.
+		self.logger = logging.getLogger(self.__class__.__name__)
+		self.logger.debug("Entering BitCollector.SQLiteReader.__init__()")
+
+		self.workers        = max(1, workers)
+		self.batch_size     = max(1, batch_size)
+		self.temp_directory = temp_directory
+
+	## Method Name: __getstate__
+	##
+	## Purpose: Drop the logger so that the reader can be passed to process-backed modules.
+	def __getstate__(self):
+		state = dict(self.__dict__)
+		del state["logger"]
+
+		return state
+
+	## Method Name: __setstate__
+	##
+	## Purpose: Restore the reader settings and recreate the logger.
+	##
+	## Parameters
+	## 1. state - The dictionary returned by __getstate__.
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self.logger = logging.getLogger(self.__class__.__name__)
+
+	## Method Name: openCopy
+	##
+	## Purpose: Copy a database and its sidecar files to a new temporary directory and open the copy read-only.
+	##          Pending changes in a -wal or hot -journal file are applied to the copy when it is opened.
+	##
+	## Parameters
+	## 1. path - The path to the database.
+	##
+	## Returns
+	## A tuple of the sqlite3 connection and the temporary directory, to be passed to closeCopy.
+	##
+	## Raises
+	## IOError, OSError or sqlite3.Error if the database can't be copied or opened.
+	def openCopy(self, path):
+		copy_directory = tempfile.mkdtemp(prefix="bitCollector_sqlite_", dir=self.temp_directory)
+
+		try:
+			database_copy = os.path.join(copy_directory, os.path.basename(path))
+
+			shutil.copyfile(path, database_copy)
+
+			for suffix in _sqlite_sidecar_suffixes:
+				if (os.path.isfile(path + suffix)):
+					shutil.copyfile(path + suffix, database_copy + suffix)
+
+			## Python 2's sqlite3 can't open a URI with mode=ro, so the copy is opened normally and then made read-only.
+			connection = sqlite3.connect(database_copy, check_same_thread=False)
+			connection.text_factory = textFactory
+
+			## Reading the schema applies the copied -wal or -journal before writes are disabled.
+			connection.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+			connection.execute("PRAGMA query_only=1")
+
+		except (IOError, OSError, sqlite3.Error):
+			shutil.rmtree(copy_directory, True)
+			raise
+
+		return connection, copy_directory
+
+	## Method Name: closeCopy
+	##
+	## Purpose: Close a connection returned by openCopy and delete the copy.
+	##
+	## Parameters
+	## 1. connection     - The sqlite3 connection.
+	## 2. copy_directory - The temporary directory holding the copy.
+	def closeCopy(self, connection, copy_directory):
+		try:
+			connection.close()
+
+		finally:
+			shutil.rmtree(copy_directory, True)
+
+	## Method Name: readBatches
+	##
+	## Purpose: Run a query against a copy of a database and yield its rows a batch at a time.
+	##          The copy is deleted once the generator is exhausted or closed.
+	##
+	## Parameters
+	## 1. path       - The path to the database.
+	## 2. query      - The SELECT statement.
+	## 3. parameters - The parameters of the query.
+	## 4. batch_size - The number of rows per batch. (None for the reader's batch size)
+	##
+	## Returns
+	## A generator of lists of rows.
+	##
+	## Raises
+	## IOError, OSError or sqlite3.Error if the database can't be copied, opened or queried.
+	def readBatches(self, path, query, parameters=(), batch_size=None):
+		if (batch_size is None):
+			batch_size = self.batch_size
+
+		read_start = time.time()
+		rows_read  = 0
+
+		connection, copy_directory = self.openCopy(path)
+
+		bitCollector_profile.addFiles(1, databaseSize(path))
+
+		try:
+			cursor = connection.execute(query, parameters)
+
+			while (1):
+				rows = cursor.fetchmany(batch_size)
+
+				if (len(rows) == 0):
+					break
+
+				rows_read += len(rows)
+
+				yield rows
+
+		finally:
+			self.closeCopy(connection, copy_directory)
+			self.logger.debug("Read " + str(rows_read) + " row(s) from " + path + " in " + ("%.3f" % (time.time() - read_start)) + " seconds")
+
+	## Method Name: readRows
+	##
+	## Purpose: Run a query against a copy of a database and yield its rows one at a time, fetching them in batches.
+	##
+	## Parameters
+	## See readBatches.
+	##
+	## Returns
+	## A generator of rows.
+	def readRows(self, path, query, parameters=(), batch_size=None):
+		for rows in self.readBatches(path, query, parameters, batch_size):
+			for row in rows:
+				yield row
+
+	## Method Name: readMany
+	##
+	## Purpose: Run queries against several databases concurrently and yield the batches of rows as they are fetched.
+	##          Each database is read by its own thread through a bounded queue, so a fast reader can't outrun the consumer.
+	##          Stopping the iteration early stops the reading threads.
+	##
+	## Parameters
+	## 1. queries    - A list of (path, query, parameters) tuples.
+	## 2. batch_size - The number of rows per batch. (None for the reader's batch size)
+	## 3. workers    - The number of databases read at a time. (None for the reader's workers)
+	##
+	## Returns
+	## A generator of (path, rows, error) tuples. Rows are lists of rows. A database which can't be read
+	## yields one tuple with an empty list and the exception.
+	def readMany(self, queries, batch_size=None, workers=None):
+		if (workers is None):
+			workers = self.workers
+
+		workers      = max(1, min(workers, len(queries)))
+		output_queue = Queue.Queue(workers * _sqlite_queue_batches)
+		query_queue  = Queue.Queue()
+		cancelled    = threading.Event()
+
+		for query in queries:
+			query_queue.put(query)
+
+		threads = []
+
+		for thread_number in range(workers):
+			query_queue.put(None)
+
+			thread = threading.Thread(target=self.readQueries, args=(query_queue, output_queue, cancelled, batch_size), name="SQLiteReader-" + str(thread_number))
+			thread.daemon = True
+			thread.start()
+			threads.append(thread)
+
+		try:
+			remaining  = len(queries)
+			read_paths = set()
+
+			while (remaining > 0):
+				result = output_queue.get()
+
+				if (result is _database_done):
+					remaining -= 1
+					continue
+
+				## The databases are read by the reader threads, so they are counted for the module here.
+				if (result[2] is None and result[0] not in read_paths):
+					read_paths.add(result[0])
+					bitCollector_profile.addFiles(1, databaseSize(result[0]))
+
+				yield result
+
+		finally:
+			## Reached on completion as well as when the module stops iterating early.
+			cancelled.set()
+
+			## Unblock the threads waiting for room in the output queue.
+			while (any([thread.is_alive() for thread in threads])):
+				try:
+					output_queue.get(True, 0.1)
+
+				except Queue.Empty:
+					pass
+
+	## Method Name: readQueries
+	##
+	## Purpose: The body of a readMany thread. Reads databases from the query queue until a None query is taken.
+	##
+	## Parameters
+	## 1. query_queue  - The queue of (path, query, parameters) tuples.
+	## 2. output_queue - The queue the (path, rows, error) tuples are put in.
+	## 3. cancelled    - The Event set when the consumer stops iterating.
+	## 4. batch_size   - The number of rows per batch.
+	def readQueries(self, query_queue, output_queue, cancelled, batch_size):
+		while (not cancelled.is_set()):
+			query = query_queue.get()
+
+			if (query is None):
+				break
+
+			path, statement, parameters = query
+
+			try:
+				batches = self.readBatches(path, statement, parameters, batch_size)
+
+				try:
+					for rows in batches:
+						if (cancelled.is_set()):
+							break
+
+						output_queue.put((path, rows, None))
+
+				finally:
+					batches.close()
+
+			except (IOError, OSError, sqlite3.Error) as error:
+				self.logger.warning("Unable to read " + path + ": " + str(error))
+				output_queue.put((path, [], error))
+
+			output_queue.put(_database_done)
+
+## Classless Method Declarations
+
+## Method Name: databaseSize
+##
+## Purpose: Return the size in bytes of a database and its sidecar files, or 0 if it can't be read.
+##
+## Parameters
+## 1. path - The path to the database.
+def databaseSize(path):
+	size = 0
+
+	for database_path in [path] + [path + suffix for suffix in _sqlite_sidecar_suffixes]:
+		try:
+			size += os.path.getsize(database_path)
+
+		except OSError:
+			pass
+
+	return size
+
+## Method Name: textFactory
+##
+## Purpose: Decode TEXT values as UTF-8, replacing invalid bytes instead of failing the whole batch.
+##
+## Parameters
+## 1. value - The raw bytes of the TEXT value.
+def textFactory(value):
+	return value.decode("utf-8", "replace")
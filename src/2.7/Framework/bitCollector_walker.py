@@ -0,0 +1,833 @@
+## File Name: bitCollector_walker.py
+##
+## Author(s): Daniel "Albinohat" Mercado
+##
+## Purpose: This script holds the filesystem walker the framework hands to the BitCollector modules
+##          through framework_settings.walker. Directories are scanned concurrently by a pool of threads
+##          and the matching entries are streamed back to the module as they are found.
+##          Completed walks are kept in a per-run FileIndex so that later walks of the same roots are served from memory.
+
+## Standard imports (Static)
+import array, fnmatch, logging, os, Queue, stat, threading, time
+
+## Third-party imports (Optional)
+## scandir backports os.scandir to Python 2. It saves a stat call per directory entry on Windows.
+try:
+	from scandir import scandir
+
+except ImportError:
+	scandir = None
+
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+
+## The maximum number of entries waiting for the module to consume them.
+_walker_buffer_size = 4096
+
+## The number of seconds between two checks for cancellation while the buffer is full.
+_walker_put_interval = 0.1
+
+## Marks the end of a walk in the output queue.
+_walk_done = object()
+
+## The array type holding the sizes, inodes and devices in the FileIndex.
+## Unsigned longs are only 32 bits on Windows, where doubles are used instead. (Exact up to 2^53)
+if (array.array("L").itemsize >= 8):
+	_index_integer_type = "L"
+
+else:
+	_index_integer_type = "d"
+
+## Class Declarations
+
+## Class Name: FileEntry
+##
+## Purpose: Hold the path and the lstat results of one file or directory found by the walker.
+class FileEntry():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the entry. (See statEntry to build one from an lstat result)
+	##
+	## Parameters
+	## 1. path   - The path to the file or directory.
+	## 2. mode   - The st_mode of the entry.
+	## 3. size   - The size in bytes.
+	## 4. mtime  - The modification time, in seconds since the epoch.
+	## 5. inode  - The inode number.
+	## 6. device - The device the entry lives on.
+	def __init__(self, path, mode, size, mtime, inode, device):
+		self.path   = path
+		self.name   = os.path.basename(path)
+		self.mode   = mode
+		self.size   = size
+		self.mtime  = mtime
+		self.inode  = inode
+		self.device = device
+
+	def isDir(self):
+		return stat.S_ISDIR(self.mode)
+
+	def isFile(self):
+		return stat.S_ISREG(self.mode)
+
+	def isLink(self):
+		return stat.S_ISLNK(self.mode)
+
+## Class Name: FileWalker
+##
+## Purpose: Walk directory trees concurrently and stream the entries matching a set of filters.
+class FileWalker():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the walker settings.
+	##
+	## Parameters
+	## 1. threads        - The number of threads scanning directories during a walk.
+	## 2. exclude_mounts - The list of mount points which are never entered. (/proc, /sys, network shares, etc)
+	## 3. cross_mounts   - A boolean tracking whether or not to enter mount points below the roots of a walk.
+	## 4. file_index     - A boolean tracking whether or not to keep completed walks in a FileIndex.
+	def __init__(self, threads, exclude_mounts, cross_mounts, file_index):
+		## Initialize the Logger for this class.
+		self.logger = logging.getLogger(self.__class__.__name__)
+		self.logger.debug("Entering BitCollector.FileWalker.__init__()")
+
+		self.threads        = max(1, threads)
+		self.exclude_mounts = set([os.path.normcase(os.path.abspath(path)) for path in exclude_mounts])
+		self.cross_mounts   = cross_mounts
+		self.file_index     = None
+
+		if (file_index == 1):
+			self.file_index = FileIndex()
+
+	## Method Name: __getstate__
+	##
+	## Purpose: Drop the logger so that the walker can be passed to process-backed modules.
+	def __getstate__(self):
+		state = dict(self.__dict__)
+		del state["logger"]
+
+		return state
+
+	## Method Name: __setstate__
+	##
+	## Purpose: Restore the walker settings and recreate the logger.
+	##
+	## Parameters
+	## 1. state - The dictionary returned by __getstate__.
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self.logger = logging.getLogger(self.__class__.__name__)
+
+	## Method Name: walk
+	##
+	## Purpose: Walk one or more directory trees and yield the matching entries as they are found.
+	##          Symbolic links are reported but never followed. Stopping the iteration early stops the scanning threads.
+	##          Directories already walked to completion during this run are read from the FileIndex instead of the disk.
+	##
+	## Parameters
+	## 1. roots           - A path or a list of paths to walk.
+	## 2. patterns        - A list of glob patterns matched against the entry name. (None matches everything)
+	## 3. min_size        - The minimum size in bytes. (None for no minimum)
+	## 4. max_size        - The maximum size in bytes. (None for no maximum)
+	## 5. modified_after  - Only entries modified at or after this time, in seconds since the epoch. (None for no limit)
+	## 6. modified_before - Only entries modified before this time, in seconds since the epoch. (None for no limit)
+	## 7. include_dirs    - A boolean tracking whether or not to yield directories as well as files.
+	##
+	## Returns
+	## A generator of FileEntry instances.
+	def walk(self, roots, patterns=None, min_size=None, max_size=None, modified_after=None, modified_before=None, include_dirs=0):
+		if (isinstance(roots, basestring)):
+			roots = [roots]
+
+		## The index is keyed by absolute path.
+		roots        = [os.path.abspath(root) for root in roots]
+		entry_filter = EntryFilter(patterns, min_size, max_size, modified_after, modified_before, include_dirs)
+
+		if (self.file_index is None):
+			return WalkJob(self, entry_filter).run(roots)
+
+		indexed_roots = [root for root in roots if (self.file_index.covers(root) == 1)]
+		disk_roots    = [root for root in roots if (root not in indexed_roots)]
+
+		return self.walkIndexAndDisk(indexed_roots, disk_roots, entry_filter)
+
+	## Method Name: walkIndexAndDisk
+	##
+	## Purpose: Yield the matching entries of the indexed roots from memory, then walk the remaining roots on disk.
+	##          A root which is a file is yielded itself, as it is by a walk on disk.
+	##
+	## Parameters
+	## 1. indexed_roots - The list of roots covered by the FileIndex.
+	## 2. disk_roots    - The list of roots to walk on disk.
+	## 3. entry_filter  - The EntryFilter the yielded entries must match.
+	def walkIndexAndDisk(self, indexed_roots, disk_roots, entry_filter):
+		for root in indexed_roots:
+			self.logger.debug("Reading " + root + " from the file index")
+
+			root_entry = self.file_index.lookup(root)
+
+			if (root_entry is not None and not root_entry.isDir()):
+				if (entry_filter.matches(root_entry) == 1):
+					yield root_entry
+
+				continue
+
+			for entry in self.file_index.find(prefix=root):
+				if (entry_filter.matches(entry) == 1):
+					yield entry
+
+		if (len(disk_roots) > 0):
+			for entry in WalkJob(self, entry_filter).run(disk_roots):
+				yield entry
+
+## Class Name: EntryFilter
+##
+## Purpose: Hold the criteria an entry must meet to be yielded by a walk.
+class EntryFilter():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the filter. (See FileWalker.walk)
+	def __init__(self, patterns, min_size, max_size, modified_after, modified_before, include_dirs):
+		self.patterns        = patterns
+		self.min_size        = min_size
+		self.max_size        = max_size
+		self.modified_after  = modified_after
+		self.modified_before = modified_before
+		self.include_dirs    = include_dirs
+
+		if (isinstance(patterns, basestring)):
+			self.patterns = [patterns]
+
+	## Method Name: matches
+	##
+	## Purpose: Return 1 if the entry meets every criterion, 0 otherwise.
+	##
+	## Parameters
+	## 1. entry - The FileEntry to check.
+	def matches(self, entry):
+		if (entry.isDir() and self.include_dirs == 0):
+			return 0
+
+		if (self.min_size is not None and entry.size < self.min_size):
+			return 0
+
+		if (self.max_size is not None and entry.size > self.max_size):
+			return 0
+
+		if (self.modified_after is not None and entry.mtime < self.modified_after):
+			return 0
+
+		if (self.modified_before is not None and entry.mtime >= self.modified_before):
+			return 0
+
+		if (self.patterns is not None):
+			for pattern in self.patterns:
+				if (fnmatch.fnmatch(entry.name, pattern)):
+					return 1
+
+			return 0
+
+		return 1
+
+## Class Name: WalkJob
+##
+## Purpose: Hold the state of one walk. Scanning threads take directories from a shared queue,
+##          queue the subdirectories they find and hand the matching entries to the consumer through a bounded queue.
+class WalkJob():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the queues and counters of the walk.
+	##
+	## Parameters
+	## 1. walker       - The FileWalker which started the walk.
+	## 2. entry_filter - The EntryFilter the yielded entries must match.
+	def __init__(self, walker, entry_filter):
+		self.walker       = walker
+		self.entry_filter = entry_filter
+		self.logger       = walker.logger
+
+		self.directory_queue = Queue.Queue()
+		self.output_queue    = Queue.Queue(_walker_buffer_size)
+		self.cancelled       = threading.Event()
+
+		## The number of directories queued or being scanned. The walk is over when it drops to 0.
+		self.lock        = threading.Lock()
+		self.outstanding = 0
+
+		self.directories = 0
+		self.entries     = 0
+		self.errors      = 0
+
+		## Every entry found by the walk, merged into the walker's FileIndex if the walk runs to completion.
+		self.index_segment = None
+
+		if (walker.file_index is not None):
+			self.index_segment = FileIndex()
+
+	## Method Name: run
+	##
+	## Purpose: Start the scanning threads and yield the matching entries until every directory has been scanned.
+	##
+	## Parameters
+	## 1. roots - The list of paths to walk.
+	def run(self, roots):
+		walk_start = time.time()
+
+		## The directory roots which will be complete in the index once every queued directory has been scanned.
+		index_roots = []
+
+		for root in roots:
+			try:
+				root_entry = statEntry(root, os.lstat(root))
+
+			except OSError as error:
+				self.logger.warning("Unable to walk " + root + ": " + str(error))
+				continue
+
+			if (root_entry.isDir()):
+				self.outstanding += 1
+				self.directory_queue.put(root_entry)
+				index_roots.append(root)
+
+			elif (self.entry_filter.matches(root_entry) == 1):
+				self.output_queue.put(root_entry)
+
+		if (self.outstanding == 0):
+			self.output_queue.put(_walk_done)
+
+		threads = []
+
+		for thread_number in range(min(self.walker.threads, max(1, self.outstanding * self.walker.threads))):
+			thread = threading.Thread(target=self.scanDirectories, name="FileWalker-" + str(thread_number))
+			thread.daemon = True
+			thread.start()
+			threads.append(thread)
+
+		try:
+			while (1):
+				entry = self.output_queue.get()
+
+				if (entry is _walk_done):
+					if (self.index_segment is not None and len(index_roots) > 0):
+						self.walker.file_index.merge(self.index_segment, index_roots)
+
+					break
+
+				yield entry
+
+		finally:
+			## Reached on completion as well as when the module stops iterating early.
+			self.cancelled.set()
+
+			for thread in threads:
+				self.directory_queue.put(None)
+
+			self.logger.debug("Walked " + str(self.directories) + " directories and " + str(self.entries) + " entries with " + str(self.errors) + " error(s) in " + ("%.3f" % (time.time() - walk_start)) + " seconds")
+
+	## Method Name: scanDirectories
+	##
+	## Purpose: The body of a scanning thread. Scans queued directories until the walk is over or cancelled.
+	def scanDirectories(self):
+		while (not self.cancelled.is_set()):
+			directory_entry = self.directory_queue.get()
+
+			if (directory_entry is None):
+				break
+
+			try:
+				self.scanDirectory(directory_entry)
+
+			finally:
+				with self.lock:
+					self.outstanding -= 1
+					walk_over = (self.outstanding == 0)
+
+				if (walk_over):
+					self.putEntry(_walk_done)
+
+	## Method Name: scanDirectory
+	##
+	## Purpose: Read one directory, queueing its subdirectories and handing its matching entries to the consumer.
+	##
+	## Parameters
+	## 1. directory_entry - The FileEntry of the directory.
+	def scanDirectory(self, directory_entry):
+		try:
+			directory_listing = listDirectory(directory_entry.path)
+
+		except OSError as error:
+			self.logger.debug("Unable to read directory " + directory_entry.path + ": " + str(error))
+			self.errors += 1
+			return
+
+		self.directories += 1
+		entries = []
+
+		for path, stat_info in directory_listing:
+			if (self.cancelled.is_set()):
+				return
+
+			if (isinstance(stat_info, OSError)):
+				self.logger.debug("Unable to stat " + path + ": " + str(stat_info))
+				self.errors += 1
+				continue
+
+			entry = statEntry(path, stat_info)
+			entries.append(entry)
+			self.entries += 1
+
+			if (entry.isDir() and self.enterDirectory(entry, directory_entry) == 1):
+				with self.lock:
+					self.outstanding += 1
+
+				self.directory_queue.put(entry)
+
+			if (self.entry_filter.matches(entry) == 1):
+				self.putEntry(entry)
+
+		if (self.index_segment is not None):
+			self.index_segment.addEntries(entries)
+
+	## Method Name: enterDirectory
+	##
+	## Purpose: Decide whether or not to walk into a subdirectory.
+	##
+	## Parameters
+	## 1. entry        - The FileEntry of the subdirectory.
+	## 2. parent_entry - The FileEntry of the directory containing it.
+	##
+	## Returns
+	## 1 if the subdirectory should be walked, 0 if it is an excluded mount point.
+	def enterDirectory(self, entry, parent_entry):
+		## A directory on another device than its parent is a mount point.
+		if (entry.device == parent_entry.device):
+			return 1
+
+		if (self.walker.cross_mounts == 0):
+			self.logger.debug("Not crossing into mount point " + entry.path)
+			self.skipMount(entry)
+			return 0
+
+		if (os.path.normcase(os.path.abspath(entry.path)) in self.walker.exclude_mounts):
+			self.logger.debug("Skipping excluded mount point " + entry.path)
+			self.skipMount(entry)
+			return 0
+
+		return 1
+
+	## Method Name: skipMount
+	##
+	## Purpose: Remember a mount point which wasn't walked so that the FileIndex doesn't claim to cover it.
+	##
+	## Parameters
+	## 1. entry - The FileEntry of the mount point.
+	def skipMount(self, entry):
+		if (self.index_segment is not None):
+			with self.index_segment.lock:
+				self.index_segment.skipped_mounts.add(entry.path)
+
+	## Method Name: putEntry
+	##
+	## Purpose: Hand an entry to the consumer, waiting while the output queue is full unless the walk is cancelled.
+	##
+	## Parameters
+	## 1. entry - The FileEntry to hand over, or _walk_done.
+	def putEntry(self, entry):
+		while (not self.cancelled.is_set()):
+			try:
+				self.output_queue.put(entry, True, _walker_put_interval)
+				return
+
+			except Queue.Full:
+				pass
+
+## Class Name: FileIndex
+##
+## Purpose: Hold the entries found by completed walks for the rest of the run, in parallel arrays rather than an object per file.
+##          Modules can query it by directory, extension or size range through framework_settings.file_index.
+##          Each process keeps its own index. Process-backed modules start with an empty one.
+class FileIndex():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize an empty index.
+	def __init__(self):
+		self.lock = threading.Lock()
+
+		## Row N of each array describes the same entry.
+		self.paths   = []
+		self.modes   = array.array("L")
+		self.sizes   = array.array(_index_integer_type)
+		self.mtimes  = array.array("d")
+		self.inodes  = array.array(_index_integer_type)
+		self.devices = array.array(_index_integer_type)
+
+		## The rows of the files with each extension. (".py", ".txt", "" for none, etc)
+		self.extensions = {}
+
+		## The rows sorted by path and by size, built on the first query after the index changes.
+		self.path_order = None
+		self.size_order = None
+
+		## The directories walked to completion, and the mount points below them which were not entered.
+		self.roots          = set()
+		self.skipped_mounts = set()
+
+	## Method Name: __getstate__
+	##
+	## Purpose: Pickle the index as an empty one. Process-backed modules build their own index.
+	def __getstate__(self):
+		return {}
+
+	## Method Name: __setstate__
+	##
+	## Purpose: Initialize an empty index. (See __getstate__)
+	##
+	## Parameters
+	## 1. state - The dictionary returned by __getstate__.
+	def __setstate__(self, state):
+		self.__init__()
+
+	def __len__(self):
+		return len(self.paths)
+
+	## Method Name: addEntries
+	##
+	## Purpose: Append a list of entries to the index.
+	##
+	## Parameters
+	## 1. entries - The list of FileEntry instances to append.
+	def addEntries(self, entries):
+		with self.lock:
+			for entry in entries:
+				row = len(self.paths)
+
+				self.paths.append(entry.path)
+				self.modes.append(entry.mode)
+				self.sizes.append(entry.size)
+				self.mtimes.append(entry.mtime)
+				self.inodes.append(entry.inode)
+				self.devices.append(entry.device)
+
+				if (not stat.S_ISDIR(entry.mode)):
+					self.extensions.setdefault(fileExtension(entry.path), array.array("L")).append(row)
+
+			self.path_order = None
+			self.size_order = None
+
+	## Method Name: merge
+	##
+	## Purpose: Append the entries of a completed walk and mark its roots as covered.
+	##          Entries of previously covered directories below the new roots are replaced.
+	##
+	## Parameters
+	## 1. segment - The FileIndex filled by the walk.
+	## 2. roots   - The list of absolute directory paths the walk covered.
+	def merge(self, segment, roots):
+		with self.lock:
+			replaced_roots = [indexed_root for indexed_root in self.roots if (isUnderAny(indexed_root, roots) == 1)]
+
+			if (len(replaced_roots) > 0):
+				self.keepRows([row for row in xrange(len(self.paths)) if (isUnderAny(self.paths[row], replaced_roots) == 0)])
+				self.roots.difference_update(replaced_roots)
+				self.skipped_mounts = set([path for path in self.skipped_mounts if (isUnderAny(path, replaced_roots) == 0)])
+
+			offset = len(self.paths)
+
+			self.paths.extend(segment.paths)
+			self.modes.extend(segment.modes)
+			self.sizes.extend(segment.sizes)
+			self.mtimes.extend(segment.mtimes)
+			self.inodes.extend(segment.inodes)
+			self.devices.extend(segment.devices)
+
+			for extension, rows in segment.extensions.iteritems():
+				self.extensions.setdefault(extension, array.array("L")).extend(array.array("L", [row + offset for row in rows]))
+
+			self.roots.update(roots)
+			self.skipped_mounts.update(segment.skipped_mounts)
+
+			self.path_order = None
+			self.size_order = None
+
+	## Method Name: keepRows
+	##
+	## Purpose: Replace the arrays with new ones holding only some of the rows. The caller must hold the lock.
+	##          The old arrays are left untouched for queries which are still reading them.
+	##
+	## Parameters
+	## 1. rows - The ascending list of rows to keep.
+	def keepRows(self, rows):
+		self.paths   = [self.paths[row] for row in rows]
+		self.modes   = array.array("L", [self.modes[row] for row in rows])
+		self.sizes   = array.array(_index_integer_type, [self.sizes[row] for row in rows])
+		self.mtimes  = array.array("d", [self.mtimes[row] for row in rows])
+		self.inodes  = array.array(_index_integer_type, [self.inodes[row] for row in rows])
+		self.devices = array.array(_index_integer_type, [self.devices[row] for row in rows])
+
+		self.extensions = {}
+
+		for row in xrange(len(self.paths)):
+			if (not stat.S_ISDIR(self.modes[row])):
+				self.extensions.setdefault(fileExtension(self.paths[row]), array.array("L")).append(row)
+
+	## Method Name: covers
+	##
+	## Purpose: Return 1 if a directory was walked to completion during this run, 0 otherwise.
+	##
+	## Parameters
+	## 1. path - The absolute path to the directory.
+	def covers(self, path):
+		with self.lock:
+			if (isUnderAny(path, self.roots) == 0):
+				return 0
+
+			if (isUnderAny(path, self.skipped_mounts) == 1):
+				return 0
+
+			return 1
+
+	## Method Name: lookup
+	##
+	## Purpose: Return the indexed entry of a path, or None if the path isn't in the index.
+	##          The roots of the walks are not in the index, only the entries found below them.
+	##
+	## Parameters
+	## 1. path - The path to the file or directory.
+	def lookup(self, path):
+		path = os.path.abspath(path)
+
+		with self.lock:
+			snapshot = (self.paths, self.modes, self.sizes, self.mtimes, self.inodes, self.devices)
+			position = bisectRows(self.pathOrder(), self.paths, path)
+			rows     = self.path_order[position:position + 1]
+
+		for entry in readRows(snapshot, rows, None, None, None, None):
+			if (entry.path == path):
+				return entry
+
+		return None
+
+	## Method Name: find
+	##
+	## Purpose: Yield the indexed entries meeting every given criterion.
+	##
+	## Parameters
+	## 1. prefix    - Only entries below this directory. (None for every directory)
+	## 2. extension - Only files with this extension, with or without the leading dot. (None for every entry)
+	## 3. min_size  - The minimum size in bytes. (None for no minimum)
+	## 4. max_size  - The maximum size in bytes. (None for no maximum)
+	##
+	## Returns
+	## A generator of FileEntry instances.
+	def find(self, prefix=None, extension=None, min_size=None, max_size=None):
+		if (prefix is not None):
+			prefix = directoryPrefix(os.path.abspath(prefix))
+
+		if (extension is not None):
+			extension = extension.lower()
+
+			if (extension != "" and not extension.startswith(".")):
+				extension = "." + extension
+
+		with self.lock:
+			## Rows are only ever appended to these arrays, so the rows chosen below stay valid while they are read.
+			snapshot       = (self.paths, self.modes, self.sizes, self.mtimes, self.inodes, self.devices)
+			candidate_rows = []
+
+			if (prefix is not None):
+				candidate_rows.append(self.prefixRows(prefix))
+
+			if (extension is not None):
+				candidate_rows.append(self.extensions.get(extension, array.array("L")))
+
+			if (min_size is not None or max_size is not None):
+				candidate_rows.append(self.sizeRows(min_size, max_size))
+
+			if (len(candidate_rows) == 0):
+				rows = xrange(len(self.paths))
+
+			## Read the smallest candidate list and check the other criteria row by row.
+			else:
+				rows = min(candidate_rows, key=len)
+
+		return readRows(snapshot, rows, prefix, extension, min_size, max_size)
+
+	## Method Name: prefixRows
+	##
+	## Purpose: Return the rows of the entries whose path starts with a prefix. The caller must hold the lock.
+	##
+	## Parameters
+	## 1. prefix - The path prefix.
+	def prefixRows(self, prefix):
+		start = bisectRows(self.pathOrder(), self.paths, prefix)
+		end   = start
+
+		while (end < len(self.path_order) and self.paths[self.path_order[end]].startswith(prefix)):
+			end += 1
+
+		return self.path_order[start:end]
+
+	## Method Name: pathOrder
+	##
+	## Purpose: Return the rows sorted by path, sorting them if the index changed. The caller must hold the lock.
+	def pathOrder(self):
+		if (self.path_order is None):
+			self.path_order = array.array("L", sorted(xrange(len(self.paths)), key=self.paths.__getitem__))
+
+		return self.path_order
+
+	## Method Name: sizeRows
+	##
+	## Purpose: Return the rows of the entries within a size range. The caller must hold the lock.
+	##
+	## Parameters
+	## 1. min_size - The minimum size in bytes. (None for no minimum)
+	## 2. max_size - The maximum size in bytes. (None for no maximum)
+	def sizeRows(self, min_size, max_size):
+		if (self.size_order is None):
+			self.size_order = array.array("L", sorted(xrange(len(self.sizes)), key=self.sizes.__getitem__))
+
+		start = 0
+		end   = len(self.size_order)
+
+		if (min_size is not None):
+			start = bisectRows(self.size_order, self.sizes, min_size)
+
+		## The first row larger than max_size is the first row at least max_size + 1, since sizes are whole numbers.
+		if (max_size is not None):
+			end = bisectRows(self.size_order, self.sizes, max_size + 1)
+
+		return self.size_order[start:max(start, end)]
+
+## Classless Method Declarations
+
+## Method Name: statEntry
+##
+## Purpose: Build a FileEntry from an lstat result.
+##
+## Parameters
+## 1. path      - The path to the file or directory.
+## 2. stat_info - The result of os.lstat on the path.
+def statEntry(path, stat_info):
+	return FileEntry(path, stat_info.st_mode, stat_info.st_size, stat_info.st_mtime, stat_info.st_ino, stat_info.st_dev)
+
+## Method Name: readRows
+##
+## Purpose: Yield the entries of the given rows which meet every criterion. (See FileIndex.find)
+##
+## Parameters
+## 1. snapshot  - The tuple of the index arrays. (paths, modes, sizes, mtimes, inodes, devices)
+## 2. rows      - The rows to read.
+## 3. prefix    - Only entries whose path starts with this prefix. (None for every entry)
+## 4. extension - Only files with this normalized extension. (None for every entry)
+## 5. min_size  - The minimum size in bytes. (None for no minimum)
+## 6. max_size  - The maximum size in bytes. (None for no maximum)
+def readRows(snapshot, rows, prefix, extension, min_size, max_size):
+	paths, modes, sizes, mtimes, inodes, devices = snapshot
+
+	for row in rows:
+		path = paths[row]
+		size = int(sizes[row])
+
+		if (prefix is not None and not path.startswith(prefix)):
+			continue
+
+		if (extension is not None and (stat.S_ISDIR(modes[row]) or fileExtension(path) != extension)):
+			continue
+
+		if ((min_size is not None and size < min_size) or (max_size is not None and size > max_size)):
+			continue
+
+		yield FileEntry(path, modes[row], size, mtimes[row], int(inodes[row]), int(devices[row]))
+
+## Method Name: bisectRows
+##
+## Purpose: Return the position of the first row in a sorted order whose value is at least a given value.
+##
+## Parameters
+## 1. order  - The array of rows, sorted by value.
+## 2. values - The list or array of values, indexed by row.
+## 3. value  - The value to look for.
+def bisectRows(order, values, value):
+	low  = 0
+	high = len(order)
+
+	while (low < high):
+		middle = (low + high) // 2
+
+		if (values[order[middle]] < value):
+			low = middle + 1
+
+		else:
+			high = middle
+
+	return low
+
+## Method Name: fileExtension
+##
+## Purpose: Return the lowercase extension of a path, including the dot. ("" for none)
+##
+## Parameters
+## 1. path - The path to the file.
+def fileExtension(path):
+	return os.path.splitext(path)[1].lower()
+
+## Method Name: directoryPrefix
+##
+## Purpose: Return the prefix shared by every path below a directory.
+##
+## Parameters
+## 1. directory - The absolute path to the directory.
+def directoryPrefix(directory):
+	if (directory.endswith(os.sep)):
+		return directory
+
+	return directory + os.sep
+
+## Method Name: isUnderAny
+##
+## Purpose: Return 1 if a path is one of a set of directories or below one of them, 0 otherwise.
+##
+## Parameters
+## 1. path        - The absolute path to check.
+## 2. directories - The absolute paths to the directories.
+def isUnderAny(path, directories):
+	for directory in directories:
+		if (path == directory or path.startswith(directoryPrefix(directory))):
+			return 1
+
+	return 0
+
+## Method Name: listDirectory
+##
+## Purpose: Return the path and lstat result of each entry in a directory, using scandir when it is installed.
+##
+## Parameters
+## 1. path - The path to the directory.
+##
+## Returns
+## A list of (path, lstat result) tuples. The lstat result is the OSError raised for entries which couldn't be read.
+##
+## Raises
+## OSError if the directory itself couldn't be read.
+def listDirectory(path):
+	directory_listing = []
+
+	if (scandir is not None):
+		for directory_entry in scandir(path):
+			try:
+				directory_listing.append((directory_entry.path, directory_entry.stat(follow_symlinks=False)))
+
+			except OSError as error:
+				directory_listing.append((directory_entry.path, error))
+
+	else:
+		for name in os.listdir(path):
+			entry_path = os.path.join(path, name)
+
+			try:
+				directory_listing.append((entry_path, os.lstat(entry_path)))
+
+			except OSError as error:
+				directory_listing.append((entry_path, error))
+
+	return directory_listing
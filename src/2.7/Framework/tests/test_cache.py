@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+import unittest
+import bitCollector_cache
+
+
+class FileCacheTestCase(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.path      = os.path.join(self.directory, "file.txt")
+		self.cache     = bitCollector_cache.FileCache(os.path.join(self.directory, "cache", "cache.sqlite"), batch_size=2)
+		self.writeFile("data")
+
+	def tearDown(self):
+		self.cache.close()
+		shutil.rmtree(self.directory)
+
+	def writeFile(self, data):
+		with open(self.path, "wb") as output:
+			output.write(data)
+		os.utime(self.path, (1000000, 1000000))
+
+	def test_hit_after_update(self):
+		self.assertTrue(self.cache.lookup(bitCollector_cache.toEntry(self.path), "scope") is None)
+		self.cache.update(bitCollector_cache.toEntry(self.path), "scope", {"lines": 1})
+		self.assertTrue(self.cache.lookup(bitCollector_cache.toEntry(self.path), "scope") == {"lines": 1})
+		self.assertTrue(self.cache.lookup(bitCollector_cache.toEntry(self.path), "other") is None)
+		self.assertTrue(self.cache.counts == {"scope": [1, 1], "other": [0, 1]})
+
+	def test_miss_after_mtime_change(self):
+		self.cache.update(bitCollector_cache.toEntry(self.path), "scope")
+		self.cache.flush()
+		os.utime(self.path, (2000000, 2000000))
+		self.assertTrue(self.cache.lookup(bitCollector_cache.toEntry(self.path), "scope") is None)
+		self.assertTrue(self.cache.storedData(self.path, "scope") == {})
+
+	def test_miss_after_size_change(self):
+		self.cache.update(bitCollector_cache.toEntry(self.path), "scope")
+		self.writeFile("more data")
+		self.assertTrue(self.cache.lookup(bitCollector_cache.toEntry(self.path), "scope") is None)
+
+	def test_changed_entries(self):
+		unchanged = os.path.join(self.directory, "unchanged.txt")
+		with open(unchanged, "wb") as output:
+			output.write("same")
+
+		for path in (self.path, unchanged):
+			self.cache.update(bitCollector_cache.toEntry(path), "scope")
+		self.writeFile("changed")
+
+		changed = [entry.path for entry in self.cache.changedEntries([self.path, unchanged, os.path.join(self.directory, "missing")], "scope")]
+		self.assertTrue(changed == [self.path])
+
+	def test_records_persist(self):
+		self.cache.update(bitCollector_cache.toEntry(self.path), "scope", [1, 2])
+		self.cache.close()
+		self.assertTrue(self.cache.lookup(bitCollector_cache.toEntry(self.path), "scope") is None)
+
+		self.cache = bitCollector_cache.FileCache(self.cache.path)
+		self.assertTrue(self.cache.lookup(bitCollector_cache.toEntry(self.path), "scope") == [1, 2])
+
+		self.cache.clearScope("scope")
+		self.assertTrue(self.cache.lookup(bitCollector_cache.toEntry(self.path), "scope") is None)
@@ -0,0 +1,81 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import StringIO
+import bitCollector_config
+import bitCollector_framework
+
+
+class PlanCacheTestCase(unittest.TestCase):
+	def setUp(self):
+		self.directory   = tempfile.mkdtemp()
+		self.config_path = os.path.join(self.directory, "config.json")
+		self.module_path = os.path.join(self.directory, "PlanModule.py")
+		with open(self.module_path, "wb") as module_file:
+			module_file.write("def main(thread_id, path_to_main, framework_settings, platform_details, module_dict):\n\treturn 0\n")
+		self.writeConfig("info")
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	def writeConfig(self, logging_level):
+		with open(self.config_path, "wb") as config_file:
+			json.dump({
+				"module_list"      : [{"name": "PlanModule", "parameters": []}],
+				"additional_paths" : [{"path": self.directory}],
+				"log_file"         : os.path.join(self.directory, "run"),
+				"logging_format"   : "jsonl",
+				"logging_level"    : logging_level,
+				"log_to_file"      : 0,
+				"log_to_stdout"    : 0
+			}, config_file)
+
+	def compilePlan(self):
+		stdout     = sys.stdout
+		sys.stdout = StringIO.StringIO()
+		try:
+			return bitCollector_framework.compilePlan(self.config_path)
+		finally:
+			sys.stdout = stdout
+
+	def test_plan_cached(self):
+		plan, plan_cached = self.compilePlan()
+		self.assertTrue(plan_cached == 0)
+		self.assertTrue(os.path.isfile(os.path.join(self.directory, ".config.json.plan")))
+		self.assertTrue(bitCollector_config.planCachePath(self.config_path) == os.path.join(self.directory, ".config.json.plan"))
+
+		cached_plan, plan_cached = self.compilePlan()
+		self.assertTrue(plan_cached == 1)
+		self.assertTrue(cached_plan["module_paths"] == plan["module_paths"] == [self.module_path])
+
+	def test_config_change_invalidates(self):
+		self.compilePlan()
+		self.writeConfig("debug")
+		plan, plan_cached = self.compilePlan()
+		self.assertTrue(plan_cached == 0)
+		self.assertTrue(plan["settings"]["logging_level"] == "debug")
+
+	def test_deleted_module_invalidates(self):
+		plan, plan_cached = self.compilePlan()
+		os.remove(self.module_path)
+		self.assertTrue(bitCollector_config.readPlan(bitCollector_config.planCachePath(self.config_path), plan["config_hash"]) is None)
+
+		plan, plan_cached = self.compilePlan()
+		self.assertTrue(plan_cached == 0)
+		self.assertTrue(plan["module_paths"] == [None])
+		self.assertTrue(bitCollector_config.readPlan(bitCollector_config.planCachePath(self.config_path), plan["config_hash"]) is None)
+
+	def test_source_change_invalidates(self):
+		source_path = os.path.join(self.directory, "compiler.py")
+		with open(source_path, "wb") as source_file:
+			source_file.write("schema = 1\n")
+		config_hash = bitCollector_config.hashConfig("{}", [source_path])
+		self.assertTrue(bitCollector_config.hashConfig("{}", [source_path + "c"]) == config_hash)
+
+		with open(source_path, "wb") as source_file:
+			source_file.write("schema = 2\n")
+		self.assertTrue(bitCollector_config.hashConfig("{}", [source_path]) != config_hash)
+		self.assertTrue(bitCollector_config.hashConfig("[]", [source_path]) != bitCollector_config.hashConfig("{}", [source_path]))
@@ -0,0 +1,39 @@
+import os
+import shutil
+import StringIO
+import tempfile
+import unittest
+import bitCollector_container
+
+
+class ContainerTestCase(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	def test_merge_process_container(self):
+		main_path = os.path.join(self.directory, "run.bcc")
+		writer    = bitCollector_container.ContainerWriter(main_path, "zlib", block_size=4)
+		writer.addStream(StringIO.StringIO("shared data"), "main")
+
+		## A process-backed module writes to its own file next to the run's container.
+		process_writer = bitCollector_container.ContainerWriter(os.path.join(self.directory, "run.123.456.bcc"), "stored", block_size=4)
+		process_writer.addStream(StringIO.StringIO("shared data"), "copy")
+		process_writer.addStream(StringIO.StringIO("process data"), "process")
+		process_writer.close()
+
+		self.assertTrue(writer.mergeContainer(process_writer.path) == 2)
+		self.assertFalse(os.path.exists(process_writer.path))
+		writer.close()
+
+		reader = bitCollector_container.ContainerReader(main_path)
+		contents = {}
+		for manifest_entry in reader.artifacts():
+			output = StringIO.StringIO()
+			reader.extract(manifest_entry, output)
+			contents[manifest_entry["name"]] = output.getvalue()
+		reader.close()
+		self.assertTrue(contents == {"main": "shared data", "copy": "shared data", "process": "process data"})
+		self.assertTrue(writer.deduped_bytes == len("shared data"))
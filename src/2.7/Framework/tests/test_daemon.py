@@ -0,0 +1,114 @@
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+import StringIO
+import bitCollector_daemon
+import bitCollector_fleet
+import bitCollector_framework
+
+
+class RoundTripTestCase(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.handlers  = list(logging.getLogger("").handlers)
+		self.stdout    = sys.stdout
+		sys.stdout     = StringIO.StringIO()
+
+		with open(os.path.join(self.directory, "RoundTrip.py"), "wb") as module_file:
+			module_file.write("def main(thread_id, path_to_main, framework_settings, platform_details, module_dict):\n\tmodule_dict['results'].emit({'value': 42})\n\treturn 0\n")
+
+		self.config_path = os.path.join(self.directory, "config.json")
+		with open(self.config_path, "wb") as config_file:
+			json.dump({
+				"module_list"      : [{"name": "RoundTrip", "parameters": []}],
+				"additional_paths" : [{"path": self.directory}],
+				"log_file"         : os.path.join(self.directory, "run"),
+				"logging_format"   : "jsonl",
+				"logging_level"    : "info",
+				"log_to_file"      : 1,
+				"log_to_stdout"    : 0,
+				"results_path"     : os.path.join(self.directory, "results"),
+				"platform_cache"   : 0,
+				"file_cache"       : 0
+			}, config_file)
+
+	def tearDown(self):
+		sys.stdout  = self.stdout
+		root_logger = logging.getLogger("")
+		for handler in list(root_logger.handlers):
+			if (handler not in self.handlers):
+				root_logger.removeHandler(handler)
+				handler.close()
+		if (self.directory in sys.path):
+			sys.path.remove(self.directory)
+		shutil.rmtree(self.directory)
+
+	def serveOnce(self, server):
+		server_thread = threading.Thread(target=server.handle_request)
+		server_thread.daemon = True
+		server_thread.start()
+		return server_thread
+
+	def test_daemon_round_trip(self):
+		socket_path = os.path.join(self.directory, "daemon.sock")
+		server      = bitCollector_daemon.DaemonServer(socket_path, 1)
+		try:
+			server_thread = self.serveOnce(server)
+			client_socket = bitCollector_daemon.sendRequest(socket_path, {"command": "run", "config": self.config_path, "modules": []})
+			try:
+				messages = [json.loads(line) for line in iter(client_socket.makefile("rb").readline, "")]
+			finally:
+				client_socket.close()
+			server_thread.join(10)
+
+			results = [message for message in messages if (message["type"] == "result")]
+			self.assertTrue([(message["module"], message["record"]) for message in results] == [("RoundTrip", {"value": 42})])
+
+			done = [message for message in messages if (message["type"] == "done")]
+			self.assertTrue(len(done) == 1 and done[0]["return_code"] == 0)
+			self.assertTrue([(module["name"], module["return_code"]) for module in done[0]["modules"]] == [("RoundTrip", 0)])
+			self.assertTrue(server.runner.runs == 1)
+
+			server_thread = self.serveOnce(server)
+			client_socket = bitCollector_daemon.sendRequest(socket_path, {"command": "run", "config": self.config_path, "modules": ["Missing"]})
+			try:
+				messages = [json.loads(line) for line in iter(client_socket.makefile("rb").readline, "")]
+			finally:
+				client_socket.close()
+			server_thread.join(10)
+			self.assertTrue([message["type"] for message in messages] == ["error"])
+		finally:
+			server.server_close()
+			server.runner.closePool()
+
+	def test_agent_round_trip(self):
+		plan, plan_cached = bitCollector_framework.compilePlan(self.config_path)
+		server            = bitCollector_fleet.AgentServer(("127.0.0.1", 0), 1, "secret", os.path.join(self.directory, "agent"))
+		agent             = "127.0.0.1:" + str(server.server_address[1])
+		try:
+			server_thread = self.serveOnce(server)
+			agent_session = bitCollector_fleet.AgentSession(agent, os.path.join(self.directory, "coordinator"))
+			agent_session.run({"command": "run", "plan": plan, "modules": [], "token": "secret"}, 10)
+			server_thread.join(10)
+
+			self.assertTrue(agent_session.state == "done" and agent_session.return_code == 0)
+			self.assertTrue(agent_session.result_records == 1)
+			self.assertTrue(len(agent_session.artifacts) == 2)
+			with open(os.path.join(self.directory, "coordinator", "artifacts", "results.jsonl"), "rb") as results_file:
+				self.assertTrue(json.loads(results_file.readline())["record"] == {"value": 42})
+			with open(os.path.join(self.directory, "coordinator", "results.jsonl"), "rb") as results_file:
+				self.assertTrue(json.loads(results_file.readline())["record"] == {"value": 42})
+
+			server_thread = self.serveOnce(server)
+			agent_session = bitCollector_fleet.AgentSession(agent, os.path.join(self.directory, "refused"))
+			agent_session.run({"command": "run", "plan": plan, "modules": [], "token": "wrong"}, 10)
+			server_thread.join(10)
+			self.assertTrue(agent_session.state == "failed" and agent_session.error == "The token is wrong")
+		finally:
+			server.server_close()
+			server.runner.closePool()
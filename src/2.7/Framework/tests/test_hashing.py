@@ -0,0 +1,58 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+import bitCollector_hashing
+
+
+class CountingPaths():
+	"""Yields the same path forever, counting how many were taken."""
+
+	def __init__(self, path):
+		self.path  = path
+		self.taken = 0
+
+	def __iter__(self):
+		while (1):
+			self.taken += 1
+			yield self.path
+
+
+class HashEngineTestCase(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.path      = os.path.join(self.directory, "data")
+		with open(self.path, "wb") as data:
+			data.write("data" * 1000)
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	def test_hash_files(self):
+		engine  = bitCollector_hashing.HashEngine(2, ["md5", "sha1"], chunk_size=7)
+		paths   = [self.path, os.path.join(self.directory, "missing")] * 3
+		results = list(engine.hashFiles(paths))
+
+		self.assertTrue(len(results) == 6)
+		self.assertTrue(len([result for result in results if (result.error is not None)]) == 3)
+		for result in results:
+			if (result.error is None):
+				self.assertTrue(result.size == 4000)
+				self.assertTrue(result.digests == {"md5": hashlib.md5("data" * 1000).hexdigest(), "sha1": hashlib.sha1("data" * 1000).hexdigest()})
+
+	def test_paths_taken_lazily(self):
+		engine  = bitCollector_hashing.HashEngine(4)
+		paths   = CountingPaths(self.path)
+		results = engine.hashFiles(paths)
+
+		for index in range(10):
+			self.assertTrue(next(results).error is None)
+
+		## No more files are taken than the queue holds ahead of the results consumed.
+		self.assertTrue(paths.taken <= 10 + 4 * bitCollector_hashing._hash_queue_factor)
+		results.close()
+
+	def test_worker_error_raised(self):
+		engine = bitCollector_hashing.HashEngine(2)
+		self.assertRaises(TypeError, list, engine.hashFiles([self.path, None, self.path]))
@@ -0,0 +1,37 @@
+import unittest
+import bitCollector_framework
+
+
+def make_config(module_list):
+	return {
+		"module_list"      : module_list,
+		"additional_paths" : [],
+		"log_file"         : "logs/test",
+		"logging_format"   : "jsonl",
+		"logging_level"    : "info",
+		"log_to_file"      : 0,
+		"log_to_stdout"    : 1
+	}
+
+
+class ModuleGraphTestCase(unittest.TestCase):
+	def test_repeated_module_depends_on_earlier_instance(self):
+		module_list = [{"name": "FileCollector", "parameters": []}, {"name": "FileCollector", "parameters": [], "depends_on": ["FileCollector"]}]
+		settings, module_list, dependencies, errors, warnings = bitCollector_framework.checkConfig(make_config(module_list))
+		self.assertTrue(errors == [])
+		self.assertTrue(dependencies == [[], [0]])
+
+	def test_module_never_depends_on_itself(self):
+		dependencies, unknown_names = bitCollector_framework.buildModuleGraph([{"name": "A", "depends_on": ["A"]}])
+		self.assertTrue(dependencies == [[]])
+		self.assertTrue(unknown_names == [])
+
+	def test_cycle(self):
+		module_list = [{"name": "A", "parameters": [], "depends_on": ["B"]}, {"name": "B", "parameters": [], "depends_on": ["A"]}]
+		errors = bitCollector_framework.checkConfig(make_config(module_list))[3]
+		self.assertTrue(errors == ["Module dependency cycle: A -> B -> A"])
+
+	def test_repeated_modules_depending_on_each_other(self):
+		module_list = [{"name": "A", "parameters": [], "depends_on": ["A"]}, {"name": "A", "parameters": [], "depends_on": ["A"]}]
+		errors = bitCollector_framework.checkConfig(make_config(module_list))[3]
+		self.assertTrue(errors == ["Module dependency cycle: A -> A -> A"])
@@ -0,0 +1,126 @@
+import json
+import os
+import Queue
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+import bitCollector_results
+
+
+class SlowSink():
+	path = "slow"
+
+	def __init__(self):
+		self.records = []
+
+	def write(self, batch):
+		for name, emitted, encoded_record in batch:
+			self.records.append(json.loads(encoded_record))
+		time.sleep(0.3)
+
+	def close(self):
+		pass
+
+
+class FailingSink():
+	path = "failing"
+
+	def __init__(self):
+		self.records = []
+
+	def write(self, batch):
+		records = [json.loads(encoded_record) for name, emitted, encoded_record in batch]
+		if ("fail" in records):
+			raise IOError("No space left on device")
+		self.records.extend(records)
+
+	def close(self):
+		pass
+
+
+class DelayedQueue(Queue.Queue):
+	"""Holds up the records being queued, as a preempted emitting thread would."""
+	delay = 0
+
+	def put(self, item, block=True, timeout=None):
+		if (self.delay > 0 and item is not bitCollector_results._results_done):
+			time.sleep(self.delay)
+		Queue.Queue.put(self, item, block, timeout)
+
+
+class ResultsChannelTestCase(unittest.TestCase):
+	def test_emit_while_closing(self):
+		sink    = SlowSink()
+		channel = bitCollector_results.ResultsChannel([sink], 4, 4)
+		channel.queue = DelayedQueue(4)
+
+		# The writer thread is busy writing the first record.
+		channel.put("Test", "first")
+		time.sleep(0.05)
+
+		channel.queue.delay = 0.1
+		emitter = threading.Thread(target=channel.put, args=("Test", "late"))
+		emitter.start()
+		time.sleep(0.02)
+
+		closer = threading.Thread(target=channel.close)
+		closer.daemon = True
+		closer.start()
+		closer.join(5)
+		emitter.join(5)
+		self.assertFalse(closer.is_alive())
+		self.assertTrue(sink in channel.sinks)
+		self.assertTrue(sink.records == ["first", "late"])
+		self.assertTrue(channel.put("Test", "dropped") == 0)
+
+	def test_unserializable_record(self):
+		directory = tempfile.mkdtemp()
+		try:
+			base_path = os.path.join(directory, "res")
+			sinks, warnings = bitCollector_results.createSinks(["jsonl", "csv"], base_path, None)
+			channel = bitCollector_results.ResultsChannel(sinks, 16, 16)
+			handle  = channel.handle("Test")
+
+			record = {"a": 1}
+			handle.emit(record)
+			record["a"] = 2
+			self.assertRaises(TypeError, handle.emit, {"a": set([1])})
+			handle.emit({"a": 3})
+			channel.close()
+
+			self.assertTrue(handle.emitted == 2)
+			self.assertTrue(len(channel.sinks) == 2)
+			with open(base_path + ".jsonl", "rb") as results:
+				self.assertTrue([json.loads(line)["record"] for line in results] == [{"a": 1}, {"a": 3}])
+			with open(base_path + ".csv", "rb") as results:
+				self.assertTrue([line.split(",")[2] for line in results.read().splitlines()] == ["a", "1", "3"])
+		finally:
+			shutil.rmtree(directory)
+
+	def test_spooled_unserializable_record(self):
+		sink    = SlowSink()
+		channel = bitCollector_results.ResultsChannel([sink], 4, 4)
+		handle  = bitCollector_results.ResultsHandle(None, "Test")
+
+		self.assertRaises(TypeError, handle.emit, {"a": set([1])})
+		handle.emit({"a": 1})
+		spool_path = handle.closeSpool()
+		channel.replaySpool(spool_path)
+		channel.close()
+
+		self.assertFalse(os.path.exists(spool_path))
+		self.assertTrue(sink.records == [{"a": 1}])
+
+	def test_failed_batch(self):
+		sink    = FailingSink()
+		channel = bitCollector_results.ResultsChannel([sink], 1, 1)
+
+		for record in ["first", "fail", "last"]:
+			channel.put("Test", record)
+
+		channel.close()
+		self.assertTrue(sink in channel.sinks)
+		self.assertTrue(sink.records == ["first", "last"])
+		self.assertTrue(channel.failed == {"failing": 1})
@@ -0,0 +1,97 @@
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+import bitCollector_container
+import bitCollector_framework
+import bitCollector_resources
+import bitCollector_results
+
+
+class SchedulerTestCase(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		os.makedirs(os.path.join(self.directory, "logs"))
+		self.handlers  = list(logging.getLogger("").handlers)
+
+	def tearDown(self):
+		root_logger = logging.getLogger("")
+		for handler in list(root_logger.handlers):
+			if (handler not in self.handlers):
+				root_logger.removeHandler(handler)
+				handler.close()
+		if (self.directory in sys.path):
+			sys.path.remove(self.directory)
+		shutil.rmtree(self.directory)
+
+	def writeModule(self, name, body):
+		with open(os.path.join(self.directory, name + ".py"), "wb") as module_file:
+			module_file.write("import StringIO, time\n\ndef main(thread_id, path_to_main, framework_settings, platform_details, module_dict):\n" + body)
+
+	def runModules(self, module_list, **optional_settings):
+		config = dict({
+			"module_list"      : module_list,
+			"additional_paths" : [{"path": self.directory}],
+			"log_file"         : os.path.join(self.directory, "logs", "run"),
+			"logging_format"   : "jsonl",
+			"logging_level"    : "info",
+			"log_to_file"      : 0,
+			"log_to_stdout"    : 0,
+			"platform_cache"   : 0,
+			"file_cache"       : 0
+		}, **optional_settings)
+		config_path = os.path.join(self.directory, "config.json")
+		with open(config_path, "wb") as config_file:
+			json.dump(config, config_file)
+
+		plan, plan_cached  = bitCollector_framework.compilePlan(config_path)
+		framework_settings = bitCollector_framework.FrameworkSettings(bitCollector_framework.planSettings(plan))
+		thread_manager     = bitCollector_framework.ThreadManager()
+		module_loader      = bitCollector_framework.ModuleLoader()
+		bitCollector_framework.importBCModules(logging.getLogger(""), framework_settings, module_loader)
+		bitCollector_framework.ModuleScheduler(framework_settings, None, thread_manager, module_loader).run()
+		framework_settings.results.close()
+		framework_settings.container.close()
+		return framework_settings, thread_manager
+
+	def test_abandoned_process_files_removed(self):
+		self.writeModule("AbandonedWriter", "\tmodule_dict['results'].emit({'a': 1})\n\tframework_settings.container.addStream(StringIO.StringIO('data'), 'data')\n\ttime.sleep(30)\n\treturn 0\n")
+		framework_settings, thread_manager = self.runModules([{"name": "AbandonedWriter", "parameters": [], "executor": "process", "timeout": 1}])
+
+		self.assertTrue([thread.module_dict["name"] for thread in thread_manager.abandoned_list] == ["AbandonedWriter"])
+		self.assertFalse(os.path.exists(bitCollector_results.spoolPath(framework_settings.run_id, 0)))
+		self.assertTrue(bitCollector_container.processContainerPaths(framework_settings.container.path) == [])
+
+	def test_thread_timeout_abandoned(self):
+		self.writeModule("SlowThread", "\tdeadline = time.time() + 5\n\twhile (time.time() < deadline):\n\t\ttime.sleep(0.05)\n\treturn 0\n")
+		self.writeModule("QuickThread", "\treturn 0\n")
+		start = time.time()
+		framework_settings, thread_manager = self.runModules([{"name": "SlowThread", "parameters": [], "timeout": 1}, {"name": "QuickThread", "parameters": []}])
+
+		self.assertTrue(time.time() - start < 4)
+		self.assertTrue([thread.module_dict["name"] for thread in thread_manager.abandoned_list] == ["SlowThread"])
+		self.assertTrue([thread.module_dict["name"] for thread in thread_manager.finished_list] == ["QuickThread"])
+
+	def test_thread_cpu_limit_abandoned(self):
+		self.writeModule("BusyThread", "\tdeadline = time.time() + 10\n\twhile (time.time() < deadline):\n\t\tpass\n\treturn 0\n")
+		start = time.time()
+		framework_settings, thread_manager = self.runModules([{"name": "BusyThread", "parameters": [], "max_cpu_seconds": 0.5}])
+
+		if (bitCollector_resources.currentThreadId() is None):
+			self.assertTrue(thread_manager.abandoned_list == [])
+			return
+
+		self.assertTrue(time.time() - start < 8)
+		self.assertTrue([thread.module_dict["name"] for thread in thread_manager.abandoned_list] == ["BusyThread"])
+
+	def test_process_cpu_limit_abandoned(self):
+		self.writeModule("BusyProcess", "\tdeadline = time.time() + 30\n\twhile (time.time() < deadline):\n\t\tpass\n\treturn 0\n")
+		start = time.time()
+		framework_settings, thread_manager = self.runModules([{"name": "BusyProcess", "parameters": [], "executor": "process", "max_cpu_seconds": 0.5}])
+
+		self.assertTrue(time.time() - start < 20)
+		self.assertTrue([thread.module_dict["name"] for thread in thread_manager.abandoned_list] == ["BusyProcess"])
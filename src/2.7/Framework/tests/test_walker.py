@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+import unittest
+import bitCollector_walker
+
+
+class FileWalkerTestCase(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		os.makedirs(os.path.join(self.directory, "sub", "deep"))
+		for path, data in [("a.txt", "a"), ("b.log", "bb"), ("sub/c.txt", "ccc"), ("sub/deep/d.txt", "dddd")]:
+			with open(os.path.join(self.directory, path), "wb") as output:
+				output.write(data)
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	def names(self, entries):
+		return sorted([os.path.relpath(entry.path, self.directory) for entry in entries])
+
+	def test_file_root_from_index(self):
+		walker    = bitCollector_walker.FileWalker(2, [], 1, 1)
+		file_root = os.path.join(self.directory, "a.txt")
+		self.assertTrue(self.names(walker.walk(file_root)) == ["a.txt"])
+
+		list(walker.walk(self.directory))
+		self.assertTrue(walker.file_index.covers(file_root) == 1)
+		self.assertTrue(self.names(walker.walk(file_root)) == ["a.txt"])
+		self.assertTrue(self.names(walker.walk(file_root, patterns=["*.log"])) == [])
+
+	def test_subdirectory_root_from_index(self):
+		walker = bitCollector_walker.FileWalker(2, [], 1, 1)
+		cold   = self.names(walker.walk(os.path.join(self.directory, "sub"), include_dirs=1))
+
+		walker = bitCollector_walker.FileWalker(2, [], 1, 1)
+		list(walker.walk(self.directory))
+		self.assertTrue(self.names(walker.walk(os.path.join(self.directory, "sub"), include_dirs=1)) == cold)
+		self.assertTrue(cold == [os.path.join("sub", "c.txt"), os.path.join("sub", "deep"), os.path.join("sub", "deep", "d.txt")])
+
+	def test_filters(self):
+		walker = bitCollector_walker.FileWalker(2, [], 1, None)
+		self.assertTrue(self.names(walker.walk(self.directory, patterns=["*.txt"])) == ["a.txt", os.path.join("sub", "c.txt"), os.path.join("sub", "deep", "d.txt")])
+		self.assertTrue(self.names(walker.walk(self.directory, min_size=2, max_size=3)) == ["b.log", os.path.join("sub", "c.txt")])
+		self.assertTrue(self.names(walker.walk(self.directory, patterns="*.log", include_dirs=1)) == ["b.log"])
+
+		os.utime(os.path.join(self.directory, "a.txt"), (1000000, 1000000))
+		self.assertTrue(self.names(walker.walk(self.directory, modified_before=2000000)) == ["a.txt"])
+		self.assertTrue("a.txt" not in self.names(walker.walk(self.directory, modified_after=2000000)))
+
+	def test_mount_not_crossed(self):
+		parent = bitCollector_walker.statEntry(self.directory, os.lstat(self.directory))
+		sub    = os.path.join(self.directory, "sub")
+		stat   = os.lstat(sub)
+		mount  = bitCollector_walker.FileEntry(sub, stat.st_mode, stat.st_size, stat.st_mtime, stat.st_ino, parent.device + 1)
+
+		walker = bitCollector_walker.FileWalker(2, [], 0, 1)
+		job    = bitCollector_walker.WalkJob(walker, bitCollector_walker.EntryFilter(None, None, None, None, None, 0))
+		self.assertTrue(job.enterDirectory(bitCollector_walker.statEntry(sub, stat), parent) == 1)
+		self.assertTrue(job.enterDirectory(mount, parent) == 0)
+
+		walker = bitCollector_walker.FileWalker(2, [sub], 1, 1)
+		job    = bitCollector_walker.WalkJob(walker, bitCollector_walker.EntryFilter(None, None, None, None, None, 0))
+		self.assertTrue(job.enterDirectory(mount, parent) == 0)
+
+		walker = bitCollector_walker.FileWalker(2, [], 1, 1)
+		job    = bitCollector_walker.WalkJob(walker, bitCollector_walker.EntryFilter(None, None, None, None, None, 0))
+		self.assertTrue(job.enterDirectory(mount, parent) == 1)
+
+	def test_skipped_mount_not_covered(self):
+		walker = bitCollector_walker.FileWalker(2, [], 1, 1)
+		list(walker.walk(self.directory))
+		self.assertTrue(walker.file_index.covers(os.path.join(self.directory, "sub")) == 1)
+
+		walker.file_index.skipped_mounts.add(os.path.join(self.directory, "sub"))
+		self.assertTrue(walker.file_index.covers(os.path.join(self.directory, "sub", "deep")) == 0)
+		self.assertTrue(walker.file_index.covers(self.directory) == 1)
+
+	def test_index_queries(self):
+		file_index = bitCollector_walker.FileIndex()
+		file_index.addEntries([bitCollector_walker.statEntry(path, os.lstat(path)) for path in [os.path.join(self.directory, name) for name in ("a.txt", "b.log", os.path.join("sub", "c.txt"), os.path.join("sub", "deep", "d.txt"))]])
+
+		self.assertTrue(self.names(file_index.find(prefix=os.path.join(self.directory, "sub"))) == [os.path.join("sub", "c.txt"), os.path.join("sub", "deep", "d.txt")])
+		self.assertTrue(self.names(file_index.find(extension="txt")) == ["a.txt", os.path.join("sub", "c.txt"), os.path.join("sub", "deep", "d.txt")])
+		self.assertTrue(self.names(file_index.find(extension=".LOG")) == ["b.log"])
+		self.assertTrue(self.names(file_index.find(extension="txt", min_size=2, max_size=3)) == [os.path.join("sub", "c.txt")])
+		self.assertTrue(self.names(file_index.find(prefix=self.directory, min_size=4)) == [os.path.join("sub", "deep", "d.txt")])
+		self.assertTrue(file_index.lookup(os.path.join(self.directory, "b.log")).size == 2)
+		self.assertTrue(file_index.lookup(os.path.join(self.directory, "missing")) is None)
@@ -1,17 +1,701 @@
-####
-## This module is for harvesting logs from Skype, AIM, MSN Messenger,
-## and other chat apps
-####
-import os, sys, time, json, loggin
+## File Name: ChatHarvest.py
+##
+## Author(s): Daniel "Albinohat" Mercado
+##
+## Purpose: This module harvests the chat logs kept by Pidgin, Skype, AIM and MSN Messenger.
+##          Each parser names where one client keeps its logs under a home directory. Those directories are walked
+##          once through the framework's walker, so the walk is shared with the other modules through the file index,
+##          and the files found are split into one store per account. Each file is read a line, element or row at a
+##          time into a common message record.
+##          Accounts are parsed in parallel and the messages are written to a JSON lines file as they are read,
+##          so years of history never have to fit in memory.
+##          With incremental on, the file cache records how many messages each file held, and a file which has grown
+##          since the previous run only has its new messages appended to the output.
+##
+## Message Record
+##   client       - The chat client. (pidgin, skype, aim or msn)
+##   account      - The account the log belongs to.
+##   conversation - The buddy, contact or chat the message belongs to.
+##   timestamp    - The time of the message as YYYY-MM-DDTHH:MM:SS, in the client's local time. (UTC with a trailing Z for Skype and MSN)
+##   sender       - The name of the sender, as logged.
+##   body         - The text of the message.
+##   source       - The file the message was read from.
 
-_module_version = "ChatHarvest v0.0.1"
+## Standard imports (Static)
+import fnmatch, glob, HTMLParser, json, logging, multiprocessing.pool, os, Queue, re, sqlite3, threading, time, traceback
+import xml.etree.cElementTree as ElementTree
 
+## Global Variable Declarations - CONSTANTS - DO NOT CHANGE @ RUNTIME
+_module_version = "ChatHarvest v0.1.0"
+
+## The number of messages waiting to be written to the output file.
+_message_queue_size = 10000
+
+## The number of messages written between two flushes of the output file.
+_message_flush_interval = 1000
+
+## The home directories searched when the homes parameter isn't given. Each is a glob pattern.
+_default_homes = ["/home/*", "/Users/*", "C:\\Users\\*"]
+
+## The date and time format of the timestamp field.
+_timestamp_format = "%Y-%m-%dT%H:%M:%S"
+
+## Pidgin names its log files after the start of the conversation. (2015-03-09.174105-0500EST.txt)
+_pidgin_file_date = re.compile(r"(\d{4})-(\d\d)-(\d\d)\.(\d\d)(\d\d)(\d\d)")
+
+## A logged line starts with the time, optionally with a date, followed by the sender.
+##   (17:41:05) Albinohat: message
+##   (03/09/2015 05:41:05 PM) Albinohat: message
+_chat_line = re.compile(r"^\((?:(\d\d?)/(\d\d?)/(\d{2,4}) )?(\d\d?):(\d\d):(\d\d)(?: ?([AaPp][Mm]))?\) ([^:]{1,128}?): (.*)$")
+
+## AIM logs put the time after the sender.
+##   Albinohat (5:41:05 PM): message
+_aim_line = re.compile(r"^([^(]{1,128}?) \((\d\d?):(\d\d)(?::(\d\d))?(?: ?([AaPp][Mm]))?\): (.*)$")
+
+## The HTML tags and line breaks of HTML logs.
+_html_tag    = re.compile(r"<[^>]*>")
+_html_break  = re.compile(r"<br\s*/?>", re.IGNORECASE)
+_html_parser = HTMLParser.HTMLParser()
+
+## Class Declarations
+
+## Class Name: ModuleSettings
+##
+## Purpose: Hold information about the settings required to run this BitCollector module.
 class ModuleSettings():
-	def __init__(self, module):
-		for key in module:
-			if (key == "name"):
-				self.name == module[key]
-			elif (key == "parameters"):
-					for param, value in param_pair.iteritems():
-						if (param == "Lucases"):
-							print "Lucases detected! => " + value
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the settings required to run the module, falling back to the defaults.
+	##
+	## Parameters
+	## 1. module             - The name and parameters to pass to the BitCollector module to be initialized.
+	## 2. framework_settings - The FrameworkSettings of the framework running the module.
+	def __init__(self, module, framework_settings):
+		self.name          = module["name"]
+		self.logging_level = framework_settings.logging_level
+		self.output        = os.path.join(os.path.dirname(framework_settings.log_file), "ChatHarvest.jsonl")
+		self.parsers       = sorted(_chat_parsers.keys())
+		self.workers       = 4
+		self.homes         = list(_default_homes)
+		self.incremental   = 1
+
+		## Loop through the list of dictionaries containing setting names and values.
+		for param_pair in module.get("parameters", []):
+			for param, value in param_pair.iteritems():
+				if (param == "output"):
+					self.output = value
+
+				elif (param == "parsers"):
+					self.parsers = [parser for parser in value if (parser in _chat_parsers)]
+
+					for parser in value:
+						if (parser not in _chat_parsers):
+							print "Startup - ChatHarvest.ModuleSettings.__init__ - WARNING - Unknown parser: " + str(parser) + ". Ignoring."
+
+				elif (param == "workers"):
+					self.workers = max(1, int(value))
+
+				elif (param == "homes"):
+					self.homes = value
+
+				elif (param == "incremental"):
+					self.incremental = value
+
+				elif (param == "logging_level"):
+					self.logging_level = value
+
+				else:
+					print "Startup - ChatHarvest.ModuleSettings.__init__ - ERROR - Unexpected parameter: " + str(param) + ". Ignoring."
+
+		## Call the method to initialize the module-level logger.
+		self.initializeLogger()
+
+	## Method Name: initializeLogger
+	##
+	## Purpose: Initializes the logger for this BitCollector module.
+	def initializeLogger(self):
+		self.logger = logging.getLogger(self.__class__.__name__)
+
+		level = logging.getLevelName(str(self.logging_level).upper())
+
+		if (isinstance(level, int)):
+			self.logger.setLevel(level)
+
+		else:
+			print "Startup - ChatHarvest.ModuleSettings.initializeLogger - WARNING - Unknown logging level: " + str(self.logging_level) + ". Defaulting to DEBUG."
+			self.logger.setLevel(logging.DEBUG)
+
+## Class Name: ChatStore
+##
+## Purpose: Hold the log files or database of one account of one chat client.
+class ChatStore():
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the store.
+	##
+	## Parameters
+	## 1. parser  - The ChatParser which reads the store.
+	## 2. account - The account the logs belong to.
+	## 3. entries - The list of FileEntry instances of the files holding the logs.
+	def __init__(self, parser, account, entries):
+		self.parser  = parser
+		self.account = account
+		self.entries = entries
+
+## Class Name: ChatParser
+##
+## Purpose: The base class of the parsers. A parser names the files of one client, the account each belongs to,
+##          and reads their messages. Add a subclass to _chat_parsers to support another client.
+class ChatParser():
+	## The name of the client, used in the client field of the messages.
+	client = None
+
+	## The lowercase glob patterns of the names of the files holding the logs. They match names in either case.
+	patterns = ()
+
+	## Method Name: __init__
+	##
+	## Purpose: Initialize the parser.
+	##
+	## Parameters
+	## 1. framework_settings - The FrameworkSettings of the framework running the module, for its shared services.
+	def __init__(self, framework_settings):
+		self.framework_settings = framework_settings
+
+	## Method Name: logDirectories
+	##
+	## Purpose: Return the directories the client may keep its logs in under a home directory.
+	##
+	## Parameters
+	## 1. home - The home directory of a user.
+	def logDirectories(self, home):
+		return []
+
+	## Method Name: accountOf
+	##
+	## Purpose: Return the account a file found in a log directory belongs to, or None if it doesn't hold logs.
+	##
+	## Parameters
+	## 1. parts - The list of the components of the file's path below the log directory.
+	def accountOf(self, parts):
+		return None
+
+	## Method Name: readFile
+	##
+	## Purpose: Yield the messages of one file of a store.
+	##
+	## Parameters
+	## 1. store - The ChatStore the file belongs to.
+	## 2. path  - The path to the file.
+	def readFile(self, store, path):
+		return iter([])
+
+	## Method Name: message
+	##
+	## Purpose: Return a message record. (See Message Record)
+	def message(self, store, conversation, timestamp, sender, body, source):
+		return {
+			"client"       : self.client,
+			"account"      : store.account,
+			"conversation" : conversation,
+			"timestamp"    : timestamp,
+			"sender"       : sender,
+			"body"         : body,
+			"source"       : source
+		}
+
+## Class Name: PidginParser
+##
+## Purpose: Read Pidgin's text and HTML logs. (.purple/logs/<protocol>/<account>/<buddy>/<date>.txt|.html)
+class PidginParser(ChatParser):
+	client   = "pidgin"
+	patterns = ("*.txt", "*.html", "*.htm")
+
+	def logDirectories(self, home):
+		return [os.path.join(home, ".purple", "logs"), os.path.join(home, "AppData", "Roaming", ".purple", "logs"), os.path.join(home, "Application Data", ".purple", "logs")]
+
+	def accountOf(self, parts):
+		if (len(parts) >= 3):
+			return parts[0] + "/" + parts[1]
+
+		return None
+
+	def readFile(self, store, path):
+		conversation = os.path.basename(os.path.dirname(path))
+		match        = _pidgin_file_date.match(os.path.basename(path))
+		log_date     = None
+
+		if (match):
+			log_date = tuple([int(group) for group in match.groups()[:3]])
+
+		return readChatLines(self, store, path, conversation, log_date, path.lower().endswith((".html", ".htm")))
+
+## Class Name: AIMParser
+##
+## Purpose: Read AIM's HTML and text logs. (AIM Logs/<account>/<buddy>.html)
+class AIMParser(ChatParser):
+	client   = "aim"
+	patterns = ("*.txt", "*.html", "*.htm")
+
+	def logDirectories(self, home):
+		return [os.path.join(home, "Documents", "AIM Logs"), os.path.join(home, "My Documents", "AIM Logs")]
+
+	def accountOf(self, parts):
+		if (len(parts) >= 2):
+			return parts[0]
+
+		return None
+
+	def readFile(self, store, path):
+		conversation = os.path.splitext(os.path.basename(path))[0]
+		is_html      = path.lower().endswith((".html", ".htm"))
+
+		## AIM logs carry no date, so the date of the file is used.
+		try:
+			log_date = time.localtime(os.path.getmtime(path))[:3]
+
+		except OSError:
+			log_date = None
+
+		with open(path, "rb") as log_file:
+			for line in log_file:
+				text  = cleanLine(line, is_html)
+				match = _aim_line.match(text)
+
+				if (match):
+					sender, hour, minute, second, meridiem, body = match.groups()
+					yield self.message(store, conversation, formatTimestamp(log_date, hour, minute, second or 0, meridiem), sender, body, path)
+
+## Class Name: MSNParser
+##
+## Purpose: Read MSN Messenger's XML message history. (My Received Files/<account><number>/History/<contact>.xml)
+class MSNParser(ChatParser):
+	client   = "msn"
+	patterns = ("*.xml",)
+
+	def logDirectories(self, home):
+		return [os.path.join(home, "Documents", "My Received Files"), os.path.join(home, "My Documents", "My Received Files")]
+
+	def accountOf(self, parts):
+		if (len(parts) >= 3 and parts[1] == "History"):
+			return re.sub(r"\d+$", "", parts[0])
+
+		return None
+
+	def readFile(self, store, path):
+		conversation = os.path.splitext(os.path.basename(path))[0]
+
+		try:
+			## Clear each message once it is read so that a large history isn't kept as a tree.
+			for event, element in ElementTree.iterparse(path):
+				if (element.tag != "Message"):
+					continue
+
+				timestamp = element.get("DateTime", "")[:19] or None
+
+				if (timestamp is not None):
+					timestamp += "Z"
+
+				sender = element.find("From/User")
+				text   = element.find("Text")
+
+				if (sender is not None):
+					sender = sender.get("FriendlyName")
+
+				if (text is not None):
+					text = text.text
+
+				yield self.message(store, conversation, timestamp, sender, text or "", path)
+
+				element.clear()
+
+		except SyntaxError as error:
+			logging.getLogger("MSNParser").warning("Stopped reading " + path + " at malformed XML: " + str(error))
+
+## Class Name: SkypeParser
+##
+## Purpose: Read the messages from Skype's main.db. (Skype/<account>/main.db)
+class SkypeParser(ChatParser):
+	client   = "skype"
+	patterns = ("main.db",)
+
+	def logDirectories(self, home):
+		return [os.path.join(home, ".Skype"), os.path.join(home, "Library", "Application Support", "Skype"), os.path.join(home, "AppData", "Roaming", "Skype"), os.path.join(home, "Application Data", "Skype")]
+
+	def accountOf(self, parts):
+		if (len(parts) == 2):
+			return parts[0]
+
+		return None
+
+	def readFile(self, store, path):
+		## The framework reads a copy of the database, so the running client never sees a lock or a change.
+		for timestamp, author, display_name, chat_name, body in self.framework_settings.sqlite_reader.readRows(path, "SELECT timestamp, author, from_dispname, chatname, body_xml FROM Messages ORDER BY id"):
+			if (timestamp is not None):
+				timestamp = time.strftime(_timestamp_format, time.gmtime(timestamp)) + "Z"
+
+			yield self.message(store, chat_name, timestamp, display_name or author, cleanLine(body or "", 1), path)
+
+## Class Name: MessageWriter
+##
+## Purpose: Write message records to a JSON lines file from a single thread, through a bounded queue.
+class MessageWriter():
+	## Method Name: __init__
+	##
+	## Purpose: Open the output file for appending and start the writer thread.
+	##
+	## Parameters
+	## 1. path - The path to the JSON lines file.
+	def __init__(self, path):
+		output_directory = os.path.dirname(os.path.abspath(path))
+
+		if (not os.path.isdir(output_directory)):
+			os.makedirs(output_directory)
+
+		self.path    = path
+		self.stream  = open(path, "ab")
+		self.queue   = Queue.Queue(_message_queue_size)
+		self.counts  = {}
+		self.written = 0
+
+		self.writer_thread = threading.Thread(target=self.writeMessages, name="ChatHarvestWriter")
+		self.writer_thread.daemon = True
+		self.writer_thread.start()
+
+	## Method Name: put
+	##
+	## Purpose: Queue a message, waiting while the queue is full.
+	##
+	## Parameters
+	## 1. message - The message record.
+	def put(self, message):
+		self.queue.put(message)
+
+	## Method Name: writeMessages
+	##
+	## Purpose: The body of the writer thread. Writes the queued messages until a None message is queued.
+	def writeMessages(self):
+		while (1):
+			message = self.queue.get()
+
+			if (message is None):
+				break
+
+			self.stream.write(json.dumps(message, sort_keys=True) + "\n")
+			self.counts[message["client"]] = self.counts.get(message["client"], 0) + 1
+			self.written += 1
+
+			if (self.written % _message_flush_interval == 0):
+				self.stream.flush()
+
+	## Method Name: close
+	##
+	## Purpose: Write the remaining messages and close the output file.
+	def close(self):
+		self.queue.put(None)
+		self.writer_thread.join()
+		self.stream.close()
+
+## Classless Method Declarations
+
+## Method Name: readChatLines
+##
+## Purpose: Yield the messages of a log with one "(time) sender: message" line per message.
+##          Lines which don't start a message are appended to the previous message.
+##
+## Parameters
+## 1. parser       - The ChatParser reading the log.
+## 2. store        - The ChatStore the log belongs to.
+## 3. path         - The path to the log file.
+## 4. conversation - The buddy or chat the log belongs to.
+## 5. log_date     - The (year, month, day) of the log, used for lines which only have a time. (None if unknown)
+## 6. is_html      - A boolean tracking whether or not the log is HTML.
+def readChatLines(parser, store, path, conversation, log_date, is_html):
+	message = None
+
+	with open(path, "rb") as log_file:
+		for line in log_file:
+			text  = cleanLine(line, is_html)
+			match = _chat_line.match(text)
+
+			if (match):
+				if (message is not None):
+					yield message
+
+				month, day, year, hour, minute, second, meridiem, sender, body = match.groups()
+				message_date = log_date
+
+				if (year is not None):
+					message_date = (normalizeYear(int(year)), int(month), int(day))
+
+				message = parser.message(store, conversation, formatTimestamp(message_date, hour, minute, second, meridiem), sender, body, path)
+
+			elif (message is not None and text != ""):
+				message["body"] += "\n" + text
+
+	if (message is not None):
+		yield message
+
+## Method Name: cleanLine
+##
+## Purpose: Return a line of a log as unicode text, without its HTML tags and entities if it is HTML.
+##
+## Parameters
+## 1. line    - The str or unicode line.
+## 2. is_html - A boolean tracking whether or not the line is HTML.
+def cleanLine(line, is_html):
+	if (not isinstance(line, unicode)):
+		line = line.decode("utf-8", "replace")
+
+	if (is_html):
+		line = _html_break.sub("\n", line)
+		line = _html_parser.unescape(_html_tag.sub("", line))
+
+	return line.strip()
+
+## Method Name: formatTimestamp
+##
+## Purpose: Return a timestamp from a date and the time fields of a line.
+##
+## Parameters
+## 1. date     - The (year, month, day) tuple, or None if unknown.
+## 2. hour     - The hour, as logged.
+## 3. minute   - The minute.
+## 4. second   - The second.
+## 5. meridiem - AM, PM or None for 24-hour times.
+##
+## Returns
+## YYYY-MM-DDTHH:MM:SS, or HH:MM:SS if the date is unknown.
+def formatTimestamp(date, hour, minute, second, meridiem):
+	hour = int(hour)
+
+	if (meridiem is not None):
+		hour = hour % 12
+
+		if (meridiem.lower() == "pm"):
+			hour += 12
+
+	clock = "%02d:%02d:%02d" % (hour, int(minute), int(second))
+
+	if (date is None):
+		return clock
+
+	return "%04d-%02d-%02dT%s" % (date[0], date[1], date[2], clock)
+
+## Method Name: normalizeYear
+##
+## Purpose: Return a four-digit year from a year logged with two or four digits.
+##
+## Parameters
+## 1. year - The year.
+def normalizeYear(year):
+	if (year < 100):
+		return 2000 + year
+
+	return year
+
+## Method Name: existingDirectories
+##
+## Purpose: Return the directories of a list which exist.
+##
+## Parameters
+## 1. paths - The list of paths.
+def existingDirectories(paths):
+	return [path for path in paths if (os.path.isdir(path))]
+
+## Method Name: homeDirectories
+##
+## Purpose: Return the sorted home directories matching a list of glob patterns. ("~" is expanded)
+##
+## Parameters
+## 1. patterns - The list of glob patterns, such as /home/*.
+def homeDirectories(patterns):
+	homes = set()
+
+	for pattern in patterns:
+		for path in glob.glob(os.path.expanduser(pattern)):
+			if (os.path.isdir(path)):
+				homes.add(os.path.abspath(path))
+
+	return sorted(homes)
+
+## Method Name: findStores
+##
+## Purpose: Walk the log directories of the parsers once, through the framework's walker, and split the files found
+##          into one ChatStore per account.
+##
+## Parameters
+## 1. walker          - The framework's FileWalker.
+## 2. log_directories - The dictionary mapping each absolute log directory to the list of ChatParsers which read it.
+##
+## Returns
+## The list of ChatStores, sorted by directory, client and account. Their entries are sorted by path.
+def findStores(walker, log_directories):
+	patterns = sorted(set([anyCase(pattern) for parsers in log_directories.values() for parser in parsers for pattern in parser.patterns]))
+	stores   = {}
+
+	for entry in walker.walk(sorted(log_directories), patterns=patterns):
+		for logs_directory, parsers in log_directories.iteritems():
+			if (not entry.path.startswith(os.path.join(logs_directory, ""))):
+				continue
+
+			parts = os.path.relpath(entry.path, logs_directory).split(os.sep)
+
+			for parser in parsers:
+				if (len([pattern for pattern in parser.patterns if (fnmatch.fnmatch(entry.name.lower(), pattern))]) == 0):
+					continue
+
+				account = parser.accountOf(parts)
+
+				if (account is not None):
+					stores.setdefault((logs_directory, parser.client, account), ChatStore(parser, account, [])).entries.append(entry)
+
+	for store in stores.values():
+		store.entries.sort(key=lambda entry: entry.path)
+
+	return [stores[store_key] for store_key in sorted(stores)]
+
+## Method Name: anyCase
+##
+## Purpose: Return a glob pattern matching its letters in either case, since fnmatch is case-sensitive outside of Windows.
+##
+## Parameters
+## 1. pattern - The lowercase glob pattern.
+def anyCase(pattern):
+	return "".join([("[" + character + character.upper() + "]") if (character.isalpha()) else character for character in pattern])
+
+## Method Name: harvestStore
+##
+## Purpose: Read every changed file of a store and queue the messages which weren't harvested from it before.
+##          Runs in a worker thread, one store at a time.
+##
+## Parameters
+## 1. task - The tuple of (ChatStore, MessageWriter, file cache or None, logger).
+##
+## Returns
+## A tuple of the store, the number of messages and the number of files read.
+def harvestStore(task):
+	store, writer, file_cache, logger = task
+	messages   = 0
+	files_read = 0
+
+	for entry in store.entries:
+		path      = entry.path
+		harvested = 0
+
+		## Skip the files which haven't changed since the previous run.
+		if (file_cache is not None):
+			if (changedEntry(file_cache, entry) is None):
+				continue
+
+			## Logs only ever grow, so the messages already harvested come first. A file which shrank was replaced and is read again.
+			previous = file_cache.storedData(entry, "ChatHarvest")
+
+			if (isinstance(previous, dict) and entry.size >= previous.get("size", 0)):
+				harvested = previous.get("messages", 0)
+
+		file_messages = 0
+
+		try:
+			for message in store.parser.readFile(store, path):
+				file_messages += 1
+
+				if (file_messages > harvested):
+					writer.put(message)
+					messages += 1
+
+		except (IOError, OSError, sqlite3.Error) as error:
+			logger.warning("Unable to read " + path + ": " + str(error))
+			continue
+
+		## A parser bug shouldn't stop the other files and accounts from being harvested.
+		except Exception:
+			logger.error("Unable to parse " + path + ": " + traceback.format_exc())
+			continue
+
+		files_read += 1
+
+		if (file_cache is not None):
+			file_cache.update(entry, "ChatHarvest", {"messages": file_messages, "size": entry.size})
+
+	return store, messages, files_read
+
+## Method Name: changedEntry
+##
+## Purpose: Return the FileEntry of a file if it changed since it was last harvested, or None.
+##
+## Parameters
+## 1. file_cache - The framework's FileCache.
+## 2. entry      - The FileEntry of the file, from the walker.
+def changedEntry(file_cache, entry):
+	for entry in file_cache.changedEntries([entry], "ChatHarvest"):
+		return entry
+
+	return None
+
+## Method Name: main (Required)
+##
+## Purpose: Serves as the entry point into the script.
+##
+## Parameters (All Required)
+## 1. thread_id          - The ID of the thread containing this BitCollector module.
+## 2. path_to_main       - The absolute path to the framework which initialized this BitCollector module.
+## 3. framework_settings - An instance of the FrameworkSettings class containing settings required to start the framework.
+## 4. platform_details   - An instance of the Platform class containing the platform-independent attributes as well as a platform-dependent object.
+## 5. module_dict        - The name and parameters to pass to the BitCollector module to be initialized as a dictionary.
+def main(thread_id, path_to_main, framework_settings, platform_details, module_dict):
+	module_settings = ModuleSettings(module_dict, framework_settings)
+	logger          = module_settings.logger
+
+	## Find the log directories of every enabled client under every home directory, then walk them all at once.
+	parsers         = [_chat_parsers[parser_name](framework_settings) for parser_name in module_settings.parsers]
+	log_directories = {}
+
+	for home in homeDirectories(module_settings.homes):
+		for parser in parsers:
+			for logs_directory in existingDirectories(parser.logDirectories(home)):
+				log_directories.setdefault(os.path.abspath(logs_directory), []).append(parser)
+
+	stores = findStores(framework_settings.walker, log_directories)
+
+	for store in stores:
+		logger.info("Found " + store.parser.client + " logs for " + store.account + ": " + str(len(store.entries)) + " file(s)")
+
+	if (len(stores) == 0):
+		logger.info("No chat logs found")
+		return 0
+
+	file_cache = None
+
+	if (module_settings.incremental == 1):
+		file_cache = getattr(framework_settings, "file_cache", None)
+
+		## The cache only describes what is in the output, so start over if the output was deleted.
+		if (file_cache is not None and not (os.path.isfile(module_settings.output) and os.path.getsize(module_settings.output) > 0)):
+			logger.info(module_settings.output + " is empty. Harvesting every file again.")
+			file_cache.clearScope("ChatHarvest")
+
+	## Parse the accounts in parallel. Each worker streams its messages to the writer thread.
+	writer       = MessageWriter(module_settings.output)
+	harvest_pool = multiprocessing.pool.ThreadPool(min(module_settings.workers, len(stores)))
+
+	try:
+		for store, messages, files_read in harvest_pool.imap_unordered(harvestStore, [(store, writer, file_cache, logger) for store in stores]):
+			logger.info("Harvested " + str(messages) + " message(s) from " + str(files_read) + " changed file(s) of " + store.parser.client + " account " + store.account)
+
+	finally:
+		harvest_pool.close()
+		harvest_pool.join()
+		writer.close()
+
+	logger.info("Wrote " + str(writer.written) + " message(s) to " + module_settings.output + " " + json.dumps(writer.counts, sort_keys=True))
+
+	return 0
+
+## The parsers available to the module, keyed by the name used in the parsers parameter.
+_chat_parsers = {
+	"aim"    : AIMParser,
+	"msn"    : MSNParser,
+	"pidgin" : PidginParser,
+	"skype"  : SkypeParser
+}
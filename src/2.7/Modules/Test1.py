@@ -178,11 +178,20 @@ def main(thread_id, path_to_main, framework_settings, platform_details, module_d
 
 	print "Operating System Type: " + platform_details.os_type
 	## Call the method to get the logged-in user's home directory.
-	print "Home directory: " + getHomeDirectory(root_logger, platform_details.os_type)
+	home_dir = getHomeDirectory(root_logger, platform_details.os_type)
+	print "Home directory: " + home_dir
+
+	## Emit a result record for the framework's results sinks. (Optional)
+	if ("results" in module_dict):
+		module_dict["results"].emit({"os_type": platform_details.os_type, "home_directory": home_dir})
 
 	## Call the method to create a temp file.
 	createTempFile(root_logger)
 
+	## Store the temp file in the framework's artifact container, if it has one. (Optional)
+	if (getattr(framework_settings, "container", None) is not None):
+		framework_settings.container.addFile("temp.txt", "Test1/temp.txt")
+
 	## Call the module cleanup method.
 	moduleCleanUp(root_logger)
 
@@ -2,8 +2,11 @@ from flask import Flask, current_app
 from flask_bootstrap import Bootstrap
 from flask.ext.sqlalchemy import SQLAlchemy
 from config import config
+from .jobs import JobQueue
 
 bootstrap = Bootstrap()
+db = SQLAlchemy()
+job_queue = JobQueue()
 
 def create_app(config_name):
     app = Flask(__name__)
@@ -11,6 +14,7 @@ def create_app(config_name):
     config[config_name].init_app(app)
 
     bootstrap.init_app(app)
+    db.init_app(app)
 
     if not app.debug and not app.testing and not app.config['SSL_DISABLE']:
         from flask.ext.sslify import SSLify
@@ -19,4 +23,11 @@ def create_app(config_name):
     from .main import main as main_blueprint
     app.register_blueprint(main_blueprint)
 
+    from .api_1_0 import api as api_1_0_blueprint
+    app.register_blueprint(api_1_0_blueprint, url_prefix='/api/v1.0')
+
+    job_queue.init_app(app)
+    if app.config['JOB_START_WORKERS']:
+        job_queue.start()
+
     return app
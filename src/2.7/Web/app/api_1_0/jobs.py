@@ -0,0 +1,60 @@
+from flask import jsonify, request, current_app, url_for
+from . import api
+from .errors import bad_request
+from .. import db, job_queue
+from ..models import Job
+
+
+@api.route('/jobs/')
+def get_jobs():
+    page = request.args.get('page', 1, type=int)
+    query = Job.query
+    if request.args.get('state'):
+        query = query.filter_by(state=request.args['state'])
+    pagination = query.order_by(Job.id.desc()).paginate(
+        page, per_page=current_app.config['JOBS_PER_PAGE'], error_out=False)
+    prev = None
+    if pagination.has_prev:
+        prev = url_for('api.get_jobs', page=page-1, _external=True)
+    next = None
+    if pagination.has_next:
+        next = url_for('api.get_jobs', page=page+1, _external=True)
+    return jsonify({
+        'jobs': [job.to_json() for job in pagination.items],
+        'prev': prev,
+        'next': next,
+        'count': pagination.total
+    })
+
+
+@api.route('/jobs/<int:id>')
+def get_job(id):
+    job = Job.query.get_or_404(id)
+    return jsonify(job.to_json())
+
+
+@api.route('/jobs/<int:id>/output')
+def get_job_output(id):
+    job = Job.query.get_or_404(id)
+    return current_app.response_class(job.read_output(),
+                                      mimetype='text/plain')
+
+
+@api.route('/jobs/', methods=['POST'])
+def new_job():
+    job = Job.from_json(request.get_json(silent=True))
+    job.submitted_by = request.remote_addr
+    db.session.add(job)
+    db.session.commit()
+    job_queue.wake()
+    return jsonify(job.to_json()), 201, \
+        {'Location': url_for('api.get_job', id=job.id, _external=True)}
+
+
+@api.route('/jobs/<int:id>/cancel', methods=['POST'])
+def cancel_job(id):
+    job = Job.query.get_or_404(id)
+    if not job.cancel():
+        return bad_request('job has already finished')
+    db.session.commit()
+    return jsonify(Job.query.get(id).to_json())
@@ -0,0 +1,266 @@
+import errno
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from flask import current_app
+
+
+def load_framework():
+    """Import bitCollector_framework from FRAMEWORK_PATH."""
+    framework_path = os.path.abspath(current_app.config['FRAMEWORK_PATH'])
+    if framework_path not in sys.path:
+        sys.path.append(framework_path)
+    import bitCollector_framework
+    return bitCollector_framework
+
+
+def check_config(config):
+    """Return the errors and warnings the framework finds in a config."""
+    errors, warnings = load_framework().checkConfig(config)[3:]
+    return errors, warnings
+
+
+class JobQueue(object):
+    """Runs the queued jobs in the background.
+
+    The queue itself is the jobs table, so every process of the web app
+    shares it. The process which runs the jobs, started by start, runs
+    JOB_WORKERS threads which claim the oldest queued job and run
+    bitCollector_framework.py on it in a subprocess, so a run never holds up
+    a request and a crashing module can't take the web app down with it."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.workers = []
+        self.wake_event = threading.Event()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        from . import db
+        with app.app_context():
+            db.create_all()
+
+    @property
+    def worker_id(self):
+        return '%s:%d' % (socket.gethostname(), os.getpid())
+
+    def start(self):
+        """Start the workers in this process.
+
+        Only the processes meant to run jobs start them, since the jobs left
+        running by a process of this host which exited are failed first."""
+        if self.workers:
+            return
+        with self.app.app_context():
+            self.fail_orphans()
+        for i in range(self.app.config['JOB_WORKERS']):
+            worker = threading.Thread(target=self.work,
+                                      name='JobWorker-%d' % (i + 1))
+            worker.daemon = True
+            worker.start()
+            self.workers.append(worker)
+
+    def wake(self):
+        """Tell the idle workers a job was queued."""
+        self.wake_event.set()
+
+    def work(self):
+        with self.app.app_context():
+            while True:
+                try:
+                    ran = self.run_next()
+                except Exception:
+                    self.app.logger.exception('The job worker failed')
+                    ran = False
+                if not ran:
+                    # Jobs queued by another process don't wake this one.
+                    self.wake_event.wait(self.app.config['JOB_POLL_INTERVAL'])
+                    self.wake_event.clear()
+
+    def claim(self):
+        """Mark the oldest queued job as running and return it.
+
+        A job is only claimed if its state is still queued when it is
+        updated, so two workers never run the same job."""
+        from . import db
+        from .models import Job
+        while True:
+            job_id = db.session.query(Job.id).filter_by(state='queued') \
+                .order_by(Job.id).limit(1).scalar()
+            if job_id is None:
+                return None
+            claimed = Job.query.filter_by(id=job_id, state='queued').update(
+                {'state': 'running', 'worker': self.worker_id,
+                 'started_at': datetime.utcnow()},
+                synchronize_session=False)
+            db.session.commit()
+            if claimed:
+                return Job.query.get(job_id)
+
+    def run_next(self):
+        """Run the oldest queued job. Returns False if there is none."""
+        from . import db
+        job = self.claim()
+        if job is None:
+            return False
+        try:
+            self.run(job)
+        except Exception as e:
+            db.session.rollback()
+            self.finish(job, 'failed', error='The job could not be run: %s' % e)
+            raise
+        finally:
+            db.session.remove()
+        return True
+
+    def run(self, job):
+        from . import db
+        from .models import Job
+        config = self.app.config
+        if not os.path.isdir(job.directory):
+            os.makedirs(job.directory)
+        with open(job.config_path, 'w') as config_file:
+            config_file.write(job.config)
+
+        # Relative paths in the config, such as the log file, are relative to
+        # the job's directory.
+        with open(job.output_path, 'wb') as output:
+            process = subprocess.Popen(
+                [config['JOB_PYTHON'], '-u',
+                 os.path.join(os.path.abspath(config['FRAMEWORK_PATH']),
+                              'bitCollector_framework.py'),
+                 '--progress', job.progress_path, job.config_path],
+                cwd=job.directory, stdout=output, stderr=subprocess.STDOUT,
+                close_fds=os.name != 'nt')
+        job.pid = process.pid
+        db.session.commit()
+
+        state, error = None, None
+        deadline = time.time() + config['JOB_TIMEOUT'] \
+            if config['JOB_TIMEOUT'] else None
+        while process.poll() is None:
+            time.sleep(config['JOB_POLL_INTERVAL'])
+            cancel_requested = db.session.query(Job.cancel_requested) \
+                .filter_by(id=job.id).scalar()
+            # End the transaction so the next check sees new commits.
+            db.session.rollback()
+            if cancel_requested:
+                state, error = 'cancelled', 'The run was cancelled'
+            elif deadline is not None and time.time() > deadline:
+                state, error = 'failed', 'The run took longer than %d ' \
+                    'seconds' % config['JOB_TIMEOUT']
+            else:
+                continue
+            self.stop(process)
+            break
+
+        if state is None and process.returncode == 0:
+            state = 'done'
+        elif state is None:
+            state, error = 'failed', 'bitCollector_framework.py exited ' \
+                'with %d' % process.returncode
+        self.finish(job, state, process.returncode, error)
+
+    def stop(self, process):
+        """Stop a run, giving the framework a chance to write its results."""
+        process.terminate()
+        for i in range(10):
+            if process.poll() is not None:
+                return
+            time.sleep(0.5)
+        process.kill()
+        process.wait()
+
+    def finish(self, job, state, return_code=None, error=None):
+        from . import db
+        job.state = state
+        job.return_code = return_code
+        job.error = error
+        job.finished_at = datetime.utcnow()
+        db.session.add(job)
+        db.session.commit()
+
+    def fail_orphans(self):
+        """Fail the jobs left running by a process of this host which exited."""
+        from . import db
+        from .models import Job
+        host = socket.gethostname()
+        for job in Job.query.filter_by(state='running').all():
+            worker_host, worker_pid = (job.worker or ':0').rsplit(':', 1)
+            if worker_host != host or process_exists(int(worker_pid)):
+                continue
+            self.finish(job, 'failed', error='The web app exited during the run')
+        db.session.remove()
+
+
+def stream_events(job_id, progress_path, offset=0):
+    """Yield the progress events of a job as server-sent events.
+
+    The events are read from the file the framework publishes them to,
+    starting at the byte offset the browser last received, which is the ID
+    of each event. A job event is sent whenever the state of the job
+    changes, and an end event once the job has finished and every event has
+    been sent."""
+    from . import db
+    from .models import Job
+    config = current_app.config
+    state = None
+    last_sent = time.time()
+    while True:
+        # Read the state first, so that no event written before the job
+        # finished can be missed.
+        job_state = db.session.query(Job.state).filter_by(id=job_id).scalar()
+        db.session.rollback()
+        if job_state != state:
+            state = job_state
+            yield 'data: %s\n\n' % json.dumps({'type': 'job', 'state': state})
+            last_sent = time.time()
+        lines, offset = read_lines(progress_path, offset)
+        for line, line_offset in lines:
+            yield 'id: %d\ndata: %s\n\n' % (line_offset, line)
+            last_sent = time.time()
+        if not lines and state in Job.FINISHED_STATES:
+            yield 'event: end\ndata: {}\n\n'
+            return
+        if time.time() - last_sent > config['EVENTS_KEEPALIVE']:
+            yield ': keep-alive\n\n'
+            last_sent = time.time()
+        if not lines:
+            time.sleep(config['EVENTS_POLL_INTERVAL'])
+
+
+def read_lines(path, offset, limit=65536):
+    """Return the complete lines of a file after an offset, each with the
+    offset it ends at, and the offset to read from next."""
+    try:
+        with open(path, 'rb') as stream:
+            stream.seek(offset)
+            data = stream.read(limit)
+            # Finish the last line, however long it is.
+            if len(data) == limit:
+                data += stream.readline()
+    except IOError:
+        return [], offset
+    lines = []
+    for line in data.split('\n')[:-1]:
+        offset += len(line) + 1
+        lines.append((line, offset))
+    return lines, offset
+
+
+def process_exists(pid):
+    # os.kill would terminate the process on Windows.
+    if os.name == 'nt':
+        return True
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno == errno.EPERM
+    return True
@@ -1,11 +1,86 @@
+import json
 from flask.ext.wtf import Form
 from wtforms import StringField, TextAreaField, BooleanField, SelectField,\
-    SubmitField
-from wtforms.validators import Required, Length, Email, Regexp
+    IntegerField, SubmitField
+from wtforms.validators import Required, Length, NumberRange, Optional
 from wtforms import ValidationError
+from ..jobs import check_config
+
+EXAMPLE_MODULES = '''[
+    {
+        "name": "Test1",
+        "parameters": [
+            {"par1": "Hello, world!"},
+            {"par2": 42}
+        ]
+    }
+]'''
+
 
 class GenerateConfiguration(Form):
-    name = StringField('Real name', validators=[Length(0, 64)])
-    location = StringField('Location', validators=[Length(0, 64)])
-    about_me = TextAreaField('About me')
-    submit = SubmitField('Submit')
+    name = StringField('Job name', validators=[Required(), Length(1, 64)])
+    module_list = TextAreaField(
+        'Modules', validators=[Required()], default=EXAMPLE_MODULES,
+        description='A JSON list of modules, each with a name and a list '
+                    'of parameters.')
+    additional_paths = TextAreaField(
+        'Additional module paths',
+        description='One directory per line.')
+    log_file = StringField(
+        'Log file', validators=[Required(), Length(1, 256)],
+        default='logs/$(DATE)_$(TIME)_bitCollector',
+        description='Relative paths are relative to the job\'s directory.')
+    logging_format = SelectField(
+        'Logging format', default='html',
+        choices=[(f, f) for f in ('csv', 'html', 'jsonl', 'bin')])
+    logging_level = SelectField(
+        'Logging level', default='info',
+        choices=[(l, l) for l in ('debug', 'info', 'warning', 'error',
+                                  'critical')])
+    log_to_file = BooleanField('Log to file', default=True)
+    log_to_stdout = BooleanField('Log to the job output', default=True)
+    max_concurrency = IntegerField(
+        'Concurrent modules', default=1,
+        validators=[Optional(), NumberRange(1, 256)])
+    run_timeout = IntegerField(
+        'Run timeout (seconds)', default=0,
+        validators=[Optional(), NumberRange(0)],
+        description='0 for no limit.')
+    submit = SubmitField('Queue run')
+
+    def validate_module_list(self, field):
+        try:
+            self.modules = json.loads(field.data)
+        except ValueError as e:
+            raise ValidationError('Not valid JSON: %s' % e)
+        if not isinstance(self.modules, list):
+            raise ValidationError('Expected a JSON list of modules.')
+
+    def validate(self):
+        if not Form.validate(self):
+            return False
+        errors, self.warnings = check_config(self.to_config())
+        self.module_list.errors.extend(errors)
+        return not errors
+
+    def to_config(self):
+        config = {
+            'module_list': self.modules,
+            'additional_paths': [{'path': path.strip()} for path in
+                                 self.additional_paths.data.splitlines()
+                                 if path.strip()],
+            'log_file': self.log_file.data,
+            'logging_format': self.logging_format.data,
+            'logging_level': self.logging_level.data,
+            'log_to_file': int(self.log_to_file.data),
+            'log_to_stdout': int(self.log_to_stdout.data)
+        }
+        if self.max_concurrency.data is not None:
+            config['max_concurrency'] = self.max_concurrency.data
+        if self.run_timeout.data:
+            config['run_timeout'] = self.run_timeout.data
+        return config
+
+
+class CancelJob(Form):
+    submit = SubmitField('Cancel')
@@ -1,11 +1,67 @@
+import json
+import os
 from flask import render_template, redirect, url_for, abort, flash, request,\
-    current_app, make_response
+    current_app, make_response, Response, stream_with_context
 from . import main
-from .forms import GenerateConfiguration
+from .forms import GenerateConfiguration, CancelJob
+from .. import db, job_queue
+from ..jobs import stream_events
+from ..models import Job
 
 @main.route('/', methods=['GET', 'POST'])
 def index():
     form = GenerateConfiguration()
     if form.validate_on_submit():
-        print("Hey look at that!")
+        job = Job(name=form.name.data,
+                  config=json.dumps(form.to_config(), indent=4),
+                  submitted_by=request.remote_addr)
+        db.session.add(job)
+        db.session.commit()
+        job_queue.wake()
+        for warning in form.warnings:
+            flash(warning)
+        flash('Queued job %d.' % job.id)
+        return redirect(url_for('.job', id=job.id))
+    if not form.is_submitted():
+        form.additional_paths.data = os.path.normpath(os.path.join(
+            current_app.config['FRAMEWORK_PATH'], os.pardir, 'Modules'))
     return render_template('index.html', form=form)
+
+
+@main.route('/jobs')
+def jobs():
+    page = request.args.get('page', 1, type=int)
+    pagination = Job.query.order_by(Job.id.desc()).paginate(
+        page, per_page=current_app.config['JOBS_PER_PAGE'], error_out=False)
+    return render_template('jobs.html', jobs=pagination.items,
+                           pagination=pagination)
+
+
+@main.route('/jobs/<int:id>')
+def job(id):
+    job = Job.query.get_or_404(id)
+    return render_template('job.html', job=job, form=CancelJob(),
+                           output=job.read_output())
+
+
+@main.route('/jobs/<int:id>/events')
+def job_events(id):
+    job = Job.query.get_or_404(id)
+    offset = request.headers.get('Last-Event-ID', 0, type=int)
+    return Response(stream_with_context(stream_events(job.id, job.progress_path,
+                                                      offset)),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache',
+                             'X-Accel-Buffering': 'no'})
+
+
+@main.route('/jobs/<int:id>/cancel', methods=['POST'])
+def cancel_job(id):
+    job = Job.query.get_or_404(id)
+    if CancelJob().validate_on_submit():
+        if job.cancel():
+            flash('Cancelled job %d.' % job.id)
+        else:
+            flash('Job %d has already finished.' % job.id)
+        db.session.commit()
+    return redirect(url_for('.job', id=id))
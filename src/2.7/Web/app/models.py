@@ -0,0 +1,106 @@
+import json
+import os
+from datetime import datetime
+from flask import current_app, url_for
+from .exceptions import ValidationError
+from .jobs import check_config
+from . import db
+
+
+class Job(db.Model):
+    __tablename__ = 'jobs'
+    STATES = ('queued', 'running', 'done', 'failed', 'cancelled')
+    FINISHED_STATES = ('done', 'failed', 'cancelled')
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(64))
+    config = db.Column(db.Text)
+    state = db.Column(db.String(16), index=True, default='queued')
+    submitted_by = db.Column(db.String(64))
+    worker = db.Column(db.String(128))
+    pid = db.Column(db.Integer)
+    return_code = db.Column(db.Integer)
+    error = db.Column(db.Text)
+    cancel_requested = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, index=True, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    @property
+    def finished(self):
+        return self.state in Job.FINISHED_STATES
+
+    @property
+    def directory(self):
+        return os.path.join(current_app.config['JOB_DIRECTORY'], str(self.id))
+
+    @property
+    def config_path(self):
+        return os.path.join(self.directory, 'config.json')
+
+    @property
+    def output_path(self):
+        return os.path.join(self.directory, 'output.txt')
+
+    @property
+    def progress_path(self):
+        return os.path.join(self.directory, 'progress.jsonl')
+
+    def read_output(self, limit=65536):
+        """Return the end of what the run printed."""
+        try:
+            with open(self.output_path, 'rb') as output:
+                output.seek(0, os.SEEK_END)
+                output.seek(max(0, output.tell() - limit))
+                return output.read().decode('utf-8', 'replace')
+        except IOError:
+            return u''
+
+    def cancel(self):
+        """Cancel a queued job, or ask the worker running it to stop it.
+
+        The state is changed in a single UPDATE, so a worker can't claim the
+        job in between. Returns False if the job has already finished."""
+        if Job.query.filter_by(id=self.id, state='queued').update(
+                {'state': 'cancelled', 'finished_at': datetime.utcnow()},
+                synchronize_session=False):
+            return True
+        return Job.query.filter_by(id=self.id, state='running').update(
+            {'cancel_requested': True}, synchronize_session=False) > 0
+
+    def to_json(self):
+        def timestamp(value):
+            return value.isoformat() + 'Z' if value else None
+        json_job = {
+            'url': url_for('api.get_job', id=self.id, _external=True),
+            'id': self.id,
+            'name': self.name,
+            'state': self.state,
+            'submitted_by': self.submitted_by,
+            'return_code': self.return_code,
+            'error': self.error,
+            'cancel_requested': bool(self.cancel_requested),
+            'created_at': timestamp(self.created_at),
+            'started_at': timestamp(self.started_at),
+            'finished_at': timestamp(self.finished_at),
+            'config': json.loads(self.config)
+        }
+        return json_job
+
+    @staticmethod
+    def from_json(json_job):
+        if not isinstance(json_job, dict):
+            raise ValidationError('job is not a JSON object')
+        name = json_job.get('name')
+        config = json_job.get('config')
+        if not isinstance(name, basestring) or not 0 < len(name) <= 64:
+            raise ValidationError('job does not have a name')
+        if not isinstance(config, dict):
+            raise ValidationError('job does not have a config')
+        errors, warnings = check_config(config)
+        if errors:
+            raise ValidationError('; '.join(errors))
+        return Job(name=name, config=json.dumps(config, indent=4))
+
+    def __repr__(self):
+        return '<Job %r>' % self.id
@@ -0,0 +1,133 @@
+// Live run dashboard of the job page.
+// The progress events of the run are streamed from the job's events URL
+// with server-sent events, and applied to the page as they arrive.
+$(function() {
+    var dashboard = $('.dashboard');
+    if (!dashboard.length || !window.EventSource) {
+        return;
+    }
+
+    var MAX_WARNINGS = 20;
+    var modules = {};
+    var runStart = null;
+
+    function formatBytes(bytes) {
+        var units = ['B', 'KB', 'MB', 'GB', 'TB'];
+        var unit = 0;
+        while (bytes >= 1024 && unit < units.length - 1) {
+            bytes /= 1024;
+            unit++;
+        }
+        return (unit ? bytes.toFixed(1) : bytes) + ' ' + units[unit];
+    }
+
+    function formatSeconds(seconds) {
+        return seconds == null ? '' : seconds.toFixed(1) + ' s';
+    }
+
+    function moduleRow(module) {
+        if (!modules[module.index]) {
+            var row = $('<tr>');
+            $.each(['index', 'name', 'executor', 'state', 'elapsed', 'files',
+                    'bytes', 'files_rate', 'bytes_rate'], function(i, column) {
+                row.append($('<td>').addClass('module-' + column.replace('_', '-')));
+            });
+            row.find('.module-index').text(module.index);
+            row.find('.module-name').text(module.name);
+            row.find('.module-executor').text(module.executor || '');
+            modules[module.index] = {row: row, start: null};
+            var rows = $('#modules tr');
+            var before = rows.filter(function() {
+                return +$(this).find('.module-index').text() > module.index;
+            }).first();
+            before.length ? before.before(row) : $('#modules').append(row);
+        }
+        return modules[module.index];
+    }
+
+    function setState(module, state) {
+        module.row.find('.module-state').html(
+            $('<span class="label">').addClass('job-' + {
+                pending: 'queued', running: 'running', finished: 'done',
+                failed: 'failed', abandoned: 'failed', skipped: 'cancelled'
+            }[state]).text(state));
+    }
+
+    function setCounters(row, counters) {
+        row.find('.module-files').text(counters.files);
+        row.find('.module-bytes').text(formatBytes(counters.bytes));
+        row.find('.module-files-rate').text(
+            counters.files_rate == null ? '' : counters.files_rate.toFixed(1));
+        row.find('.module-bytes-rate').text(
+            counters.bytes_rate == null ? '' : formatBytes(counters.bytes_rate) + '/s');
+    }
+
+    var handlers = {
+        job: function(event) {
+            $('#job-state').attr('class', 'label job-' + event.state)
+                .text(event.state);
+        },
+        run_start: function(event) {
+            runStart = event.time;
+            $.each(event.modules, function(i, module) {
+                setState(moduleRow(module), 'pending');
+            });
+        },
+        module_start: function(event) {
+            var module = moduleRow(event);
+            module.start = event.time;
+            module.row.find('.module-executor').text(event.executor);
+            setState(module, 'running');
+        },
+        module_end: function(event) {
+            var module = moduleRow(event);
+            module.start = null;
+            setState(module, event.status);
+            module.row.find('.module-elapsed').text(formatSeconds(event.elapsed));
+            setCounters(module.row, {files: event.files, bytes: event.bytes});
+        },
+        progress: function(event) {
+            $.each(event.modules, function(i, counters) {
+                var module = modules[counters.index];
+                if (module) {
+                    setCounters(module.row, counters);
+                    if (module.start) {
+                        module.row.find('.module-elapsed').text(
+                            formatSeconds(event.time - module.start));
+                    }
+                }
+            });
+            $('#total-files').text(event.files);
+            $('#total-bytes').text(formatBytes(event.bytes));
+            $('#total-files-rate').text(event.files_rate.toFixed(1));
+            $('#total-bytes-rate').text(formatBytes(event.bytes_rate) + '/s');
+            $('#total-dropped').text(event.dropped);
+            if (runStart) {
+                $('#total-elapsed').text(formatSeconds(event.time - runStart));
+            }
+        },
+        warning: function(event) {
+            var time = new Date(event.time * 1000).toLocaleTimeString();
+            $('#warnings').prepend($('<li>').text(
+                time + ' - ' + event.thread + ' - ' + event.level + ' - ' +
+                event.message));
+            $('#warnings li').slice(MAX_WARNINGS).remove();
+        },
+        run_end: function(event) {
+            $('#total-elapsed').text(formatSeconds(event.elapsed));
+            $('#total-dropped').text(event.dropped);
+        }
+    };
+
+    var source = new EventSource(dashboard.data('events-url'));
+    source.onmessage = function(message) {
+        var event = JSON.parse(message.data);
+        if (handlers[event.type]) {
+            handlers[event.type](event);
+        }
+    };
+    // The run is over and every event has been received.
+    source.addEventListener('end', function() {
+        source.close();
+    });
+});
@@ -1,4 +1,5 @@
 import os
+import sys
 basedir = os.path.abspath(os.path.dirname(__file__))
 
 # List of os variables -
@@ -11,6 +12,23 @@ class Config:
     APP_NAME = "BitCollector"
     SECRET_KEY = "SOME_SECRET_STRING!_THAT_ISNT_REALLY_USED!"
     SSL_DISABLE = False
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    JOBS_PER_PAGE = 20
+
+    # Queued runs are executed by bitCollector_framework.py in a subprocess,
+    # JOB_WORKERS at a time, by the process running the workers: runserver,
+    # the worker command, or every process if JOB_START_WORKERS is set.
+    FRAMEWORK_PATH = os.environ.get('FRAMEWORK_PATH') or \
+        os.path.join(basedir, os.pardir, 'Framework')
+    JOB_PYTHON = os.environ.get('JOB_PYTHON') or sys.executable
+    JOB_DIRECTORY = os.environ.get('JOB_DIRECTORY') or \
+        os.path.join(basedir, 'jobs')
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS') or 2)
+    JOB_START_WORKERS = bool(os.environ.get('JOB_START_WORKERS'))
+    JOB_TIMEOUT = int(os.environ.get('JOB_TIMEOUT') or 0)
+    JOB_POLL_INTERVAL = 1
+    EVENTS_POLL_INTERVAL = 0.5
+    EVENTS_KEEPALIVE = 15
 
     @staticmethod
     def init_app(app):
@@ -25,6 +43,9 @@ class DevelopmentConfig(Config):
 class TestingConfig(Config):
     TESTING = True
     WTF_CSRF_ENABLED = False
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or \
+        'sqlite://'
+    JOB_WORKERS = 0
 
 config = {
     'development': DevelopmentConfig,
@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 import os
+import time
 COV = None
 if os.environ.get('FLASK_COVERAGE'):
     import coverage
@@ -13,16 +14,45 @@ if os.path.exists('.env'):
         if len(var) == 2:
             os.environ[var[0]] = var[1]
 
-from app import create_app
-from flask.ext.script import Manager, Shell
+from app import create_app, db, job_queue
+from app.models import Job
+from flask.ext.script import Manager, Shell, Server
 
 app = create_app(os.getenv('FLASK_CONFIG') or 'default')
 manager = Manager(app)
 
 def make_shell_context():
-    return dict(app=app)
+    return dict(app=app, db=db, Job=Job)
+
+
+class JobServer(Server):
+    """The development server, along with the job workers.
+
+    With the reloader, the workers run in the process which restarts the
+    server, so reloading the code doesn't orphan the running jobs."""
+
+    def __call__(self, app, *args, **kwargs):
+        if not app.config['JOB_START_WORKERS'] and \
+                os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+            job_queue.start()
+        Server.__call__(self, app, *args, **kwargs)
+
 
 manager.add_command("shell", Shell(make_context=make_shell_context))
+# Each open run dashboard holds a request thread.
+manager.add_command("runserver", JobServer(threaded=True))
+
+
+@manager.command
+def worker():
+    """Run the queued jobs without serving requests."""
+    job_queue.start()
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        pass
+
 
 @manager.command
 def test(coverage=False):
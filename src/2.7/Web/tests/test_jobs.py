@@ -0,0 +1,134 @@
+import json
+import shutil
+import socket
+import subprocess
+import tempfile
+import unittest
+from app import create_app, db, job_queue
+from app.models import Job
+
+
+def make_config(**settings):
+    config = {
+        'module_list': [],
+        'additional_paths': [],
+        'log_file': 'logs/$(DATE)_$(TIME)_test',
+        'logging_format': 'jsonl',
+        'logging_level': 'info',
+        'log_to_file': 0,
+        'log_to_stdout': 1
+    }
+    config.update(settings)
+    return config
+
+
+class JobsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['JOB_DIRECTORY'] = tempfile.mkdtemp()
+        self.app.config['JOB_POLL_INTERVAL'] = 0.1
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        shutil.rmtree(self.app.config['JOB_DIRECTORY'])
+
+    def post_job(self, json_job):
+        return self.client.post('/api/v1.0/jobs/', data=json.dumps(json_job),
+                                content_type='application/json')
+
+    def test_new_job(self):
+        response = self.post_job({'name': 'test', 'config': make_config()})
+        self.assertTrue(response.status_code == 201)
+        json_response = json.loads(response.data.decode('utf-8'))
+        self.assertTrue(json_response['state'] == 'queued')
+        self.assertTrue(response.headers['Location'] == json_response['url'])
+        self.assertTrue(Job.query.count() == 1)
+
+    def test_invalid_config(self):
+        config = make_config(log_to_file=2)
+        del config['log_file']
+        response = self.post_job({'name': 'test', 'config': config})
+        self.assertTrue(response.status_code == 400)
+        message = json.loads(response.data.decode('utf-8'))['message']
+        self.assertTrue('log_to_file' in message)
+        self.assertTrue('log_file' in message)
+        self.assertTrue(Job.query.count() == 0)
+
+    def test_generate_configuration(self):
+        response = self.client.post('/', data={
+            'name': 'generated',
+            'module_list': '[{"name": "Test1", "parameters": []}]',
+            'additional_paths': '/tmp/modules\n\n',
+            'log_file': 'logs/run',
+            'logging_format': 'csv',
+            'logging_level': 'debug',
+            'log_to_file': 'y',
+            'max_concurrency': '2'})
+        self.assertTrue(response.status_code == 302)
+        config = json.loads(Job.query.one().config)
+        self.assertTrue(config['additional_paths'] == [{'path': '/tmp/modules'}])
+        self.assertTrue(config['log_to_file'] == 1)
+        self.assertTrue(config['log_to_stdout'] == 0)
+        self.assertTrue(config['max_concurrency'] == 2)
+
+    def test_run_job(self):
+        self.post_job({'name': 'test', 'config': make_config()})
+        self.assertTrue(job_queue.run_next())
+        self.assertFalse(job_queue.run_next())
+        job = Job.query.one()
+        self.assertTrue(job.state == 'done')
+        self.assertTrue(job.return_code == 0)
+        self.assertTrue(job.started_at is not None)
+        self.assertTrue(job.finished_at is not None)
+        with open(job.progress_path) as progress:
+            events = [json.loads(line)['type'] for line in progress]
+        self.assertTrue(events[0] == 'run_start')
+        self.assertTrue(events[-1] == 'run_end')
+
+    def test_job_events(self):
+        self.post_job({'name': 'test', 'config': make_config()})
+        job_queue.run_next()
+        response = self.client.get('/jobs/1/events')
+        self.assertTrue(response.mimetype == 'text/event-stream')
+        messages = response.data.decode('utf-8').split('\n\n')[:-1]
+        self.assertTrue(json.loads(messages[0][len('data: '):]) ==
+                        {'type': 'job', 'state': 'done'})
+        self.assertTrue(messages[-1] == 'event: end\ndata: {}')
+        last_id, data = messages[-2].split('\n')
+        self.assertTrue(json.loads(data[len('data: '):])['type'] == 'run_end')
+
+        # A browser which reconnects only gets the events it hasn't seen.
+        response = self.client.get('/jobs/1/events', headers={
+            'Last-Event-ID': last_id[len('id: '):]})
+        messages = response.data.decode('utf-8').split('\n\n')[:-1]
+        self.assertTrue(len(messages) == 2)
+        self.assertTrue(messages[-1] == 'event: end\ndata: {}')
+
+    def test_cancel_queued_job(self):
+        self.post_job({'name': 'test', 'config': make_config()})
+        response = self.client.post('/api/v1.0/jobs/1/cancel')
+        self.assertTrue(response.status_code == 200)
+        self.assertTrue(Job.query.get(1).state == 'cancelled')
+        self.assertFalse(job_queue.run_next())
+        response = self.client.post('/api/v1.0/jobs/1/cancel')
+        self.assertTrue(response.status_code == 400)
+
+    def test_orphans_failed_by_workers(self):
+        exited = subprocess.Popen(['true'])
+        exited.wait()
+        db.session.add(Job(name='orphan', config='{}', state='running',
+                           worker='%s:%d' % (socket.gethostname(),
+                                             exited.pid)))
+        db.session.commit()
+
+        # Creating the app, as manage.py shell does, leaves the jobs alone.
+        job_queue.init_app(self.app)
+        self.assertTrue(Job.query.get(1).state == 'running')
+        job_queue.start()
+        self.assertTrue(Job.query.get(1).state == 'failed')